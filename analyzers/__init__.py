@@ -1,7 +1,35 @@
 """Модуль для анализа данных использования Cursor."""
 
+from importlib import import_module
 from .csv_analyzer import CSVAnalyzer
+from .event_table import EventTable, UsageEvent
 from .cost_calculator import CostCalculator
 
-__all__ = ['CSVAnalyzer', 'CostCalculator', 'CursorPlansComparator']
+# Остальные классы импортируются при первом обращении: --stats-only
+# не должен платить за хранилище, выборку, экспорт и таймлайны
+_LAZY = {
+    'TimelineCube': 'timeline', 'WorkCalendar': 'timeline',
+    'TimelinePyramid': 'timeline_pyramid',
+    'UsageStore': 'usage_store',
+    'UsageQuery': 'usage_query', 'EventColumns': 'usage_query',
+    'is_columnar': 'columnar_io', 'export_usage': 'columnar_io', 'read_event_table': 'columnar_io',
+    'SpikeDetector': 'spike_detector', 'SpikeNotifier': 'spike_detector',
+    'BurnRateProjector': 'burn_rate',
+    'SessionTable': 'sessions',
+    'CacheEfficiency': 'cache_efficiency',
+    'BlockSample': 'sampling',
+}
 
+
+def __getattr__(name):
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(f'.{_LAZY[name]}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+__all__ = ['CSVAnalyzer', 'EventTable', 'UsageEvent', 'CostCalculator', 'TimelineCube', 'WorkCalendar', 'TimelinePyramid',
+           'UsageStore', 'UsageQuery', 'EventColumns', 'is_columnar', 'export_usage', 'read_event_table',
+           'SpikeDetector', 'SpikeNotifier', 'BurnRateProjector', 'SessionTable', 'CacheEfficiency', 'BlockSample',
+           'CursorPlansComparator']
@@ -0,0 +1,144 @@
+"""Статистики box plot, рассчитанные без построения всех точек."""
+
+import numpy as np
+
+
+def compute_box_stats(costs, label, whis=1.5, max_fliers=200, presorted=False):
+    """
+    Рассчитывает статистики box plot в формате matplotlib `bxp`.
+
+    Квартили находятся через np.partition (O(n) вместо полной сортировки),
+    выбросы передаются ограниченной выборкой: минимум, максимум и
+    равномерно распределенные по рангу промежуточные значения. Так
+    считается разовый анализ. Для уже отсортированных стоимостей (их
+    держит режим --watch) квартили берутся по индексу, а усы и выбросы -
+    бинарным поиском, без прохода по всем значениям.
+
+    Args:
+        costs: Стоимости запросов (list, array('d') или np.ndarray)
+        label: Подпись бокса (название модели)
+        whis: Длина усов в межквартильных размахах
+        max_fliers: Максимальное количество выбросов для отрисовки
+        presorted: costs отсортированы по возрастанию
+
+    Returns:
+        dict: med, q1, q3, mean, whislo, whishi, cilo, cihi, fliers, n, label
+    """
+    values = np.asarray(costs, dtype=float)
+    n = len(values)
+    if n == 0:
+        return None
+
+    if presorted:
+        q1, med, q3 = sorted_quantiles(values, (0.25, 0.5, 0.75))
+    else:
+        q1, med, q3 = partition_quantiles(values, (0.25, 0.5, 0.75))
+    iqr = q3 - q1
+
+    low_bound = q1 - whis * iqr
+    high_bound = q3 + whis * iqr
+    if presorted:
+        lo = np.searchsorted(values, low_bound, side='left')
+        hi = np.searchsorted(values, high_bound, side='right')
+        whislo = values[lo] if lo < hi else q1
+        whishi = values[hi - 1] if lo < hi else q3
+        fliers = np.concatenate((values[:np.searchsorted(values, whislo, side='left')],
+                                 values[np.searchsorted(values, whishi, side='right'):]))
+    else:
+        inside = values[(values >= low_bound) & (values <= high_bound)]
+        whislo = inside.min() if len(inside) else q1
+        whishi = inside.max() if len(inside) else q3
+        fliers = values[(values < whislo) | (values > whishi)]
+    if len(fliers) > max_fliers:
+        if not presorted:
+            fliers = np.sort(fliers)
+        fliers = fliers[np.linspace(0, len(fliers) - 1, max_fliers).astype(int)]
+
+    # Доверительный интервал медианы для вырезов (как в matplotlib.cbook.boxplot_stats)
+    notch = 1.57 * iqr / np.sqrt(n)
+
+    return {
+        'label': label,
+        'n': n,
+        'mean': float(values.mean()),
+        'med': med,
+        'q1': q1,
+        'q3': q3,
+        'whislo': float(whislo),
+        'whishi': float(whishi),
+        'cilo': med - notch,
+        'cihi': med + notch,
+        'fliers': fliers,
+    }
+
+
+def sorted_quantiles(values, quantiles):
+    """Квантили отсортированного массива с линейной интерполяцией (как np.percentile)."""
+    result = []
+    for q in quantiles:
+        p = (len(values) - 1) * q
+        lo, hi = int(np.floor(p)), int(np.ceil(p))
+        result.append(float(values[lo] + (values[hi] - values[lo]) * (p - lo)))
+    return result
+
+
+def partition_quantiles(values, quantiles):
+    """Квантили с линейной интерполяцией (как np.percentile) через np.partition."""
+    positions = [(len(values) - 1) * q for q in quantiles]
+    kth = sorted({int(np.floor(p)) for p in positions} | {int(np.ceil(p)) for p in positions})
+    part = np.partition(values, kth)
+
+    result = []
+    for p in positions:
+        lo, hi = int(np.floor(p)), int(np.ceil(p))
+        result.append(float(part[lo] + (part[hi] - part[lo]) * (p - lo)))
+    return result
+
+
+def compute_sketch_box_stats(sketch, label, whis=1.5, max_fliers=200):
+    """
+    Рассчитывает приближенные статистики box plot по квантильному скетчу.
+
+    Квартили берутся из скетча, среднее и крайние значения - точные
+    (скетч хранит сумму, минимум и максимум). Усы и выбросы определяются
+    по сохраненной скетчем выборке.
+
+    Args:
+        sketch: KLLSketch со стоимостями запросов
+        label: Подпись бокса (название модели)
+        whis: Длина усов в межквартильных размахах
+        max_fliers: Максимальное количество выбросов для отрисовки
+
+    Returns:
+        dict: Те же поля, что и compute_box_stats
+    """
+    if sketch.n == 0:
+        return None
+
+    q1, med, q3 = sketch.quantiles((0.25, 0.5, 0.75))
+    iqr = q3 - q1
+
+    sample = np.append(sketch.items(), [sketch.min, sketch.max])
+    inside = sample[(sample >= q1 - whis * iqr) & (sample <= q3 + whis * iqr)]
+    whislo = inside.min() if len(inside) else q1
+    whishi = inside.max() if len(inside) else q3
+
+    fliers = np.unique(sample[(sample < whislo) | (sample > whishi)])
+    if len(fliers) > max_fliers:
+        fliers = fliers[np.linspace(0, len(fliers) - 1, max_fliers).astype(int)]
+
+    notch = 1.57 * iqr / np.sqrt(sketch.n)
+
+    return {
+        'label': label,
+        'n': sketch.n,
+        'mean': sketch.total / sketch.n,
+        'med': med,
+        'q1': q1,
+        'q3': q3,
+        'whislo': float(whislo),
+        'whishi': float(whishi),
+        'cilo': med - notch,
+        'cihi': med + notch,
+        'fliers': fliers,
+    }
@@ -0,0 +1,176 @@
+"""Прогноз расходов на платежный цикл и проверка бюджетов."""
+
+from datetime import datetime
+import numpy as np
+from config import BUDGETS
+
+
+# Часов в неделе: сезонный профиль - коэффициент для каждого часа недели
+WEEK_HOURS = 7 * 24
+
+
+class BurnRateProjector:
+    """
+    Прогнозирует расходы на конец платежного цикла по почасовым агрегатам.
+
+    Прогноз = потрачено с начала цикла + уровень последних trend_days дней
+    × сумма сезонных коэффициентов оставшихся часов цикла. Коэффициенты -
+    средняя стоимость часа недели (день недели × час, как на хитмапе
+    стоимости), деленная на среднюю по всем часам недели: ночью и в
+    выходные расходуется меньше, в рабочие часы - больше.
+
+    Считается по агрегату 'hourly_cost_by_model_full' (сотни-тысячи часов),
+    события не перебираются. В режиме --watch агрегат дополняется на месте,
+    а пересчет прогноза стоит O(часов), поэтому его можно повторять хоть
+    каждую минуту.
+    """
+
+    def __init__(self, team_budget=None, model_budgets=None, cycle_start_day=None,
+                 trend_days=None, warn_ratio=None):
+        """
+        Инициализирует прогноз (значения по умолчанию - из BUDGETS).
+
+        Args:
+            team_budget: Бюджет команды (всего экспорта) на цикл, $
+            model_budgets: Бюджеты моделей на цикл {модель: $}
+            cycle_start_day: День месяца начала цикла (1-28)
+            trend_days: Дней для текущего уровня расходов
+            warn_ratio: Доля бюджета, с которой прогноз - предупреждение
+        """
+        self.team_budget = team_budget if team_budget is not None else BUDGETS['team']
+        self.model_budgets = model_budgets if model_budgets is not None else BUDGETS['models']
+        self.cycle_start_day = cycle_start_day or BUDGETS['cycle_start_day']
+        self.trend_days = trend_days or BUDGETS['trend_days']
+        self.warn_ratio = warn_ratio or BUDGETS['warn_ratio']
+        if not 1 <= self.cycle_start_day <= 28:
+            raise ValueError(f"cycle_start_day: {self.cycle_start_day} (ожидается 1-28)")
+
+    def cycle_bounds(self, moment):
+        """
+        Платежный цикл, в который попадает moment.
+
+        Returns:
+            tuple: (начало, конец) - naive datetime UTC+7
+        """
+        start = moment.replace(day=self.cycle_start_day, hour=0, minute=0, second=0, microsecond=0)
+        if start > moment:
+            start = self._shift_month(start, -1)
+        return start, self._shift_month(start, 1)
+
+    def project(self, hourly_cost_by_model, as_of=None, since=None):
+        """
+        Прогноз на конец цикла для команды и каждой модели.
+
+        Args:
+            hourly_cost_by_model: {'YYYY-MM-DD HH:00': {модель: стоимость}}
+            as_of: Момент прогноза (naive datetime UTC+7); час as_of считается
+                прошедшим. None - конец последнего часа с данными
+                (экспорт отстает от реального времени)
+            since: С какого момента агрегат полный (начало периода анализа)
+
+        Returns:
+            dict | None: Цикл, уровень расходов и записи 'team' и 'models'
+                ({'spent', 'projected', 'budget', 'ratio', 'status', 'exhausted_at'});
+                None, если данных нет или агрегат не покрывает цикл и окно тренда
+        """
+        if not hourly_cost_by_model:
+            return None
+
+        hours = np.array(list(hourly_cost_by_model), dtype='datetime64[h]').astype(np.int64)
+        models = sorted({model for costs in hourly_cost_by_model.values() for model in costs}
+                        | set(self.model_budgets))
+        index = {model: i for i, model in enumerate(models)}
+        costs = np.zeros((len(hours), len(models)))
+        for row, hour_costs in enumerate(hourly_cost_by_model.values()):
+            for model, cost in hour_costs.items():
+                costs[row, index[model]] += cost
+
+        end = int(hours.max()) + 1 if as_of is None else self._hour(as_of) + 1
+        cycle_start, cycle_end = self.cycle_bounds(self._datetime(end - 1))
+        cycle_start, cycle_end = self._hour(cycle_start), self._hour(cycle_end)
+        first = int(hours.min())
+        trend_start = max(end - self.trend_days * 24, first)
+        if since is not None and self._hour(since) > min(cycle_start, trend_start):
+            return None
+
+        past = hours < end
+        profile = self._profile(hours[past], costs[past].sum(axis=1), first, end)
+        in_trend = (hours >= trend_start) & (hours < end)
+        trend_cost = costs[in_trend].sum(axis=0)
+        # Уровень: стоимость "среднего" часа без сезонности
+        level = trend_cost / max(profile[self._cells(np.arange(trend_start, end))].sum(), 1e-9)
+        remaining = np.cumsum(profile[self._cells(np.arange(end, cycle_end))])
+        spent = costs[(hours >= cycle_start) & (hours < end)].sum(axis=0)
+
+        return {
+            'cycle_start': self._format(cycle_start),
+            'cycle_end': self._format(cycle_end),
+            'as_of': self._format(end),
+            'elapsed': (end - cycle_start) / (cycle_end - cycle_start),
+            'daily_rate': float(trend_cost.sum()) * 24 / max(end - trend_start, 1),
+            'team': self._entry(spent.sum(), level.sum(), remaining, end, self.team_budget),
+            'models': {
+                model: self._entry(spent[i], level[i], remaining, end, self.model_budgets.get(model))
+                for i, model in enumerate(models)
+                if spent[i] > 0 or level[i] > 0 or model in self.model_budgets
+            },
+        }
+
+    def _entry(self, spent, level, remaining, end, budget):
+        """Прогноз и статус бюджета одной записи."""
+        spent, level = float(spent), float(level)
+        projected = spent + level * (float(remaining[-1]) if len(remaining) else 0.0)
+        entry = {'spent': spent, 'projected': projected, 'budget': budget,
+                 'ratio': None, 'status': None, 'exhausted_at': None}
+        if not budget:
+            return entry
+
+        entry['ratio'] = projected / budget
+        if spent >= budget:
+            entry['status'] = 'exceeded'
+        elif projected > budget:
+            entry['status'] = 'over'
+            # Конец часа, в котором накопленный прогноз достигнет бюджета
+            hour = int(np.searchsorted(spent + level * remaining, budget))
+            entry['exhausted_at'] = self._format(end + hour + 1)
+        elif entry['ratio'] >= self.warn_ratio:
+            entry['status'] = 'warning'
+        else:
+            entry['status'] = 'ok'
+        return entry
+
+    def _profile(self, hours, totals, first, end):
+        """Сезонные коэффициенты часов недели (среднее по неделе - 1)."""
+        weekly = np.bincount(self._cells(hours), weights=totals, minlength=WEEK_HOURS)
+        # Час недели мог встретиться в данных разное число раз
+        occurrences = np.bincount(self._cells(np.arange(first, end)), minlength=WEEK_HOURS)
+        mean_cost = weekly / np.maximum(occurrences, 1)
+        if mean_cost.sum() <= 0:
+            return np.ones(WEEK_HOURS)
+        return mean_cost / mean_cost.mean()
+
+    @staticmethod
+    def _cells(hours):
+        """Час недели (понедельник 00:00 = 0) для часов от эпохи."""
+        return ((hours // 24 + 3) % 7) * 24 + hours % 24
+
+    @staticmethod
+    def _hour(moment):
+        """naive datetime в целые часы от эпохи (с округлением вниз)."""
+        return int(np.datetime64(moment, 'h').astype(np.int64))
+
+    @staticmethod
+    def _datetime(hour):
+        """Часы от эпохи в naive datetime."""
+        return np.datetime64(hour, 'h').astype('datetime64[s]').astype(datetime)
+
+    @classmethod
+    def _format(cls, hour):
+        """Часы от эпохи в строку 'YYYY-MM-DD HH:MM'."""
+        return cls._datetime(hour).strftime('%Y-%m-%d %H:%M')
+
+    @staticmethod
+    def _shift_month(moment, months):
+        """Сдвигает дату на months месяцев (день месяца не больше 28)."""
+        month = moment.month - 1 + months
+        return moment.replace(year=moment.year + month // 12, month=month % 12 + 1)
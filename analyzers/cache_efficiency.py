@@ -0,0 +1,201 @@
+"""Эффективность кэша промптов по моделям, дням и сессиям."""
+
+import numpy as np
+from config import CACHE_EFFICIENCY
+from .cost_calculator import CostCalculator
+from .usage_store import to_store_seconds
+
+
+PAID_KINDS = ('Included', 'On-Demand')
+
+# Колонки, которые суммируются по группам (модель, день, сессия)
+TOTAL_COLUMNS = ('prompt_tokens', 'cache_read', 'cache_write', 'cached_cost', 'uncached_cost')
+
+
+class CacheEfficiency:
+    """
+    Hit ratio, write amplification и сэкономленная кэшем стоимость.
+
+    Стоимость каждого запроса считается дважды по MODEL_PRICING -
+    как есть и так, будто все токены промпта пришли без кэша, - через
+    CostCalculator.calculate_costs массивами по каждой модели. Дальше
+    любые группировки - bincount по кодам группы, без цикла по строкам.
+    Учитываются запросы Included и On-Demand.
+    """
+
+    def __init__(self, columns, since=None, until=None):
+        """
+        Считает стоимости запросов периода.
+
+        Args:
+            columns: EventColumns, отсортированные по времени
+            since: Начало периода (naive datetime UTC+7)
+            until: Конец периода (не включительно)
+        """
+        ts = columns.ts
+        lo = 0 if since is None else int(np.searchsorted(ts, to_store_seconds(since)))
+        hi = len(ts) if until is None else int(np.searchsorted(ts, to_store_seconds(until)))
+        self.models = columns.models
+        self.offset = lo
+
+        values = {name: columns.values[name][lo:hi].astype(np.float64)
+                  for name in ('input_tokens', 'output_tokens', 'cache_read', 'cache_write')}
+        self.paid = np.isin(columns.kind_codes[lo:hi], [i for i, kind in enumerate(columns.kinds) if kind in PAID_KINDS])
+        self.ts = ts[lo:hi]
+        self.model_codes = columns.model_codes[lo:hi]
+
+        # input включает запись в кэш; без кэша весь промпт - обычный input
+        fresh_input = values['input_tokens'] - values['cache_write']
+        prompt = values['input_tokens'] + values['cache_read']
+        cached_cost = np.zeros(len(prompt))
+        uncached_cost = np.zeros(len(prompt))
+        for code in np.unique(self.model_codes[self.paid]):
+            rows = self.paid & (self.model_codes == code)
+            model = self.models[code]
+            cached_cost[rows] = CostCalculator.calculate_costs(
+                model, fresh_input[rows], values['output_tokens'][rows],
+                values['cache_read'][rows], values['cache_write'][rows])
+            uncached_cost[rows] = CostCalculator.calculate_costs(
+                model, prompt[rows], values['output_tokens'][rows], 0, 0)
+
+        self.columns = {
+            'prompt_tokens': np.where(self.paid, prompt, 0.0),
+            'cache_read': np.where(self.paid, values['cache_read'], 0.0),
+            'cache_write': np.where(self.paid, values['cache_write'], 0.0),
+            'cached_cost': cached_cost,
+            'uncached_cost': uncached_cost,
+        }
+
+    def totals(self):
+        """Показатели по всем запросам периода."""
+        return self._stats({name: column.sum() for name, column in self.columns.items()},
+                           int(self.paid.sum()))
+
+    def by_model(self):
+        """
+        Показатели по моделям.
+
+        Returns:
+            dict: {модель: показатели} (см. _stats), только модели с запросами
+        """
+        totals = self._group(self.model_codes, len(self.models))
+        return {model: self._row(totals, i) for i, model in enumerate(self.models) if totals['requests'][i]}
+
+    def by_day(self):
+        """
+        Показатели по дням (UTC+7).
+
+        Returns:
+            dict: 'days' и списки 'hit_ratio', 'cost_avoided', 'uncached_cost', 'cached_cost'
+        """
+        if len(self.ts) == 0:
+            return {'days': [], 'hit_ratio': [], 'cost_avoided': [], 'uncached_cost': [], 'cached_cost': []}
+        days = self.ts // 86400
+        first = int(days[0])
+        totals = self._group(days - first, int(days[-1]) - first + 1)
+        rows = [self._row(totals, i) for i in range(len(totals['requests']))]
+        return {
+            'days': [str(np.datetime64(first + i, 'D')) for i in range(len(rows))],
+            'hit_ratio': [row['hit_ratio'] for row in rows],
+            'cost_avoided': [row['cost_avoided'] for row in rows],
+            'uncached_cost': [row['uncached_cost'] for row in rows],
+            'cached_cost': [row['cached_cost'] for row in rows],
+        }
+
+    def poor_sessions(self, sessions, limit=None):
+        """
+        Сессии, плохо использующие кэш (правило то же, что в poor_reuse).
+
+        Показатели всех сессий считаются массивами, словари строятся
+        только для отобранных.
+
+        Args:
+            sessions: SessionTable того же периода (с rows, то есть без владельцев)
+            limit: Сколько сессий вернуть (по умолчанию CACHE_EFFICIENCY['shown'])
+
+        Returns:
+            tuple: (количество таких сессий, самые дорогие из них - показатели
+                    с 'start', 'end', 'model' и 'reasons')
+        """
+        if sessions.rows is None or len(sessions) == 0:
+            return 0, []
+        limit = CACHE_EFFICIENCY['shown'] if limit is None else limit
+
+        # Строки сессий идут подряд с sessions.rows[0]
+        session_ids = np.repeat(np.arange(len(sessions)), sessions.requests)
+        first = int(sessions.rows[0]) - self.offset
+        rows = np.zeros(len(self.ts), dtype=bool)
+        rows[first:first + len(session_ids)] = True
+        totals = self._group(session_ids, len(sessions), rows)
+
+        prompt, cache_read, cache_write = totals['prompt_tokens'], totals['cache_read'], totals['cache_write']
+        with np.errstate(divide='ignore', invalid='ignore'):
+            hit_ratio = np.where(prompt > 0, cache_read / prompt, 0.0)
+            amplification = np.where(cache_read > 0, cache_write / cache_read, np.where(cache_write > 0, np.inf, 0.0))
+        poor = (prompt >= CACHE_EFFICIENCY['min_prompt_tokens']) & (
+            (hit_ratio < CACHE_EFFICIENCY['min_hit_ratio'])
+            | (amplification > CACHE_EFFICIENCY['max_write_amplification'])
+            | (totals['uncached_cost'] < totals['cached_cost'])
+        )
+
+        flagged = np.flatnonzero(poor)
+        worst = flagged[np.argsort(-totals['cached_cost'][flagged], kind='stable')][:limit]
+        result = []
+        for i in worst:
+            stats = self._row(totals, i)
+            stats.update(start=sessions.format_time(sessions.start[i]), end=sessions.format_time(sessions.end[i]),
+                         model=sessions.models[sessions.model_codes[i]], reasons=self.poor_reuse(stats))
+            result.append(stats)
+        return len(flagged), result
+
+    @staticmethod
+    def poor_reuse(stats):
+        """
+        Причины, по которым кэш используется плохо (пустой список - все в порядке).
+
+        Args:
+            stats: Показатели модели, дня или сессии
+        """
+        if stats['prompt_tokens'] < CACHE_EFFICIENCY['min_prompt_tokens']:
+            return []
+        reasons = []
+        if stats['hit_ratio'] < CACHE_EFFICIENCY['min_hit_ratio']:
+            reasons.append('low_hit_ratio')
+        amplification = stats['write_amplification']
+        if amplification is None or amplification > CACHE_EFFICIENCY['max_write_amplification']:
+            reasons.append('write_amplification')
+        if stats['cost_avoided'] < 0:
+            reasons.append('negative_savings')
+        return reasons
+
+    def _group(self, codes, n_groups, rows=None):
+        """Суммы колонок по группам (rows - маска строк, которым соответствуют codes)."""
+        columns = self.columns if rows is None else {name: column[rows] for name, column in self.columns.items()}
+        paid = self.paid if rows is None else self.paid[rows]
+        totals = {name: np.bincount(codes, weights=column, minlength=n_groups) for name, column in columns.items()}
+        totals['requests'] = np.bincount(codes[paid], minlength=n_groups)
+        return totals
+
+    @classmethod
+    def _row(cls, totals, i):
+        """Показатели группы i."""
+        return cls._stats({name: totals[name][i] for name in TOTAL_COLUMNS}, int(totals['requests'][i]))
+
+    @staticmethod
+    def _stats(sums, requests):
+        """Показатели из сумм колонок."""
+        prompt, cache_read, cache_write = float(sums['prompt_tokens']), float(sums['cache_read']), float(sums['cache_write'])
+        cached_cost, uncached_cost = float(sums['cached_cost']), float(sums['uncached_cost'])
+        return {
+            'requests': requests,
+            'prompt_tokens': prompt,
+            'cache_read': cache_read,
+            'cache_write': cache_write,
+            'hit_ratio': cache_read / prompt if prompt else 0.0,
+            # Нет чтений - запись в кэш не окупилась ничем
+            'write_amplification': cache_write / cache_read if cache_read else (None if cache_write else 0.0),
+            'cached_cost': cached_cost,
+            'uncached_cost': uncached_cost,
+            'cost_avoided': uncached_cost - cached_cost,
+            'savings_ratio': (uncached_cost - cached_cost) / uncached_cost if uncached_cost else 0.0,
+        }
@@ -0,0 +1,208 @@
+"""Экспорт и чтение событий и агрегатов в Arrow IPC / Parquet (нужен pyarrow)."""
+
+import os
+import numpy as np
+from utils import profile_stage
+from .usage_query import EventColumns, UsageQuery
+
+
+# Расширения файлов: Parquet или Arrow IPC (файловый формат, он же Feather v2)
+PARQUET_EXTENSIONS = ('.parquet',)
+ARROW_EXTENSIONS = ('.arrow', '.feather', '.ipc')
+
+UTC_OFFSET_SECONDS = 7 * 3600
+SCHEMA_VERSION = b'1'
+
+# Агрегаты: суффикс файла -> ключ группировки UsageQuery
+ROLLUPS = {'hourly': '1h', 'daily': '1d'}
+ROLLUP_VALUES = ('cost', 'input_tokens', 'output_tokens', 'cache_read', 'cache_write')
+TOKEN_COLUMNS = ('input_tokens', 'output_tokens', 'cache_read', 'cache_write')
+
+
+def is_columnar(filepath):
+    """Проверяет, что файл - Parquet или Arrow IPC (по расширению)."""
+    return os.path.splitext(filepath)[1].lower() in PARQUET_EXTENSIONS + ARROW_EXTENSIONS
+
+
+def _require_pyarrow():
+    """Импортирует pyarrow или объясняет, как его установить."""
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError("Для Arrow/Parquet нужен pyarrow: pip install pyarrow") from None
+    return pyarrow
+
+
+def export_usage(source, filepath):
+    """
+    Экспортирует события и почасовые/дневные агрегаты.
+
+    События пишутся в filepath, агрегаты - рядом: <имя>.hourly<расш>,
+    <имя>.daily<расш>.
+
+    Args:
+        source: Источник событий (см. EventColumns.from_source)
+        filepath: Файл событий (.parquet, .arrow, .feather или .ipc)
+
+    Returns:
+        list: Пути к созданным файлам
+    """
+    columns = EventColumns.from_source(source)
+    stem, ext = os.path.splitext(filepath)
+    paths = [write_events(columns, filepath)]
+    for suffix in ROLLUPS:
+        paths.append(write_rollup(columns, f"{stem}.{suffix}{ext}", suffix))
+    return paths
+
+
+def write_events(source, filepath):
+    """
+    Пишет события с типизированными колонками.
+
+    Время - timestamp UTC (в Parquet хранится в мс), модель и тип запроса -
+    словарные колонки.
+    Каждый день (UTC+7, как в анализаторе) - отдельная группа строк
+    Parquet или отдельный батч Arrow IPC, поэтому чтение диапазона дат
+    пропускает остальные дни.
+
+    Args:
+        source: Источник событий (см. EventColumns.from_source)
+        filepath: Путь к файлу
+
+    Returns:
+        str: Путь к файлу
+    """
+    pa = _require_pyarrow()
+    columns = EventColumns.from_source(source)
+
+    with profile_stage('Экспорт событий'):
+        table = pa.table({
+            'ts': pa.array(columns.ts - UTC_OFFSET_SECONDS, type=pa.timestamp('s', tz='UTC')),
+            'model': _dictionary(pa, columns.model_codes, columns.models),
+            'kind': _dictionary(pa, columns.kind_codes, columns.kinds),
+            **{name: pa.array(columns.values[name], type=pa.int64()) for name in TOKEN_COLUMNS},
+            'cost': pa.array(columns.values['cost'], type=pa.float64()),
+        }).replace_schema_metadata({b'cursor_usage.events': SCHEMA_VERSION})
+
+        days = columns.ts // 86400
+        bounds = np.concatenate(([0], np.flatnonzero(np.diff(days)) + 1, [len(days)]))
+        _write_batches(pa, table, filepath, zip(bounds[:-1], bounds[1:]))
+    return filepath
+
+
+def write_rollup(source, filepath, rollup='hourly'):
+    """
+    Пишет агрегаты по бакету, модели и типу запроса (как в UsageStore).
+
+    Args:
+        source: Источник событий (см. EventColumns.from_source)
+        filepath: Путь к файлу
+        rollup: 'hourly' или 'daily'
+
+    Returns:
+        str: Путь к файлу
+    """
+    pa = _require_pyarrow()
+    columns = EventColumns.from_source(source)
+
+    with profile_stage(f'Экспорт агрегатов ({rollup})'):
+        rows = UsageQuery(columns).group_by(ROLLUPS[rollup], 'model', 'kind').agg(
+            requests='count', **{name: 'sum' for name in ROLLUP_VALUES})
+        buckets = np.array([row[ROLLUPS[rollup]] for row in rows], dtype='datetime64[s]').astype(np.int64)
+        model_codes, models = EventColumns._encode([row['model'] for row in rows])
+        kind_codes, kinds = EventColumns._encode([row['kind'] for row in rows])
+
+        table = pa.table({
+            'bucket': pa.array(buckets - UTC_OFFSET_SECONDS, type=pa.timestamp('s', tz='UTC')),
+            'model': _dictionary(pa, model_codes, models),
+            'kind': _dictionary(pa, kind_codes, kinds),
+            'requests': pa.array([row['requests'] for row in rows], type=pa.int64()),
+            'cost': pa.array([row['cost'] for row in rows], type=pa.float64()),
+            **{name: pa.array([row[name] for row in rows], type=pa.int64()) for name in TOKEN_COLUMNS},
+        }).replace_schema_metadata({b'cursor_usage.rollup': rollup.encode()})
+        _write_batches(pa, table, filepath, [(0, len(rows))])
+    return filepath
+
+
+def read_columns(filepath):
+    """
+    Читает события, записанные write_events, без разбора CSV.
+
+    Returns:
+        EventColumns: Колоночная копия событий, отсортированная по времени
+    """
+    pa = _require_pyarrow()
+
+    with profile_stage('Чтение Arrow/Parquet'):
+        if os.path.splitext(filepath)[1].lower() in PARQUET_EXTENSIONS:
+            import pyarrow.parquet as pq
+            table = pq.read_table(filepath)
+        else:
+            with pa.memory_map(filepath, 'r') as source:
+                table = pa.ipc.open_file(source).read_all()
+
+        if b'cursor_usage.events' not in (table.schema.metadata or {}):
+            raise ValueError(f"{filepath}: это не экспорт событий (нет метаданных cursor_usage.events)")
+
+        table = table.unify_dictionaries().combine_chunks()
+        model_codes, models = _codes(pa, table.column('model'))
+        kind_codes, kinds = _codes(pa, table.column('kind'))
+        # Parquet хранит время в мс, приводим обратно к секундам
+        ts_type = pa.timestamp('s', tz='UTC')
+        ts = table.column('ts').cast(ts_type).cast(pa.int64()).to_numpy() + UTC_OFFSET_SECONDS
+
+        # Файл могли собрать не этим экспортом: порядок по времени обязателен
+        order = None if np.all(ts[1:] >= ts[:-1]) else np.argsort(ts, kind='stable')
+
+        def column(name, dtype):
+            values = table.column(name).to_numpy().astype(dtype)
+            return values if order is None else values[order]
+
+        if order is not None:
+            ts, model_codes, kind_codes = ts[order], model_codes[order], kind_codes[order]
+        return EventColumns(
+            ts, model_codes, models, kind_codes, kinds,
+            *(column(name, np.int64) for name in TOKEN_COLUMNS),
+            column('cost', np.float64),
+        )
+
+
+def read_event_table(filepath):
+    """Читает экспорт событий в EventTable (источник для CSVAnalyzer)."""
+    from .event_table import EventTable
+    return EventTable.from_columns(read_columns(filepath))
+
+
+def _dictionary(pa, codes, values):
+    """Словарная колонка (int32 коды + строки)."""
+    return pa.DictionaryArray.from_arrays(pa.array(codes, type=pa.int32()), pa.array(values, type=pa.string()))
+
+
+def _codes(pa, column):
+    """Коды и значения словарной колонки (после combine_chunks - один кусок)."""
+    if column.num_chunks == 0:
+        return np.zeros(0, dtype=np.int64), []
+    array = column.chunk(0)
+    if not pa.types.is_dictionary(array.type):
+        array = array.dictionary_encode()
+    return array.indices.to_numpy(zero_copy_only=False).astype(np.int64), array.dictionary.to_pylist()
+
+
+def _write_batches(pa, table, filepath, ranges):
+    """Пишет таблицу по диапазонам строк: группа строк Parquet / батч Arrow IPC на диапазон."""
+    directory = os.path.dirname(filepath)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    if os.path.splitext(filepath)[1].lower() in PARQUET_EXTENSIONS:
+        import pyarrow.parquet as pq
+        with pq.ParquetWriter(filepath, table.schema, compression='zstd') as writer:
+            for start, stop in ranges:
+                writer.write_table(table.slice(start, stop - start))
+    elif os.path.splitext(filepath)[1].lower() in ARROW_EXTENSIONS:
+        with pa.OSFile(filepath, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            for start, stop in ranges:
+                writer.write_table(table.slice(start, stop - start))
+    else:
+        raise ValueError(f"Неизвестный формат: {filepath} "
+                         f"(поддерживаются {', '.join(PARQUET_EXTENSIONS + ARROW_EXTENSIONS)})")
@@ -1,5 +1,6 @@
 """Калькулятор стоимости использования моделей."""
 
+import numpy as np
 from config import MODEL_PRICING
 
 
@@ -70,3 +71,54 @@ class CostCalculator:
         
         return cost
 
+    
+    @staticmethod
+    def calculate_costs(model, input_tokens, output_tokens, cache_read, cache_write):
+        """
+        Рассчитывает стоимость массива запросов к одной модели.
+        
+        Правила те же, что в calculate_cost (включая порог 200k контекста),
+        но расчет идет по массивам numpy целиком.
+        
+        Args:
+            model: Название модели
+            input_tokens: Массив входных токенов
+            output_tokens: Массив выходных токенов
+            cache_read: Массив токенов cache read
+            cache_write: Массив токенов cache write
+            
+        Returns:
+            np.ndarray: Стоимости в долларах (float64)
+        """
+        input_tokens = np.asarray(input_tokens, dtype=np.float64)
+        output_tokens = np.asarray(output_tokens, dtype=np.float64)
+        cache_read = np.asarray(cache_read, dtype=np.float64)
+        cache_write = np.asarray(cache_write, dtype=np.float64)
+        
+        if model not in MODEL_PRICING:
+            return np.zeros(len(input_tokens))
+        
+        pricing = MODEL_PRICING[model]
+        is_over_200k = input_tokens + cache_read + cache_write > 200000
+        
+        def price(under, over):
+            return np.where(is_over_200k, over, under) if over != under else under
+        
+        if 'input_under_200k' in pricing:
+            input_price = price(pricing['input_under_200k'], pricing['input_over_200k'])
+            output_price = price(pricing['output_under_200k'], pricing['output_over_200k'])
+            cache_read_price = price(pricing.get('cache_read_under_200k', 0),
+                                     pricing.get('cache_read_over_200k', 0))
+            cache_write_price = np.where(
+                is_over_200k,
+                pricing.get('cache_write_over_200k', pricing['input_over_200k']),
+                pricing.get('cache_write_under_200k', pricing['input_under_200k']),
+            )
+        else:
+            input_price = price(pricing.get('input', 0), pricing.get('over_200k', pricing.get('input', 0)))
+            output_price = pricing.get('output', 0)
+            cache_read_price = pricing.get('cache_read', 0)
+            cache_write_price = pricing['cache_write'] if 'cache_write' in pricing else input_price
+        
+        return (input_tokens * input_price + output_tokens * output_price
+                + cache_read * cache_read_price + cache_write * cache_write_price) / 1_000_000
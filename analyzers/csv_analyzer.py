@@ -1,26 +1,48 @@
 """Анализатор CSV файлов с данными использования."""
 
-import csv
+import copy
+import heapq
+from array import array
+from bisect import bisect_right
 from collections import defaultdict
 from datetime import datetime, timedelta
-from tqdm import tqdm
-from .cost_calculator import CostCalculator
+import numpy as np
+from utils import profile_stage
+from .event_table import EventTable
+from .box_stats import compute_box_stats, compute_sketch_box_stats, partition_quantiles, sorted_quantiles
+from .quantile_sketch import KLLSketch
+from .day_hour_grid import DayHourGrid
 
 
 class CSVAnalyzer:
     """Класс для анализа CSV данных об использовании Cursor."""
     
-    def __init__(self, csv_file, period='all'):
+    def __init__(self, csv_file, period='all', cost_sketches=False, sketch_k=200, show_progress=True,
+                 events=None, since=None, until=None):
         """
         Инициализирует анализатор.
         
         Args:
             csv_file: Путь к CSV файлу
             period: 'all', 'month', 'week', 'day'
+            cost_sketches: Хранить распределения стоимости в квантильных
+                скетчах (KLL) вместо полного списка стоимостей. Память
+                под распределения не зависит от числа запросов, но события
+                (EventTable) и метки времени для таймлайнов хранятся целиком
+            sketch_k: Точность скетчей (погрешность ранга ~2.3 / k^0.97)
+            show_progress: Показывать прогресс-бар tqdm (без него файл читается
+                один раз, а tqdm не импортируется)
+            events: Уже разобранная EventTable (тогда CSV не читается)
+            since: Начало произвольного периода (naive datetime UTC+7) вместо period
+            until: Конец периода (не включительно), None - без ограничения
         """
         self.csv_file = csv_file
+        self.show_progress = show_progress
+        self.events = events
         self.period = period
-        self.period_start = self._get_period_start()
+        self.cost_sketches = cost_sketches
+        self.period_start = since if since is not None else self._get_period_start()
+        self.period_end = until
         self.models = defaultdict(lambda: {
             'included_requests': 0, 'on_demand_requests': 0,
             'included_cost': 0.0, 'on_demand_cost': 0.0,
@@ -30,7 +52,9 @@ class CSVAnalyzer:
         })
         self.daily_usage = defaultdict(lambda: defaultdict(int))
         self.hourly_usage = defaultdict(int)
-        self.request_costs_by_model = defaultdict(list)  # Для box plot
+        self.request_costs_by_model = defaultdict(lambda: array('d'))  # Для box plot (типизированные массивы)
+        self.sorted_costs_by_model = None  # Отсортированные стоимости по моделям (заводятся в update())
+        self.cost_sketches_by_model = defaultdict(lambda: KLLSketch(sketch_k))  # Скетчи стоимости по моделям
         self.daily_cost = defaultdict(float)  # Стоимость по дням
         self.hourly_cost = defaultdict(float)  # Стоимость по часам
         self.daily_cost_by_model = defaultdict(lambda: defaultdict(float))  # Стоимость по дням и моделям
@@ -43,16 +67,18 @@ class CSVAnalyzer:
         self.ten_min_cost_by_model = defaultdict(lambda: defaultdict(float))  # Стоимость по 10 минут и моделям
         self.ten_min_requests = defaultdict(int)  # Запросы по 10-минутным интервалам
         self.ten_min_requests_by_model = defaultdict(lambda: defaultdict(int))  # Запросы по 10 минут и моделям
-        self.all_timestamps = []  # Все временные метки для анализа
+        self.all_timestamps = []  # Все временные метки для анализа (после analyze() отсортированы)
+        self.day_hour_grid = DayHourGrid()  # Календарная сетка день × час
     
-    def _get_period_start(self):
-        """Возвращает начальную дату фильтрации."""
+    def _get_period_start(self, period=None):
+        """Возвращает начальную дату фильтрации для period (по умолчанию - self.period)."""
+        period = period or self.period
         now = datetime.now()
-        if self.period == 'day':
+        if period == 'day':
             return now - timedelta(days=1)
-        elif self.period == 'week':
+        elif period == 'week':
             return now - timedelta(days=7)
-        elif self.period == 'month':
+        elif period == 'month':
             return now - timedelta(days=30)
         return None  # 'all' - без фильтра
         
@@ -60,118 +86,260 @@ class CSVAnalyzer:
         """Анализирует CSV файл и собирает статистику."""
         print("\n📊 Анализирую CSV файл...")
         
-        with open(self.csv_file, 'r', encoding='utf-8') as f:
-            lines = sum(1 for _ in f) - 1
+        if self.events is None:
+            self.events = EventTable.from_csv(self.csv_file, show_progress=self.show_progress)
         
-        with open(self.csv_file, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            
-            for row in tqdm(reader, total=lines, desc="Обработка данных", unit="строк"):
-                self._process_row(row)
-        
-        return {
-            'models': dict(self.models),
-            'daily_usage': dict(self.daily_usage),
-            'hourly_usage': dict(self.hourly_usage),
-            'request_costs_by_model': dict(self.request_costs_by_model),
-            'daily_cost': dict(self.daily_cost),
-            'hourly_cost': dict(self.hourly_cost),
-            'daily_cost_by_model': dict(self.daily_cost_by_model),
-            'hourly_cost_by_model': dict(self.hourly_cost_by_model),
-            'hourly_cost_full': dict(self.hourly_cost_full),
-            'hourly_cost_by_model_full': dict(self.hourly_cost_by_model_full),
-            'hourly_requests_full': dict(self.hourly_requests_full),
-            'hourly_requests_by_model_full': dict(self.hourly_requests_by_model_full),
-            'ten_min_cost': dict(self.ten_min_cost),
-            'ten_min_cost_by_model': dict(self.ten_min_cost_by_model),
-            'ten_min_requests': dict(self.ten_min_requests),
-            'ten_min_requests_by_model': dict(self.ten_min_requests_by_model),
-            'all_timestamps': sorted(self.all_timestamps)
-        }
+        with profile_stage('Агрегация событий'):
+            for event in self.events.between(self.period_start, self.period_end):
+                self._add_event(event)
+        
+        self.all_timestamps.sort()
+        return self._snapshot()
     
-    def _process_row(self, row):
-        """Обрабатывает одну строку CSV."""
-        try:
-            model = row['Model']
-            kind = row['Kind']
-            
-            # Парсим дату с UTC+7 смещением
-            date_obj = datetime.fromisoformat(row['Date'].replace('Z', '+00:00'))
-            date_utc7 = date_obj + timedelta(hours=7)
-            date_utc7_naive = date_utc7.replace(tzinfo=None)
-            
-            # Фильтруем по периоду
-            if self.period_start and date_utc7_naive < self.period_start:
-                return
-            
-            date_str = date_utc7_naive.strftime('%Y-%m-%d')
-            hour = date_utc7_naive.hour
+    def update(self, events):
+        """
+        Добавляет новые события к уже собранной статистике (режим --watch).
+        
+        Старые события не обходятся заново: агрегаты дополняются на месте,
+        новые метки времени и стоимости вливаются в уже отсортированные.
+        Подходит для периодов с неподвижным началом ('all' и since/until);
+        у 'day', 'week' и 'month' начало сдвигается со временем, их нужно
+        считать заново через analyze().
+        
+        Args:
+            events: Новые события, отсортированные по времени
+        
+        Returns:
+            dict: Результаты в формате analyze()
+        """
+        start = len(self.all_timestamps)
+        if self.sorted_costs_by_model is None:
+            self.sorted_costs_by_model = {}
+        with profile_stage('Агрегация новых событий'):
+            for event in events:
+                if self.period_start is not None and event.date < self.period_start:
+                    continue
+                if self.period_end is not None and event.date >= self.period_end:
+                    continue
+                self._add_event(event)
+            self._merge_timestamps(start)
+        
+        return self._snapshot()
+    
+    def _merge_timestamps(self, start):
+        """Вливает метки времени, добавленные после индекса start, в отсортированные прежние."""
+        new = sorted(self.all_timestamps[start:])
+        if not new:
+            return
+        del self.all_timestamps[start:]
+        # Обычно новые события позже всех прежних, и слияние сводится к дописыванию в конец
+        position = bisect_right(self.all_timestamps, new[0])
+        self.all_timestamps[position:] = heapq.merge(self.all_timestamps[position:], new)
+    
+    def analyze_windows(self, periods=('day', 'week', 'month', 'all')):
+        """
+        Анализирует все стандартные периоды за один проход по событиям.
+        
+        Периоды вложены друг в друга (день ⊂ неделя ⊂ месяц ⊂ все данные),
+        поэтому события обходятся от новых к старым, а при пересечении
+        начала очередного периода накопленная статистика сохраняется
+        снимком. Снимок копирует только агрегаты периода, так что общая
+        стоимость близка к одному анализу всех данных.
+        
+        Args:
+            periods: Названия периодов ('all', 'month', 'week', 'day')
+        
+        Returns:
+            dict: {период: результаты в формате analyze()}
+        """
+        print("\n📊 Анализирую CSV файл (все периоды за один проход)...")
+        
+        if self.events is None:
+            self.events = EventTable.from_csv(self.csv_file, show_progress=self.show_progress)
+        
+        # Начала периодов от самого позднего к самому раннему ('all' - последний)
+        boundaries = sorted(((self._get_period_start(period), period) for period in periods),
+                            key=lambda item: item[0] or datetime.min, reverse=True)
+        
+        window_results = {}
+        next_boundary = 0
+        with profile_stage('Агрегация событий'):
+            for event in reversed(self.events.between(None, self.period_end)):
+                while (next_boundary < len(boundaries) and boundaries[next_boundary][0] is not None
+                       and event.date < boundaries[next_boundary][0]):
+                    window_results[boundaries[next_boundary][1]] = self._snapshot()
+                    next_boundary += 1
+                self._add_event(event)
+        
+        for _, period in boundaries[next_boundary:]:
+            window_results[period] = self._snapshot()
+        
+        # События шли от новых к старым (для timsort это один убывающий прогон)
+        for results in window_results.values():
+            results['all_timestamps'].sort()
+        return {period: window_results[period] for period in periods}
+    
+    def _snapshot(self):
+        """Копирует текущие агрегаты в словарь результатов (дальнейшие события их не меняют)."""
+        with profile_stage('Агрегация: box plot'):
+            cost_box_stats = self.get_cost_box_stats()
+        with profile_stage('Агрегация: перцентили'):
+            cost_percentiles = self.get_cost_percentiles()
+        
+        with profile_stage('Агрегация: снимок результатов'):
+            return {
+                'models': {model: dict(stats) for model, stats in self.models.items()},
+                'total_cost': self.get_total_cost(),
+                'total_requests': self.get_total_requests(),
+                'daily_usage': self._copy_nested(self.daily_usage),
+                'hourly_usage': dict(self.hourly_usage),
+                'cost_box_stats': cost_box_stats,
+                'cost_percentiles': cost_percentiles,
+                'daily_cost': dict(self.daily_cost),
+                'hourly_cost': dict(self.hourly_cost),
+                'daily_cost_by_model': self._copy_nested(self.daily_cost_by_model),
+                'hourly_cost_by_model': self._copy_nested(self.hourly_cost_by_model),
+                'hourly_cost_full': dict(self.hourly_cost_full),
+                'hourly_cost_by_model_full': self._copy_nested(self.hourly_cost_by_model_full),
+                'hourly_requests_full': dict(self.hourly_requests_full),
+                'hourly_requests_by_model_full': self._copy_nested(self.hourly_requests_by_model_full),
+                'ten_min_cost': dict(self.ten_min_cost),
+                'ten_min_cost_by_model': self._copy_nested(self.ten_min_cost_by_model),
+                'ten_min_requests': dict(self.ten_min_requests),
+                'ten_min_requests_by_model': self._copy_nested(self.ten_min_requests_by_model),
+                'all_timestamps': list(self.all_timestamps),
+                'day_hour_grid': copy.deepcopy(self.day_hour_grid),
+            }
+    
+    @staticmethod
+    def _copy_nested(nested):
+        """Копирует словарь словарей в обычные dict."""
+        return {key: dict(inner) for key, inner in nested.items()}
+    
+    def _add_event(self, event):
+        """Добавляет событие в статистику."""
+        date_utc7_naive, model, kind = event.date, event.model, event.kind
+        input_tokens, output_tokens = event.input_tokens, event.output_tokens
+        cache_read, cache_write, cost = event.cache_read, event.cache_write, event.cost
+        
+        date_str = date_utc7_naive.strftime('%Y-%m-%d')
+        hour = date_utc7_naive.hour
+        
+        # Обновляем статистику
+        if kind == 'Included':
+            self.models[model]['included_requests'] += 1
+            self.models[model]['included_cost'] += cost
+            self._record_request_cost(model, cost)
+        elif kind == 'On-Demand':
+            self.models[model]['on_demand_requests'] += 1
+            self.models[model]['on_demand_cost'] += cost
+            self._record_request_cost(model, cost)
+        elif kind == 'Rate Limited':
+            self.models[model]['errors'] += 1
+        
+        # Обновляем токены
+        self.models[model]['input_tokens'] += input_tokens
+        self.models[model]['output_tokens'] += output_tokens
+        self.models[model]['cache_read'] += cache_read
+        self.models[model]['cache_write'] += cache_write
+        
+        # Дневная и почасовая статистика (только для Included/On-Demand)
+        if kind in ['Included', 'On-Demand']:
+            self.daily_usage[date_str][model] += 1
+            self.hourly_usage[hour] += 1
+            self.daily_cost[date_str] += cost
+            self.hourly_cost[hour] += cost
+            self.daily_cost_by_model[date_str][model] += cost
+            self.hourly_cost_by_model[hour][model] += cost
             
-            # Парсим токены
-            input_tokens = int(row.get('Input (w/ Cache Write)', 0) or 0)
-            output_tokens = int(row.get('Output Tokens', 0) or 0)
-            cache_read = int(row.get('Cache Read', 0) or 0)
+            # Почасовая статистика с полным ключом (YYYY-MM-DD HH:00)
+            hour_full_key = date_utc7_naive.strftime('%Y-%m-%d %H:00')
+            self.hourly_cost_full[hour_full_key] += cost
+            self.hourly_cost_by_model_full[hour_full_key][model] += cost
+            self.hourly_requests_full[hour_full_key] += 1
+            self.hourly_requests_by_model_full[hour_full_key][model] += 1
             
-            input_no_cache = int(row.get('Input (w/o Cache Write)', 0) or 0)
-            cache_write = max(0, input_tokens - input_no_cache)
+            # 10-минутные интервалы
+            ten_min_key = date_utc7_naive.strftime('%Y-%m-%d %H:%M')
+            ten_min_bucket = ten_min_key[:-1] + '0'  # Округляем до 10 минут
+            self.ten_min_cost[ten_min_bucket] += cost
+            self.ten_min_cost_by_model[ten_min_bucket][model] += cost
+            self.ten_min_requests[ten_min_bucket] += 1
+            self.ten_min_requests_by_model[ten_min_bucket][model] += 1
             
-            # Считаем стоимость (приоритет: данные из CSV, затем расчет)
-            csv_cost = float(row.get('Cost', 0) or 0)
-            if csv_cost > 0:
-                cost = csv_cost
+            # Сохраняем временную метку для графиков
+            self.all_timestamps.append((date_utc7_naive, model, cost))
+            self.day_hour_grid.add(date_utc7_naive.toordinal(), hour, cost)
+    
+    def _record_request_cost(self, model, cost):
+        """Сохраняет стоимость запроса для распределений (список или скетч модели)."""
+        if self.cost_sketches:
+            self.cost_sketches_by_model[model].update(cost)
+        else:
+            self.request_costs_by_model[model].append(cost)
+    
+    def get_cost_box_stats(self):
+        """Возвращает статистики box plot по моделям с платными запросами."""
+        if self.cost_sketches:
+            return {
+                model: compute_sketch_box_stats(sketch, model)
+                for model, sketch in self.cost_sketches_by_model.items()
+                if sketch.n and sketch.max > 0
+            }
+        box_stats = {}
+        for model in self.request_costs_by_model:
+            if self.sorted_costs_by_model is None:
+                # Разовый анализ: квартили через np.partition, без сортировки
+                costs = np.asarray(self.request_costs_by_model[model], dtype=float)
+                if len(costs) and costs.max() > 0:
+                    box_stats[model] = compute_box_stats(costs, model)
             else:
-                cost = CostCalculator.calculate_cost(
-                    model, input_no_cache, output_tokens, cache_read, cache_write
-                )
-            
-            # Обновляем статистику
-            if kind == 'Included':
-                self.models[model]['included_requests'] += 1
-                self.models[model]['included_cost'] += cost
-                self.request_costs_by_model[model].append(cost)
-            elif kind == 'On-Demand':
-                self.models[model]['on_demand_requests'] += 1
-                self.models[model]['on_demand_cost'] += cost
-                self.request_costs_by_model[model].append(cost)
-            elif kind == 'Rate Limited':
-                self.models[model]['errors'] += 1
-            
-            # Обновляем токены
-            self.models[model]['input_tokens'] += input_tokens
-            self.models[model]['output_tokens'] += output_tokens
-            self.models[model]['cache_read'] += cache_read
-            self.models[model]['cache_write'] += cache_write
-            
-            # Дневная и почасовая статистика (только для Included/On-Demand)
-            if kind in ['Included', 'On-Demand']:
-                self.daily_usage[date_str][model] += 1
-                self.hourly_usage[hour] += 1
-                self.daily_cost[date_str] += cost
-                self.hourly_cost[hour] += cost
-                self.daily_cost_by_model[date_str][model] += cost
-                self.hourly_cost_by_model[hour][model] += cost
-                
-                # Почасовая статистика с полным ключом (YYYY-MM-DD HH:00)
-                hour_full_key = date_utc7_naive.strftime('%Y-%m-%d %H:00')
-                self.hourly_cost_full[hour_full_key] += cost
-                self.hourly_cost_by_model_full[hour_full_key][model] += cost
-                self.hourly_requests_full[hour_full_key] += 1
-                self.hourly_requests_by_model_full[hour_full_key][model] += 1
-                
-                # 10-минутные интервалы
-                ten_min_key = date_utc7_naive.strftime('%Y-%m-%d %H:%M')
-                ten_min_bucket = ten_min_key[:-1] + '0'  # Округляем до 10 минут
-                self.ten_min_cost[ten_min_bucket] += cost
-                self.ten_min_cost_by_model[ten_min_bucket][model] += cost
-                self.ten_min_requests[ten_min_bucket] += 1
-                self.ten_min_requests_by_model[ten_min_bucket][model] += 1
-                
-                # Сохраняем временную метку для графиков
-                self.all_timestamps.append((date_utc7_naive, model, cost))
-                
-        except (KeyError, ValueError) as e:
-            # Пропускаем проблемные строки
-            pass
+                costs = self._sorted_costs(model)
+                if len(costs) and costs[-1] > 0:
+                    box_stats[model] = compute_box_stats(costs, model, presorted=True)
+        return box_stats
+    
+    def _sorted_costs(self, model):
+        """
+        Отсортированные стоимости запросов модели (режим --watch).
+        
+        При первом вызове стоимости сортируются целиком. Дальше стоимости,
+        добавленные с прошлого вызова, сортируются отдельно и вливаются
+        в прежний массив: np.insert по позициям из searchsorted - это
+        слияние с копированием массива, O(n + k log n) на обновление
+        вместо повторной сортировки всей истории.
+        """
+        costs = self.request_costs_by_model[model]
+        sorted_costs = self.sorted_costs_by_model.get(model, np.zeros(0))
+        if len(sorted_costs) < len(costs):
+            new = np.sort(np.array(costs[len(sorted_costs):], dtype=float))
+            sorted_costs = np.insert(sorted_costs, np.searchsorted(sorted_costs, new), new)
+            self.sorted_costs_by_model[model] = sorted_costs
+        return sorted_costs
+    
+    def get_cost_percentiles(self, quantiles=(0.5, 0.9, 0.99)):
+        """
+        Возвращает перцентили стоимости запроса по моделям.
+        
+        Returns:
+            dict: {модель: {'p50': ..., 'p90': ..., 'p99': ..., 'rank_error': ...}},
+                  rank_error - погрешность ранга (0 для точного расчета)
+        """
+        percentiles = {}
+        if self.cost_sketches:
+            for model, sketch in self.cost_sketches_by_model.items():
+                values = sketch.quantiles(quantiles)
+                percentiles[model] = {f'p{q * 100:g}': v for q, v in zip(quantiles, values)}
+                percentiles[model]['rank_error'] = sketch.rank_error()
+        else:
+            for model, costs in self.request_costs_by_model.items():
+                if self.sorted_costs_by_model is None:
+                    values = partition_quantiles(np.asarray(costs, dtype=float), quantiles)
+                else:
+                    values = sorted_quantiles(self._sorted_costs(model), quantiles)
+                percentiles[model] = {f'p{q * 100:g}': v for q, v in zip(quantiles, values)}
+                percentiles[model]['rank_error'] = 0.0
+        return percentiles
     
     def get_total_cost(self):
         """Возвращает общую стоимость использования."""
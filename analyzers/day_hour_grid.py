@@ -0,0 +1,95 @@
+"""Компактная сетка день × час, заполняемая при чтении CSV."""
+
+import numpy as np
+
+
+# date(1970, 1, 1).toordinal()
+EPOCH_ORDINAL = 719163
+
+
+class DayHourGrid:
+    """
+    Стоимость и количество запросов в массивах (дни × 24 часа).
+
+    Диапазон дней расширяется удвоением емкости в обе стороны, поэтому
+    строки можно добавлять в любом порядке (экспорт Cursor идет от новых
+    к старым). Год данных - это ~8 760 ячеек на метрику.
+    """
+
+    def __init__(self, capacity=64):
+        """
+        Инициализирует пустую сетку.
+
+        Args:
+            capacity: Начальная емкость в днях
+        """
+        self._first = None  # ординал дня в строке 0
+        self._lo = 0  # первая заполненная строка
+        self._hi = 0  # строка после последней заполненной
+        self._cost = np.zeros((capacity, 24))
+        self._requests = np.zeros((capacity, 24), dtype=np.int64)
+
+    @property
+    def n_days(self):
+        """Количество дней в диапазоне (от первого до последнего с данными)."""
+        return self._hi - self._lo
+
+    @property
+    def cost(self):
+        """Стоимость: массив (дни × 24)."""
+        return self._cost[self._lo:self._hi]
+
+    @property
+    def requests(self):
+        """Количество запросов: массив (дни × 24)."""
+        return self._requests[self._lo:self._hi]
+
+    def dates(self):
+        """Возвращает даты строк как массив datetime64[D]."""
+        if self._first is None:
+            return np.array([], dtype='datetime64[D]')
+        first = self._first + self._lo - EPOCH_ORDINAL
+        return np.arange(first, first + self.n_days).astype('datetime64[D]')
+
+    def add(self, day_ordinal, hour, cost):
+        """
+        Добавляет запрос.
+
+        Args:
+            day_ordinal: date.toordinal() дня запроса
+            hour: Час (0-23)
+            cost: Стоимость запроса
+        """
+        if self._first is None:
+            self._first = day_ordinal - len(self._cost) // 2
+            self._lo = self._hi = day_ordinal - self._first
+
+        row = day_ordinal - self._first
+        if row < 0 or row >= len(self._cost):
+            row = self._grow(row)
+
+        self._cost[row, hour] += cost
+        self._requests[row, hour] += 1
+        self._lo = min(self._lo, row)
+        self._hi = max(self._hi, row + 1)
+
+    def _grow(self, row):
+        """Увеличивает емкость (удвоением), чтобы вместить строку; возвращает ее новый индекс."""
+        old_capacity = len(self._cost)
+        needed = max(row + 1, old_capacity) - min(row, 0)
+        capacity = old_capacity
+        while capacity < needed:
+            capacity *= 2
+
+        # При расширении в прошлое старые данные сдвигаются к концу массива
+        shift = capacity - old_capacity if row < 0 else 0
+        cost = np.zeros((capacity, 24))
+        requests = np.zeros((capacity, 24), dtype=np.int64)
+        cost[shift:shift + old_capacity] = self._cost
+        requests[shift:shift + old_capacity] = self._requests
+
+        self._cost, self._requests = cost, requests
+        self._first -= shift
+        self._lo += shift
+        self._hi += shift
+        return row + shift
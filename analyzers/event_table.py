@@ -0,0 +1,217 @@
+"""Таблица событий использования, разобранная из CSV один раз."""
+
+import csv
+from bisect import bisect_left, bisect_right
+from collections import namedtuple, Counter
+from datetime import datetime, timedelta
+from utils import profile_stage
+from .cost_calculator import CostCalculator
+
+
+UsageEvent = namedtuple('UsageEvent', [
+    'date',  # naive datetime, UTC+7
+    'model', 'kind',
+    'input_tokens', 'output_tokens', 'cache_read', 'cache_write',
+    'cost',
+])
+
+
+class EventTable:
+    """
+    События из CSV экспорта, отсортированные по времени.
+
+    Строки разбираются (даты, токены, стоимость) один раз; анализ любого
+    периода берет срез таблицы бинарным поиском, поэтому несколько периодов
+    считаются без повторного чтения файла.
+    """
+
+    def __init__(self, events):
+        """
+        Инициализирует таблицу.
+
+        Args:
+            events: Последовательность UsageEvent в любом порядке
+        """
+        self.events = sorted(events, key=lambda event: event.date)
+        self.dates = [event.date for event in self.events]
+        self._columns = None
+
+    def __len__(self):
+        return len(self.events)
+
+    def __iter__(self):
+        return iter(self.events)
+
+    @classmethod
+    def from_csv(cls, csv_file, show_progress=True):
+        """
+        Читает и разбирает CSV файл.
+
+        Args:
+            csv_file: Путь к CSV файлу
+            show_progress: Показывать прогресс-бар tqdm
+
+        Returns:
+            EventTable: Таблица событий (проблемные строки пропускаются)
+        """
+        lines = None
+        if show_progress:
+            from tqdm import tqdm
+            with open(csv_file, 'r', encoding='utf-8') as f:
+                lines = sum(1 for _ in f) - 1
+
+        events = []
+        with profile_stage('Разбор CSV'), open(csv_file, 'r', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            if show_progress:
+                reader = tqdm(reader, total=lines, desc="Обработка данных", unit="строк")
+
+            for row in reader:
+                event = cls.parse_row(row, calculate_cost=False)
+                if event is not None:
+                    events.append(event)
+
+        with profile_stage('Расчет стоимости'):
+            events = [cls._with_cost(event) if event.cost is None else event for event in events]
+
+        with profile_stage('Сортировка событий'):
+            return cls(events)
+
+    @classmethod
+    def from_columns(cls, columns):
+        """
+        Строит таблицу из колоночной копии (EventColumns) без разбора CSV.
+
+        Args:
+            columns: EventColumns, отсортированные по времени
+
+        Returns:
+            EventTable: Таблица событий (колоночная копия сохраняется для columns())
+        """
+        with profile_stage('Сборка событий из колонок'):
+            values = columns.values
+            table = cls(map(
+                UsageEvent,
+                columns.ts.astype('datetime64[s]').astype(object).tolist(),
+                [columns.models[code] for code in columns.model_codes.tolist()],
+                [columns.kinds[code] for code in columns.kind_codes.tolist()],
+                values['input_tokens'].tolist(), values['output_tokens'].tolist(),
+                values['cache_read'].tolist(), values['cache_write'].tolist(), values['cost'].tolist(),
+            ))
+        table._columns = columns
+        return table
+
+    def ingest_csv(self, csv_file):
+        """
+        Добавляет из CSV события, которых еще нет в таблице.
+
+        Строки новее последнего события добавляются сразу. Более старые
+        сверяются с событиями той же секунды (бинарный поиск, одинаковые
+        строки считаются по количеству), и недостающие вливаются в таблицу
+        на свое место: так подхватываются экспорт за более ранний период
+        и пропуски в середине истории. Файл читается целиком - по первой
+        совпавшей строке нельзя знать, что дальше нет недостающих.
+
+        Args:
+            csv_file: Путь к CSV файлу
+
+        Returns:
+            list: Добавленные события, отсортированные по времени
+        """
+        last = self.dates[-1] if self.events else None
+        matched = Counter()
+
+        new_events = []
+        with profile_stage('Разбор новых строк CSV'), open(csv_file, 'r', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                event = self.parse_row(row)
+                if event is None:
+                    continue
+                if last is not None and event.date <= last and matched[event] < self._count(event):
+                    matched[event] += 1
+                    continue
+                new_events.append(event)
+
+        new_events.sort(key=lambda event: event.date)
+        self.events.extend(new_events)
+        if new_events and last is not None and new_events[0].date < last:
+            # Две отсортированные серии: timsort сливает их за линейное время
+            self.events.sort(key=lambda event: event.date)
+            self.dates = [event.date for event in self.events]
+        else:
+            self.dates.extend(event.date for event in new_events)
+        if new_events:
+            self._columns = None
+        return new_events
+
+    def _count(self, event):
+        """Сколько раз событие уже есть в таблице (среди событий той же секунды)."""
+        lo = bisect_left(self.dates, event.date)
+        return self.events[lo:bisect_right(self.dates, event.date, lo)].count(event)
+
+    def columns(self):
+        """Колоночная копия событий (EventColumns), строится один раз."""
+        if self._columns is None:
+            from .usage_query import EventColumns
+            with profile_stage('Колоночная копия событий'):
+                self._columns = EventColumns.from_events(self.events)
+        return self._columns
+
+    @classmethod
+    def parse_row(cls, row, calculate_cost=True):
+        """
+        Разбирает строку CSV в UsageEvent (None для некорректной строки).
+
+        Args:
+            row: Строка csv.DictReader
+            calculate_cost: Рассчитать стоимость по токенам, если в CSV ее нет;
+                иначе cost остается None (см. _with_cost)
+        """
+        try:
+            model = row['Model']
+            kind = row['Kind']
+
+            # Парсим дату с UTC+7 смещением
+            date_obj = datetime.fromisoformat(row['Date'].replace('Z', '+00:00'))
+            date_utc7_naive = (date_obj + timedelta(hours=7)).replace(tzinfo=None)
+
+            # Парсим токены
+            input_tokens = int(row.get('Input (w/ Cache Write)', 0) or 0)
+            output_tokens = int(row.get('Output Tokens', 0) or 0)
+            cache_read = int(row.get('Cache Read', 0) or 0)
+
+            input_no_cache = int(row.get('Input (w/o Cache Write)', 0) or 0)
+            cache_write = max(0, input_tokens - input_no_cache)
+
+            # Стоимость: приоритет у данных из CSV, иначе расчет по токенам
+            csv_cost = float(row.get('Cost', 0) or 0)
+        except (KeyError, ValueError):
+            # Пропускаем проблемные строки
+            return None
+
+        event = UsageEvent(date_utc7_naive, model, kind, input_tokens, output_tokens,
+                           cache_read, cache_write, csv_cost if csv_cost > 0 else None)
+        return cls._with_cost(event) if calculate_cost and event.cost is None else event
+
+    @staticmethod
+    def _with_cost(event):
+        """Возвращает событие со стоимостью, рассчитанной по токенам."""
+        input_no_cache = event.input_tokens - event.cache_write
+        return event._replace(cost=CostCalculator.calculate_cost(
+            event.model, input_no_cache, event.output_tokens, event.cache_read, event.cache_write
+        ))
+
+    def between(self, since=None, until=None):
+        """
+        Возвращает события с since <= дата < until.
+
+        Args:
+            since: Начало (naive datetime UTC+7), None - с первого события
+            until: Конец (naive datetime UTC+7), None - до последнего события
+
+        Returns:
+            list: Срез событий, отсортированный по времени
+        """
+        lo = bisect_left(self.dates, since) if since is not None else 0
+        hi = bisect_left(self.dates, until) if until is not None else len(self.events)
+        return self.events[lo:hi]
@@ -0,0 +1,149 @@
+"""Потоковый квантильный скетч KLL с ограниченной памятью."""
+
+import random
+import numpy as np
+
+
+class KLLSketch:
+    """
+    Квантильный скетч KLL (Karnin, Lang, Liberty, 2016).
+
+    Хранит O(k) значений независимо от длины потока. Скетчи с одинаковым k
+    можно объединять (merge), поэтому их удобно собирать параллельно
+    по частям данных и сливать в конце.
+
+    Погрешность - по рангу: квантиль q возвращает значение, чей истинный
+    ранг лежит в пределах q ± rank_error() с вероятностью ~99%.
+    """
+
+    def __init__(self, k=200, c=2 / 3, seed=None):
+        """
+        Инициализирует скетч.
+
+        Args:
+            k: Размер верхнего компактора (точность/память)
+            c: Коэффициент уменьшения емкости нижних уровней
+            seed: Зерно генератора случайных чисел (для воспроизводимости)
+        """
+        self.k = k
+        self.c = c
+        self.n = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self.compactors = [[]]
+        self._size = 0
+        self._max_size = self._capacity(0)
+        self._random = random.Random(seed)
+
+    def __len__(self):
+        return self.n
+
+    def rank_error(self):
+        """Нормированная погрешность ранга (эмпирическая оценка Apache DataSketches)."""
+        return 2.296 / self.k ** 0.9723
+
+    def update(self, value):
+        """Добавляет одно значение."""
+        self.compactors[0].append(value)
+        self.n += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+        self._size += 1
+        if self._size >= self._max_size:
+            self._compress()
+
+    def merge(self, other):
+        """Объединяет другой скетч с тем же k в текущий."""
+        if other.k != self.k:
+            raise ValueError(f"Скетчи с разным k не объединяются: {self.k} и {other.k}")
+        if other.n == 0:
+            return self
+        while len(self.compactors) < len(other.compactors):
+            self._grow()
+        for level, items in enumerate(other.compactors):
+            self.compactors[level].extend(items)
+
+        self.n += other.n
+        self.total += other.total
+        self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = other.max if self.max is None else max(self.max, other.max)
+
+        self._size = sum(len(items) for items in self.compactors)
+        while self._size >= self._max_size:
+            self._compress()
+        return self
+
+    def quantiles(self, qs):
+        """
+        Возвращает приближенные квантили.
+
+        Args:
+            qs: Последовательность долей от 0 до 1
+
+        Returns:
+            list: Значения квантилей (пустой скетч - None)
+        """
+        if self.n == 0:
+            return [None for _ in qs]
+
+        values, weights = self._weighted_items()
+        order = np.argsort(values, kind='stable')
+        values = values[order]
+        cumulative = np.cumsum(weights[order])
+
+        result = []
+        for q in qs:
+            idx = min(int(np.searchsorted(cumulative, q * cumulative[-1], side='left')), len(values) - 1)
+            result.append(float(min(max(values[idx], self.min), self.max)))
+        return result
+
+    def quantile(self, q):
+        """Возвращает приближенный квантиль q."""
+        return self.quantiles([q])[0]
+
+    def items(self):
+        """Возвращает сохраненные значения (выборку потока) как массив."""
+        return self._weighted_items()[0]
+
+    def _weighted_items(self):
+        """Значения всех уровней и их веса (2^уровень)."""
+        values = np.concatenate([np.asarray(items, dtype=float) for items in self.compactors])
+        weights = np.concatenate([np.full(len(items), 2 ** level, dtype=float)
+                                  for level, items in enumerate(self.compactors)])
+        return values, weights
+
+    def _capacity(self, level):
+        """Емкость уровня: верхний уровень - k, нижние уменьшаются в c раз."""
+        height = len(self.compactors) - level - 1
+        return int(np.ceil(self.k * self.c ** height)) + 1
+
+    def _grow(self):
+        """Добавляет новый верхний уровень."""
+        self.compactors.append([])
+        self._max_size = sum(self._capacity(level) for level in range(len(self.compactors)))
+
+    def _compress(self):
+        """Сжимает первый переполненный уровень: половина значений уходит выше с весом ×2."""
+        for level in range(len(self.compactors)):
+            items = self.compactors[level]
+            if len(items) < self._capacity(level):
+                continue
+            if level + 1 >= len(self.compactors):
+                self._grow()
+
+            items.sort()
+            # При нечетном размере последнее значение остается на уровне
+            leftover = [items[-1]] if len(items) % 2 else []
+            even = items[:len(items) - len(leftover)]
+            offset = self._random.randint(0, 1)
+            self.compactors[level + 1].extend(even[offset::2])
+            self.compactors[level] = leftover
+
+            self._size = sum(len(level_items) for level_items in self.compactors)
+            if self._size < self._max_size:
+                break
@@ -0,0 +1,270 @@
+"""Приближенные оценки по случайным блокам CSV экспорта (режим --sample)."""
+
+import csv
+import os
+from statistics import NormalDist
+import numpy as np
+from config import SAMPLING
+from utils import profile_stage
+from .event_table import EventTable
+from .usage_query import EventColumns
+from .usage_store import to_store_seconds
+
+
+PAID_KINDS = ('Included', 'On-Demand')
+TOKEN_COLUMNS = ('input_tokens', 'output_tokens', 'cache_read', 'cache_write')
+
+# До стольких блоков порядок - перестановка всех блоков, дальше - случайные
+# номера без повторов (перестановка архива в сотни гигабайт заняла бы гигабайты)
+PERMUTATION_LIMIT = 1 << 22
+
+
+class BlockSample:
+    """
+    Кластерная выборка строк CSV: случайные блоки файла по block_bytes байт.
+
+    Каждый блок читается одним seek и одним read, поэтому выборка из
+    архива в десятки гигабайт набирается за секунды. Строка принадлежит
+    блоку, в котором начинается, значит каждая строка файла попадает
+    ровно в один блок. Тогда сумма по файлу без смещения оценивается как
+    M / m × (сумма по m прочитанным блокам из M), а дисперсия оценки -
+    M² (1 - m/M) s² / m, где s² - выборочная дисперсия сумм блоков.
+    Строки одного блока идут подряд по времени и похожи друг на друга;
+    разброс между блоками это учитывает, разброс между строками - нет.
+    Если выборка покрыла все блоки, оценки точные и интервалы нулевые.
+    """
+
+    def __init__(self, columns, blocks, sampled_blocks, n_blocks, file_size, bytes_read):
+        """
+        Инициализирует выборку.
+
+        Args:
+            columns: EventColumns строк выборки (в порядке чтения, не по времени)
+            blocks: Порядковый номер прочитанного блока (0..sampled_blocks-1) для каждой строки
+            sampled_blocks: Прочитано блоков (m)
+            n_blocks: Всего блоков в файле (M)
+            file_size: Размер файла, байт
+            bytes_read: Прочитано байт
+        """
+        self.columns = columns
+        self.blocks = blocks
+        self.sampled_blocks = sampled_blocks
+        self.n_blocks = n_blocks
+        self.file_size = file_size
+        self.bytes_read = bytes_read
+
+    def __len__(self):
+        return len(self.blocks)
+
+    @property
+    def exact(self):
+        """Выборка покрыла весь файл: оценки совпадают с точным расчетом."""
+        return self.sampled_blocks >= self.n_blocks
+
+    @classmethod
+    def from_csv(cls, csv_file, rows=None, block_bytes=None, seed=None):
+        """
+        Набирает выборку из случайных блоков CSV.
+
+        Блоки берутся в случайном порядке без повторов, пока в выборке
+        не окажется rows строк (последний блок дочитывается целиком).
+
+        Args:
+            csv_file: Путь к CSV файлу
+            rows: Размер выборки в строках (по умолчанию SAMPLING['rows'])
+            block_bytes: Размер блока, байт (по умолчанию SAMPLING['block_bytes'])
+            seed: Зерно генератора (по умолчанию SAMPLING['seed'])
+
+        Returns:
+            BlockSample: Выборка (проблемные строки пропускаются)
+        """
+        rows = rows or SAMPLING['rows']
+        block_bytes = block_bytes or SAMPLING['block_bytes']
+        seed = SAMPLING['seed'] if seed is None else seed
+        file_size = os.path.getsize(csv_file)
+
+        events, blocks = [], []
+        with profile_stage('Чтение блоков выборки'), open(csv_file, 'rb') as f:
+            header = next(csv.reader([f.readline().decode('utf-8')]), [])
+            data_start = f.tell()
+            n_blocks = max(1, -(-(file_size - data_start) // block_bytes))
+            bytes_read = data_start
+
+            sampled = 0
+            for block in cls._random_blocks(n_blocks, np.random.default_rng(seed)):
+                if len(events) >= rows:
+                    break
+                start = data_start + block * block_bytes
+                data = cls._read_block(f, start, start + block_bytes, data_start)
+                bytes_read += len(data)
+                for row in csv.DictReader(data.decode('utf-8').splitlines(), fieldnames=header):
+                    event = EventTable.parse_row(row)
+                    if event is not None:
+                        events.append(event)
+                        blocks.append(sampled)
+                sampled += 1
+
+        with profile_stage('Колоночная копия выборки'):
+            columns = EventColumns.from_events(events)
+        return cls(columns, np.array(blocks, dtype=np.int64), sampled, n_blocks, file_size, bytes_read)
+
+    @staticmethod
+    def _random_blocks(n_blocks, rng):
+        """Номера блоков в случайном порядке без повторов."""
+        if n_blocks <= PERMUTATION_LIMIT:
+            yield from rng.permutation(n_blocks).tolist()
+            return
+        seen = set()
+        while len(seen) < n_blocks:
+            for block in rng.integers(n_blocks, size=1024).tolist():
+                if block not in seen:
+                    seen.add(block)
+                    yield block
+
+    @staticmethod
+    def _read_block(f, start, end, data_start):
+        """Байты строк, которые начинаются в [start, end)."""
+        if start > data_start:
+            # Дочитываем строку, начавшуюся раньше: она принадлежит предыдущему блоку
+            f.seek(start - 1)
+            f.readline()
+        else:
+            f.seek(start)
+        position = f.tell()
+        if position >= end:
+            return b''
+        data = f.read(end - position)
+        if data and not data.endswith(b'\n'):
+            data += f.readline()
+        return data
+
+    def estimate(self, since=None, until=None, confidence=None):
+        """
+        Оценки итогов, статистики по моделям и матриц день недели × час.
+
+        Каждая оценка - {'value': ..., 'margin': ...}, margin - половина
+        доверительного интервала (0 для точного расчета, None, если блок
+        в выборке один и разброс оценить нельзя).
+
+        Args:
+            since: Начало периода (naive datetime UTC+7)
+            until: Конец периода (не включительно)
+            confidence: Уровень доверия (по умолчанию SAMPLING['confidence'])
+
+        Returns:
+            dict: Параметры выборки, 'rows', 'total_requests', 'total_cost',
+                  'errors', 'models' и 'weekday_hour' (матрицы 7 × 24 и их margin)
+        """
+        confidence = confidence or SAMPLING['confidence']
+        z = NormalDist().inv_cdf(0.5 + confidence / 2)
+        columns = self.columns
+        kinds = columns.kinds
+
+        rows = np.ones(len(self), dtype=bool)
+        if since is not None:
+            rows &= columns.ts >= to_store_seconds(since)
+        if until is not None:
+            rows &= columns.ts < to_store_seconds(until)
+        paid = rows & np.isin(columns.kind_codes, [i for i, kind in enumerate(kinds) if kind in PAID_KINDS])
+        errors = rows & np.isin(columns.kind_codes, [i for i, kind in enumerate(kinds) if kind == 'Rate Limited'])
+        cost = columns.values['cost']
+        no_cells = np.zeros(len(self), dtype=np.int64)
+
+        # Модели: суммы по (блок, модель)
+        n_models = len(columns.models)
+        by_model = {
+            'requests': self._totals(paid, columns.model_codes, n_models),
+            'cost': self._totals(paid, columns.model_codes, n_models, cost),
+            'errors': self._totals(errors, columns.model_codes, n_models),
+            **{name: self._totals(rows, columns.model_codes, n_models, columns.values[name])
+               for name in TOKEN_COLUMNS},
+        }
+        estimates = {name: self._intervals(self._estimate(totals, z)) for name, totals in by_model.items()}
+        estimates['cost_per_request'] = self._intervals(self._ratio(by_model['cost'], by_model['requests'], z))
+        seen = np.bincount(columns.model_codes[rows], minlength=n_models)
+
+        models = {model: {name: intervals[code] for name, intervals in estimates.items()}
+                  for code, model in enumerate(columns.models) if seen[code]}
+
+        # День недели × час (как EventColumns.weekday_hour)
+        ts = columns.ts
+        cells = ((ts // 86400 + 3) % 7) * 24 + ts // 3600 % 24
+        requests_cells, requests_margin = self._estimate(self._totals(paid, cells, 7 * 24), z)
+        cost_cells, cost_margin = self._estimate(self._totals(paid, cells, 7 * 24, cost), z)
+        paid_cells, _ = self._estimate(self._totals(paid & (cost > 0), cells, 7 * 24), z)
+
+        def matrix(values):
+            return None if values is None else np.asarray(values).reshape(7, 24).tolist()
+
+        return {
+            'exact': self.exact,
+            'confidence': confidence,
+            'sample_rows': int(rows.sum()),
+            'sampled_blocks': self.sampled_blocks,
+            'n_blocks': self.n_blocks,
+            'bytes_read': self.bytes_read,
+            'file_size': self.file_size,
+            'rows': self._intervals(self._estimate(self._totals(rows, no_cells, 1), z))[0],
+            'total_requests': self._intervals(self._estimate(self._totals(paid, no_cells, 1), z))[0],
+            'total_cost': self._intervals(self._estimate(self._totals(paid, no_cells, 1, cost), z))[0],
+            'errors': self._intervals(self._estimate(self._totals(errors, no_cells, 1), z))[0],
+            'models': models,
+            'weekday_hour': {
+                'requests': matrix(requests_cells),
+                'cost': matrix(cost_cells),
+                'paid_requests': matrix(paid_cells),
+                'requests_margin': matrix(requests_margin),
+                'cost_margin': matrix(cost_margin),
+            },
+        }
+
+    def _totals(self, mask, cells, n_cells, weights=None):
+        """Суммы (или количества) по (блок выборки, ячейка): матрица m × n_cells."""
+        size = self.sampled_blocks * n_cells
+        index = self.blocks[mask] * n_cells + cells[mask]
+        totals = np.bincount(index, weights=None if weights is None else weights[mask], minlength=size)
+        return totals.astype(np.float64).reshape(self.sampled_blocks, n_cells)
+
+    def _estimate(self, totals, z):
+        """
+        Оценка сумм по файлу и половины интервала для каждой ячейки.
+
+        Returns:
+            tuple: (оценки, margin) - массивы длины n_cells; margin None,
+                   если блок в выборке один
+        """
+        m, n = self.sampled_blocks, self.n_blocks
+        values = totals.sum(axis=0) * (n / m)
+        if self.exact:
+            return values, np.zeros_like(values)
+        if m < 2:
+            return values, None
+        variance = n * n * (1 - m / n) * totals.var(axis=0, ddof=1) / m
+        return values, z * np.sqrt(variance)
+
+    def _ratio(self, numerator, denominator, z):
+        """
+        Оценка отношения сумм (например, стоимость на запрос) и половина интервала.
+
+        Дисперсия - по линеаризации: разброс между блоками остатков
+        y - R x, деленный на средний знаменатель блока в квадрате.
+        """
+        m, n = self.sampled_blocks, self.n_blocks
+        x = denominator.sum(axis=0)
+        ratio = np.divide(numerator.sum(axis=0), x, out=np.zeros_like(x), where=x > 0)
+        if self.exact:
+            return ratio, np.zeros_like(ratio)
+        if m < 2:
+            return ratio, None
+        residuals = numerator - ratio * denominator
+        mean_x = x / m
+        variance = (1 - m / n) * residuals.var(axis=0, ddof=1) / m
+        margin = np.divide(z * np.sqrt(variance), mean_x, out=np.zeros_like(x), where=mean_x > 0)
+        return ratio, margin
+
+    @staticmethod
+    def _intervals(estimate):
+        """Оценки ячеек списком {'value', 'margin'} (обычные float)."""
+        values, margins = estimate
+        return [{'value': float(value), 'margin': None if margins is None else float(margins[i])}
+                for i, value in enumerate(values)]
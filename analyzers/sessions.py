@@ -0,0 +1,172 @@
+"""Восстановление сессий работы по меткам времени запросов."""
+
+import numpy as np
+from config import SESSIONS
+from .usage_store import to_store_seconds
+
+
+PAID_KINDS = ('Included', 'On-Demand')
+
+
+class SessionTable:
+    """
+    Сессии: запросы подряд, между которыми пауза не длиннее gap_minutes.
+
+    Строится по отсортированным колонкам событий за O(N) без цикла
+    Python по строкам: границы сессий - np.flatnonzero(np.diff(ts) > gap),
+    стоимость и основная модель - bincount по (сессия, модель).
+    Учитываются все запросы (активность), стоимость - только Included
+    и On-Demand.
+    """
+
+    def __init__(self, start, end, requests, cost, model_codes, models, gap_minutes, rows=None):
+        """
+        Инициализирует таблицу сессий.
+
+        Args:
+            start: Секунды (UTC+7) первого запроса каждой сессии
+            end: Секунды последнего запроса
+            requests: Запросов в сессии
+            cost: Стоимость сессии
+            model_codes: Код основной модели (наибольшая стоимость, без стоимости - больше запросов)
+            models: Имена моделей по кодам
+            gap_minutes: Пауза, разделяющая сессии
+            rows: Номер первой строки каждой сессии в EventColumns (сессии идут
+                подряд, строки сессии i - rows[i]..rows[i] + requests[i] - 1);
+                None, если сессии строились по владельцам
+        """
+        self.start = start
+        self.end = end
+        self.requests = requests
+        self.cost = cost
+        self.model_codes = model_codes
+        self.models = models
+        self.gap_minutes = gap_minutes
+        self.rows = rows
+
+    def __len__(self):
+        return len(self.start)
+
+    @classmethod
+    def from_columns(cls, columns, gap_minutes=None, since=None, until=None, groups=None):
+        """
+        Делит события на сессии.
+
+        Args:
+            columns: EventColumns, отсортированные по времени
+            gap_minutes: Пауза между сессиями (по умолчанию SESSIONS['gap_minutes'])
+            since: Начало периода (naive datetime UTC+7)
+            until: Конец периода (не включительно)
+            groups: Коды владельцев событий (например, пользователей): сессии
+                строятся отдельно для каждого; None - все события одного владельца
+
+        Returns:
+            SessionTable
+        """
+        gap_minutes = gap_minutes or SESSIONS['gap_minutes']
+        ts = columns.ts
+        # События отсортированы: период - срез, найденный бинарным поиском
+        lo = 0 if since is None else int(np.searchsorted(ts, to_store_seconds(since)))
+        hi = len(ts) if until is None else int(np.searchsorted(ts, to_store_seconds(until)))
+        ts = ts[lo:hi]
+        model_codes = columns.model_codes[lo:hi]
+        paid = np.isin(columns.kind_codes[lo:hi], [i for i, kind in enumerate(columns.kinds) if kind in PAID_KINDS])
+        cost = np.where(paid, columns.values['cost'][lo:hi], 0.0)
+
+        if groups is not None:
+            # Внутри владельца события остаются по времени (стабильная сортировка)
+            groups = np.asarray(groups)[lo:hi]
+            order = np.argsort(groups, kind='stable')
+            ts, model_codes, cost, groups = ts[order], model_codes[order], cost[order], groups[order]
+        boundary = np.diff(ts) > gap_minutes * 60
+        if groups is not None:
+            boundary |= np.diff(groups) != 0
+
+        n = len(ts)
+        if n == 0:
+            empty = np.array([], dtype=np.int64)
+            return cls(empty, empty, empty, np.array([]), empty, columns.models, gap_minutes, rows=empty)
+
+        starts = np.r_[0, np.flatnonzero(boundary) + 1]
+        ends = np.r_[starts[1:], n] - 1
+        requests = ends - starts + 1
+        n_sessions, n_models = len(starts), len(columns.models)
+
+        session_ids = np.repeat(np.arange(n_sessions), requests)
+        cells = session_ids * n_models + model_codes
+        cost_by_model = np.bincount(cells, weights=cost, minlength=n_sessions * n_models).reshape(n_sessions, n_models)
+        requests_by_model = np.bincount(cells, minlength=n_sessions * n_models).reshape(n_sessions, n_models)
+        session_cost = cost_by_model.sum(axis=1)
+        dominant = np.where(session_cost > 0, cost_by_model.argmax(axis=1), requests_by_model.argmax(axis=1))
+
+        return cls(ts[starts], ts[ends], requests, session_cost, dominant, columns.models, gap_minutes,
+                   rows=lo + starts if groups is None else None)
+
+    @property
+    def duration_minutes(self):
+        """Длительность сессий в минутах (от первого до последнего запроса)."""
+        return (self.end - self.start) / 60
+
+    @property
+    def cost_per_minute(self):
+        """Стоимость минуты сессии (длительность не меньше SESSIONS['min_rate_minutes'])."""
+        return self.cost / np.maximum(self.duration_minutes, SESSIONS['min_rate_minutes'])
+
+    def summary(self, top=None):
+        """
+        Сводка по сессиям для статистики и дашборда.
+
+        Args:
+            top: Сколько самых дорогих сессий включить (по умолчанию SESSIONS['shown'])
+
+        Returns:
+            dict | None: Количество, перцентили длительности, запросов и стоимости,
+                         самые дорогие сессии; None, если сессий нет
+        """
+        if len(self) == 0:
+            return None
+        top = SESSIONS['shown'] if top is None else top
+        duration, cost_per_minute = self.duration_minutes, self.cost_per_minute
+
+        def percentiles(values):
+            p50, p90 = np.percentile(values, [50, 90])
+            return {'mean': float(values.mean()), 'p50': float(p50), 'p90': float(p90), 'max': float(values.max())}
+
+        most_expensive = np.argsort(-self.cost, kind='stable')[:top]
+        return {
+            'gap_minutes': self.gap_minutes,
+            'count': len(self),
+            'total_hours': float(duration.sum() / 60),
+            'duration_minutes': percentiles(duration),
+            'requests': percentiles(self.requests),
+            'cost': percentiles(self.cost),
+            'cost_per_minute': percentiles(cost_per_minute),
+            'top': [
+                {
+                    'start': self.format_time(self.start[i]),
+                    'end': self.format_time(self.end[i]),
+                    'duration_minutes': float(duration[i]),
+                    'requests': int(self.requests[i]),
+                    'cost': float(self.cost[i]),
+                    'model': self.models[self.model_codes[i]],
+                    'cost_per_minute': float(cost_per_minute[i]),
+                }
+                for i in most_expensive
+            ],
+        }
+
+    def chart_data(self):
+        """Колонки сессий обычными списками (аргументы графиков для процесса рендеринга)."""
+        return {
+            'duration_minutes': self.duration_minutes.tolist(),
+            'requests': self.requests.tolist(),
+            'cost': self.cost.tolist(),
+            'model_codes': self.model_codes.tolist(),
+            'models': list(self.models),
+            'gap_minutes': self.gap_minutes,
+        }
+
+    @staticmethod
+    def format_time(seconds):
+        """Секунды UTC+7 в строку 'YYYY-MM-DD HH:MM'."""
+        return str(np.datetime64(int(seconds), 's'))[:16].replace('T', ' ')
@@ -0,0 +1,303 @@
+"""Онлайн-детектор всплесков расходов по моделям."""
+
+import json
+import math
+from datetime import datetime
+import numpy as np
+from config import SPIKE_DETECTION
+from .usage_store import to_store_seconds
+
+
+# MAD -> стандартное отклонение для нормального распределения
+MAD_SCALE = 1.4826
+
+PAID_KINDS = ('Included', 'On-Demand')
+
+# Наибольший множитель rate ** -n внутри блока decay_scan (e ** 200)
+MAX_LOG_WEIGHT = 200.0
+
+
+def decay_scan(steps, values, start, rate):
+    """
+    Считает y_i = rate ** steps_i * y_(i-1) + values_i для всех i сразу.
+
+    Решение - сумма values_j с весами rate ** (n_i - n_j), где n -
+    накопленные шаги, то есть cumsum. Веса берутся относительно конца
+    блока, а блок не длиннее MAX_LOG_WEIGHT в показателе, поэтому
+    rate ** -n не переполняется; блоков столько, во сколько раз история
+    длиннее ~27 суток 10-минутных бакетов (при alpha 0.05).
+
+    Args:
+        steps: Шаги от предыдущего значения (целые >= 1)
+        values: Добавки values_i
+        start: y_(-1)
+        rate: Множитель за один шаг (0 < rate < 1)
+
+    Returns:
+        np.ndarray: y_i
+    """
+    n = np.cumsum(steps)
+    y = np.empty(len(values))
+    limit = max(1, int(MAX_LOG_WEIGHT / -math.log(rate)))
+    carry, base, i = start, 0, 0
+    while i < len(values):
+        j = int(np.searchsorted(n, n[i] + limit, side='right'))
+        block, end = n[i:j], n[j - 1]
+        sums = np.cumsum(values[i:j] * rate ** (end - block))
+        y[i:j] = carry * rate ** (block - base) + sums * rate ** (block - end)
+        carry, base, i = y[j - 1], end, j
+    return y
+
+
+class ModelBaseline:
+    """
+    Статистика ряда одной модели: EWMA по всем бакетам, медиана/MAD - по активным.
+
+    EWMA среднее/дисперсия учитывают и пустые бакеты (простой снижает
+    ожидаемый расход), но пропуск из g нулей применяется сразу:
+    среднее умножается на (1 - alpha) ** g. Медиана и MAD считаются
+    по последним window бакетам, где модель тратила деньги: у редко
+    используемой модели медиана всех бакетов - ноль, и любой запрос
+    дороже min_cost выглядел бы всплеском.
+    """
+
+    __slots__ = ('mean', 'var', 'count', 'last', 'recent')
+
+    def __init__(self):
+        self.mean = 0.0
+        self.var = 0.0
+        self.count = 0  # активных бакетов
+        self.last = None  # номер последнего активного бакета
+        self.recent = np.empty(0)  # стоимости последних активных бакетов (не больше window)
+
+
+class SpikeDetector:
+    """
+    Находит всплески стоимости по моделям в потоке 10-минутных бакетов.
+
+    События подаются порциями в порядке времени (весь анализ сразу или
+    новые строки в режиме --watch). Последний бакет остается открытым,
+    пока не придут более поздние события: в него еще могут попасть
+    запросы. Закрытые бакеты обрабатываются по моделям целыми массивами:
+    EWMA - линейная рекурсия с затуханием за пропуски (decay_scan),
+    медиана/MAD окна активных бакетов считаются только для бакетов
+    дороже min_cost. Бакет сравнивается со статистикой модели до того,
+    как попадает в нее.
+    """
+
+    def __init__(self, bucket_minutes=None, window=None, alpha=None, threshold=None,
+                 min_cost=None, min_scale=None, warmup=None):
+        """
+        Инициализирует детектор (значения по умолчанию - из SPIKE_DETECTION).
+
+        Args:
+            bucket_minutes: Размер бакета в минутах
+            window: Активных бакетов модели в окне медианы/MAD
+            alpha: Вес нового бакета в EWMA
+            threshold: Порог отклонения в масштабах
+            min_cost: Минимальная стоимость бакета для срабатывания
+            min_scale: Нижняя граница масштаба отклонения
+            warmup: Активных бакетов модели до первых срабатываний
+        """
+        config = SPIKE_DETECTION
+        self.step = int((bucket_minutes or config['bucket_minutes']) * 60)
+        self.window = window or config['window']
+        self.alpha = alpha or config['alpha']
+        self.threshold = threshold or config['threshold']
+        self.min_cost = config['min_cost'] if min_cost is None else min_cost
+        self.min_scale = min_scale or config['min_scale']
+        self.warmup = max(1, config['warmup'] if warmup is None else warmup)
+        self._baselines = {}
+        self._models = []
+        self._codes = {}
+        self._bucket = None
+        self._open = {}
+
+    def feed(self, columns, until=None):
+        """
+        Добавляет события Included/On-Demand из колоночной копии.
+
+        Args:
+            columns: EventColumns, отсортированные по времени
+            until: Учитывать только события раньше until (naive datetime UTC+7)
+
+        Returns:
+            list: Всплески в бакетах, закрытых этой порцией
+        """
+        paid = np.isin(columns.kind_codes, [i for i, kind in enumerate(columns.kinds) if kind in PAID_KINDS])
+        if until is not None:
+            paid &= columns.ts < to_store_seconds(until)
+        buckets = columns.ts[paid] - columns.ts[paid] % self.step
+        codes = np.array([self._model_code(model) for model in columns.models], dtype=np.int64)
+        codes = codes[columns.model_codes[paid]] if len(codes) else np.empty(0, dtype=np.int64)
+        costs = columns.values['cost'][paid]
+        if self._bucket is not None:
+            # Бакеты до открытого уже закрыты (события старше обработанных)
+            later = buckets >= self._bucket
+            buckets, codes, costs = buckets[later], codes[later], costs[later]
+            buckets = np.r_[np.full(len(self._open), self._bucket), buckets]
+            codes = np.r_[np.array([self._model_code(model) for model in self._open], dtype=np.int64), codes]
+            costs = np.r_[np.array(list(self._open.values()), dtype=float), costs]
+        if len(buckets) == 0:
+            return []
+
+        # Суммы по парам (бакет, модель): только непустые пары, без матрицы бакеты × модели
+        keys, inverse = np.unique(buckets * len(self._models) + codes, return_inverse=True)
+        sums = np.bincount(inverse, weights=costs, minlength=len(keys))
+        pair_buckets, pair_codes = np.divmod(keys, len(self._models))
+
+        last = pair_buckets[-1]
+        closed = pair_buckets < last
+        self._bucket = int(last)
+        self._open = {self._models[code]: cost for code, cost in zip(pair_codes[~closed].tolist(),
+                                                                     sums[~closed].tolist())}
+        return self._close(pair_buckets[closed], pair_codes[closed], sums[closed])
+
+    def flush(self):
+        """
+        Закрывает последний бакет (конец полного анализа).
+
+        Returns:
+            list: Всплески в последнем бакете
+        """
+        if self._bucket is None:
+            return []
+        codes = np.array([self._model_code(model) for model in self._open], dtype=np.int64)
+        spikes = self._close(np.full(len(codes), self._bucket), codes, np.array(list(self._open.values())))
+        self._bucket, self._open = None, {}
+        return spikes
+
+    def is_behind(self, moment):
+        """
+        Проверяет, что бакет момента уже закрыт: такие события feed пропустит.
+
+        Args:
+            moment: naive datetime UTC+7
+        """
+        ts = to_store_seconds(moment)
+        return self._bucket is not None and ts - ts % self.step < self._bucket
+
+    def _model_code(self, model):
+        """Постоянный номер модели детектора (в разных порциях EventColumns номера разные)."""
+        if model not in self._codes:
+            self._codes[model] = len(self._models)
+            self._models.append(model)
+            self._baselines[model] = ModelBaseline()
+        return self._codes[model]
+
+    def _close(self, buckets, codes, costs):
+        """Проверяет закрытые бакеты по статистике каждой модели и добавляет их в нее."""
+        spikes = []
+        for code in np.unique(codes).tolist():
+            model = self._models[code]
+            selected = codes == code
+            spikes.extend(self._close_model(model, self._baselines[model], buckets[selected], costs[selected]))
+        spikes.sort(key=lambda spike: (spike['ts'], spike['model']))
+        return spikes
+
+    def _close_model(self, model, baseline, buckets, costs):
+        """
+        Обрабатывает активные бакеты одной модели (по возрастанию времени).
+
+        EWMA после бакета i: m_i = r ** k_i * m_(i-1) + alpha * x_i, где
+        r = 1 - alpha, k_i - бакетов от предыдущего активного; дисперсия -
+        такая же рекурсия. Перед сравнением статистика сдвигается через
+        k_i - 1 нулевых бакетов: среднее умножается на d = r ** (k_i - 1),
+        дисперсия становится d * (v + m ** 2 * (1 - d)).
+        """
+        index = buckets // self.step
+        if baseline.count == 0:
+            # Первый бакет модели задает среднее и не проверяется
+            baseline.mean, baseline.var, baseline.count = float(costs[0]), 0.0, 1
+            baseline.last, baseline.recent = int(index[0]), costs[:1].copy()
+            index, buckets, costs = index[1:], buckets[1:], costs[1:]
+        if len(costs) == 0:
+            return []
+
+        alpha, rate = self.alpha, 1 - self.alpha
+        steps = np.diff(index, prepend=baseline.last)
+        decay = rate ** (steps - 1)
+        means = decay_scan(steps, alpha * costs, baseline.mean, rate)
+        previous_means = np.r_[baseline.mean, means[:-1]]
+        expected = decay * previous_means
+        gap_shift = previous_means ** 2 * (1 - decay)
+        variances = decay_scan(steps, rate * (decay * gap_shift + alpha * (costs - expected) ** 2), baseline.var, rate)
+        expected_var = decay * (np.r_[baseline.var, variances[:-1]] + gap_shift)
+
+        # Медиана/MAD - только у бакетов, которые могут оказаться всплеском
+        history = np.r_[baseline.recent, costs]
+        counts = baseline.count + np.arange(len(costs))
+        candidates = np.flatnonzero((costs >= self.min_cost) & (counts >= self.warmup))
+        spikes = []
+        if len(candidates):
+            positions = len(baseline.recent) + candidates[:, None] + np.arange(-self.window, 0)
+            windows = np.where(positions >= 0, history[np.maximum(positions, 0)], np.nan)
+            medians = np.nanmedian(windows, axis=1)
+            mads = np.nanmedian(np.abs(windows - medians[:, None]), axis=1)
+            scales = np.maximum(np.maximum(MAD_SCALE * mads, np.sqrt(expected_var[candidates])), self.min_scale)
+            scores = (costs[candidates] - medians) / scales
+            for i in np.flatnonzero(scores >= self.threshold).tolist():
+                position = candidates[i]
+                bucket = int(buckets[position])
+                spikes.append({
+                    'bucket': str(np.datetime64(bucket, 's'))[:16],
+                    'ts': bucket,
+                    'model': model,
+                    'cost': round(float(costs[position]), 4),
+                    'median': round(float(medians[i]), 4),
+                    'ewma': round(float(expected[position]), 4),
+                    'scale': round(float(scales[i]), 4),
+                    'score': round(float(scores[i]), 1),
+                })
+
+        baseline.mean, baseline.var = float(means[-1]), float(variances[-1])
+        baseline.count += len(costs)
+        baseline.last = int(index[-1])
+        baseline.recent = history[-self.window:].copy()
+        return spikes
+
+
+class SpikeNotifier:
+    """
+    Отправляет всплески в JSON lines файл и/или на локальный вебхук.
+
+    Файл дописывается (одна строка JSON на всплеск). На вебхук уходит
+    POST с {'spikes': [...]}; ошибка доставки печатается и не прерывает анализ.
+    """
+
+    def __init__(self, jsonl_path=None, webhook_url=None, timeout=None):
+        """
+        Инициализирует отправитель.
+
+        Args:
+            jsonl_path: Файл JSON lines
+            webhook_url: URL вебхука
+            timeout: Таймаут запроса к вебхуку, секунд
+        """
+        self.jsonl_path = jsonl_path
+        self.webhook_url = webhook_url
+        self.timeout = timeout or SPIKE_DETECTION['webhook_timeout']
+
+    def emit(self, spikes):
+        """Отправляет всплески (пустой список ничего не делает)."""
+        if not spikes:
+            return
+        detected_at = datetime.now().isoformat(timespec='seconds')
+        records = [dict(spike, detected_at=detected_at) for spike in spikes]
+
+        if self.jsonl_path:
+            with open(self.jsonl_path, 'a', encoding='utf-8') as f:
+                f.writelines(json.dumps(record, ensure_ascii=False) + '\n' for record in records)
+
+        if self.webhook_url:
+            # urllib.request импортируется долго, а нужен только с вебхуком
+            import urllib.request
+            request = urllib.request.Request(
+                self.webhook_url, data=json.dumps({'spikes': records}, ensure_ascii=False).encode('utf-8'),
+                headers={'Content-Type': 'application/json'}, method='POST',
+            )
+            try:
+                with urllib.request.urlopen(request, timeout=self.timeout):
+                    pass
+            except OSError as e:
+                print(f"[!] Вебхук всплесков недоступен ({self.webhook_url}): {e}")
@@ -0,0 +1,201 @@
+"""Куб агрегатов для графиков таймлайна."""
+
+import numpy as np
+from datetime import datetime, timedelta
+from config import TIMELINE_WINDOWS, WORKING_HOURS, WEEKEND_DAYS, HOLIDAYS
+from .timeline_pyramid import TimelinePyramid
+
+
+UTC_OFFSET = timedelta(hours=7)
+
+
+def local_now():
+    """Возвращает текущее время в UTC+7 как naive datetime."""
+    return datetime.now() + UTC_OFFSET
+
+
+def to_epoch_seconds(timestamps):
+    """Переводит список naive datetime в массив секунд (int64)."""
+    return np.array(timestamps, dtype='datetime64[s]').astype(np.int64)
+
+
+class WorkCalendar:
+    """
+    Календарь рабочих часов, выходных и праздников в виде булевых масок.
+
+    Маски строятся один раз, а проверка бакетов выполняется векторно
+    по целочисленным меткам времени (секунды, UTC+7).
+    """
+
+    def __init__(self, working_hours=None, weekend_days=None, holidays=None):
+        """
+        Инициализирует календарь.
+
+        Args:
+            working_hours: 24 флага рабочих часов, по умолчанию WORKING_HOURS
+            weekend_days: 7 флагов выходных (пн..вс), по умолчанию WEEKEND_DAYS
+            holidays: Праздничные дни 'YYYY-MM-DD', по умолчанию HOLIDAYS
+        """
+        if working_hours is None:
+            working_hours = WORKING_HOURS
+        if weekend_days is None:
+            weekend_days = WEEKEND_DAYS
+        if holidays is None:
+            holidays = HOLIDAYS
+        self.working_hour_mask = np.array(working_hours, dtype=bool)
+        self.weekend_mask = np.array(weekend_days, dtype=bool)
+        self.holiday_days = np.array(holidays, dtype='datetime64[D]').astype(np.int64)
+
+    def is_night(self, seconds):
+        """Маска нерабочих часов для массива меток."""
+        return ~self.working_hour_mask[(seconds % 86400) // 3600]
+
+    def is_day_off(self, seconds):
+        """Маска выходных и праздничных дней для массива меток."""
+        days = seconds // 86400
+        # 1970-01-01 - четверг (weekday=3)
+        return self.weekend_mask[(days + 3) % 7] | np.isin(days, self.holiday_days)
+
+
+class TimelineCube:
+    """
+    Агрегаты стоимости и запросов: окно × бакет × модель.
+
+    Окна с фиксированным шагом берутся из TimelinePyramid разностью
+    префиксных сумм, окно "весь период" раскладывается через np.bincount,
+    а кумулятивные суммы считаются одним np.cumsum сразу для стоимости
+    и запросов.
+    """
+
+    METRICS = ('cost', 'requests')
+
+    def __init__(self, all_timestamps, now=None, windows=None):
+        """
+        Инициализирует куб.
+
+        Args:
+            all_timestamps: Отсортированный список (datetime, model, cost)
+            now: Конец окон (naive UTC+7), по умолчанию - текущее время
+            windows: Описание окон, по умолчанию TIMELINE_WINDOWS
+        """
+        model_names = sorted({item[1] for item in all_timestamps})
+        model_index = {model: i for i, model in enumerate(model_names)}
+        self._init_arrays(to_epoch_seconds([item[0] for item in all_timestamps]),
+                          np.array([model_index[item[1]] for item in all_timestamps], dtype=np.int64),
+                          np.array([item[2] for item in all_timestamps], dtype=float),
+                          model_names, now, windows)
+
+    @classmethod
+    def from_columns(cls, columns, since=None, until=None, now=None, windows=None):
+        """
+        Строит куб по колонкам событий без списка кортежей.
+
+        Берутся запросы Included и On-Demand за [since, until) - те же,
+        что CSVAnalyzer кладет в all_timestamps.
+
+        Args:
+            columns: EventColumns, отсортированные по времени
+            since: Начало периода (naive datetime UTC+7), None - с первого события
+            until: Конец периода (не включительно), None - до последнего события
+            now: Конец окон (naive UTC+7), по умолчанию - текущее время
+            windows: Описание окон, по умолчанию TIMELINE_WINDOWS
+        """
+        lo = int(np.searchsorted(columns.ts, to_epoch_seconds([since])[0])) if since is not None else 0
+        hi = int(np.searchsorted(columns.ts, to_epoch_seconds([until])[0])) if until is not None else len(columns.ts)
+        rows = slice(lo, max(lo, hi))
+        paid = np.isin(columns.kind_codes[rows],
+                       [i for i, kind in enumerate(columns.kinds) if kind in ('Included', 'On-Demand')])
+        codes = columns.model_codes[rows][paid]
+        # Модели периода в порядке columns.models (он уже отсортирован)
+        used = np.unique(codes)
+        remap = np.zeros(len(columns.models), dtype=np.int64)
+        remap[used] = np.arange(len(used))
+
+        cube = cls.__new__(cls)
+        cube._init_arrays(columns.ts[rows][paid], remap[codes], columns.values['cost'][rows][paid],
+                          [columns.models[i] for i in used], now, windows)
+        return cube
+
+    def _init_arrays(self, timestamps, model_codes, costs, model_names, now, windows):
+        """Заполняет куб массивами событий."""
+        self.windows = windows or TIMELINE_WINDOWS
+        self.now = now or local_now()
+        self.model_names = model_names
+        self.timestamps = timestamps
+        self.model_codes = model_codes
+        self.costs = costs
+        self.pyramid = TimelinePyramid(self.timestamps, self.model_codes, self.costs, self.model_names)
+        self._cache = {}
+
+    def __getstate__(self):
+        """Состояние для pickle без построенных окон и уровней пирамиды (их дешевле пересчитать)."""
+        state = dict(self.__dict__)
+        state['_cache'] = {}
+        state['pyramid'] = TimelinePyramid(self.timestamps, self.model_codes, self.costs, self.model_names)
+        return state
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def window(self, name):
+        """
+        Возвращает агрегаты окна (строятся один раз и кэшируются).
+
+        Returns:
+            dict: 'starts' - начала бакетов (секунды), 'models' - имена моделей,
+                  'values'/'cumulative' - {'cost': (бакеты × модели), 'requests': ...}
+        """
+        if name not in self._cache:
+            self._cache[name] = self._build_window(self.windows[name])
+        return self._cache[name]
+
+    def full_range(self, step):
+        """
+        Возвращает агрегаты с шагом step секунд от первого до последнего события.
+
+        Args:
+            step: Шаг бакета в секундах (например, 600 для 10 минут)
+        """
+        name = ('full_range', step)
+        if name not in self._cache:
+            if len(self.timestamps) == 0:
+                return None
+            end = int(self.timestamps[-1])
+            buckets = end // step - int(self.timestamps[0]) // step + 1
+            self._cache[name] = self._build_window({'step': step, 'buckets': buckets, 'end': end})
+        return self._cache[name]
+
+    def _build_window(self, window):
+        """Раскладывает события по бакетам окна."""
+        step = window['step']
+        n_models = len(self.model_names)
+
+        if step is None:
+            # Весь период: группы с равным количеством запросов
+            total = len(self.timestamps)
+            bucket_size = max(1, total // max(1, min(window['buckets'], total)))
+            n_buckets = -(-total // bucket_size)
+            flat_idx = (np.arange(total) // bucket_size) * n_models + self.model_codes
+            size = n_buckets * n_models
+            starts = self.timestamps[::bucket_size]
+
+            values = np.empty((2, n_buckets, n_models))
+            values[0] = np.bincount(flat_idx, weights=self.costs, minlength=size).reshape(n_buckets, n_models)
+            values[1] = np.bincount(flat_idx, minlength=size).reshape(n_buckets, n_models)
+        else:
+            end = window.get('end', int(to_epoch_seconds([self.now])[0])) // step * step
+            n_buckets = window['buckets']
+            first = end - (n_buckets - 1) * step
+            starts = first + np.arange(n_buckets, dtype=np.int64) * step
+
+            buckets = self.pyramid.bucket_values(step, first, n_buckets)
+            values = np.stack([buckets[metric] for metric in self.METRICS]).astype(float)
+
+        cumulative = np.cumsum(values, axis=1)
+
+        return {
+            'starts': starts,
+            'models': self.model_names,
+            'values': dict(zip(self.METRICS, values)),
+            'cumulative': dict(zip(self.METRICS, cumulative)),
+        }
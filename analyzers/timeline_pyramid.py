@@ -0,0 +1,196 @@
+"""Многоуровневая пирамида временных рядов для запросов по диапазонам."""
+
+import numpy as np
+from datetime import datetime
+
+
+# Уровни пирамиды: (название, шаг в секундах, сдвиг начала бакета).
+# Недели начинаются с понедельника (1970-01-05 = 4 дня от эпохи).
+PYRAMID_LEVELS = (
+    ('1min', 60, 0),
+    ('10min', 600, 0),
+    ('1h', 3600, 0),
+    ('1d', 86400, 0),
+    ('1w', 7 * 86400, 4 * 86400),
+)
+
+
+class TimelinePyramid:
+    """
+    Стоимость и запросы по моделям на нескольких разрешениях.
+
+    Каждый уровень - непрерывные массивы префиксных сумм (модель × бакет)
+    от первого до последнего события. Сумма за любой диапазон бакетов -
+    разность двух элементов, поэтому запрос [since, until] на N точек
+    стоит O(N × моделей) независимо от количества событий.
+
+    Уровни строятся лениво при первом обращении (один np.bincount по
+    событиям), так что мелкие уровни не занимают память, пока не нужны.
+    """
+
+    def __init__(self, timestamps, model_codes, costs, model_names, levels=PYRAMID_LEVELS):
+        """
+        Инициализирует пирамиду.
+
+        Args:
+            timestamps: Отсортированные метки времени (секунды, UTC+7), int64
+            model_codes: Индексы моделей в model_names
+            costs: Стоимости запросов
+            model_names: Список названий моделей
+            levels: Уровни для выбора в query(), от мелкого к крупному
+        """
+        self.timestamps = np.asarray(timestamps, dtype=np.int64)
+        self.model_codes = np.asarray(model_codes, dtype=np.int64)
+        self.costs = np.asarray(costs, dtype=float)
+        self.model_names = list(model_names)
+        self.levels = levels
+        self._levels = {}
+
+    def level(self, step, offset=0):
+        """
+        Возвращает уровень с шагом step (строится один раз).
+
+        Returns:
+            dict: 'first' - индекс первого бакета, 'n' - количество бакетов,
+                  'cost'/'requests' - префиксные суммы (модели × (n + 1))
+        """
+        key = (step, offset)
+        if key not in self._levels:
+            self._levels[key] = self._build_level(step, offset)
+        return self._levels[key]
+
+    def bucket_values(self, step, first_start, n_buckets, offset=0):
+        """
+        Значения n_buckets бакетов по step секунд начиная с first_start.
+
+        Returns:
+            dict: {'cost': (бакеты × модели), 'requests': (бакеты × модели)}
+        """
+        first = (first_start - offset) // step
+        return self._range_sums(self.level(step, offset), first + np.arange(n_buckets + 1))
+
+    def query(self, since=None, until=None, points=200, res=None):
+        """
+        Агрегаты за диапазон [since, until), сведенные к points точкам.
+
+        Без res выбирается самый крупный уровень, на котором в диапазоне
+        не меньше points бакетов; точки - группы соседних бакетов.
+        С res уровень задан явно и каждый бакет - отдельная точка.
+
+        since и until не обязаны совпадать с границами бакетов: крайние
+        бакеты уровня обрезаются по сырым меткам времени (вычитаются
+        события до since и с until, их не больше, чем в одном бакете),
+        поэтому суммы точные для любого диапазона. 'starts' остаются
+        началами бакетов: первая и последняя точки могут покрывать
+        только часть своего бакета, точные границы - 'since' и 'until'.
+
+        Args:
+            since: Начало (datetime UTC+7 или секунды), по умолчанию первое событие
+            until: Конец (datetime UTC+7 или секунды), по умолчанию после последнего
+            points: Желаемое количество точек (с res - максимум бакетов)
+            res: Название уровня из levels, None - выбрать по points
+
+        Returns:
+            dict: 'level', 'starts' (секунды), 'since', 'until' (границы
+                  диапазона в секундах), 'models', 'cost', 'requests'
+                  (массивы точки × модели); None, если событий нет
+
+        Raises:
+            ValueError: Неизвестный res или бакетов уровня res больше points
+        """
+        if len(self.timestamps) == 0:
+            return None
+
+        since = self._to_seconds(since) if since is not None else int(self.timestamps[0])
+        until = self._to_seconds(until) if until is not None else int(self.timestamps[-1]) + 1
+        span = max(1, until - since)
+
+        if res is not None:
+            levels = {level[0]: level for level in self.levels}
+            if res not in levels:
+                raise ValueError(f"Неизвестный уровень: {res} (доступны: {', '.join(levels)})")
+            name, step, offset = levels[res]
+        else:
+            name, step, offset = self.levels[0]
+            for level_name, level_step, level_offset in reversed(self.levels):
+                if span / level_step >= points:
+                    name, step, offset = level_name, level_step, level_offset
+                    break
+
+        first = (since - offset) // step
+        last = -(-(until - offset) // step)
+        n_level = last - first
+        if until <= since or n_level <= 0:
+            # Пустой диапазон: точек нет (иначе деление на n_points = 0)
+            n_models = len(self.model_names)
+            return {'cost': np.zeros((0, n_models)), 'requests': np.zeros((0, n_models), dtype=np.int64),
+                    'level': name, 'starts': np.zeros(0, dtype=np.int64), 'since': since, 'until': until,
+                    'models': self.model_names}
+        if res is not None:
+            if n_level > points:
+                raise ValueError(f"Слишком много точек ({n_level:,} > {points:,})")
+            n_points = n_level
+        else:
+            n_points = min(points, n_level)
+        boundaries = first + (np.arange(n_points + 1) * n_level) // n_points
+
+        result = self._range_sums(self.level(step, offset), boundaries)
+        starts = boundaries[:-1] * step + offset
+        head = self._raw_sums(int(starts[0]), since)
+        tail = self._raw_sums(until, int(boundaries[-1]) * step + offset)
+        for metric in ('cost', 'requests'):
+            result[metric][0] -= head[metric]
+            result[metric][-1] -= tail[metric]
+        result.update({
+            'level': name,
+            'starts': starts,
+            'since': since,
+            'until': until,
+            'models': self.model_names,
+        })
+        return result
+
+    def _raw_sums(self, since, until):
+        """Суммы по моделям за [since, until) по сырым событиям (для обрезки крайних бакетов)."""
+        lo, hi = np.searchsorted(self.timestamps, [since, until])
+        codes = self.model_codes[lo:max(lo, hi)]
+        n_models = len(self.model_names)
+        return {
+            'cost': np.bincount(codes, weights=self.costs[lo:max(lo, hi)], minlength=n_models),
+            'requests': np.bincount(codes, minlength=n_models),
+        }
+
+    def _build_level(self, step, offset):
+        """Раскладывает события по бакетам уровня и считает префиксные суммы."""
+        n_models = len(self.model_names)
+        if len(self.timestamps) == 0:
+            return {'first': 0, 'n': 0,
+                    'cost': np.zeros((n_models, 1)), 'requests': np.zeros((n_models, 1), dtype=np.int64)}
+
+        bucket = (self.timestamps - offset) // step
+        first = int(bucket[0])
+        n = int(bucket[-1]) - first + 1
+        # Индекс модель-major: ряд каждой модели лежит в памяти непрерывно
+        flat = self.model_codes * n + (bucket - first)
+
+        cost = np.zeros((n_models, n + 1))
+        requests = np.zeros((n_models, n + 1), dtype=np.int64)
+        cost[:, 1:] = np.cumsum(np.bincount(flat, weights=self.costs, minlength=n_models * n).reshape(n_models, n), axis=1)
+        requests[:, 1:] = np.cumsum(np.bincount(flat, minlength=n_models * n).reshape(n_models, n), axis=1)
+        return {'first': first, 'n': n, 'cost': cost, 'requests': requests}
+
+    @staticmethod
+    def _range_sums(level, boundaries):
+        """Суммы между соседними границами (глобальные индексы бакетов)."""
+        local = np.clip(boundaries - level['first'], 0, level['n'])
+        return {
+            metric: (level[metric][:, local[1:]] - level[metric][:, local[:-1]]).T
+            for metric in ('cost', 'requests')
+        }
+
+    @staticmethod
+    def _to_seconds(value):
+        """Переводит datetime (naive UTC+7) или число в секунды от эпохи."""
+        if isinstance(value, datetime):
+            return int(np.datetime64(value, 's').astype(np.int64))
+        return int(value)
@@ -0,0 +1,390 @@
+"""Запросы к событиям использования: фильтры, группировки и агрегаты."""
+
+import re
+import numpy as np
+from datetime import datetime, timedelta
+from .event_table import EventTable
+
+
+EPOCH = datetime(1970, 1, 1)
+
+# Числовые колонки событий; total_tokens - вычисляемая
+VALUE_COLUMNS = ('cost', 'input_tokens', 'output_tokens', 'cache_read', 'cache_write', 'total_tokens')
+
+# Шаги временных бакетов; недели начинаются с понедельника (1970-01-05 = 4 дня от эпохи)
+BUCKET_UNITS = {'min': 60, 'h': 3600, 'd': 86400, 'w': 7 * 86400}
+WEEK_OFFSET = 4 * 86400
+
+AGGREGATIONS = ('sum', 'count', 'mean', 'min', 'max', 'median')
+
+
+class EventColumns:
+    """
+    Типизированная колоночная копия событий, отсортированная по времени.
+
+    Время - секунды int64 (UTC+7, как в EventTable), модели и типы
+    запросов - целочисленные коды. Строится один раз на источник; все
+    запросы UsageQuery к нему работают со срезами этих массивов.
+    """
+
+    def __init__(self, ts, model_codes, models, kind_codes, kinds,
+                 input_tokens, output_tokens, cache_read, cache_write, cost):
+        """Инициализирует колонки (массивы одинаковой длины, ts отсортирован)."""
+        self.ts = ts
+        self.model_codes = model_codes
+        self.models = models
+        self.kind_codes = kind_codes
+        self.kinds = kinds
+        self.values = {
+            'input_tokens': input_tokens,
+            'output_tokens': output_tokens,
+            'cache_read': cache_read,
+            'cache_write': cache_write,
+            'cost': cost,
+        }
+
+    def __len__(self):
+        return len(self.ts)
+
+    @classmethod
+    def from_events(cls, events):
+        """
+        Строит колонки из UsageEvent (EventTable или список, отсортированный по времени).
+        """
+        events = list(events)
+        ts = np.array([event.date for event in events], dtype='datetime64[s]').astype(np.int64)
+        model_codes, models = cls._encode([event.model for event in events])
+        kind_codes, kinds = cls._encode([event.kind for event in events])
+        columns = {
+            name: np.fromiter((getattr(event, name) for event in events), dtype=np.int64, count=len(events))
+            for name in ('input_tokens', 'output_tokens', 'cache_read', 'cache_write')
+        }
+        cost = np.fromiter((event.cost for event in events), dtype=np.float64, count=len(events))
+        return cls(ts, model_codes, models, kind_codes, kinds, cost=cost, **columns)
+
+    @classmethod
+    def from_source(cls, source):
+        """
+        Приводит источник к EventColumns.
+
+        Args:
+            source: EventColumns, EventTable, UsageStore, путь к CSV/Parquet/Arrow
+                    или последовательность UsageEvent
+        """
+        from .usage_store import UsageStore
+        from .columnar_io import is_columnar, read_columns
+
+        if isinstance(source, EventColumns):
+            return source
+        if isinstance(source, EventTable):
+            return source.columns()
+        if isinstance(source, UsageStore):
+            return cls.from_store(source)
+        if isinstance(source, str):
+            if is_columnar(source):
+                return read_columns(source)
+            return EventTable.from_csv(source, show_progress=False).columns()
+        return cls.from_events(source)
+
+    @classmethod
+    def from_store(cls, store):
+        """Строит колонки из UsageStore одним запросом (без UsageEvent)."""
+        rows = store.conn.execute(
+            'SELECT ts, model, kind, input_tokens, output_tokens, cache_read, cache_write, cost '
+            'FROM events ORDER BY ts').fetchall()
+        if not rows:
+            empty = np.zeros(0, dtype=np.int64)
+            return cls(empty, empty, [], empty, [], empty, empty, empty, empty, np.zeros(0))
+
+        ts, models, kinds, input_tokens, output_tokens, cache_read, cache_write, cost = zip(*rows)
+        model_codes, models = cls._encode(models)
+        kind_codes, kinds = cls._encode(kinds)
+        return cls(
+            np.array(ts, dtype=np.int64), model_codes, models, kind_codes, kinds,
+            np.array(input_tokens, dtype=np.int64), np.array(output_tokens, dtype=np.int64),
+            np.array(cache_read, dtype=np.int64), np.array(cache_write, dtype=np.int64),
+            np.array(cost, dtype=np.float64),
+        )
+
+    @staticmethod
+    def _encode(values):
+        """Кодирует строки целыми числами; возвращает (коды, список значений)."""
+        names, codes = np.unique(np.array(values, dtype=object), return_inverse=True)
+        return codes.astype(np.int64), [str(name) for name in names]
+
+    def weekday_hour(self, kinds=('Included', 'On-Demand'), since=None, until=None):
+        """
+        Матрицы день недели × час (7 × 24) для хитмапов.
+
+        Args:
+            kinds: Учитываемые типы запросов
+            since: Начало периода (naive datetime UTC+7), None - с первого события
+            until: Конец периода (не включительно), None - до последнего события
+
+        Returns:
+            dict: 'requests', 'cost', 'paid_requests' (запросы со стоимостью > 0) - списки 7 × 24
+        """
+        lo = np.searchsorted(self.ts, int((since - EPOCH).total_seconds())) if since is not None else 0
+        hi = np.searchsorted(self.ts, int((until - EPOCH).total_seconds())) if until is not None else len(self.ts)
+        rows = slice(lo, max(lo, hi))
+        mask = np.isin(self.kind_codes[rows], [i for i, kind in enumerate(self.kinds) if kind in kinds])
+        ts = self.ts[rows][mask]
+        cost = self.values['cost'][rows][mask]
+        cells = ((ts // 86400 + 3) % 7) * 24 + ts // 3600 % 24
+
+        def matrix(counts):
+            return counts.reshape(7, 24).tolist()
+
+        return {
+            'requests': matrix(np.bincount(cells, minlength=7 * 24)),
+            'cost': matrix(np.bincount(cells, weights=cost, minlength=7 * 24)),
+            'paid_requests': matrix(np.bincount(cells[cost > 0], minlength=7 * 24)),
+        }
+
+    def column(self, name, rows):
+        """Значения колонки name для строк rows (срез или индексы)."""
+        if name == 'total_tokens':
+            return (self.values['input_tokens'][rows] + self.values['output_tokens'][rows]
+                    + self.values['cache_read'][rows])
+        if name not in self.values:
+            raise ValueError(f"Неизвестная колонка: {name} (доступны: {', '.join(VALUE_COLUMNS)})")
+        return self.values[name][rows]
+
+
+class UsageQuery:
+    """
+    Запрос к событиям: where() -> group_by() -> agg().
+
+        UsageQuery(events).where(model='gpt-5', since=start).group_by('model', '1h') \\
+            .agg(cost='sum', requests='count', p95_cost=('cost', 'p95'))
+
+    Источник - EventTable, UsageStore, путь к CSV/Parquet/Arrow или EventColumns;
+    колоночная копия строится один раз и общая для всех производных
+    запросов. Диапазон времени выбирается бинарным поиском по
+    отсортированному времени, фильтры и агрегаты считаются numpy по
+    срезу целиком. where() и group_by() возвращают новый запрос.
+    """
+
+    def __init__(self, source, filters=None, keys=()):
+        """
+        Инициализирует запрос.
+
+        Args:
+            source: EventTable, UsageStore, путь к CSV/Parquet/Arrow или EventColumns
+            filters: Фильтры (для производных запросов)
+            keys: Ключи группировки (для производных запросов)
+        """
+        self.columns = EventColumns.from_source(source)
+        self.filters = dict(filters or {})
+        self.keys = tuple(keys)
+
+    def where(self, model=None, kind=None, since=None, until=None):
+        """
+        Добавляет фильтры (повторный вызов уточняет предыдущие).
+
+        Args:
+            model: Модель или список моделей
+            kind: Тип запроса или список типов ('Included', 'On-Demand', 'Rate Limited')
+            since: Начало (naive datetime UTC+7)
+            until: Конец (naive datetime UTC+7, не включительно)
+
+        Returns:
+            UsageQuery: Новый запрос
+        """
+        filters = dict(self.filters)
+        for name, value in (('model', model), ('kind', kind)):
+            if value is not None:
+                values = {value} if isinstance(value, str) else set(value)
+                filters[name] = filters[name] & values if name in filters else values
+        if since is not None:
+            filters['since'] = max(since, filters['since']) if 'since' in filters else since
+        if until is not None:
+            filters['until'] = min(until, filters['until']) if 'until' in filters else until
+        return UsageQuery(self.columns, filters, self.keys)
+
+    def group_by(self, *keys):
+        """
+        Задает группировку.
+
+        Args:
+            keys: 'model', 'kind', 'hour' (час суток), 'weekday' (0 - понедельник)
+                  или временной бакет: '10min', '1h', '1d', '1w' (любое число единиц)
+
+        Returns:
+            UsageQuery: Новый запрос
+        """
+        for key in keys:
+            if key not in ('model', 'kind', 'hour', 'weekday'):
+                self._bucket_step(key)
+        return UsageQuery(self.columns, self.filters, keys)
+
+    def agg(self, **specs):
+        """
+        Считает агрегаты по группам.
+
+        Args:
+            specs: имя результата -> функция или (колонка, функция).
+                   Функции: sum, count, mean, min, max, median, pNN (перцентиль, например p95).
+                   Если колонка не указана, она совпадает с именем результата:
+                   cost='sum', requests='count', p95_cost=('cost', 'p95')
+
+        Returns:
+            list: Строки-словари (ключи группировки + агрегаты), отсортированные по ключам;
+                  без group_by - один словарь
+        """
+        plan = [self._parse_spec(name, spec) for name, spec in specs.items()]
+        rows = self._select()
+        n = len(rows) if isinstance(rows, np.ndarray) else rows.stop - rows.start
+
+        if not self.keys:
+            groups, n_groups = np.zeros(n, dtype=np.int64), 1
+            key_values = []
+        else:
+            groups, n_groups, key_values = self._groups(rows)
+
+        counts = np.bincount(groups, minlength=n_groups)
+        results = {}
+        for name, column, func in plan:
+            values = None if func == 'count' else self.columns.column(column, rows)
+            results[name] = self._aggregate(func, values, groups, n_groups, counts)
+
+        if not self.keys:
+            return {name: self._scalar(values[0]) for name, values in results.items()}
+
+        output = []
+        for i in range(n_groups):
+            row = {key: values[i] for key, values in zip(self.keys, key_values)}
+            row.update((name, self._scalar(values[i])) for name, values in results.items())
+            output.append(row)
+        return output
+
+    def _select(self):
+        """Строки под фильтрами: срез по времени, затем маска по модели и типу."""
+        ts = self.columns.ts
+        lo, hi = 0, len(ts)
+        if 'since' in self.filters:
+            lo = np.searchsorted(ts, self._seconds(self.filters['since']), side='left')
+        if 'until' in self.filters:
+            hi = np.searchsorted(ts, self._seconds(self.filters['until']), side='left')
+        rows = slice(lo, max(lo, hi))
+
+        mask = None
+        for name, codes, names in (('model', self.columns.model_codes, self.columns.models),
+                                   ('kind', self.columns.kind_codes, self.columns.kinds)):
+            if name not in self.filters:
+                continue
+            wanted = [i for i, value in enumerate(names) if value in self.filters[name]]
+            selected = np.isin(codes[rows], wanted)
+            mask = selected if mask is None else mask & selected
+        if mask is None:
+            return rows
+        return np.arange(rows.start, rows.stop)[mask]
+
+    def _groups(self, rows):
+        """
+        Номера групп для строк.
+
+        Returns:
+            tuple: (номер группы для каждой строки, количество групп, значения ключей по группам)
+        """
+        codes, decoders = [], []
+        for key in self.keys:
+            if key == 'model':
+                key_codes, decode = self.columns.model_codes[rows], self.columns.models.__getitem__
+            elif key == 'kind':
+                key_codes, decode = self.columns.kind_codes[rows], self.columns.kinds.__getitem__
+            elif key == 'hour':
+                key_codes, decode = self.columns.ts[rows] // 3600 % 24, int
+            elif key == 'weekday':
+                key_codes, decode = (self.columns.ts[rows] // 86400 + 3) % 7, int
+            else:
+                step, offset = self._bucket_step(key)
+                key_codes = (self.columns.ts[rows] - offset) // step
+
+                def decode(code, step=step, offset=offset):
+                    return EPOCH + timedelta(seconds=int(code) * step + offset)
+            codes.append(np.asarray(key_codes, dtype=np.int64))
+            decoders.append(decode)
+
+        if not len(codes[0]):
+            return np.zeros(0, dtype=np.int64), 0, [[] for _ in self.keys]
+
+        # Составной ключ: уникальные значения каждого ключа -> плоский индекс
+        inverses, uniques = [], []
+        for key_codes in codes:
+            unique, inverse = np.unique(key_codes, return_inverse=True)
+            uniques.append(unique)
+            inverses.append(inverse)
+        flat = np.ravel_multi_index(inverses, [len(unique) for unique in uniques])
+        groups_flat, groups = np.unique(flat, return_inverse=True)
+
+        key_values = []
+        for unique, decode, index in zip(uniques, decoders,
+                                         np.unravel_index(groups_flat, [len(u) for u in uniques])):
+            key_values.append([decode(code) for code in unique[index]])
+        return groups, len(groups_flat), key_values
+
+    @staticmethod
+    def _aggregate(func, values, groups, n_groups, counts):
+        """Векторный агрегат по группам."""
+        if func == 'count':
+            return counts
+        if func in ('sum', 'mean'):
+            sums = np.bincount(groups, weights=values, minlength=n_groups)
+            if func == 'sum':
+                return sums.round().astype(np.int64) if values.dtype.kind == 'i' else sums
+            with np.errstate(invalid='ignore', divide='ignore'):
+                return np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+
+        # min, max и перцентили - по значениям, отсортированным внутри групп
+        order = np.lexsort((values, groups))
+        sorted_values = values[order].astype(np.float64)
+        starts = np.cumsum(counts) - counts
+        result = np.full(n_groups, np.nan)
+        present = counts > 0
+        if func in ('min', 'max'):
+            index = starts[present] if func == 'min' else starts[present] + counts[present] - 1
+            result[present] = sorted_values[index]
+            # Целые колонки остаются целыми, если в каждой группе есть значение (иначе NaN)
+            if values.dtype.kind == 'i' and present.all():
+                return values[order][index]
+            return result
+
+        q = 0.5 if func == 'median' else float(func[1:]) / 100
+        # Линейная интерполяция, как np.percentile по умолчанию
+        position = starts[present] + q * (counts[present] - 1)
+        lower = np.floor(position).astype(np.int64)
+        upper = np.minimum(lower + 1, starts[present] + counts[present] - 1)
+        fraction = position - lower
+        result[present] = sorted_values[lower] * (1 - fraction) + sorted_values[upper] * fraction
+        return result
+
+    @staticmethod
+    def _parse_spec(name, spec):
+        """Разбирает спецификацию агрегата в (имя, колонка, функция)."""
+        column, func = (name, spec) if isinstance(spec, str) else spec
+        if func not in AGGREGATIONS and not re.fullmatch(r'p\d{1,2}(\.\d+)?', func):
+            raise ValueError(f"Неизвестный агрегат: {func} (доступны: {', '.join(AGGREGATIONS)}, pNN)")
+        if func != 'count' and column not in VALUE_COLUMNS:
+            raise ValueError(f"Неизвестная колонка: {column} (доступны: {', '.join(VALUE_COLUMNS)})")
+        return name, column, func
+
+    @staticmethod
+    def _bucket_step(key):
+        """Шаг и сдвиг временного бакета ('10min', '1h', '1d', '1w')."""
+        match = re.fullmatch(r'(\d+)(min|h|d|w)', key)
+        if not match or int(match.group(1)) <= 0:
+            raise ValueError(f"Неизвестный ключ группировки: {key} "
+                             f"(доступны: model, kind, hour, weekday, 10min, 1h, 1d, 1w)")
+        unit = match.group(2)
+        return int(match.group(1)) * BUCKET_UNITS[unit], WEEK_OFFSET if unit == 'w' else 0
+
+    @staticmethod
+    def _seconds(moment):
+        """Секунды от эпохи для naive datetime (UTC+7)."""
+        return int((moment - EPOCH).total_seconds())
+
+    @staticmethod
+    def _scalar(value):
+        """numpy-скаляр -> int/float."""
+        return value.item() if hasattr(value, 'item') else value
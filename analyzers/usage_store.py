@@ -0,0 +1,395 @@
+"""Локальное хранилище событий использования в SQLite."""
+
+import os
+import csv
+from datetime import datetime, timedelta
+from config import USAGE_STORE
+from utils import profile_stage
+from .event_table import EventTable, UsageEvent
+
+
+EPOCH = datetime(1970, 1, 1)
+
+EVENTS_TABLE = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    source_id INTEGER NOT NULL REFERENCES sources(id),
+    ts INTEGER NOT NULL,
+    model TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    input_tokens INTEGER NOT NULL,
+    output_tokens INTEGER NOT NULL,
+    cache_read INTEGER NOT NULL,
+    cache_write INTEGER NOT NULL,
+    cost REAL NOT NULL,
+    occurrence INTEGER NOT NULL
+)"""
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sources (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    rows INTEGER NOT NULL,
+    imported_at TEXT NOT NULL
+);
+""" + EVENTS_TABLE + ";\n"
+
+# Версия схемы (PRAGMA user_version). 2 - события без повторов между источниками
+SCHEMA_VERSION = 2
+
+# Ключ события: одинаковые строки одного файла различаются номером повтора
+# (occurrence), а та же строка из другого экспорта повторно не вставляется.
+# Индекс начинается с ts, поэтому служит и индексом по времени.
+EVENT_KEY = ('ts', 'model', 'kind', 'input_tokens', 'output_tokens', 'cache_read', 'cache_write', 'cost')
+KEY_INDEX = 'idx_events_key'
+
+STAGING_SCHEMA = """
+CREATE TEMP TABLE IF NOT EXISTS staging (
+    ts INTEGER NOT NULL,
+    model TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    input_tokens INTEGER NOT NULL,
+    output_tokens INTEGER NOT NULL,
+    cache_read INTEGER NOT NULL,
+    cache_write INTEGER NOT NULL,
+    cost REAL NOT NULL
+)
+"""
+
+INDEXES = {
+    'idx_events_model_ts': 'events(model, ts)',
+    'idx_events_kind': 'events(kind)',
+    'idx_events_source': 'events(source_id)',
+}
+
+ROLLUP_SCHEMA = """
+CREATE TABLE IF NOT EXISTS {table} (
+    bucket INTEGER NOT NULL,
+    model TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    requests INTEGER NOT NULL,
+    cost REAL NOT NULL,
+    input_tokens INTEGER NOT NULL,
+    output_tokens INTEGER NOT NULL,
+    cache_read INTEGER NOT NULL,
+    cache_write INTEGER NOT NULL,
+    PRIMARY KEY (bucket, model, kind)
+) WITHOUT ROWID;
+"""
+
+# Материализованные агрегаты: таблица -> шаг бакета в секундах
+ROLLUPS = {'usage_hourly': 3600, 'usage_daily': 86400}
+
+TOTAL_FIELDS = ('requests', 'cost', 'input_tokens', 'output_tokens', 'cache_read', 'cache_write')
+
+
+def to_store_seconds(moment):
+    """Переводит naive datetime (UTC+7) в целые секунды хранилища."""
+    return int((moment - EPOCH).total_seconds())
+
+
+def from_store_seconds(ts):
+    """Переводит секунды хранилища обратно в naive datetime (UTC+7)."""
+    return EPOCH + timedelta(seconds=ts)
+
+
+class UsageStore:
+    """
+    События из CSV экспортов в SQLite: импорт один раз, запросы без разбора CSV.
+
+    Хранилище - объединенная история всех импортированных экспортов.
+    Экспорты Cursor - пересекающиеся снимки, поэтому событие, которое
+    уже есть в хранилище из другого файла, второй раз не добавляется.
+    Время хранится целыми секундами в UTC+7 (как в EventTable). Кроме
+    событий ведутся почасовые и дневные агрегаты по модели и типу запроса;
+    totals() собирает ответ из дней, часов и событий на краях диапазона,
+    поэтому запрос за любой период читает немного строк.
+    """
+
+    def __init__(self, path=None, batch_size=None):
+        """
+        Открывает (или создает) хранилище.
+
+        Args:
+            path: Файл базы, по умолчанию USAGE_STORE['path']
+            batch_size: Строк в одном executemany, по умолчанию USAGE_STORE['batch_size']
+        """
+        self.path = path or USAGE_STORE['path']
+        self.batch_size = batch_size or USAGE_STORE['batch_size']
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # sqlite3 нужен только при открытии хранилища: аналитика берет отсюда лишь to_store_seconds
+        import sqlite3
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        version = self.conn.execute('PRAGMA user_version').fetchone()[0]
+        has_events = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'events'").fetchone() is not None
+        if has_events and version < SCHEMA_VERSION:
+            self._migrate()
+        self.conn.executescript(SCHEMA + ''.join(ROLLUP_SCHEMA.format(table=table) for table in ROLLUPS))
+        self._create_indexes()
+        self.conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+
+    def _create_indexes(self):
+        """Создает индексы событий (если их нет)."""
+        self.conn.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS {KEY_INDEX} ON events({', '.join(EVENT_KEY)}, occurrence)")
+        for name, target in INDEXES.items():
+            self.conn.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {target}')
+
+    def _migrate(self):
+        """
+        Переводит хранилище версии 1 (события каждого источника отдельно) на ключ событий.
+
+        Повторы внутри источника нумеруются, из пересекающихся источников
+        событие остается один раз; агрегаты пересчитываются.
+        """
+        key = ', '.join(EVENT_KEY)
+        with profile_stage('Миграция хранилища'), self.conn:
+            # DDL в sqlite3 не открывает транзакцию сам, а миграция должна пройти целиком
+            self.conn.execute('BEGIN')
+            self.conn.execute('ALTER TABLE events RENAME TO events_v1')
+            for name in ('idx_events_ts', *INDEXES):
+                self.conn.execute(f'DROP INDEX IF EXISTS {name}')
+            self.conn.execute(EVENTS_TABLE)
+            # Ключевой индекс до вставки: по нему INSERT OR IGNORE отбрасывает повторы
+            self._create_indexes()
+            self.conn.execute(
+                f'INSERT OR IGNORE INTO events (source_id, {key}, occurrence) '
+                f'SELECT source_id, {key}, ROW_NUMBER() OVER (PARTITION BY source_id, {key} ORDER BY id) - 1 '
+                f'FROM events_v1 ORDER BY id')
+            self.conn.execute('DROP TABLE events_v1')
+            first_ts, last_ts = self.conn.execute('SELECT MIN(ts), MAX(ts) FROM events').fetchone()
+            if first_ts is not None:
+                self._refresh_rollups(first_ts, last_ts)
+
+    def close(self):
+        """Закрывает соединение."""
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def import_csv(self, csv_file, show_progress=True):
+        """
+        Импортирует CSV экспорт (повторно - только если файл изменился).
+
+        Добавляются только события, которых еще нет в хранилище (из этого
+        или другого экспорта); одинаковые строки внутри файла - разные
+        события. Агрегаты пересчитываются только для затронутого диапазона
+        времени. Все происходит в одной транзакции.
+
+        Args:
+            csv_file: Путь к CSV файлу
+            show_progress: Показывать прогресс-бар tqdm
+
+        Returns:
+            int: Количество новых событий (0, если файл не изменился)
+        """
+        path = os.path.abspath(csv_file)
+        stat = os.stat(path)
+        source = self.conn.execute('SELECT id, size, mtime FROM sources WHERE path = ?', (path,)).fetchone()
+        if source is not None and source[1] == stat.st_size and source[2] == stat.st_mtime:
+            return 0
+
+        lines = None
+        if show_progress:
+            from tqdm import tqdm
+            with open(path, 'r', encoding='utf-8') as f:
+                lines = sum(1 for _ in f) - 1
+
+        with profile_stage('Импорт CSV в хранилище'), self.conn:
+            if source is None:
+                source_id = self.conn.execute(
+                    'INSERT INTO sources (path, size, mtime, rows, imported_at) VALUES (?, ?, ?, 0, ?)',
+                    (path, stat.st_size, stat.st_mtime, datetime.now().isoformat(timespec='seconds')),
+                ).lastrowid
+            else:
+                source_id = source[0]
+
+            # Строки файла сначала во временную таблицу: там повторы нумеруются одним запросом
+            self.conn.execute(STAGING_SCHEMA)
+            self.conn.execute('DELETE FROM staging')
+            rows = 0
+            with open(path, 'r', encoding='utf-8') as f:
+                reader = csv.DictReader(f)
+                if show_progress:
+                    reader = tqdm(reader, total=lines, desc="Импорт в хранилище", unit="строк")
+
+                batch = []
+                for row in reader:
+                    event = EventTable.parse_row(row)
+                    if event is None:
+                        continue
+                    batch.append((to_store_seconds(event.date), event.model, event.kind, event.input_tokens,
+                                  event.output_tokens, event.cache_read, event.cache_write, event.cost))
+                    if len(batch) >= self.batch_size:
+                        self._stage_events(batch)
+                        rows += len(batch)
+                        batch = []
+                if batch:
+                    self._stage_events(batch)
+                    rows += len(batch)
+
+            # В пустую таблицу быстрее загрузить все и построить индексы один раз
+            bulk_load = self.conn.execute('SELECT 1 FROM events LIMIT 1').fetchone() is None
+            if bulk_load:
+                for name in (KEY_INDEX, *INDEXES):
+                    self.conn.execute(f'DROP INDEX IF EXISTS {name}')
+
+            key = ', '.join(EVENT_KEY)
+            added = self.conn.execute(
+                f'INSERT OR IGNORE INTO events (source_id, {key}, occurrence) '
+                f'SELECT ?, {key}, ROW_NUMBER() OVER (PARTITION BY {key}) - 1 FROM staging',
+                (source_id,)).rowcount
+            first_ts, last_ts = self.conn.execute('SELECT MIN(ts), MAX(ts) FROM staging').fetchone()
+            self.conn.execute('DELETE FROM staging')
+
+            if bulk_load:
+                self._create_indexes()
+            self.conn.execute('UPDATE sources SET size = ?, mtime = ?, rows = ?, imported_at = ? WHERE id = ?',
+                              (stat.st_size, stat.st_mtime, rows,
+                               datetime.now().isoformat(timespec='seconds'), source_id))
+            if added:
+                self._refresh_rollups(first_ts, last_ts)
+        return added
+
+    def _stage_events(self, batch):
+        """Вставляет пачку строк файла во временную таблицу одним executemany."""
+        self.conn.executemany(
+            'INSERT INTO staging (ts, model, kind, input_tokens, output_tokens, '
+            'cache_read, cache_write, cost) VALUES (?, ?, ?, ?, ?, ?, ?, ?)', batch)
+
+    def _refresh_rollups(self, first_ts, last_ts):
+        """Пересчитывает агрегаты в бакетах, покрывающих [first_ts, last_ts]."""
+        for table, step in ROLLUPS.items():
+            lo = first_ts - first_ts % step
+            hi = last_ts - last_ts % step + step
+            self.conn.execute(f'DELETE FROM {table} WHERE bucket >= ? AND bucket < ?', (lo, hi))
+            self.conn.execute(
+                f'INSERT INTO {table} '
+                f'SELECT ts - ts % {step}, model, kind, COUNT(*), SUM(cost), SUM(input_tokens), '
+                f'SUM(output_tokens), SUM(cache_read), SUM(cache_write) '
+                f'FROM events WHERE ts >= ? AND ts < ? GROUP BY 1, model, kind', (lo, hi))
+
+    def time_range(self):
+        """
+        Возвращает (первое, последнее) время событий или (None, None) для пустого хранилища.
+        """
+        # MIN и MAX в одном SELECT сканируют индекс целиком, подзапросы берут его края
+        first_ts, last_ts = self.conn.execute(
+            'SELECT (SELECT MIN(ts) FROM events), (SELECT MAX(ts) FROM events)').fetchone()
+        if first_ts is None:
+            return None, None
+        return from_store_seconds(first_ts), from_store_seconds(last_ts)
+
+    def load_events(self, since=None, until=None):
+        """
+        Загружает события с since <= дата < until в EventTable (для CSVAnalyzer).
+
+        Args:
+            since: Начало (naive datetime UTC+7), None - с первого события
+            until: Конец (naive datetime UTC+7), None - до последнего события
+
+        Returns:
+            EventTable: Таблица событий, отсортированная по времени
+        """
+        with profile_stage('Чтение событий из хранилища'):
+            clause, params = self._where(
+                to_store_seconds(since) if since is not None else None,
+                to_store_seconds(until) if until is not None else None,
+            )
+            cursor = self.conn.execute(
+                'SELECT ts, model, kind, input_tokens, output_tokens, cache_read, cache_write, cost '
+                f'FROM events{clause} ORDER BY ts', params)
+            return EventTable([UsageEvent(EPOCH + timedelta(seconds=row[0]), *row[1:]) for row in cursor])
+
+    def totals(self, since=None, until=None, model=None, kind=None):
+        """
+        Суммы за период: запросы, стоимость и токены.
+
+        Целые дни и часы берутся из агрегатов, события читаются только
+        на неровных краях диапазона.
+
+        Args:
+            since: Начало (naive datetime UTC+7), None - с первого события
+            until: Конец (naive datetime UTC+7, не включительно), None - до последнего события
+            model: Модель или список моделей, None - все
+            kind: Тип запроса или список типов, None - все
+
+        Returns:
+            dict: requests, cost, input_tokens, output_tokens, cache_read, cache_write
+        """
+        result = dict.fromkeys(TOTAL_FIELDS, 0)
+        if since is None or until is None:
+            first, last = self.time_range()
+            if first is None:
+                return result
+            since = since if since is not None else first
+            until = until if until is not None else last + timedelta(seconds=1)
+
+        lo, hi = to_store_seconds(since), to_store_seconds(until)
+
+        for table, seg_lo, seg_hi in self._segments(lo, hi):
+            if table == 'events':
+                columns = 'COUNT(*), SUM(cost), SUM(input_tokens), SUM(output_tokens), SUM(cache_read), SUM(cache_write)'
+                clause, params = self._where(seg_lo, seg_hi, model, kind, column='ts')
+            else:
+                columns = ', '.join(f'SUM({field})' for field in TOTAL_FIELDS)
+                clause, params = self._where(seg_lo, seg_hi, model, kind, column='bucket')
+            row = self.conn.execute(f'SELECT {columns} FROM {table}{clause}', params).fetchone()
+            for field, value in zip(TOTAL_FIELDS, row):
+                result[field] += value or 0
+        return result
+
+    @staticmethod
+    def _segments(lo, hi):
+        """
+        Делит [lo, hi) на участки: события на краях, часы и целые дни в середине.
+
+        Returns:
+            list: (таблица, начало, конец) непустых участков
+        """
+        hour, day = ROLLUPS['usage_hourly'], ROLLUPS['usage_daily']
+        hour_lo = -(-lo // hour) * hour
+        hour_hi = hi // hour * hour
+        if hour_lo >= hour_hi:
+            return [('events', lo, hi)] if lo < hi else []
+
+        day_lo = -(-hour_lo // day) * day
+        day_hi = hour_hi // day * day
+        if day_lo < day_hi:
+            middle = [('usage_hourly', hour_lo, day_lo), ('usage_daily', day_lo, day_hi),
+                      ('usage_hourly', day_hi, hour_hi)]
+        else:
+            middle = [('usage_hourly', hour_lo, hour_hi)]
+        segments = [('events', lo, hour_lo)] + middle + [('events', hour_hi, hi)]
+        return [segment for segment in segments if segment[1] < segment[2]]
+
+    @staticmethod
+    def _where(lo=None, hi=None, model=None, kind=None, column='ts'):
+        """Собирает условие WHERE по времени, модели и типу запроса."""
+        conditions, params = [], []
+        if lo is not None:
+            conditions.append(f'{column} >= ?')
+            params.append(lo)
+        if hi is not None:
+            conditions.append(f'{column} < ?')
+            params.append(hi)
+        for name, value in (('model', model), ('kind', kind)):
+            if value is None:
+                continue
+            values = [value] if isinstance(value, str) else list(value)
+            conditions.append(f"{name} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+        clause = ' WHERE ' + ' AND '.join(conditions) if conditions else ''
+        return clause, params
@@ -0,0 +1,5 @@
+"""Синтетические экспорты и бенчмарки анализатора.
+
+Модули запускаются как python -m benchmarks.synthetic_export и
+python -m benchmarks.suite, поэтому пакет их не импортирует заранее.
+"""
@@ -0,0 +1,235 @@
+"""
+Бенчмарки разбора CSV, расчета стоимости и графиков на синтетическом экспорте.
+
+Запуск: python -m benchmarks.suite [--rows 10k] [--baseline benchmarks/baseline.json]
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import statistics
+from contextlib import redirect_stdout, redirect_stderr
+from datetime import datetime
+
+import numpy as np
+from analyzers import CSVAnalyzer, EventTable, CostCalculator
+from .synthetic_export import SyntheticExportGenerator, SYNTHETIC_SIZES, parse_rows, size_label
+
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BENCHMARK_DIR, 'data')
+DEFAULT_BASELINE = os.path.join(BENCHMARK_DIR, 'baseline.json')
+
+
+class BenchmarkSuite:
+    """
+    Замеряет ключевые этапы: разбор CSV, анализ, расчет стоимости, графики.
+
+    Каждый замер повторяется repeat раз, в результат идут лучшее и
+    медианное время. Результаты сравниваются с сохраненной базой по
+    лучшему времени, замедление больше threshold считается регрессией.
+    """
+
+    def __init__(self, csv_file, repeat=3, charts=True, render_profile='draft'):
+        """
+        Инициализирует набор.
+
+        Args:
+            csv_file: CSV экспорт для замеров
+            repeat: Повторов каждого замера
+            charts: Замерять ли графики (требует matplotlib)
+            render_profile: Профиль сохранения графиков
+        """
+        self.csv_file = csv_file
+        self.repeat = repeat
+        self.charts = charts
+        self.render_profile = render_profile
+        self.results = {}
+
+    def run(self):
+        """
+        Выполняет все замеры.
+
+        Returns:
+            dict: {название: {'best': с, 'median': с, 'runs': n}}
+        """
+        events = self._measure('ingest: EventTable.from_csv',
+                               lambda: EventTable.from_csv(self.csv_file, show_progress=False))
+        results = self._measure('analyze: CSVAnalyzer.analyze', lambda: self._quiet(
+            CSVAnalyzer(self.csv_file, show_progress=False, events=events).analyze))
+        self._measure('analyze: CSVAnalyzer.analyze + ingest', lambda: self._quiet(
+            CSVAnalyzer(self.csv_file, show_progress=False).analyze))
+        self._measure('analyze: CSVAnalyzer.analyze_windows', lambda: self._quiet(
+            CSVAnalyzer(self.csv_file, show_progress=False, events=events).analyze_windows))
+
+        self._benchmark_pricing(events)
+        if self.charts:
+            self._benchmark_charts(events, results)
+        return self.results
+
+    def _benchmark_pricing(self, events):
+        """Замеры расчета стоимости: по строке и массивами по моделям."""
+        rows = [(event.model, event.input_tokens - event.cache_write, event.output_tokens,
+                 event.cache_read, event.cache_write) for event in events]
+
+        def scalar():
+            calculate = CostCalculator.calculate_cost
+            return [calculate(*row) for row in rows]
+
+        columns = {}
+        for model, input_tokens, output_tokens, cache_read, cache_write in rows:
+            columns.setdefault(model, []).append((input_tokens, output_tokens, cache_read, cache_write))
+        columns = {model: np.array(values, dtype=np.int64).T for model, values in columns.items()}
+
+        def vectorized():
+            return {model: CostCalculator.calculate_costs(model, *values) for model, values in columns.items()}
+
+        self._measure('pricing: CostCalculator.calculate_cost', scalar)
+        self._measure('pricing: CostCalculator.calculate_costs', vectorized)
+
+    def _benchmark_charts(self, events, results):
+        """Замеры каждого графика, включая хитмапы (по отдельному заданию на график)."""
+        from main import CursorUsageAnalyzer
+        from visualizers import ChartRenderer, CHARTS
+
+        analyzer = CursorUsageAnalyzer(csv_file=self.csv_file, events=events, show_progress=False,
+                                       results=results, clear_output=False)
+        self._quiet(analyzer.analyze)
+        renderer = ChartRenderer()
+        with tempfile.TemporaryDirectory() as output_dir:
+            for chart_id, kwargs in analyzer._chart_jobs():
+                group = CHARTS[chart_id][0]
+                self._measure(f"chart: {group}/{chart_id}", lambda: self._quiet(
+                    renderer.render, [(chart_id, kwargs)], output_dir=output_dir, csv_file=self.csv_file,
+                    render_profile=self.render_profile))
+
+    def _measure(self, name, func):
+        """Замеряет func repeat раз; возвращает результат последнего вызова."""
+        timings = []
+        for _ in range(self.repeat):
+            start = time.perf_counter()
+            result = func()
+            timings.append(time.perf_counter() - start)
+        self.results[name] = {'best': min(timings), 'median': statistics.median(timings), 'runs': len(timings)}
+        print(f"  {name:<60} {min(timings):>9.3f} с")
+        return result
+
+    @staticmethod
+    def _quiet(func, *args, **kwargs):
+        """Вызывает func без вывода в консоль (включая прогресс-бары tqdm)."""
+        with redirect_stdout(io.StringIO()), redirect_stderr(io.StringIO()):
+            return func(*args, **kwargs)
+
+    def report(self, rows):
+        """Формирует отчет для сохранения в JSON."""
+        return {
+            'meta': {
+                'rows': rows,
+                'repeat': self.repeat,
+                'render_profile': self.render_profile,
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'created': datetime.now().isoformat(timespec='seconds'),
+            },
+            'results': self.results,
+        }
+
+
+def compare_with_baseline(results, baseline, threshold=0.2):
+    """
+    Сравнивает результаты с базой по лучшему времени.
+
+    Args:
+        results: Результаты BenchmarkSuite.run()
+        baseline: Отчет из сохраненной базы
+        threshold: Допустимое замедление (0.2 = 20%)
+
+    Returns:
+        tuple: (строки сравнения, список регрессий)
+    """
+    lines = [f"{'Замер':<60} {'База, с':>9} {'Сейчас, с':>10} {'Изменение':>10}", "-" * 92]
+    regressions = []
+    for name, stats in results.items():
+        base = baseline['results'].get(name)
+        if base is None:
+            lines.append(f"{name:<60} {'-':>9} {stats['best']:>10.3f} {'новый':>10}")
+            continue
+        change = stats['best'] / base['best'] - 1 if base['best'] > 0 else 0.0
+        mark = ''
+        if change > threshold:
+            mark = '  ⚠ регрессия'
+            regressions.append(name)
+        lines.append(f"{name:<60} {base['best']:>9.3f} {stats['best']:>10.3f} {change:>+9.0%}{mark}")
+    return lines, regressions
+
+
+def synthetic_csv(rows, seed=42):
+    """Путь к синтетическому экспорту нужного размера (генерируется один раз)."""
+    filepath = os.path.join(DATA_DIR, f"team-usage-events-synthetic-{size_label(rows)}-{seed}.csv")
+    if not os.path.exists(filepath):
+        print(f"Генерация синтетического экспорта ({rows:,} строк)...")
+        # Фиксированный конец периода: одинаковые данные при каждом запуске
+        end = datetime.fromisoformat('2025-06-30T12:00:00+00:00')
+        SyntheticExportGenerator(seed=seed, end=end).write(filepath, rows)
+    return filepath
+
+
+def main():
+    """Точка входа бенчмарков."""
+    parser = argparse.ArgumentParser(description='Бенчмарки анализатора на синтетическом экспорте')
+    parser.add_argument('--rows', type=parse_rows, default=SYNTHETIC_SIZES['10k'],
+                        help=f"Размер экспорта: {', '.join(SYNTHETIC_SIZES)} или число строк (по умолчанию 10k)")
+    parser.add_argument('--csv', help='Замерять на этом CSV вместо синтетического')
+    parser.add_argument('--repeat', type=int, default=3, help='Повторов каждого замера (по умолчанию 3)')
+    parser.add_argument('--no-charts', action='store_true', help='Без замеров графиков')
+    parser.add_argument('--output', help='Сохранить результаты в JSON')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE,
+                        help='JSON с базовыми результатами для сравнения (по умолчанию benchmarks/baseline.json)')
+    parser.add_argument('--update-baseline', action='store_true', help='Записать результаты как новую базу')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='Допустимое замедление относительно базы (по умолчанию 0.2 = 20%%)')
+    args = parser.parse_args()
+
+    csv_file = args.csv or synthetic_csv(args.rows)
+    suite = BenchmarkSuite(csv_file, repeat=args.repeat, charts=not args.no_charts)
+
+    print(f"\nБенчмарки: {csv_file}")
+    results = suite.run()
+    report = suite.report(args.rows if not args.csv else None)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\nРезультаты сохранены: {args.output}")
+
+    if args.update_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"База обновлена: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\nБаза {args.baseline} не найдена (создайте ее флагом --update-baseline)")
+        return 0
+
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    if baseline['meta'].get('rows') != report['meta']['rows']:
+        print(f"\n⚠ База снята на {baseline['meta'].get('rows')} строках, сейчас - {report['meta']['rows']}")
+
+    lines, regressions = compare_with_baseline(results, baseline, args.threshold)
+    print("\n" + "\n".join(lines))
+    if regressions:
+        print(f"\n⚠ Регрессии ({len(regressions)}): {', '.join(regressions)}")
+        return 1
+    print("\n✓ Регрессий нет")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
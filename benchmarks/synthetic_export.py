@@ -0,0 +1,212 @@
+"""
+Генератор синтетических экспортов team-usage-events-*.csv.
+
+Запуск: python -m benchmarks.synthetic_export --rows 1m [--out csv_data] [--seed 42]
+"""
+
+import os
+import sys
+import argparse
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+from config import MODEL_PRICING
+from analyzers import CostCalculator
+
+
+# Типовые размеры экспортов
+SYNTHETIC_SIZES = {'10k': 10_000, '1m': 1_000_000, '10m': 10_000_000}
+
+CSV_HEADER = ('Date,Kind,Model,Max Mode,Input (w/ Cache Write),Input (w/o Cache Write),'
+              'Cache Read,Output Tokens,Total Tokens,Cost')
+
+# Доли типов запросов
+KIND_SHARES = {'Included': 0.62, 'On-Demand': 0.33, 'Rate Limited': 0.05}
+
+# Популярные модели; остальные модели из MODEL_PRICING получают вес OTHER_MODEL_WEIGHT
+MODEL_WEIGHTS = {
+    'claude-4.5-sonnet': 30, 'auto': 18, 'claude-4.5-sonnet-thinking': 10, 'gpt-5': 8,
+    'claude-4.5-opus': 6, 'composer-1': 5, 'gpt-5-codex': 4, 'claude-4.5-haiku': 3,
+    'gemini-2.5-pro': 3, 'grok-code-fast-1': 2,
+}
+OTHER_MODEL_WEIGHT = 0.3
+
+# Активность по часам суток (UTC+7): рабочий день с обеденным провалом и поздними вечерами
+HOUR_WEIGHTS = [0.2, 0.1, 0.05, 0.05, 0.05, 0.1, 0.2, 0.4, 0.8, 1.0, 1.0, 1.0,
+                0.6, 0.8, 1.0, 1.0, 1.0, 0.9, 0.7, 0.5, 0.5, 0.6, 0.5, 0.3]
+WEEKEND_WEIGHT = 0.3
+
+# Доля запросов с контекстом > 200k (только у моделей с ценами over_200k)
+LONG_CONTEXT_SHARE = 0.03
+
+UTC_OFFSET = timedelta(hours=7)
+
+
+class SyntheticExportGenerator:
+    """
+    Пишет CSV в формате экспорта Cursor с правдоподобным распределением данных.
+
+    Токены распределены с тяжелым хвостом (логнормально), часть запросов
+    выходит за 200k контекста, стоимость считается по MODEL_PRICING.
+    Строки идут от новых к старым, как в настоящем экспорте. Генерация
+    детерминирована при одинаковом seed.
+    """
+
+    def __init__(self, seed=42, days=180, end=None):
+        """
+        Инициализирует генератор.
+
+        Args:
+            seed: Зерно генератора случайных чисел
+            days: Длина периода экспорта в днях
+            end: Последний момент экспорта (aware datetime), по умолчанию - сейчас
+        """
+        self.seed = seed
+        self.days = days
+        self.end = end or datetime.now(timezone.utc)
+
+        self.models = list(MODEL_PRICING)
+        weights = np.array([MODEL_WEIGHTS.get(model, OTHER_MODEL_WEIGHT) for model in self.models])
+        self.model_probs = weights / weights.sum()
+        self.long_context_models = np.array(['input_under_200k' in MODEL_PRICING[model]
+                                             for model in self.models])
+
+        self.kinds = list(KIND_SHARES)
+        self.kind_probs = np.array(list(KIND_SHARES.values()))
+
+    def write(self, filepath, rows, chunk_size=250_000):
+        """
+        Генерирует экспорт из rows строк.
+
+        Args:
+            filepath: Путь к CSV файлу
+            rows: Количество строк
+            chunk_size: Строк в одном блоке генерации (ограничивает память)
+
+        Returns:
+            str: Путь к созданному файлу
+        """
+        rng = np.random.default_rng(self.seed)
+        timestamps = self._timestamps(rng, rows)
+
+        directory = os.path.dirname(filepath)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with open(filepath, 'w', encoding='utf-8', newline='') as f:
+            f.write(CSV_HEADER + '\n')
+            for start in range(0, rows, chunk_size):
+                chunk = timestamps[start:start + chunk_size]
+                f.writelines(self._format_rows(rng, chunk))
+        return filepath
+
+    def _timestamps(self, rng, rows):
+        """Моменты запросов (мс UTC), от новых к старым."""
+        end_local = (self.end + UTC_OFFSET).replace(tzinfo=None)
+        first_day = (end_local - timedelta(days=self.days)).date()
+
+        # День с учетом выходных, затем час по профилю суток
+        day_offsets = np.arange(self.days + 1)
+        weekdays = (first_day.weekday() + day_offsets) % 7
+        day_probs = np.where(weekdays >= 5, WEEKEND_WEIGHT, 1.0)
+        hour_probs = np.array(HOUR_WEIGHTS) / sum(HOUR_WEIGHTS)
+
+        days = rng.choice(day_offsets, size=rows, p=day_probs / day_probs.sum())
+        hours = rng.choice(24, size=rows, p=hour_probs)
+        seconds = days * 86400 + hours * 3600 + rng.integers(0, 3600, size=rows)
+
+        first_ms = int((datetime.combine(first_day, datetime.min.time()) - UTC_OFFSET)
+                       .replace(tzinfo=timezone.utc).timestamp()) * 1000
+        timestamps = first_ms + seconds * 1000
+        end_ms = int(self.end.timestamp() * 1000)
+        timestamps = np.where(timestamps > end_ms, timestamps - 7 * 86400 * 1000, timestamps)
+        timestamps.sort()
+        return timestamps[::-1]
+
+    def _format_rows(self, rng, timestamps):
+        """Генерирует строки CSV для блока моментов времени."""
+        n = len(timestamps)
+        model_idx = rng.choice(len(self.models), size=n, p=self.model_probs)
+        kind_idx = rng.choice(len(self.kinds), size=n, p=self.kind_probs)
+
+        # Тяжелые хвосты: логнормальные токены
+        cache_read = rng.lognormal(np.log(40_000), 1.1, n)
+        input_no_cache = rng.lognormal(np.log(6_000), 1.3, n)
+        cache_write = input_no_cache * rng.beta(2, 5, n) * 4
+        output = rng.lognormal(np.log(1_200), 1.2, n)
+
+        # Остальные запросы ужимаются в 200k контекста пропорционально
+        context = cache_read + input_no_cache + cache_write
+        scale = np.where(context >= 200_000, rng.uniform(0.3, 0.95, n) * 200_000 / context, 1.0)
+        cache_read, input_no_cache, cache_write = cache_read * scale, input_no_cache * scale, cache_write * scale
+
+        # Длинный контекст: 200k-900k токенов, в основном из кэша
+        long_context = (rng.random(n) < LONG_CONTEXT_SHARE) & self.long_context_models[model_idx]
+        cache_read = np.where(long_context, rng.uniform(200_000, 900_000, n), cache_read)
+
+        rate_limited = kind_idx == self.kinds.index('Rate Limited')
+        tokens = [np.where(rate_limited, 0, values).astype(np.int64)
+                  for values in (input_no_cache, cache_write, cache_read, output)]
+        input_no_cache, cache_write, cache_read, output = tokens
+        input_with_cache = input_no_cache + cache_write
+
+        costs = np.zeros(n)
+        for i in np.unique(model_idx):
+            mask = model_idx == i
+            costs[mask] = CostCalculator.calculate_costs(
+                self.models[i], input_no_cache[mask], output[mask], cache_read[mask], cache_write[mask]
+            )
+        costs[rate_limited] = 0.0
+
+        dates = np.datetime_as_string(timestamps.astype('datetime64[ms]'), unit='ms')
+        models = np.array(self.models, dtype=object)[model_idx]
+        kinds = np.array(self.kinds, dtype=object)[kind_idx]
+        max_mode = np.where(long_context, 'Yes', 'No')
+        total = input_with_cache + cache_read + output
+
+        for row in zip(dates.tolist(), kinds.tolist(), models.tolist(), max_mode.tolist(),
+                       input_with_cache.tolist(), input_no_cache.tolist(), cache_read.tolist(),
+                       output.tolist(), total.tolist(), costs.tolist()):
+            yield '{}Z,{},{},{},{},{},{},{},{},{:.6f}\n'.format(*row)
+
+
+def parse_rows(value):
+    """Разбирает размер экспорта: 10k, 1m, 10m или число строк."""
+    if value.lower() in SYNTHETIC_SIZES:
+        return SYNTHETIC_SIZES[value.lower()]
+    try:
+        rows = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"неверный размер: {value} (доступны: {', '.join(SYNTHETIC_SIZES)} или число)")
+    if rows <= 0:
+        raise argparse.ArgumentTypeError("количество строк должно быть положительным")
+    return rows
+
+
+def size_label(rows):
+    """Короткая метка размера для имени файла (10k, 1m, 12345)."""
+    for label, size in SYNTHETIC_SIZES.items():
+        if size == rows:
+            return label
+    return str(rows)
+
+
+def main():
+    """Точка входа генератора."""
+    parser = argparse.ArgumentParser(description='Генератор синтетического экспорта Cursor')
+    parser.add_argument('--rows', type=parse_rows, default=SYNTHETIC_SIZES['10k'],
+                        help=f"Размер: {', '.join(SYNTHETIC_SIZES)} или число строк (по умолчанию 10k)")
+    parser.add_argument('--out', default='csv_data', help='Папка для файла (по умолчанию csv_data)')
+    parser.add_argument('--seed', type=int, default=42, help='Зерно генератора (по умолчанию 42)')
+    parser.add_argument('--days', type=int, default=180, help='Длина периода в днях (по умолчанию 180)')
+    args = parser.parse_args()
+
+    filepath = os.path.join(args.out, f"team-usage-events-synthetic-{size_label(args.rows)}.csv")
+    print(f"Генерация {args.rows:,} строк: {filepath}")
+    SyntheticExportGenerator(seed=args.seed, days=args.days).write(filepath, args.rows)
+    print("✓ Готово")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,6 +1,20 @@
 """Конфигурация приложения."""
 
 from .model_pricing_config import MODEL_PRICING
+from .timeline_config import TIMELINE_WINDOWS, TIMELINE_METRICS, TIMELINE_SPECS
+from .calendar_config import WORKING_HOURS, WEEKEND_DAYS, HOLIDAYS
+from .render_config import RENDER_PROFILES, RENDER_FORMATS, DEFAULT_RENDER_PROFILE, RENDER_DAEMON
+from .store_config import USAGE_STORE
+from .watch_config import EXPORT_WATCH
+from .dashboard_config import DASHBOARD
+from .spike_config import SPIKE_DETECTION
+from .budget_config import BUDGETS
+from .session_config import SESSIONS
+from .cache_config import CACHE_EFFICIENCY
+from .sample_config import SAMPLING
 
-__all__ = ['MODEL_PRICING']
-
+__all__ = ['MODEL_PRICING', 'TIMELINE_WINDOWS', 'TIMELINE_METRICS', 'TIMELINE_SPECS',
+           'WORKING_HOURS', 'WEEKEND_DAYS', 'HOLIDAYS',
+           'RENDER_PROFILES', 'RENDER_FORMATS', 'DEFAULT_RENDER_PROFILE', 'RENDER_DAEMON',
+           'USAGE_STORE', 'EXPORT_WATCH', 'DASHBOARD', 'SPIKE_DETECTION', 'BUDGETS', 'SESSIONS',
+           'CACHE_EFFICIENCY', 'SAMPLING']
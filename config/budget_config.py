@@ -0,0 +1,23 @@
+# Бюджеты и прогноз расходов на платежный цикл
+#
+# Прогноз на конец цикла = потрачено с начала цикла + ожидаемые расходы
+# до конца цикла. Ожидаемый расход часа = уровень последних trend_days
+# дней × сезонный коэффициент этого часа недели (профиль день недели × час,
+# как на хитмапе стоимости).
+#
+# - cycle_start_day: день месяца, с которого начинается цикл (1-28)
+# - trend_days: дней, по которым считается текущий уровень расходов
+# - warn_ratio: доля бюджета, начиная с которой прогноз - предупреждение
+# - team: бюджет команды на цикл, $ (весь экспорт; None - без бюджета),
+#   то же задается флагом --budget
+# - models: бюджеты моделей на цикл, {'gpt-5': 500.0}
+
+BUDGETS = {
+    'cycle_start_day': 1,
+    'trend_days': 14,
+    'warn_ratio': 0.9,
+    'team': None,
+    'models': {
+        # 'claude-4.5-sonnet-thinking': 800.0,
+    },
+}
@@ -0,0 +1,20 @@
+# Эффективность кэша промптов
+#
+# - hit ratio: доля токенов промпта, прочитанных из кэша
+#   (cache_read / (input + cache_read), input включает запись в кэш)
+# - write amplification: токенов записано в кэш на токен, прочитанный из него
+# - cost avoided: стоимость тех же токенов без кэша (все токены промпта по
+#   цене input из MODEL_PRICING) минус стоимость с кэшем
+#
+# Модель или сессия отмечается как плохо использующая кэш, если
+# hit ratio < min_hit_ratio, write amplification > max_write_amplification
+# или кэш не окупился (cost avoided < 0). Модели и сессии, у которых
+# токенов промпта меньше min_prompt_tokens, не оцениваются.
+# shown - сколько сессий с плохим кэшем выводить в статистике.
+
+CACHE_EFFICIENCY = {
+    'min_hit_ratio': 0.5,
+    'max_write_amplification': 1.0,
+    'min_prompt_tokens': 100_000,
+    'shown': 5,
+}
@@ -0,0 +1,14 @@
+# Календарь для подсветки графиков таймлайна (время UTC+7)
+#
+# Маски вычисляются один раз и применяются к целочисленным меткам бакетов:
+# - WORKING_HOURS: 24 флага, True - рабочий час (остальные считаются ночью)
+# - WEEKEND_DAYS: 7 флагов (понедельник..воскресенье), True - выходной
+# - HOLIDAYS: праздничные дни 'YYYY-MM-DD', подсвечиваются как выходные
+
+WORKING_HOURS = [6 <= hour < 22 for hour in range(24)]
+
+WEEKEND_DAYS = [False, False, False, False, False, True, True]
+
+HOLIDAYS = [
+    # '2026-01-01',
+]
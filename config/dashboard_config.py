@@ -0,0 +1,19 @@
+# Локальный HTTP дашборд (--serve)
+#
+# - host, port: адрес сервера (127.0.0.1 - только с этой машины,
+#   0.0.0.0 - для коллег в локальной сети)
+# - render_workers: процессов для построения PNG (matplotlib не
+#   потокобезопасен, поэтому графики строятся в отдельных процессах)
+# - render_profile: профиль сохранения PNG из RENDER_PROFILES
+# - cache_entries: сколько готовых ответов хранить (старые версии данных
+#   вытесняются первыми)
+# - max_points: максимум бакетов в ответе /api/timeline
+
+DASHBOARD = {
+    'host': '127.0.0.1',
+    'port': 8765,
+    'render_workers': 2,
+    'render_profile': 'screen',
+    'cache_entries': 256,
+    'max_points': 5000,
+}
@@ -0,0 +1,53 @@
+# Профили сохранения графиков
+#
+# - dpi: разрешение растра (для SVG/PDF влияет только на растровые элементы)
+# - format: 'png', 'svg', 'webp' или 'pdf'
+# - png_compression: уровень сжатия PNG 0-9 (выше - меньше файл, дольше запись)
+# - webp_quality: качество WebP 1-100
+# - tight_bbox: пересчитывать ли границы фигуры (bbox_inches='tight')
+#
+# draft - быстрые итерации над отчетом, print - качество для архива.
+
+RENDER_FORMATS = ('png', 'svg', 'webp', 'pdf')
+
+RENDER_PROFILES = {
+    'draft': {
+        'caption': 'Черновик (72 DPI, быстрое сохранение)',
+        'dpi': 72,
+        'format': 'png',
+        'png_compression': 1,
+        'webp_quality': 70,
+        'tight_bbox': False,
+    },
+    'screen': {
+        'caption': 'Экран (120 DPI)',
+        'dpi': 120,
+        'format': 'png',
+        'png_compression': 6,
+        'webp_quality': 85,
+        'tight_bbox': True,
+    },
+    'print': {
+        'caption': 'Печать (300 DPI)',
+        'dpi': 300,
+        'format': 'png',
+        'png_compression': 6,
+        'webp_quality': 95,
+        'tight_bbox': True,
+    },
+}
+
+DEFAULT_RENDER_PROFILE = 'print'
+
+# Фоновый процесс рендеринга (render_service): держит matplotlib/seaborn
+# загруженными между запусками и принимает задания через Unix-сокет.
+# - socket_path: None - <временная папка>/cursor-usage-render-<uid>.sock
+# - idle_timeout: секунд без заданий до автоматического завершения
+# - start_timeout: сколько ждать запуска процесса клиентом
+
+RENDER_DAEMON = {
+    'enabled': False,
+    'socket_path': None,
+    'idle_timeout': 600,
+    'start_timeout': 30,
+}
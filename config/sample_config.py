@@ -0,0 +1,29 @@
+# Приближенный просмотр большого экспорта (--sample)
+#
+# Файл делится на блоки по block_bytes байт. Блоки выбираются случайно
+# (без повторов), и каждый читается целиком. Строка принадлежит блоку,
+# в котором она начинается. Блоки набираются, пока в выборке не окажется
+# rows строк. Суммы по всему файлу оцениваются как суммы по блокам,
+# умноженные на (всего блоков / прочитано блоков). Доверительные
+# интервалы считаются по разбросу сумм между блоками (кластерная выборка).
+# Поэтому соседние строки одного блока, например запросы одной сессии,
+# не занижают погрешность.
+#
+# - rows: размер выборки по умолчанию (--sample без числа)
+# - block_bytes: размер блока; чем меньше блок, тем больше независимых
+#   блоков в выборке того же размера и тем уже интервалы (особенно у ячеек
+#   хитмапов: блок отсортированного файла покрывает несколько минут),
+#   но тем больше операций seek
+# - confidence: уровень доверия интервалов
+# - min_rows: меньше строк выборки в периоде - предупреждение о грубой оценке
+# - seed: зерно генератора (None - новая выборка при каждом запуске)
+# - shown_cells: сколько самых загруженных ячеек день недели × час выводить
+
+SAMPLING = {
+    'rows': 50_000,
+    'block_bytes': 4 * 1024,
+    'confidence': 0.95,
+    'min_rows': 1_000,
+    'seed': None,
+    'shown_cells': 5,
+}
@@ -0,0 +1,12 @@
+# Сессии работы: запросы, идущие подряд без длинных пауз
+#
+# - gap_minutes: пауза между запросами, после которой начинается новая сессия
+# - min_rate_minutes: нижняя граница длительности для стоимости минуты
+#   (у сессии из одного запроса длительность нулевая)
+# - shown: сколько самых дорогих сессий выводить в статистике
+
+SESSIONS = {
+    'gap_minutes': 30,
+    'min_rate_minutes': 1,
+    'shown': 5,
+}
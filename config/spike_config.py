@@ -0,0 +1,31 @@
+# Детектор всплесков расходов по 10-минутным бакетам
+#
+# Для каждой модели ведутся EWMA среднее/дисперсия по всем бакетам (пустые -
+# нули, пропуск затухает одним множителем) и медиана/MAD последних активных
+# бакетов модели (с ненулевой стоимостью). Бакет - всплеск, если
+#   (стоимость - медиана окна) / масштаб >= threshold и стоимость >= min_cost,
+# где масштаб = max(1.4826 * MAD, стандартное отклонение EWMA, min_scale).
+#
+# - bucket_minutes: размер бакета
+# - window: активных бакетов модели в окне медианы/MAD
+# - alpha: вес нового бакета в EWMA
+# - warmup: сколько активных бакетов модели нужно увидеть до первых срабатываний
+# - max_kept: сколько последних всплесков хранить (режим --watch)
+# - shown: сколько последних всплесков выводить в статистике
+# - jsonl_path, webhook_url: куда отправлять всплески (None - никуда);
+#   то же задается флагами --spikes-out и --spike-webhook
+
+SPIKE_DETECTION = {
+    'bucket_minutes': 10,
+    'window': 144,
+    'alpha': 0.05,
+    'threshold': 6.0,
+    'min_cost': 1.0,
+    'min_scale': 0.05,
+    'warmup': 36,
+    'max_kept': 1000,
+    'shown': 10,
+    'jsonl_path': None,
+    'webhook_url': None,
+    'webhook_timeout': 5,
+}
@@ -0,0 +1,14 @@
+# Локальное хранилище событий (SQLite)
+#
+# - path: файл базы; события всех импортированных CSV хранятся в нем
+#   нормализованными, с индексами по времени, модели и типу запроса
+# - batch_size: строк в одном executemany при импорте
+#
+# Файл-источник повторно импортируется, только если изменились его
+# размер или время изменения. Экспорты пересекаются, поэтому событие,
+# которое уже есть в базе из другого файла, второй раз не добавляется.
+
+USAGE_STORE = {
+    'path': 'csv_data/usage.sqlite3',
+    'batch_size': 50_000,
+}
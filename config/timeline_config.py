@@ -0,0 +1,94 @@
+# Конфигурация графиков таймлайна (стоимость и запросы во времени)
+#
+# Окно описывает ось времени: шаг бакета в секундах и количество бакетов,
+# заканчивающихся текущим моментом (UTC+7). step=None - окно на весь период,
+# данные делятся на `buckets` групп с равным числом запросов.
+#
+# Чтобы добавить новое окно (например, "последний квартал"), достаточно
+# добавить запись в TIMELINE_WINDOWS - графики для него построятся
+# автоматически для каждой метрики и способа группировки.
+
+TIMELINE_WINDOWS = {
+    'all': {
+        'step': None,
+        'buckets': 200,
+        'file_suffix': 'all_period',
+        'caption': 'за весь период',
+        'title': 'All Period',
+        'bar_title': 'Distribution',
+        'label_format': '%Y-%m-%d',
+        'tick_step': None,  # ~10 подписей
+        'color': '#2ecc71',
+        'bar_color': '#3498db',
+        'highlight': (),
+    },
+    'month': {
+        'step': 86400,
+        'buckets': 30,
+        'file_suffix': 'last_month',
+        'caption': 'за последний месяц (по дням)',
+        'title': 'Last 30 Days',
+        'bar_title': 'Daily',
+        'bucket_name': 'day',
+        'label_format': '%Y-%m-%d',
+        'tick_step': 3,
+        'color': '#3498db',
+        'bar_color': '#3498db',
+        'highlight': ('weekend',),
+    },
+    'week': {
+        'step': 3600,
+        'buckets': 168,
+        'file_suffix': 'last_week',
+        'caption': 'за последнюю неделю (по часам)',
+        'title': 'Last 7 Days (Hourly)',
+        'bar_title': 'Hourly',
+        'bucket_name': 'hour',
+        'label_format': '%H:%M',
+        'day_label_format': '%m-%d',
+        'day_markers': True,
+        'tick_step': 12,
+        'color': '#e74c3c',
+        'bar_color': '#e74c3c',
+        'highlight': ('night', 'weekend'),
+    },
+    'day': {
+        'step': 600,
+        'buckets': 144,
+        'file_suffix': 'last_day',
+        'caption': 'за последний день (по 10 минут)',
+        'title': 'Last 24 Hours (10-min intervals)',
+        'bar_title': '10-min',
+        'bucket_name': '10min',
+        'label_format': '%H:%M',
+        'tick_step': 6,
+        'color': '#9b59b6',
+        'bar_color': '#9b59b6',
+        'highlight': ('night',),
+    },
+}
+
+TIMELINE_METRICS = {
+    'cost': {
+        'file_prefix': 'cost',
+        'caption': 'стоимости',
+        'title': 'Cost',
+        'unit': 'Cost ($)',
+        'value_format': '${:.2f}',
+    },
+    'requests': {
+        'file_prefix': 'request',
+        'caption': 'запросов',
+        'title': 'Requests',
+        'unit': 'Requests',
+        'value_format': '{:,.0f}',
+    },
+}
+
+# Порядок построения: метрика × группировка × окно
+TIMELINE_SPECS = [
+    {'metric': metric, 'stacking': stacking, 'window': window}
+    for metric in ('cost', 'requests')
+    for stacking in ('total', 'by_model')
+    for window in TIMELINE_WINDOWS
+]
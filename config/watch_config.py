@@ -0,0 +1,15 @@
+# Режим наблюдения за папкой экспортов (--watch)
+#
+# - directory: папка, куда кладут новые экспорты
+# - pattern: маска имен файлов экспорта
+# - poll_interval: как часто опрашивать папку, секунд
+# - debounce: сколько секунд новые/измененные файлы должны не меняться,
+#   прежде чем запустится обновление (файл может еще копироваться,
+#   а несколько экспортов подряд дают одно обновление)
+
+EXPORT_WATCH = {
+    'directory': 'csv_data',
+    'pattern': 'team-usage-events-*.csv',
+    'poll_interval': 2.0,
+    'debounce': 5.0,
+}
@@ -0,0 +1,6 @@
+"""Локальный HTTP дашборд: статистика, ряды и графики из данных в памяти."""
+
+from .server import DashboardServer
+from .snapshot import DashboardSnapshot, DashboardError
+
+__all__ = ['DashboardServer', 'DashboardSnapshot', 'DashboardError']
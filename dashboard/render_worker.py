@@ -0,0 +1,48 @@
+"""Построение PNG в процессах пула дашборда."""
+
+import io
+import os
+import atexit
+import shutil
+import tempfile
+from contextlib import redirect_stdout
+
+
+# Состояние процесса пула: исполнитель и папка для файлов создаются один раз
+_renderer = None
+_output_dir = None
+
+
+def render_chart(chart_id, kwargs, render_profile):
+    """
+    Строит график в PNG и возвращает содержимое файлов.
+
+    Выполняется в процессе пула: matplotlib и визуализаторы загружаются
+    один раз на процесс, файлы удаляются сразу после чтения.
+
+    Args:
+        chart_id: Идентификатор графика из visualizers.CHARTS
+        kwargs: Аргументы графика
+        render_profile: Профиль сохранения
+
+    Returns:
+        list: bytes каждой фигуры графика (у таймлайнов их несколько)
+    """
+    global _renderer, _output_dir
+    if _renderer is None:
+        from visualizers import ChartRenderer
+        _renderer = ChartRenderer()
+        _output_dir = tempfile.mkdtemp(prefix='cursor-usage-dashboard-')
+        atexit.register(shutil.rmtree, _output_dir, True)
+
+    with redirect_stdout(io.StringIO()):
+        _renderer.render([(chart_id, kwargs)], output_dir=_output_dir,
+                         render_profile=render_profile, render_format='png')
+
+    pages = []
+    for filename in sorted(os.listdir(_output_dir)):
+        filepath = os.path.join(_output_dir, filename)
+        with open(filepath, 'rb') as f:
+            pages.append(f.read())
+        os.unlink(filepath)
+    return pages
@@ -0,0 +1,300 @@
+"""HTTP сервер дашборда на asyncio."""
+
+import json
+import html
+import asyncio
+import threading
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from urllib.parse import urlsplit, parse_qs
+
+from config import DASHBOARD
+from .snapshot import DashboardSnapshot, DashboardError
+from .render_worker import render_chart
+
+
+STATUS_TEXT = {200: 'OK', 304: 'Not Modified', 400: 'Bad Request', 404: 'Not Found',
+               405: 'Method Not Allowed', 500: 'Internal Server Error', 503: 'Service Unavailable'}
+
+# Сколько ждать следующего запроса в keep-alive соединении, секунд
+KEEP_ALIVE_TIMEOUT = 30
+
+
+class DashboardServer:
+    """
+    Отдает статистику и графики последней версии данных по HTTP.
+
+    Эндпоинты:
+        /                         страница с графиками и сводкой
+        /api/summary              общая статистика и модели
+        /api/timeline             ряд по бакетам: metric=cost|requests, res=1min|10min|1h|1d|1w,
+                                  since, until (YYYY-MM-DD[ HH:MM], UTC+7), model
+        /api/heatmap              день недели × час
+        /charts/<chart_id>.png    график (page=N для графиков из нескольких фигур)
+
+    Ответы кэшируются по версии данных и отдаются с ETag, повторный запрос
+    с If-None-Match получает 304. Одинаковые запросы, пришедшие
+    одновременно, ждут один и тот же расчет. JSON считается в пуле
+    потоков, PNG строятся в пуле процессов, так что цикл событий только
+    принимает соединения и раздает готовые ответы.
+    """
+
+    def __init__(self, host=None, port=None, render_workers=None, render_profile=None, cache_entries=None):
+        """
+        Инициализирует сервер (значения по умолчанию - из DASHBOARD).
+
+        Args:
+            host: Адрес для прослушивания
+            port: Порт
+            render_workers: Процессов для построения PNG
+            render_profile: Профиль сохранения PNG
+            cache_entries: Максимум готовых ответов в кэше
+        """
+        self.host = host or DASHBOARD['host']
+        self.port = port or DASHBOARD['port']
+        self.render_workers = render_workers or DASHBOARD['render_workers']
+        self.render_profile = render_profile or DASHBOARD['render_profile']
+        self.cache_entries = cache_entries or DASHBOARD['cache_entries']
+        self.snapshot = None
+        self._cache = OrderedDict()
+        self._pool = None
+        self._ready = threading.Event()
+
+    @property
+    def url(self):
+        """Адрес дашборда."""
+        return f"http://{self.host}:{self.port}/"
+
+    def publish(self, analyzer):
+        """
+        Публикует новую версию данных (можно вызывать из любого потока).
+
+        Args:
+            analyzer: CursorUsageAnalyzer с готовыми results
+        """
+        snapshot = DashboardSnapshot(
+            analyzer.results, analyzer.analyzer.events.columns(),
+            dict(analyzer._chart_jobs()), analyzer.period,
+            since=analyzer.analyzer.period_start, until=analyzer.analyzer.period_end,
+        )
+        # Присваивание атомарно: запросы видят либо старый, либо новый снимок
+        self.snapshot = snapshot
+
+    def serve_forever(self):
+        """Запускает сервер в текущем потоке (до Ctrl+C)."""
+        asyncio.run(self._serve())
+
+    def start(self):
+        """Запускает сервер в фоновом потоке и ждет, пока он начнет принимать соединения."""
+        thread = threading.Thread(target=self.serve_forever, name='dashboard', daemon=True)
+        thread.start()
+        self._ready.wait()
+        return thread
+
+    async def _serve(self):
+        """Открывает сокет и пул процессов рендеринга."""
+        # spawn: процессы пула не наследуют потоки и состояние matplotlib родителя
+        self._pool = ProcessPoolExecutor(self.render_workers, mp_context=multiprocessing.get_context('spawn'))
+        try:
+            server = await asyncio.start_server(self._handle, self.host, self.port)
+            self._ready.set()
+            async with server:
+                await server.serve_forever()
+        finally:
+            self._ready.set()
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+    async def _handle(self, reader, writer):
+        """Обрабатывает соединение (HTTP/1.1 keep-alive)."""
+        try:
+            while True:
+                request_line = await asyncio.wait_for(reader.readline(), KEEP_ALIVE_TIMEOUT)
+                if not request_line.strip():
+                    break
+                method, target, version = request_line.decode('latin-1').split()
+                headers = {}
+                while True:
+                    line = await asyncio.wait_for(reader.readline(), KEEP_ALIVE_TIMEOUT)
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                status, content_type, body, etag = await self._respond(method, target, headers)
+                keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+                head = [f"HTTP/1.1 {status} {STATUS_TEXT[status]}",
+                        f"Content-Length: {len(body)}",
+                        f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+                if content_type:
+                    head.append(f"Content-Type: {content_type}")
+                if etag:
+                    # no-cache: браузер всегда спрашивает сервер, но с If-None-Match получает 304
+                    head += [f"ETag: {etag}", "Cache-Control: no-cache"]
+                writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1'))
+                if method != 'HEAD':
+                    writer.write(body)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.TimeoutError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, method, target, headers):
+        """
+        Формирует ответ на запрос.
+
+        Returns:
+            tuple: (статус, Content-Type, тело, ETag)
+        """
+        if method not in ('GET', 'HEAD'):
+            return self._error(405, f"Метод {method} не поддерживается")
+
+        snapshot = self.snapshot
+        if snapshot is None:
+            return self._error(503, "Данные еще загружаются")
+
+        url = urlsplit(target)
+        params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        etag = f'"{snapshot.version}"'
+        if etag in (tag.strip() for tag in headers.get('if-none-match', '').split(',')):
+            return 304, None, b'', etag
+
+        try:
+            content_type, body = await self._cached(snapshot, url.path, params)
+        except DashboardError as e:
+            return self._error(e.status, str(e))
+        except Exception as e:
+            return self._error(500, f"{type(e).__name__}: {e}")
+        return 200, content_type, body, etag
+
+    async def _cached(self, snapshot, path, params):
+        """Ответ из кэша; при промахе - расчет, который разделяют одновременные запросы."""
+        page = params.pop('page', '1') if path.startswith('/charts/') else None
+        key = (snapshot.version, path, tuple(sorted(params.items())))
+
+        task = self._cache.get(key)
+        if task is None:
+            # Ответы прошлых версий данных уже не понадобятся
+            for old_key in [old_key for old_key in self._cache if old_key[0] != snapshot.version]:
+                del self._cache[old_key]
+            task = asyncio.ensure_future(self._build(snapshot, path, params))
+            self._cache[key] = task
+            while len(self._cache) > self.cache_entries:
+                self._cache.popitem(last=False)
+        else:
+            self._cache.move_to_end(key)
+
+        try:
+            content_type, body = await asyncio.shield(task)
+        except Exception:
+            # Ошибку не кэшируем: следующий запрос посчитает заново
+            if self._cache.get(key) is task:
+                del self._cache[key]
+            raise
+
+        if page is not None:
+            pages = body
+            if not page.isdigit() or not 1 <= int(page) <= len(pages):
+                raise DashboardError(404, f"Нет страницы {page} (всего {len(pages)})")
+            body = pages[int(page) - 1]
+        return content_type, body
+
+    async def _build(self, snapshot, path, params):
+        """Считает ответ: JSON - в пуле потоков, PNG - в пуле процессов."""
+        loop = asyncio.get_running_loop()
+        if path in ('/', '/index.html'):
+            return 'text/html; charset=utf-8', self._index(snapshot).encode('utf-8')
+        if path == '/api/summary':
+            return await loop.run_in_executor(None, self._json, snapshot.summary)
+        if path == '/api/heatmap':
+            return await loop.run_in_executor(None, self._json, snapshot.heatmap)
+        if path == '/api/timeline':
+            options = {
+                'metric': params.get('metric', 'cost'),
+                'res': params.get('res', '1h'),
+                'since': self._parse_datetime(params, 'since'),
+                'until': self._parse_datetime(params, 'until'),
+                'model': params.get('model'),
+                'max_points': DASHBOARD['max_points'],
+            }
+            return await loop.run_in_executor(None, lambda: self._json(snapshot.timeline, **options))
+        if path.startswith('/charts/') and path.endswith('.png'):
+            chart_id = path[len('/charts/'):-len('.png')]
+            if chart_id not in snapshot.jobs:
+                raise DashboardError(404, f"Неизвестный график: {chart_id} (доступны: {', '.join(snapshot.jobs)})")
+            pages = await loop.run_in_executor(self._pool, render_chart, chart_id,
+                                               snapshot.jobs[chart_id], self.render_profile)
+            if not pages:
+                raise DashboardError(404, f"График {chart_id} пуст: нет данных")
+            return 'image/png', pages
+        raise DashboardError(404, f"Не найдено: {path}")
+
+    @staticmethod
+    def _json(func, **kwargs):
+        """Вызывает func и сериализует результат в JSON."""
+        return 'application/json; charset=utf-8', json.dumps(func(**kwargs), ensure_ascii=False).encode('utf-8')
+
+    @staticmethod
+    def _parse_datetime(params, name):
+        """Разбирает параметр даты 'YYYY-MM-DD[ HH:MM]' (UTC+7)."""
+        if name not in params:
+            return None
+        try:
+            return datetime.fromisoformat(params[name])
+        except ValueError:
+            raise DashboardError(400, f"{name}: неверная дата {params[name]} (ожидается YYYY-MM-DD[ HH:MM])")
+
+    @staticmethod
+    def _error(status, message):
+        """Ответ с ошибкой в JSON."""
+        body = json.dumps({'error': message}, ensure_ascii=False).encode('utf-8')
+        return status, 'application/json; charset=utf-8', body, None
+
+    @staticmethod
+    def _index(snapshot):
+        """Страница дашборда: сводка и графики (PNG подгружаются по мере готовности)."""
+        summary = snapshot.summary()
+        rows = ''.join(
+            f"<tr><td>{html.escape(model)}</td>"
+            f"<td>{stats['included_requests'] + stats['on_demand_requests']:,}</td>"
+            f"<td>${stats['included_cost'] + stats['on_demand_cost']:,.2f}</td></tr>"
+            for model, stats in sorted(summary['models'].items(),
+                                       key=lambda item: -(item[1]['included_cost'] + item[1]['on_demand_cost']))
+        )
+        charts = ''.join(
+            f'<figure><img loading="lazy" src="/charts/{chart_id}.png" alt="{chart_id}">'
+            f'<figcaption>{chart_id}</figcaption></figure>'
+            for chart_id in summary['charts']
+        )
+        return f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>Cursor Usage Dashboard</title>
+<style>
+body {{ background: #111; color: #ddd; font-family: sans-serif; margin: 24px; }}
+table {{ border-collapse: collapse; }}
+td, th {{ padding: 4px 12px; border-bottom: 1px solid #333; text-align: right; }}
+td:first-child, th:first-child {{ text-align: left; }}
+figure {{ margin: 24px 0; }}
+img {{ max-width: 100%; }}
+a {{ color: #4ECDC4; }}
+</style>
+</head>
+<body>
+<h1>Cursor Usage Dashboard</h1>
+<p>Period: {html.escape(summary['period'])} &middot; {summary['first_event']} &mdash; {summary['last_event']}
+&middot; data version {summary['version']}</p>
+<p>Total cost: <b>${summary['total_cost']:,.2f}</b> &middot; Requests: <b>{summary['total_requests']:,}</b></p>
+<p>API: <a href="/api/summary">/api/summary</a> &middot; <a href="/api/timeline?metric=cost&amp;res=1d">/api/timeline</a>
+&middot; <a href="/api/heatmap">/api/heatmap</a></p>
+<h2>Models</h2>
+<table><tr><th>Model</th><th>Requests</th><th>Cost</th></tr>{rows}</table>
+{charts}
+</body>
+</html>
+"""
@@ -0,0 +1,166 @@
+"""Неизменяемый срез данных, который отдает дашборд."""
+
+import hashlib
+from datetime import datetime
+import numpy as np
+from analyzers import TimelinePyramid
+from analyzers.timeline_pyramid import PYRAMID_LEVELS
+from analyzers.usage_store import to_store_seconds
+
+
+WEEKDAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+TIMELINE_METRICS = ('cost', 'requests')
+PAID_KINDS = ('Included', 'On-Demand')
+
+
+class DashboardError(Exception):
+    """Ошибка запроса к дашборду с HTTP статусом."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class DashboardSnapshot:
+    """
+    Результаты анализа, колонки событий и задания графиков одной версии данных.
+
+    Снимок не меняется после создания: новая версия данных - новый снимок,
+    поэтому запросы читают его из разных потоков без блокировок. Версия -
+    хэш содержимого, так что ETag не меняется, пока не изменились данные
+    (в том числе после перезапуска сервера).
+    """
+
+    def __init__(self, results, columns, jobs, period='all', since=None, until=None):
+        """
+        Инициализирует снимок.
+
+        Args:
+            results: Результаты CSVAnalyzer.analyze()
+            columns: EventColumns всех событий (для таймлайна и хитмапа)
+            jobs: Задания графиков {chart_id: kwargs} (CursorUsageAnalyzer._chart_jobs)
+            period: Название периода результатов
+            since: Начало периода результатов (naive datetime UTC+7), None - с первого события
+            until: Конец периода (не включительно), None - до последнего события
+        """
+        self.results = results
+        self.columns = columns
+        self.jobs = jobs
+        self.period = period
+        self.since = since
+        self.until = until
+        self.created = datetime.now().isoformat(timespec='seconds')
+        self._pyramid = None
+
+        digest = hashlib.blake2b(digest_size=8)
+        digest.update(f"{period}|{since}|{until}|{len(columns.ts)}|{results['total_requests']}|"
+                      f"{results['total_cost']!r}".encode())
+        digest.update(columns.ts[-1:].tobytes())
+        digest.update(columns.values['cost'].sum().tobytes())
+        self.version = digest.hexdigest()
+
+    def summary(self):
+        """Общая статистика и статистика по моделям."""
+        results = self.results
+        ts = self.columns.ts[self._period_rows()]
+        return {
+            'version': self.version,
+            'period': self.period,
+            'created': self.created,
+            'first_event': self._format_seconds(ts[0]) if len(ts) else None,
+            'last_event': self._format_seconds(ts[-1]) if len(ts) else None,
+            'total_cost': results['total_cost'],
+            'total_requests': results['total_requests'],
+            'models': results['models'],
+            'cost_percentiles': results['cost_percentiles'],
+            'spikes': results.get('spikes', []),
+            'burn_rate': results.get('burn_rate'),
+            'sessions': results.get('sessions'),
+            'cache_efficiency': results.get('cache_efficiency'),
+            'charts': list(self.jobs),
+        }
+
+    def timeline(self, metric='cost', res='1h', since=None, until=None, model=None, max_points=5000):
+        """
+        Ряд стоимости или запросов (Included и On-Demand) по бакетам.
+
+        Суммы берутся из префиксных сумм TimelinePyramid, поэтому ответ
+        не зависит от количества событий в диапазоне. Диапазон ограничен
+        периодом снимка: ряд описывает те же события, что и summary().
+
+        Args:
+            metric: 'cost' или 'requests'
+            res: Шаг бакета: '1min', '10min', '1h', '1d', '1w'
+            since: Начало (naive datetime UTC+7), None - с начала периода
+            until: Конец (не включительно), None - до конца периода
+            model: Только эта модель, None - все модели
+            max_points: Максимум бакетов в ответе
+
+        Returns:
+            dict: 'starts' (начала бакетов), 'since'/'until' (точные границы
+                  диапазона: крайние бакеты обрезаны по ним), 'total' и
+                  'models' (ряд каждой модели)
+        """
+        if metric not in TIMELINE_METRICS:
+            raise DashboardError(400, f"metric: {metric} (доступны: {', '.join(TIMELINE_METRICS)})")
+        levels = [level[0] for level in PYRAMID_LEVELS]
+        if res not in levels:
+            raise DashboardError(400, f"res: {res} (доступны: {', '.join(levels)})")
+
+        pyramid = self.pyramid()
+        if model is not None and model not in pyramid.model_names:
+            raise DashboardError(404, f"Модель не найдена: {model}")
+        if self.since is not None:
+            since = self.since if since is None else max(since, self.since)
+        if self.until is not None:
+            until = self.until if until is None else min(until, self.until)
+        try:
+            result = pyramid.query(since, until, points=max_points, res=res)
+        except ValueError as e:
+            raise DashboardError(400, f"{e}: сузьте since/until или возьмите res крупнее")
+        if result is None:
+            return {'metric': metric, 'res': res, 'starts': [], 'since': None, 'until': None, 'total': [], 'models': {}}
+
+        values, starts = result[metric], result['starts']
+        models = {
+            name: values[:, i].tolist()
+            for i, name in enumerate(pyramid.model_names)
+            if (model is None or name == model) and values[:, i].any()
+        }
+        total = values[:, pyramid.model_names.index(model)] if model is not None else values.sum(axis=1)
+        return {
+            'metric': metric,
+            'res': res,
+            'starts': np.datetime_as_string(starts.astype('datetime64[s]')).tolist(),
+            'since': self._format_seconds(result['since']),
+            'until': self._format_seconds(result['until']),
+            'total': total.tolist(),
+            'models': models,
+        }
+
+    def heatmap(self):
+        """Запросы, стоимость и платные запросы по дню недели и часу (7 × 24)."""
+        job = self.jobs.get('requests_heatmap')
+        weekday_hour = job['weekday_hour'] if job else self.columns.weekday_hour(PAID_KINDS, self.since, self.until)
+        return dict(weekday_hour, weekdays=WEEKDAY_NAMES, hours=list(range(24)))
+
+    def pyramid(self):
+        """TimelinePyramid платных запросов (строится при первом обращении)."""
+        if self._pyramid is None:
+            columns = self.columns
+            paid = np.isin(columns.kind_codes, [i for i, kind in enumerate(columns.kinds) if kind in PAID_KINDS])
+            self._pyramid = TimelinePyramid(columns.ts[paid], columns.model_codes[paid],
+                                            columns.values['cost'][paid], columns.models)
+        return self._pyramid
+
+    def _period_rows(self):
+        """Срез колонок событий периода снимка."""
+        ts = self.columns.ts
+        lo = np.searchsorted(ts, to_store_seconds(self.since)) if self.since is not None else 0
+        hi = np.searchsorted(ts, to_store_seconds(self.until)) if self.until is not None else len(ts)
+        return slice(lo, max(lo, hi))
+
+    @staticmethod
+    def _format_seconds(seconds):
+        """Секунды UTC+7 в строку ISO."""
+        return str(np.datetime64(int(seconds), 's'))
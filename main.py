@@ -3,10 +3,60 @@
 Модульная версия с разделением на компоненты.
 """
 
-from utils import find_csv_file, setup_output_encoding, clear_directory
-from analyzers import CSVAnalyzer
-from visualizers.base_visualizer import BaseVisualizer
-from visualizers import ModelChartsVisualizer, ActivityChartsVisualizer, HeatmapChartsVisualizer
+import gc
+import os
+import sys
+import shlex
+import pickle
+import argparse
+from collections import deque
+from datetime import datetime
+from utils import find_csv_file, setup_output_encoding, clear_directory, PROFILER, profile_stage
+# Здесь только то, что нужно --stats-only: хранилище, выборка, экспорт,
+# наблюдение за папкой и таймлайны импортируются в своих режимах
+from analyzers import (CSVAnalyzer, EventTable, EventColumns, SpikeDetector, BurnRateProjector, SessionTable,
+                       CacheEfficiency, is_columnar, read_event_table)
+from analyzers.usage_store import to_store_seconds
+from config import (RENDER_PROFILES, RENDER_FORMATS, DEFAULT_RENDER_PROFILE, RENDER_DAEMON, USAGE_STORE,
+                    EXPORT_WATCH, DASHBOARD, SPIKE_DETECTION, CACHE_EFFICIENCY, SAMPLING)
+
+
+PERIODS = ['all', 'month', 'week', 'day']
+
+# Периоды, начало которых сдвигается со временем (в режиме --watch считаются заново)
+SLIDING_PERIODS = ('month', 'week', 'day')
+
+# Статусы бюджета в прогнозе расходов
+BUDGET_STATUSES = {
+    'ok': 'в пределах бюджета',
+    'warning': 'близко к бюджету',
+    'over': 'превысит бюджет',
+    'exceeded': 'бюджет уже превышен',
+}
+
+# Названия периодов в заголовке статистики
+PERIOD_NAMES = {
+    'all': 'Все данные',
+    'month': 'Последний месяц',
+    'week': 'Последняя неделя',
+    'day': 'Последний день'
+}
+
+# Дни недели в строках хитмапов (понедельник - первый)
+WEEKDAY_NAMES = ['Пн', 'Вт', 'Ср', 'Чт', 'Пт', 'Сб', 'Вс']
+
+# Хитмапы, которые строятся по выборке (--sample)
+SAMPLE_CHARTS = ('requests_heatmap', 'cost_heatmap', 'cost_per_request_heatmap')
+
+# Причины плохого использования кэша промптов
+CACHE_REASONS = {
+    'low_hit_ratio': 'низкий hit ratio',
+    'write_amplification': 'много записи в кэш',
+    'negative_savings': 'кэш не окупился',
+}
+
+# matplotlib, seaborn и визуализаторы импортируются только при построении
+# графиков, поэтому режим --stats-only их не загружает.
 
 
 def select_period():
@@ -33,57 +83,227 @@ def select_period():
             print("❌ Неправильный выбор. Попробуйте снова (1-4)")
 
 
+def select_render_profile():
+    """Интерактивный выбор профиля сохранения графиков."""
+    names = list(RENDER_PROFILES)
+    
+    print("\n" + "=" * 70)
+    print("КАЧЕСТВО ГРАФИКОВ")
+    print("=" * 70 + "\n")
+    for i, name in enumerate(names, 1):
+        default_note = " [по умолчанию]" if name == DEFAULT_RENDER_PROFILE else ""
+        print(f"{i} - {RENDER_PROFILES[name]['caption']}{default_note}")
+    
+    while True:
+        choice = input(f"\nВыберите вариант (1-{len(names)}, Enter - по умолчанию): ").strip()
+        if not choice:
+            return DEFAULT_RENDER_PROFILE
+        if choice.isdigit() and 1 <= int(choice) <= len(names):
+            return names[int(choice) - 1]
+        print(f"❌ Неправильный выбор. Попробуйте снова (1-{len(names)})")
+
+
 class CursorUsageAnalyzer:
     """Главный класс для анализа использования Cursor."""
     
-    def __init__(self, period='all'):
-        """Инициализирует анализатор."""
+    def __init__(self, period='all', cost_sketches=False, render_profile=DEFAULT_RENDER_PROFILE,
+                 single_pdf=False, show_progress=True, csv_file=None, events=None, since=None, until=None,
+                 output_dir='graphics', clear_output=True, charts=None, render_format=None, results=None,
+                 spike_notifier=None, budget=None, spikes=None):
+        """
+        Инициализирует анализатор.
+        
+        Args:
+            period: 'all', 'month', 'week', 'day' ('custom' - только since/until)
+            cost_sketches: Квантильные скетчи вместо полных списков стоимостей
+            render_profile: Профиль сохранения графиков
+            single_pdf: Все графики одним PDF документом
+            show_progress: Прогресс-бар при чтении CSV
+            csv_file: Путь к CSV, по умолчанию - первый файл в csv_data/
+            events: Уже разобранная EventTable (общая для нескольких периодов)
+            since: Начало периода (naive datetime UTC+7) вместо period
+            until: Конец периода (не включительно)
+            output_dir: Папка для графиков и HTML отчета
+            clear_output: Очищать папку перед построением графиков
+            charts: Идентификаторы графиков или групп (None - все)
+            render_format: Формат файлов вместо указанного в профиле
+            results: Готовые результаты периода (CSVAnalyzer.analyze_windows)
+            spike_notifier: SpikeNotifier для найденных всплесков расходов
+            budget: Бюджет команды на платежный цикл, $ (вместо BUDGETS['team'])
+            spikes: Готовые всплески по всей истории events (detect_spikes, общие для нескольких периодов)
+        """
         setup_output_encoding()
-        self.csv_file = find_csv_file()
+        self.csv_file = csv_file or find_csv_file()
         self.period = period
-        self.analyzer = CSVAnalyzer(self.csv_file, period=period)
+        self.since = since
+        self.until = until
+        self.render_profile = render_profile
+        self.render_format = render_format
+        self.single_pdf = single_pdf
+        self.output_dir = output_dir
+        self.clear_output = clear_output
+        self.charts = charts
+        self.analyzer = CSVAnalyzer(self.csv_file, period=period, cost_sketches=cost_sketches,
+                                    show_progress=show_progress, events=events, since=since, until=until)
+        self.precomputed_results = results
         self.results = None
+        # Режим --watch: свой исполнитель рендеринга и отпечатки аргументов графиков
+        self._renderer = None
+        self._chart_fingerprints = {}
+        # Всплески расходов: детектор держит состояние между обновлениями --watch
+        self.spike_notifier = spike_notifier
+        self._spike_detector = None
+        self.precomputed_spikes = spikes
+        self._spikes = deque(maxlen=SPIKE_DETECTION['max_kept'])
+        self._streaming = False
+        self.burn_rate = BurnRateProjector(team_budget=budget)
+        self.sessions = None
+        self._timeline_cube = None
     
     def analyze(self):
         """Выполняет анализ CSV файла."""
-        period_names = {
-            'all': 'Все данные',
-            'month': 'Последний месяц',
-            'week': 'Последняя неделя',
-            'day': 'Последний день'
-        }
-        
         print("=" * 70)
         print("АНАЛИЗАТОР ИСПОЛЬЗОВАНИЯ CURSOR")
         print("=" * 70)
         print(f"\nФайл: {self.csv_file}")
-        print(f"Период: {period_names.get(self.period, self.period)}")
+        if self.since or self.until:
+            since = self.since.strftime('%Y-%m-%d %H:%M') if self.since else 'начало'
+            until = self.until.strftime('%Y-%m-%d %H:%M') if self.until else 'конец'
+            print(f"Период: {since} — {until}")
+        else:
+            print(f"Период: {PERIOD_NAMES.get(self.period, self.period)}")
         
-        self.results = self.analyzer.analyze()
+        self.results = self.precomputed_results or self.analyzer.analyze()
+        self._timeline_cube = None
+        self._detect_spikes()
+        self._project_burn_rate()
+        self._build_sessions()
+        self._analyze_cache()
         
         return self.results
     
-    def print_statistics(self):
-        """Выводит статистику использования."""
+    def _detect_spikes(self, new_events=None):
+        """
+        Ищет всплески расходов и кладет их в results['spikes'].
+        
+        Без new_events детектор проходит всю историю до конца периода
+        (до начала периода он набирает статистику), а готовые всплески
+        всей истории (spikes) только обрезаются по периоду. С new_events -
+        только новые события: состояние детектора сохраняется между вызовами.
+        Если среди них есть события старше уже обработанных (дозагружен
+        более ранний экспорт), история проходится заново. Новые всплески
+        периода отправляются в spike_notifier.
+        
+        Args:
+            new_events: События, добавленные с прошлого вызова (режим --watch)
+        """
+        with profile_stage('Всплески расходов'):
+            known = None
+            if new_events and self._spike_detector.is_behind(new_events[0].date):
+                # Отправляются только всплески, которых не было до прохода заново
+                known = {(spike['ts'], spike['model']) for spike in self._spikes}
+                new_events = None
+            if new_events is None and self.precomputed_spikes is not None:
+                self._spikes.clear()
+                end = self.analyzer.period_end
+                end = to_store_seconds(end) if end is not None else None
+                spikes = [spike for spike in self.precomputed_spikes if end is None or spike['ts'] < end]
+            elif new_events is None:
+                self._spike_detector = SpikeDetector()
+                self._spikes.clear()
+                spikes = self._spike_detector.feed(self.analyzer.events.columns(), until=self.analyzer.period_end)
+                # В режиме --watch последний бакет остается открытым: в него еще придут события
+                if not self._streaming:
+                    spikes += self._spike_detector.flush()
+            elif new_events:
+                spikes = self._spike_detector.feed(EventColumns.from_events(new_events), until=self.analyzer.period_end)
+            else:
+                spikes = []
+            
+            start = self.analyzer.period_start
+            start = to_store_seconds(start) if start is not None else None
+            spikes = [spike for spike in spikes if start is None or spike['ts'] >= start]
+            self._spikes.extend(spikes)
+            self.results['spikes'] = [spike for spike in self._spikes if start is None or spike['ts'] >= start]
+            if known is not None:
+                spikes = [spike for spike in spikes if (spike['ts'], spike['model']) not in known]
+        
+        if self.spike_notifier is not None:
+            self.spike_notifier.emit(spikes)
+    
+    def _build_sessions(self):
+        """Делит события периода на сессии работы (self.sessions, results['sessions'])."""
+        with profile_stage('Сессии'):
+            self.sessions = SessionTable.from_columns(self.analyzer.events.columns(),
+                                                      since=self.analyzer.period_start, until=self.analyzer.period_end)
+            self.results['sessions'] = self.sessions.summary()
+    
+    def _analyze_cache(self):
+        """Эффективность кэша промптов по моделям, дням и сессиям (results['cache_efficiency'])."""
+        with profile_stage('Эффективность кэша'):
+            cache = CacheEfficiency(self.analyzer.events.columns(),
+                                    since=self.analyzer.period_start, until=self.analyzer.period_end)
+            models = cache.by_model()
+            poor_models = {model: cache.poor_reuse(stats) for model, stats in models.items()}
+            poor_count, poor_sessions = cache.poor_sessions(self.sessions)
+            self.results['cache_efficiency'] = {
+                'total': cache.totals(),
+                'models': models,
+                'daily': cache.by_day(),
+                'poor_models': {model: reasons for model, reasons in poor_models.items() if reasons},
+                'poor_session_count': poor_count,
+                'poor_sessions': poor_sessions,
+                'thresholds': dict(CACHE_EFFICIENCY),
+            }
+    
+    def timeline_cube(self):
+        """
+        Куб таймлайнов периода: один на графики таймлайна и HTML отчет.
+        
+        Строится по колонкам событий при первом обращении после анализа
+        (в режиме --stats-only не строится совсем).
+        """
+        if self._timeline_cube is None:
+            from analyzers import TimelineCube
+            with profile_stage('Куб таймлайнов'):
+                self._timeline_cube = TimelineCube.from_columns(
+                    self.analyzer.events.columns(), since=self.analyzer.period_start, until=self.analyzer.period_end)
+        return self._timeline_cube
+    
+    def _project_burn_rate(self):
+        """Прогноз расходов на платежный цикл по почасовым агрегатам (results['burn_rate'])."""
+        with profile_stage('Прогноз расходов'):
+            self.results['burn_rate'] = self.burn_rate.project(self.results['hourly_cost_by_model_full'],
+                                                               since=self.analyzer.period_start)
+    
+    def format_statistics(self):
+        """
+        Формирует текст статистики использования.
+        
+        Returns:
+            list: Строки статистики (для вывода в консоль и страницы PDF)
+        """
         if not self.results:
-            return
+            return []
+        
+        lines = []
         
         models = self.results['models']
-        total_cost = self.analyzer.get_total_cost()
-        total_requests = self.analyzer.get_total_requests()
+        total_cost = self.results['total_cost']
+        total_requests = self.results['total_requests']
         
-        print("\n" + "=" * 70)
-        print("ОБЩАЯ СТАТИСТИКА")
-        print("=" * 70)
+        lines.append("\n" + "=" * 70)
+        lines.append("ОБЩАЯ СТАТИСТИКА")
+        lines.append("=" * 70)
         
-        print(f"\nВсего моделей использовано: {len(models)}")
-        print(f"Общее количество запросов: {total_requests:,}")
-        print(f"Общая стоимость: ${total_cost:.2f}")
+        lines.append(f"\nВсего моделей использовано: {len(models)}")
+        lines.append(f"Общее количество запросов: {total_requests:,}")
+        lines.append(f"Общая стоимость: ${total_cost:.2f}")
         
         # Статистика по моделям
-        print("\n" + "-" * 70)
-        print("СТАТИСТИКА ПО МОДЕЛЯМ:")
-        print("-" * 70)
+        lines.append("\n" + "-" * 70)
+        lines.append("СТАТИСТИКА ПО МОДЕЛЯМ:")
+        lines.append("-" * 70)
         
         for model_name, stats in sorted(models.items(), 
                                        key=lambda x: x[1]['included_cost'] + x[1]['on_demand_cost'],
@@ -94,124 +314,868 @@ class CursorUsageAnalyzer:
             if total_model_requests == 0:
                 continue
             
-            print(f"\n{model_name}:")
-            print(f"  Запросы: {total_model_requests:,} "
-                  f"(Included: {stats['included_requests']}, On-Demand: {stats['on_demand_requests']})")
-            print(f"  Стоимость: ${total_model_cost:.2f} "
-                  f"(Included: ${stats['included_cost']:.2f}, On-Demand: ${stats['on_demand_cost']:.2f})")
-            print(f"  Стоимость на запрос: ${total_model_cost / total_model_requests:.4f}")
+            lines.append(f"\n{model_name}:")
+            lines.append(f"  Запросы: {total_model_requests:,} "
+                         f"(Included: {stats['included_requests']}, On-Demand: {stats['on_demand_requests']})")
+            lines.append(f"  Стоимость: ${total_model_cost:.2f} "
+                         f"(Included: ${stats['included_cost']:.2f}, On-Demand: ${stats['on_demand_cost']:.2f})")
+            lines.append(f"  Стоимость на запрос: ${total_model_cost / total_model_requests:.4f}")
+            
+            percentiles = self.results['cost_percentiles'].get(model_name)
+            if percentiles:
+                error_note = f" (±{percentiles['rank_error'] * 100:.1f}% по рангу)" if percentiles['rank_error'] else ""
+                lines.append(f"  Перцентили стоимости: p50 ${percentiles['p50']:.4f}, "
+                             f"p90 ${percentiles['p90']:.4f}, p99 ${percentiles['p99']:.4f}{error_note}")
             
             if stats['errors'] > 0:
-                print(f"  Ошибки (Rate Limited): {stats['errors']}")
+                lines.append(f"  Ошибки (Rate Limited): {stats['errors']}")
+        
+        burn_rate = self.results.get('burn_rate')
+        if burn_rate:
+            lines.append("\n" + "-" * 70)
+            lines.append("ПРОГНОЗ РАСХОДОВ ЗА ПЛАТЕЖНЫЙ ЦИКЛ:")
+            lines.append("-" * 70)
+            lines.append(f"  Цикл: {burn_rate['cycle_start']} — {burn_rate['cycle_end']} "
+                         f"(прошло {burn_rate['elapsed'] * 100:.0f}%, данные до {burn_rate['as_of']})")
+            lines.append(f"  Текущий уровень: ${burn_rate['daily_rate']:.2f}/день "
+                         f"(в среднем за последние {self.burn_rate.trend_days} дн.)")
+            entries = [('Команда', burn_rate['team'])] + [
+                (model, entry) for model, entry in sorted(burn_rate['models'].items()) if entry['budget']
+            ]
+            for name, entry in entries:
+                line = f"  {name}: потрачено ${entry['spent']:.2f}, прогноз ${entry['projected']:.2f}"
+                if entry['budget']:
+                    line += (f" из ${entry['budget']:.2f} ({entry['ratio'] * 100:.0f}%) - "
+                             f"{BUDGET_STATUSES[entry['status']]}")
+                    if entry['exhausted_at']:
+                        line += f", закончится ~{entry['exhausted_at']}"
+                lines.append(line)
+        
+        cache = self.results.get('cache_efficiency')
+        if cache and cache['total']['prompt_tokens']:
+            total = cache['total']
+            lines.append("\n" + "-" * 70)
+            lines.append("ЭФФЕКТИВНОСТЬ КЭША ПРОМПТОВ:")
+            lines.append("-" * 70)
+            lines.append(f"  Всего: hit ratio {total['hit_ratio'] * 100:.1f}%, "
+                         f"запись/чтение {self._format_amplification(total)}, "
+                         f"сэкономлено ${total['cost_avoided']:.2f} из ${total['uncached_cost']:.2f} "
+                         f"без кэша ({total['savings_ratio'] * 100:.0f}%)")
+            for model, stats in sorted(cache['models'].items(), key=lambda item: -item[1]['uncached_cost']):
+                reasons = cache['poor_models'].get(model)
+                flag = f"  ⚠ {', '.join(CACHE_REASONS[reason] for reason in reasons)}" if reasons else ""
+                lines.append(f"  {model}: hit ratio {stats['hit_ratio'] * 100:.1f}%, "
+                             f"запись/чтение {self._format_amplification(stats)}, "
+                             f"сэкономлено ${stats['cost_avoided']:.2f} ({stats['savings_ratio'] * 100:.0f}%){flag}")
+            if cache['poor_session_count']:
+                lines.append(f"  Сессий с плохим кэшем: {cache['poor_session_count']:,} (самые дорогие):")
+                for session in cache['poor_sessions']:
+                    lines.append(f"    {session['start']}  {session['model']}: ${session['cached_cost']:.2f}, "
+                                 f"hit ratio {session['hit_ratio'] * 100:.1f}%, "
+                                 f"запись/чтение {self._format_amplification(session)} - "
+                                 f"{', '.join(CACHE_REASONS[reason] for reason in session['reasons'])}")
+        
+        sessions = self.results.get('sessions')
+        if sessions:
+            duration = sessions['duration_minutes']
+            lines.append("\n" + "-" * 70)
+            lines.append(f"СЕССИИ (пауза больше {sessions['gap_minutes']} мин - новая сессия):")
+            lines.append("-" * 70)
+            lines.append(f"  Сессий: {sessions['count']:,}, всего {sessions['total_hours']:.1f} ч")
+            lines.append(f"  Длительность: медиана {duration['p50']:.0f} мин, p90 {duration['p90']:.0f} мин, "
+                         f"максимум {duration['max']:.0f} мин")
+            lines.append(f"  Запросов в сессии: медиана {sessions['requests']['p50']:.0f}, "
+                         f"p90 {sessions['requests']['p90']:.0f}")
+            lines.append(f"  Стоимость сессии: медиана ${sessions['cost']['p50']:.2f}, "
+                         f"p90 ${sessions['cost']['p90']:.2f}; "
+                         f"стоимость минуты: медиана ${sessions['cost_per_minute']['p50']:.3f}")
+            lines.append("  Самые дорогие:")
+            for session in sessions['top']:
+                # Конец в тот же день - только время
+                end = session['end'][11:] if session['end'][:10] == session['start'][:10] else session['end']
+                lines.append(f"    {session['start']} — {end}  {session['model']}: "
+                             f"${session['cost']:.2f}, {session['requests']:,} запросов, "
+                             f"{session['duration_minutes']:.0f} мин (${session['cost_per_minute']:.3f}/мин)")
+        
+        spikes = self.results.get('spikes')
+        if spikes:
+            shown = SPIKE_DETECTION['shown']
+            lines.append("\n" + "-" * 70)
+            lines.append(f"ВСПЛЕСКИ РАСХОДОВ: {len(spikes)}" + (f" (последние {shown})" if len(spikes) > shown else ""))
+            lines.append("-" * 70)
+            for spike in spikes[-shown:]:
+                lines.append(f"  {spike['bucket']}  {spike['model']}: ${spike['cost']:.2f} за "
+                             f"{SPIKE_DETECTION['bucket_minutes']} мин (медиана ${spike['median']:.2f}, "
+                             f"отклонение {spike['score']:.1f})")
+        
+        return lines
+    
+    @staticmethod
+    def _format_amplification(stats):
+        """Write amplification для вывода (без чтений из кэша - прочерк)."""
+        amplification = stats['write_amplification']
+        return f"{amplification:.2f}" if amplification is not None else "— (нет чтений)"
+    
+    def print_statistics(self):
+        """Выводит статистику использования."""
+        lines = self.format_statistics()
+        if lines:
+            print("\n".join(lines))
+    
+    def refresh(self, new_events=(), stats_only=False):
+        """
+        Обновляет анализ новыми событиями (режим --watch).
+        
+        Первый вызов выполняет полный анализ. Дальше агрегаты дополняются
+        только новыми событиями, а 'day'/'week'/'month' пересчитываются
+        по общей таблице событий (их окно сдвигается со временем).
+        Перестраиваются только графики, аргументы которых изменились.
+        
+        Args:
+            new_events: События, добавленные в таблицу с прошлого вызова
+            stats_only: Только статистика, без графиков и HTML отчета
+        """
+        if self.results is None:
+            self._streaming = True
+            self.analyze()
+        else:
+            if self.period in SLIDING_PERIODS:
+                self.analyzer = CSVAnalyzer(self.csv_file, period=self.period,
+                                            cost_sketches=self.analyzer.cost_sketches,
+                                            show_progress=False, events=self.analyzer.events)
+                self.results = self.analyzer.analyze()
+            else:
+                self.results = self.analyzer.update(new_events)
+            self._timeline_cube = None
+            self._detect_spikes(new_events)
+            self._project_burn_rate()
+            self._build_sessions()
+            self._analyze_cache()
+        
+        self.print_statistics()
+        if not stats_only:
+            self.create_visualizations(only_changed=True)
+            self.create_html_report()
     
-    def create_visualizations(self):
-        """Создает все графики."""
+    def create_visualizations(self, only_changed=False):
+        """
+        Создает все графики.
+        
+        Args:
+            only_changed: Перестроить только графики, аргументы которых изменились
+                с прошлого вызова; файлы сохраняют прежние номера (режим --watch)
+        """
         if not self.results:
             return
         
+        jobs = self._chart_jobs()
+        if self.charts is not None:
+            jobs = self._select_charts(jobs)
+        
+        keep_numbers = False
+        if only_changed:
+            fingerprints = {chart_id: self._fingerprint(kwargs) for chart_id, kwargs in jobs}
+            # Один PDF пишется целиком, частично перестраиваются только отдельные файлы
+            keep_numbers = bool(self._chart_fingerprints) and not self.single_pdf
+            if keep_numbers:
+                jobs = [(chart_id, kwargs) for chart_id, kwargs in jobs
+                        if fingerprints[chart_id] != self._chart_fingerprints.get(chart_id)]
+            self._chart_fingerprints = fingerprints
+            if not jobs:
+                print("\n📊 Графики не изменились")
+                return
+        
         # Очищаем папку перед созданием новых графиков
-        clear_directory('graphics')
-        BaseVisualizer.reset_counter()
+        if self.clear_output and not keep_numbers:
+            clear_directory(self.output_dir)
         
         print("\n" + "=" * 70)
         print("📊 СОЗДАНИЕ ГРАФИКОВ")
         print("=" * 70)
         
-        models = self.results['models']
-        daily_usage = self.results['daily_usage']
-        hourly_usage = self.results['hourly_usage']
-        request_costs_by_model = self.results['request_costs_by_model']
-        daily_cost = self.results['daily_cost']
-        hourly_cost = self.results['hourly_cost']
-        daily_cost_by_model = self.results['daily_cost_by_model']
-        hourly_cost_by_model = self.results['hourly_cost_by_model']
-        hourly_cost_full = self.results['hourly_cost_full']
-        hourly_cost_by_model_full = self.results['hourly_cost_by_model_full']
-        hourly_requests_full = self.results['hourly_requests_full']
-        hourly_requests_by_model_full = self.results['hourly_requests_by_model_full']
-        ten_min_cost = self.results['ten_min_cost']
-        ten_min_cost_by_model = self.results['ten_min_cost_by_model']
-        ten_min_requests = self.results['ten_min_requests']
-        ten_min_requests_by_model = self.results['ten_min_requests_by_model']
-        all_timestamps = self.results['all_timestamps']
-        monthly_cost = self.analyzer.get_total_cost()
-        
-        print("\n📈 Графики моделей...")
-        model_viz = ModelChartsVisualizer()
-        model_viz.create_models_overview(models)
-        model_viz.create_included_vs_ondemand(models)
-        model_viz.create_tokens_detailed(models)
-        model_viz.create_cost_per_request(models)
-        model_viz.create_cost_distribution_boxplot(request_costs_by_model)
-        model_viz.create_token_composition(models)
-        
-        print("\n📉 Графики активности...")
-        activity_viz = ActivityChartsVisualizer()
-        activity_viz.create_daily_activity(daily_usage)
-        activity_viz.create_daily_activity_separate(daily_usage)
-        
-        print("\n💰 Графики стоимости...")
-        activity_viz.create_cost_timeline_all_period(all_timestamps)
-        activity_viz.create_cost_timeline_last_month(daily_cost_by_model)
-        activity_viz.create_cost_timeline_last_week(hourly_cost_full)
-        activity_viz.create_cost_timeline_last_day(ten_min_cost)
-        
-        print("\n💰 Графики стоимости по моделям...")
-        activity_viz.create_cost_timeline_by_model_all_period(all_timestamps, models)
-        activity_viz.create_cost_timeline_by_model_last_month(daily_cost_by_model, models)
-        activity_viz.create_cost_timeline_by_model_last_week(hourly_cost_by_model_full, models)
-        activity_viz.create_cost_timeline_by_model_last_day(ten_min_cost_by_model, models)
-        
-        print("\n📊 Графики запросов...")
-        activity_viz.create_request_timeline_all_period(all_timestamps)
-        activity_viz.create_request_timeline_last_month(daily_usage)
-        activity_viz.create_request_timeline_last_week(hourly_requests_full)
-        activity_viz.create_request_timeline_last_day(ten_min_requests)
-        
-        print("\n📊 Графики запросов по моделям...")
-        activity_viz.create_request_timeline_by_model_all_period(all_timestamps, models)
-        activity_viz.create_request_timeline_by_model_last_month(daily_usage, models)
-        activity_viz.create_request_timeline_by_model_last_week(hourly_requests_by_model_full, models)
-        activity_viz.create_request_timeline_by_model_last_day(ten_min_requests_by_model, models)
-        
-        print("\n🔥 Хитмапы...")
-        heatmap_viz = HeatmapChartsVisualizer(self.csv_file)
-        heatmap_viz.create_combined_requests_heatmap()
-        heatmap_viz.create_combined_cost_heatmap()
-        heatmap_viz.create_cost_per_request_heatmap()
-        
-        print("\n✅ Создано 25 графиков в папке graphics/")
-    
-    def run(self):
-        """Запускает полный анализ."""
+        options = {
+            'output_dir': os.path.abspath(self.output_dir),
+            'csv_file': os.path.abspath(self.csv_file),
+            'render_profile': self.render_profile,
+            'render_format': self.render_format,
+        }
+        if self.single_pdf:
+            # Все фигуры пишутся страницами одного PDF по мере построения
+            options['pdf_path'] = os.path.join(options['output_dir'], 'report.pdf')
+            jobs.insert(0, ('summary', {'lines': self.format_statistics()}))
+        
+        if only_changed:
+            # Долгоживущий процесс сам держит matplotlib и визуализаторы
+            if self._renderer is None:
+                with profile_stage('Импорт matplotlib и визуализаторов'):
+                    from visualizers import ChartRenderer
+                self._renderer = ChartRenderer()
+            figures = self._renderer.render(jobs, keep_numbers=keep_numbers, **options)
+            if self._renderer.numbering_changed:
+                # У графика изменилось количество фигур: номера файлов сдвигаются
+                self._chart_fingerprints = {}
+                self._renderer.figure_numbers = {}
+                self.create_visualizations(only_changed=True)
+                return
+        elif RENDER_DAEMON['enabled']:
+            # Этапы внутри процесса рендеринга не профилируются, замеряется задание целиком
+            from render_service import RenderClient
+            with profile_stage('Графики (процесс рендеринга)'):
+                figures = RenderClient().render(jobs, **options)
+        else:
+            with profile_stage('Импорт matplotlib и визуализаторов'):
+                from visualizers import ChartRenderer
+            figures = ChartRenderer().render(jobs, **options)
+        
+        if self.single_pdf:
+            print(f"\n✅ PDF отчет ({figures} стр.): {os.path.join(self.output_dir, 'report.pdf')}")
+        elif keep_numbers:
+            print(f"\n✅ Обновлено {figures} графиков в папке {self.output_dir}/")
+        else:
+            print(f"\n✅ Создано {figures} графиков в папке {self.output_dir}/")
+    
+    @staticmethod
+    def _fingerprint(kwargs):
+        """Отпечаток аргументов графика: одинаковые данные дают одинаковый отпечаток."""
+        import hashlib
+        return hashlib.blake2b(pickle.dumps(kwargs, protocol=pickle.HIGHEST_PROTOCOL), digest_size=16).digest()
+    
+    def _select_charts(self, jobs):
+        """Оставляет задания графиков из self.charts (идентификаторы или группы)."""
+        from visualizers import CHARTS
+        
+        chart_ids = [chart_id for chart_id, _ in jobs]
+        groups = list(dict.fromkeys(CHARTS[chart_id][0] for chart_id in chart_ids))
+        unknown = [name for name in self.charts if name not in chart_ids and name not in groups]
+        if unknown:
+            raise ValueError(f"Неизвестные графики: {', '.join(unknown)}. "
+                             f"Доступны: {', '.join(groups + chart_ids)}")
+        return [(chart_id, kwargs) for chart_id, kwargs in jobs
+                if chart_id in self.charts or CHARTS[chart_id][0] in self.charts]
+    
+    def _chart_jobs(self):
+        """
+        Формирует задания на рендеринг всех графиков.
+        
+        Returns:
+            list: (chart_id, kwargs) из visualizers.chart_registry.CHARTS;
+                  аргументы - обычные dict/list, чтобы их можно было передать процессу рендеринга
+        """
+        models = {model: dict(stats) for model, stats in self.results['models'].items()}
+        daily_usage = {day: dict(usage) for day, usage in self.results['daily_usage'].items()}
+        day_hour_grid = self.results['day_hour_grid']
+        # Хитмапы день недели × час строятся по событиям периода, без повторного чтения CSV
+        weekday_hour = {'weekday_hour': self.analyzer.events.columns().weekday_hour(
+            since=self.analyzer.period_start, until=self.analyzer.period_end)}
+        
+        return [
+            ('models_overview', {'models': models}),
+            ('included_vs_ondemand', {'models': models}),
+            ('tokens_detailed', {'models': models}),
+            ('cost_per_request', {'models': models}),
+            ('cost_distribution_boxplot', {'cost_box_stats': self.results['cost_box_stats']}),
+            ('token_composition', {'models': models}),
+            ('cache_efficiency', {'cache_efficiency': self.results['cache_efficiency']}),
+            ('daily_activity', {'daily_usage': daily_usage}),
+            ('daily_activity_separate', {'daily_usage': daily_usage}),
+            ('timelines', {'cube': self.timeline_cube(), 'spikes': self.results['spikes']}),
+            ('requests_heatmap', weekday_hour),
+            ('cost_heatmap', weekday_hour),
+            ('cost_per_request_heatmap', weekday_hour),
+            ('calendar_heatmap', {'day_hour_grid': day_hour_grid}),
+            ('calendar_day_grid', {'day_hour_grid': day_hour_grid}),
+            ('session_distributions', {'sessions': self.sessions.chart_data()}),
+        ]
+    
+    def create_html_report(self):
+        """Создает интерактивный HTML отчет."""
+        if not self.results:
+            return
+        
+        with profile_stage('HTML отчет'):
+            from reports import HtmlReportWriter
+            writer = HtmlReportWriter(output_dir=self.output_dir)
+            filepath = writer.write(self.results, self.results['total_cost'], self.results['total_requests'],
+                                    cube=self.timeline_cube())
+        print(f"\n🌐 HTML отчет: {filepath}")
+    
+    def run(self, stats_only=False, interactive=False):
+        """
+        Запускает полный анализ.
+        
+        Ошибки не глотаются: из командной строки (cron, скрипты) процесс
+        завершается с ненулевым кодом, понятное сообщение без выхода
+        выводится только при интерактивном запуске.
+        
+        Args:
+            stats_only: Только статистика, без графиков и HTML отчета
+            interactive: Запуск из меню (run_interactive)
+        """
         try:
             # Анализ
             self.analyze()
             
             # Вывод статистики
             self.print_statistics()
+            if stats_only:
+                return
             
             # Визуализация
             self.create_visualizations()
+            self.create_html_report()
             
             print("\n" + "=" * 70)
             print("✓ АНАЛИЗ ЗАВЕРШЕН!")
-            print("Графики сохранены в папке: graphics/")
+            print(f"Графики сохранены в папке: {self.output_dir}/")
             print("=" * 70)
             
         except FileNotFoundError as e:
             print(f"\nОшибка: {e}")
+            if not interactive:
+                sys.exit(1)
         except Exception as e:
+            # Traceback в stderr и код выхода 1 - вызывающему скрипту видно, что анализ не удался
+            if not interactive:
+                raise
             print(f"\nНепредвиденная ошибка: {e}")
             import traceback
             traceback.print_exc()
 
 
+def parse_periods(value):
+    """Разбирает список периодов через запятую."""
+    periods = [period.strip() for period in value.split(',') if period.strip()]
+    unknown = [period for period in periods if period not in PERIODS]
+    if unknown or not periods:
+        raise argparse.ArgumentTypeError(f"неизвестный период: {', '.join(unknown) or value} "
+                                         f"(доступны: {', '.join(PERIODS)})")
+    return list(dict.fromkeys(periods))
+
+
+def parse_datetime(value):
+    """Разбирает дату 'YYYY-MM-DD' или 'YYYY-MM-DD HH:MM' (UTC+7)."""
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"неверная дата: {value} (ожидается YYYY-MM-DD[ HH:MM])")
+
+
+def parse_args():
+    """Разбирает аргументы командной строки."""
+    parser = argparse.ArgumentParser(description='Анализатор использования Cursor AI')
+    parser.add_argument('--period', type=parse_periods,
+                        help=f"Периоды через запятую: {','.join(PERIODS)}. "
+                             f"Несколько периодов считаются из одного чтения CSV, графики - в подпапках --out")
+    parser.add_argument('--since', type=parse_datetime, help='Начало периода, YYYY-MM-DD[ HH:MM] (UTC+7)')
+    parser.add_argument('--until', type=parse_datetime, help='Конец периода (не включительно), YYYY-MM-DD[ HH:MM]')
+    parser.add_argument('--csv',
+                        help='CSV файл экспорта или его Parquet/Arrow копия (по умолчанию - первый CSV в csv_data/)')
+    parser.add_argument('--out', default='graphics', help='Папка для графиков и отчетов (по умолчанию graphics)')
+    parser.add_argument('--charts',
+                        help='Графики или группы через запятую (models, activity, timeline, heatmaps, ...)')
+    parser.add_argument('--format', choices=RENDER_FORMATS, help='Формат файлов графиков вместо формата профиля')
+    parser.add_argument('--profile', choices=list(RENDER_PROFILES), default=DEFAULT_RENDER_PROFILE,
+                        help=f'Профиль сохранения графиков (по умолчанию {DEFAULT_RENDER_PROFILE})')
+    parser.add_argument('--single-pdf', action='store_true', help='Собрать все графики в один PDF')
+    parser.add_argument('--cost-sketches', '--bounded-memory', dest='cost_sketches', action='store_true',
+                        help='Распределения стоимости в квантильных скетчах (KLL) вместо списков стоимостей '
+                             'всех запросов; перцентили и box plot приближенные. События по-прежнему '
+                             'загружаются целиком, поэтому память все равно растет с размером экспорта')
+    parser.add_argument('--stats-only', action='store_true',
+                        help='Только статистика в консоль: без графиков и без импорта matplotlib')
+    parser.add_argument('--store', action='store_true',
+                        help=f"Читать события из SQLite хранилища ({USAGE_STORE['path']}), CSV импортируется при изменении")
+    parser.add_argument('--watch', nargs='?', const=EXPORT_WATCH['directory'], metavar='DIR',
+                        help=f"Следить за папкой экспортов (по умолчанию {EXPORT_WATCH['directory']}): "
+                             f"новые строки дополняют анализ, перестраиваются изменившиеся графики")
+    parser.add_argument('--serve', nargs='?', type=int, const=DASHBOARD['port'], metavar='PORT',
+                        help=f"HTTP дашборд на http://{DASHBOARD['host']}:PORT (по умолчанию {DASHBOARD['port']}); "
+                             f"вместе с --watch отдает обновляемые данные")
+    parser.add_argument('--spikes-out', metavar='PATH',
+                        help='Дописывать найденные всплески расходов в PATH (JSON lines)')
+    parser.add_argument('--spike-webhook', metavar='URL',
+                        help='Отправлять всплески расходов POST запросом на URL (JSON)')
+    parser.add_argument('--budget', type=float, metavar='USD',
+                        help='Бюджет команды на платежный цикл, $ (бюджеты моделей - в config/budget_config.py)')
+    parser.add_argument('--sample', nargs='?', type=int, const=SAMPLING['rows'], metavar='ROWS',
+                        help=f"Быстрая оценка по случайной выборке из ROWS строк (по умолчанию {SAMPLING['rows']:,}): "
+                             f"итоги, модели и хитмапы с доверительными интервалами, без чтения всего CSV")
+    parser.add_argument('--export', metavar='PATH',
+                        help='Экспортировать события в PATH (.parquet или .arrow) и агрегаты рядом (PATH.hourly, PATH.daily)')
+    parser.add_argument('--profile-stages', action='store_true',
+                        help='Замерить время, CPU и память по этапам и вывести таблицу')
+    parser.add_argument('--profile-memory', action='store_true',
+                        help='Пиковая память Python по этапам (tracemalloc, медленнее); включает --profile-stages')
+    parser.add_argument('--profile-out', metavar='PATH',
+                        help='Сохранить PATH.json (этапы) и PATH.prof (cProfile); включает --profile-stages')
+    args = parser.parse_args()
+    # Параметры профиля без таблицы этапов не имеют смысла
+    if args.profile_memory or args.profile_out:
+        args.profile_stages = True
+    return args
+
+
+def run_interactive():
+    """Интерактивный запуск (без аргументов командной строки)."""
+    period = select_period()
+    render_profile = select_render_profile()
+    single_pdf = input("\nСобрать все графики в один PDF? (y/N): ").strip().lower() in ('y', 'д')
+    analyzer = CursorUsageAnalyzer(period=period, render_profile=render_profile, single_pdf=single_pdf)
+    analyzer.run(interactive=True)
+
+
 def main():
     """Главная функция."""
-    period = select_period()
-    analyzer = CursorUsageAnalyzer(period=period)
-    analyzer.run()
+    if len(sys.argv) == 1 and sys.stdin.isatty():
+        run_interactive()
+        return
+    
+    args = parse_args()
+    
+    if args.since or args.until:
+        periods = ['custom'] + (args.period or [])
+    else:
+        periods = args.period or ['all']
+    charts = [name.strip() for name in args.charts.split(',')] if args.charts else None
+    
+    if args.profile_stages:
+        PROFILER.start(trace_memory=args.profile_memory, cprofile=bool(args.profile_out))
+    try:
+        if args.sample:
+            run_sample(args, periods, charts)
+        elif args.watch:
+            watch_exports(args, periods, charts, dashboard=start_dashboard(args))
+        elif args.serve:
+            serve_dashboard(args, periods, charts)
+        else:
+            run_periods(args, periods, charts)
+    finally:
+        if args.profile_stages:
+            report_profile(args.profile_out)
+
+
+def run_periods(args, periods, charts):
+    """Анализирует периоды из аргументов командной строки."""
+    csv_file, events = load_events(args, periods)
+    
+    # Стандартные периоды считаются вместе за один проход по событиям
+    standard_periods = [period for period in periods if period != 'custom']
+    window_results = {}
+    if len(standard_periods) > 1:
+        window_results = CSVAnalyzer(csv_file, events=events, show_progress=False,
+                                     cost_sketches=args.cost_sketches).analyze_windows(standard_periods)
+    # Детектор проходит историю один раз, периоды берут свои всплески из общего списка
+    spikes = detect_spikes(events) if len(periods) > 1 else None
+    
+    for i, period in enumerate(periods):
+        # Один период пишется прямо в --out, несколько - в подпапки по периодам.
+        # Очищаются только свои подпапки и папка по умолчанию, но не произвольная --out.
+        output_dir = args.out if len(periods) == 1 else os.path.join(args.out, period)
+        custom = period == 'custom'
+        analyzer = CursorUsageAnalyzer(
+            period=period, render_profile=args.profile, single_pdf=args.single_pdf,
+            show_progress=False, csv_file=csv_file, events=events,
+            since=args.since if custom else None, until=args.until if custom else None,
+            output_dir=output_dir, clear_output=output_dir != args.out or args.out == 'graphics',
+            charts=charts, render_format=args.format, results=window_results.get(period),
+            # Всплески всей истории общие для периодов, отправляет их только первый
+            spike_notifier=make_spike_notifier(args) if i == 0 else None, budget=args.budget,
+            cost_sketches=args.cost_sketches, spikes=spikes,
+        )
+        analyzer.run(stats_only=args.stats_only)
+
+
+def run_sample(args, periods, charts):
+    """
+    Режим --sample: приближенная статистика по случайным блокам CSV.
+    
+    Читается только выборка (BlockSample), поэтому ответ по архиву
+    в десятки гигабайт занимает секунды. Итоги, статистика по моделям
+    и хитмапы день недели × час масштабируются на весь файл
+    с доверительными интервалами. В конце выводится та же команда
+    без --sample для точного расчета.
+    """
+    setup_output_encoding()
+    if args.watch or args.serve or args.store or args.export:
+        print("\nОшибка: --sample читает CSV напрямую (без --watch, --serve, --store и --export)")
+        sys.exit(1)
+    try:
+        with profile_stage('Поиск CSV'):
+            csv_file = args.csv or find_csv_file()
+        if is_columnar(csv_file):
+            raise ValueError("--sample читает только CSV (Parquet/Arrow и так загружается быстро)")
+        from analyzers import BlockSample
+        sample = BlockSample.from_csv(csv_file, rows=args.sample)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"\nОшибка: {e}")
+        sys.exit(1)
+    
+    for period in periods:
+        custom = period == 'custom'
+        # Границы периода - как в полном анализе (CSVAnalyzer не читает файл до analyze())
+        analyzer = CSVAnalyzer(csv_file, period=period, show_progress=False,
+                               since=args.since if custom else None, until=args.until if custom else None)
+        estimate = sample.estimate(since=analyzer.period_start, until=analyzer.period_end)
+        
+        print("=" * 70)
+        print("АНАЛИЗАТОР ИСПОЛЬЗОВАНИЯ CURSOR (ВЫБОРКА)")
+        print("=" * 70)
+        print(f"\nФайл: {csv_file}")
+        if custom:
+            since = args.since.strftime('%Y-%m-%d %H:%M') if args.since else 'начало'
+            until = args.until.strftime('%Y-%m-%d %H:%M') if args.until else 'конец'
+            print(f"Период: {since} — {until}")
+        else:
+            print(f"Период: {PERIOD_NAMES.get(period, period)}")
+        print("\n".join(format_sample_statistics(estimate)))
+        
+        if not args.stats_only:
+            output_dir = args.out if len(periods) == 1 else os.path.join(args.out, period)
+            render_sample_heatmaps(args, csv_file, estimate, output_dir, charts)
+    
+    if not sample.exact:
+        print(f"\n🎯 Точный расчет: {exact_command(sys.argv)}")
+
+
+def format_sample_statistics(estimate):
+    """
+    Формирует текст приближенной статистики (BlockSample.estimate).
+    
+    Returns:
+        list: Строки статистики
+    """
+    lines = []
+    lines.append("\n" + "=" * 70)
+    lines.append("ПРИБЛИЖЕННАЯ СТАТИСТИКА (--sample)")
+    lines.append("=" * 70)
+    
+    megabytes = 1024 * 1024
+    lines.append(f"\nВыборка: {estimate['sample_rows']:,} строк периода, {estimate['sampled_blocks']:,} из "
+                 f"{estimate['n_blocks']:,} блоков (прочитано {estimate['bytes_read'] / megabytes:.1f} "
+                 f"из {estimate['file_size'] / megabytes:.1f} МБ)")
+    if estimate['exact']:
+        lines.append("Выборка покрыла весь файл - значения точные")
+    elif estimate['total_cost']['margin'] is None:
+        lines.append("В выборке один блок - погрешность не оценить, увеличьте --sample")
+    else:
+        lines.append(f"~ - оценка на весь файл, ± - половина {estimate['confidence'] * 100:.0f}% "
+                     f"доверительного интервала")
+    if not estimate['exact'] and estimate['sample_rows'] < SAMPLING['min_rows']:
+        lines.append(f"⚠ В период попало мало строк выборки ({estimate['sample_rows']:,}): оценки грубые, "
+                     f"увеличьте --sample или запустите точный расчет")
+    
+    models = estimate['models']
+    lines.append(f"\nМоделей в выборке: {len(models)}")
+    lines.append(f"Общее количество запросов: {format_estimate(estimate['total_requests'])}")
+    lines.append(f"Общая стоимость: {format_estimate(estimate['total_cost'], money=True)}")
+    if estimate['errors']['value']:
+        lines.append(f"Ошибки (Rate Limited): {format_estimate(estimate['errors'])}")
+    
+    lines.append("\n" + "-" * 70)
+    lines.append("СТАТИСТИКА ПО МОДЕЛЯМ:")
+    lines.append("-" * 70)
+    for model_name, stats in sorted(models.items(), key=lambda item: item[1]['cost']['value'], reverse=True):
+        lines.append(f"\n{model_name}:")
+        if stats['requests']['value']:
+            lines.append(f"  Запросы: {format_estimate(stats['requests'])}")
+            lines.append(f"  Стоимость: {format_estimate(stats['cost'], money=True)}")
+            lines.append(f"  Стоимость на запрос: {format_estimate(stats['cost_per_request'], money=True, decimals=4)}")
+        lines.append("  Токены: " + ", ".join(
+            f"{label} {format_estimate(stats[name], relative_only=True)}"
+            for label, name in (('input', 'input_tokens'), ('output', 'output_tokens'),
+                                ('cache read', 'cache_read'), ('cache write', 'cache_write'))))
+        if stats['errors']['value']:
+            lines.append(f"  Ошибки (Rate Limited): {format_estimate(stats['errors'])}")
+    
+    weekday_hour = estimate['weekday_hour']
+    requests = [value for row in weekday_hour['requests'] for value in row]
+    busiest = sorted(range(len(requests)), key=lambda cell: -requests[cell])[:SAMPLING['shown_cells']]
+    busiest = [cell for cell in busiest if requests[cell] > 0]
+    if busiest:
+        lines.append("\n" + "-" * 70)
+        lines.append("САМЫЕ ЗАГРУЖЕННЫЕ ЧАСЫ (день недели × час, сумма за период):")
+        lines.append("-" * 70)
+        for cell in busiest:
+            day, hour = divmod(cell, 24)
+            
+            def cell_estimate(name):
+                margins = weekday_hour[f'{name}_margin']
+                return {'value': weekday_hour[name][day][hour],
+                        'margin': None if margins is None else margins[day][hour]}
+            
+            lines.append(f"  {WEEKDAY_NAMES[day]} {hour:02d}:00: {format_estimate(cell_estimate('requests'))} "
+                         f"запросов, {format_estimate(cell_estimate('cost'), money=True)}")
+    
+    return lines
+
+
+def format_estimate(estimate, money=False, decimals=None, relative_only=False):
+    """
+    Оценка по выборке для вывода: '~$1,234.56 ± $12.34 (±1.0%)'.
+    
+    Точное значение (margin 0) выводится без ~ и ±, оценка без известной
+    погрешности (margin None) - только с ~. relative_only - только
+    относительная погрешность: '~1,234 (±1.0%)'.
+    """
+    value, margin = estimate['value'], estimate['margin']
+    unit = '$' if money else ''
+    decimals = (2 if money else 0) if decimals is None else decimals
+    text = f"{unit}{value:,.{decimals}f}"
+    if margin == 0:
+        return text
+    if margin is None:
+        return f"~{text}"
+    relative = f" (±{margin / value * 100:.1f}%)" if value else ""
+    if relative_only:
+        return f"~{text}{relative}"
+    return f"~{text} ± {unit}{margin:,.{decimals}f}{relative}"
+
+
+def render_sample_heatmaps(args, csv_file, estimate, output_dir, charts):
+    """Строит хитмапы день недели × час по оценкам выборки (с подписью о точности)."""
+    weekday_hour = {name: estimate['weekday_hour'][name] for name in ('requests', 'cost', 'paid_requests')}
+    if not estimate['exact']:
+        share = estimate['bytes_read'] / max(estimate['file_size'], 1) * 100
+        margins = []
+        for label, name in (('requests', 'total_requests'), ('cost', 'total_cost')):
+            total = estimate[name]
+            if total['margin'] is not None and total['value']:
+                margins.append(f"{label} ±{total['margin'] / total['value'] * 100:.1f}%")
+        accuracy = f"{', '.join(margins)} ({estimate['confidence'] * 100:.0f}% CI)" if margins else "error unknown"
+        weekday_hour['caption'] = f"Estimated from a {share:.1f}% sample: {accuracy}"
+    
+    jobs = [(chart_id, {'weekday_hour': weekday_hour}) for chart_id in SAMPLE_CHARTS]
+    if charts is not None:
+        jobs = [(chart_id, kwargs) for chart_id, kwargs in jobs if chart_id in charts or 'heatmaps' in charts]
+        if not jobs:
+            print(f"\n📊 По выборке строятся только хитмапы: heatmaps, {', '.join(SAMPLE_CHARTS)}")
+            return
+    
+    # Очищаются только подпапки периодов и папка по умолчанию, но не произвольная --out
+    if output_dir != args.out or args.out == 'graphics':
+        clear_directory(output_dir)
+    print("\n" + "=" * 70)
+    print("📊 ХИТМАПЫ ПО ВЫБОРКЕ")
+    print("=" * 70)
+    with profile_stage('Импорт matplotlib и визуализаторов'):
+        from visualizers import ChartRenderer
+    figures = ChartRenderer().render(jobs, output_dir=os.path.abspath(output_dir), csv_file=os.path.abspath(csv_file),
+                                     render_profile=args.profile, render_format=args.format)
+    print(f"\n✅ Создано {figures} графиков в папке {output_dir}/")
+
+
+def exact_command(argv):
+    """Команда точного расчета: те же аргументы без --sample."""
+    parts = ['python', os.path.basename(argv[0])]
+    skip_value = False
+    for arg in argv[1:]:
+        if skip_value:
+            skip_value = False
+            if arg.isdigit():
+                continue
+        if arg == '--sample':
+            skip_value = True
+        elif not arg.startswith('--sample='):
+            parts.append(shlex.quote(arg))
+    return ' '.join(parts)
+
+
+def load_events(args, periods):
+    """
+    Загружает события из CSV, Parquet/Arrow или хранилища (по аргументам).
+    
+    Returns:
+        tuple: (путь к файлу, EventTable)
+    """
+    try:
+        setup_output_encoding()
+        with profile_stage('Поиск CSV'):
+            csv_file = args.csv or find_csv_file()
+        # CSV читается один раз, все периоды - срезы общей таблицы событий
+        if is_columnar(csv_file):
+            if args.store:
+                raise ValueError("--store импортирует только CSV, Parquet/Arrow читается напрямую")
+            events = read_event_table(csv_file)
+        elif args.store:
+            events = load_from_store(csv_file, args, periods)
+        else:
+            events = EventTable.from_csv(csv_file, show_progress=not args.stats_only)
+        if args.export:
+            from analyzers import export_usage
+            paths = export_usage(events, args.export)
+            print(f"📦 Экспорт: {', '.join(paths)}")
+    except (FileNotFoundError, ImportError, ValueError) as e:
+        print(f"\nОшибка: {e}")
+        sys.exit(1)
+    return csv_file, events
+
+
+def detect_spikes(events):
+    """Всплески расходов по всей истории EventTable (один проход детектора для всех периодов)."""
+    with profile_stage('Всплески расходов'):
+        detector = SpikeDetector()
+        return detector.feed(events.columns()) + detector.flush()
+
+
+def make_spike_notifier(args):
+    """SpikeNotifier по --spikes-out/--spike-webhook (или из SPIKE_DETECTION), иначе None."""
+    jsonl_path = args.spikes_out or SPIKE_DETECTION['jsonl_path']
+    webhook_url = args.spike_webhook or SPIKE_DETECTION['webhook_url']
+    if not jsonl_path and not webhook_url:
+        return None
+    from analyzers import SpikeNotifier
+    return SpikeNotifier(jsonl_path=jsonl_path, webhook_url=webhook_url)
+
+
+def start_dashboard(args):
+    """Запускает дашборд в фоновом потоке (для --watch --serve), иначе None."""
+    if not args.serve:
+        return None
+    from dashboard import DashboardServer
+    dashboard = DashboardServer(port=args.serve)
+    dashboard.start()
+    print(f"\n🌐 Дашборд: {dashboard.url}")
+    return dashboard
+
+
+def serve_dashboard(args, periods, charts):
+    """
+    Режим --serve: анализ один раз, дальше статистика и графики по HTTP.
+    
+    Графики строятся по запросу и кэшируются, на диск ничего не пишется.
+    """
+    from dashboard import DashboardServer
+    if len(periods) > 1:
+        print("\nОшибка: --serve работает с одним периодом")
+        sys.exit(1)
+    
+    csv_file, events = load_events(args, periods)
+    period = periods[0]
+    custom = period == 'custom'
+    analyzer = CursorUsageAnalyzer(
+        period=period, show_progress=False, csv_file=csv_file, events=events,
+        since=args.since if custom else None, until=args.until if custom else None,
+        spike_notifier=make_spike_notifier(args), budget=args.budget,
+        cost_sketches=args.cost_sketches,
+    )
+    analyzer.analyze()
+    analyzer.print_statistics()
+    
+    dashboard = DashboardServer(port=args.serve)
+    dashboard.publish(analyzer)
+    print(f"\n🌐 Дашборд: {dashboard.url} (Ctrl+C - выход)")
+    try:
+        dashboard.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Дашборд остановлен")
+
+
+def watch_exports(args, periods, charts, dashboard=None):
+    """
+    Режим --watch: анализ обновляется по мере появления новых экспортов.
+    
+    Все экспорты папки (или --csv) загружаются в одну таблицу событий.
+    Из каждого нового или измененного файла берутся только строки,
+    которых еще нет в таблице (более старые вливаются на свое место),
+    агрегаты дополняются на месте, перестраиваются только графики
+    с изменившимися данными.
+    
+    Args:
+        dashboard: Запущенный DashboardServer, получающий каждую новую версию данных
+    """
+    setup_output_encoding()
+    if len(periods) > 1:
+        print("\nОшибка: --watch работает с одним периодом")
+        sys.exit(1)
+    if args.store or args.export or (args.csv and is_columnar(args.csv)):
+        print("\nОшибка: --watch читает CSV экспорты напрямую (без --store, --export и Parquet/Arrow)")
+        sys.exit(1)
+    
+    from utils.export_watcher import ExportWatcher
+    watcher = ExportWatcher(args.watch, EXPORT_WATCH['pattern'],
+                            poll_interval=EXPORT_WATCH['poll_interval'], debounce=EXPORT_WATCH['debounce'])
+    files = watcher.existing()
+    if args.csv:
+        files = [args.csv]
+    if not files:
+        print(f"\n👀 Жду экспорты {EXPORT_WATCH['pattern']} в папке {args.watch}/ ...")
+        files = watcher.wait_for_changes()
+    
+    events = EventTable([])
+    for csv_file in files:
+        events.ingest_csv(csv_file)
+    
+    period = periods[0]
+    custom = period == 'custom'
+    analyzer = CursorUsageAnalyzer(
+        period=period, render_profile=args.profile, single_pdf=args.single_pdf,
+        show_progress=False, csv_file=files[-1], events=events,
+        since=args.since if custom else None, until=args.until if custom else None,
+        output_dir=args.out, clear_output=args.out == 'graphics',
+        charts=charts, render_format=args.format, spike_notifier=make_spike_notifier(args),
+        budget=args.budget, cost_sketches=args.cost_sketches,
+    )
+    analyzer.refresh(stats_only=args.stats_only)
+    if dashboard is not None:
+        dashboard.publish(analyzer)
+    
+    print(f"\n👀 Слежу за {os.path.join(args.watch, EXPORT_WATCH['pattern'])} (Ctrl+C - выход)")
+    try:
+        while True:
+            changed = watcher.wait_for_changes()
+            last = events.dates[-1] if len(events) else None
+            new_events = []
+            for csv_file in changed:
+                new_events.extend(events.ingest_csv(csv_file))
+            stamp = datetime.now().strftime('%H:%M:%S')
+            if not new_events and period not in SLIDING_PERIODS:
+                print(f"\n[{stamp}] {', '.join(map(os.path.basename, changed))}: новых событий нет")
+                continue
+            
+            older = sum(event.date < last for event in new_events) if last is not None else 0
+            older = f" (старше уже загруженных: {older:,})" if older else ""
+            print(f"\n[{stamp}] {', '.join(map(os.path.basename, changed))}: новых событий {len(new_events):,}{older}")
+            new_events.sort(key=lambda event: event.date)
+            analyzer.refresh(new_events, stats_only=args.stats_only)
+            if dashboard is not None:
+                dashboard.publish(analyzer)
+            # Фигуры matplotlib и прошлые снимки результатов не должны копиться неделями
+            del new_events
+            gc.collect()
+    except KeyboardInterrupt:
+        print("\n👋 Наблюдение остановлено")
+
+
+def load_from_store(csv_file, args, periods):
+    """
+    Импортирует CSV в хранилище (если файл изменился) и читает события оттуда.
+
+    Хранилище объединяет все импортированные экспорты: события, которые
+    есть в нескольких файлах, учитываются один раз.
+    """
+    from analyzers import UsageStore
+    with UsageStore() as store:
+        imported = store.import_csv(csv_file, show_progress=not args.stats_only)
+        if imported and not args.stats_only:
+            print(f"💾 В хранилище {store.path} добавлено новых событий: {imported:,}")
+        # Только произвольный период - из хранилища читается только он
+        if periods == ['custom']:
+            return store.load_events(args.since, args.until)
+        return store.load_events()
+
+
+def report_profile(profile_out=None):
+    """Останавливает профилировщик, выводит таблицу этапов и сохраняет отчеты."""
+    PROFILER.stop()
+    print("\n" + "=" * 70)
+    print("⏱ ПРОФИЛЬ ЭТАПОВ (по убыванию времени)")
+    print("=" * 70)
+    print("\n".join(PROFILER.format_table()))
+    
+    if profile_out:
+        PROFILER.write_json(f"{profile_out}.json")
+        PROFILER.write_prof(f"{profile_out}.prof")
+        print(f"\nПрофиль сохранен: {profile_out}.json, {profile_out}.prof")
 
 
 if __name__ == '__main__':
@@ -0,0 +1,5 @@
+"""Фоновый процесс рендеринга графиков и его клиент."""
+
+from .client import RenderClient
+
+__all__ = ['RenderClient']
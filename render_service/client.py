@@ -0,0 +1,107 @@
+"""Клиент фонового процесса рендеринга."""
+
+import os
+import sys
+import time
+import subprocess
+from multiprocessing.connection import Client
+
+from config import RENDER_DAEMON
+from .common import PROJECT_ROOT, default_socket_path, load_authkey, code_stamp
+
+
+class RenderClient:
+    """
+    Отправляет задания процессу рендеринга, запуская его при необходимости.
+
+    Клиент не импортирует matplotlib: задание - это идентификаторы
+    графиков и готовые агрегаты, рендеринг выполняет сервер.
+    """
+
+    def __init__(self, socket_path=None, idle_timeout=None, start_timeout=None):
+        """
+        Инициализирует клиент.
+
+        Args:
+            socket_path: Путь к сокету, по умолчанию из RENDER_DAEMON
+            idle_timeout: Простой сервера до завершения, по умолчанию из RENDER_DAEMON
+            start_timeout: Сколько ждать запуска сервера, по умолчанию из RENDER_DAEMON
+        """
+        self.socket_path = socket_path or RENDER_DAEMON['socket_path'] or default_socket_path()
+        self.idle_timeout = idle_timeout or RENDER_DAEMON['idle_timeout']
+        self.start_timeout = start_timeout or RENDER_DAEMON['start_timeout']
+
+    def render(self, jobs, **options):
+        """
+        Выполняет задание на сервере и выводит его лог.
+
+        Args:
+            jobs: Список (chart_id, kwargs), см. visualizers.chart_registry.CHARTS
+            **options: Параметры ChartRenderer.render (output_dir, csv_file, ...)
+
+        Returns:
+            int: Количество сохраненных фигур
+        """
+        self.ensure_running()
+        response = self._request({'command': 'render', 'job': dict(options, jobs=jobs)})
+        print(response.get('output', ''), end='')
+        if not response['ok']:
+            raise RuntimeError(f"Ошибка процесса рендеринга:\n{response['error']}")
+        return response['figures']
+
+    def ping(self):
+        """Возвращает состояние сервера или None, если он не запущен."""
+        try:
+            return self._request({'command': 'ping'})
+        except (FileNotFoundError, ConnectionRefusedError):
+            return None
+
+    def shutdown(self):
+        """Останавливает сервер (если запущен)."""
+        try:
+            self._request({'command': 'shutdown'})
+        except (FileNotFoundError, ConnectionRefusedError):
+            pass
+
+    def ensure_running(self):
+        """Запускает сервер, если он не отвечает или работает на устаревшем коде."""
+        status = self.ping()
+        if status is not None and status['code_stamp'] == code_stamp():
+            return
+        if status is not None:
+            print("♻️  Код графиков изменился, перезапуск процесса рендеринга...")
+            self.shutdown()
+            self._wait_for_exit()
+        self._start()
+
+    def _request(self, message):
+        """Отправляет одно сообщение и возвращает ответ."""
+        with Client(self.socket_path, family='AF_UNIX', authkey=load_authkey(self.socket_path)) as conn:
+            conn.send(message)
+            return conn.recv()
+
+    def _start(self):
+        """Запускает сервер в отдельной сессии и ждет, пока он начнет отвечать."""
+        print("🚀 Запуск процесса рендеринга...")
+        load_authkey(self.socket_path, create=True)
+        with open(self.socket_path + '.log', 'a', encoding='utf-8') as log:
+            subprocess.Popen(
+                [sys.executable, '-m', 'render_service.server',
+                 '--socket', self.socket_path, '--idle-timeout', str(self.idle_timeout)],
+                cwd=PROJECT_ROOT, stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT,
+                start_new_session=True,
+            )
+
+        deadline = time.monotonic() + self.start_timeout
+        while time.monotonic() < deadline:
+            if self.ping() is not None:
+                return
+            time.sleep(0.1)
+        raise TimeoutError(f"Процесс рендеринга не запустился за {self.start_timeout} с "
+                           f"(лог: {self.socket_path}.log)")
+
+    def _wait_for_exit(self):
+        """Ждет, пока остановленный сервер удалит сокет."""
+        deadline = time.monotonic() + self.start_timeout
+        while os.path.exists(self.socket_path) and time.monotonic() < deadline:
+            time.sleep(0.05)
@@ -0,0 +1,51 @@
+"""Общие настройки клиента и сервера рендеринга."""
+
+import os
+import glob
+import getpass
+import tempfile
+
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Пакеты, код которых выполняется в процессе рендеринга
+RENDER_PACKAGES = ('analyzers', 'config', 'visualizers', 'render_service')
+
+
+def default_socket_path():
+    """Путь к сокету по умолчанию (отдельный для каждого пользователя)."""
+    uid = os.getuid() if hasattr(os, 'getuid') else getpass.getuser()
+    return os.path.join(tempfile.gettempdir(), f'cursor-usage-render-{uid}.sock')
+
+
+def load_authkey(socket_path, create=False):
+    """
+    Читает ключ аутентификации из файла рядом с сокетом.
+
+    Args:
+        socket_path: Путь к сокету
+        create: Создать ключ (доступ только владельцу), если файла нет
+
+    Returns:
+        bytes: Ключ для multiprocessing.connection
+    """
+    key_path = socket_path + '.key'
+    if create and not os.path.exists(key_path):
+        fd = os.open(key_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(os.urandom(32))
+    with open(key_path, 'rb') as f:
+        return f.read()
+
+
+def code_stamp():
+    """
+    Отпечаток версии кода рендеринга: время последнего изменения файлов.
+
+    Клиент сравнивает его с отпечатком запущенного процесса и перезапускает
+    процесс, если код изменился после его старта.
+    """
+    paths = []
+    for package in RENDER_PACKAGES:
+        paths.extend(glob.glob(os.path.join(PROJECT_ROOT, package, '*.py')))
+    return max((os.path.getmtime(path) for path in paths), default=0.0)
@@ -0,0 +1,142 @@
+"""
+Долгоживущий процесс рендеринга графиков.
+
+Запуск: python -m render_service.server --socket PATH [--idle-timeout SECONDS]
+Обычно процесс запускает RenderClient при первом задании.
+"""
+
+import io
+import os
+import sys
+import time
+import argparse
+import threading
+import traceback
+from contextlib import redirect_stdout
+from multiprocessing.connection import Listener, Client, AuthenticationError
+
+import matplotlib.pyplot as plt
+from visualizers.base_visualizer import BaseVisualizer
+from visualizers.chart_registry import ChartRenderer
+from .common import load_authkey, code_stamp
+
+
+class RenderServer:
+    """
+    Принимает задания на рендеринг через Unix-сокет.
+
+    matplotlib, seaborn и визуализаторы загружаются один раз при старте;
+    задания выполняются последовательно. Если заданий нет idle_timeout
+    секунд, процесс завершается и удаляет сокет.
+    """
+
+    def __init__(self, socket_path, idle_timeout=600):
+        """
+        Инициализирует сервер.
+
+        Args:
+            socket_path: Путь к Unix-сокету
+            idle_timeout: Секунд без заданий до завершения
+        """
+        self.socket_path = socket_path
+        self.idle_timeout = idle_timeout
+        self.authkey = load_authkey(socket_path)
+        self.code_stamp = code_stamp()
+        self.renderer = ChartRenderer()
+        self._last_activity = time.monotonic()
+        self._busy = False
+
+    def warm_up(self):
+        """Прогревает matplotlib: стиль, бэкенд и кэш шрифтов."""
+        BaseVisualizer._setup_matplotlib()
+        fig, ax = plt.subplots(figsize=(2, 2))
+        ax.set_title('warm-up')
+        ax.plot([0, 1], [0, 1])
+        fig.canvas.draw()
+        plt.close(fig)
+
+    def serve(self):
+        """Обрабатывает задания до простоя или команды shutdown."""
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+        listener = Listener(self.socket_path, family='AF_UNIX', authkey=self.authkey)
+        os.chmod(self.socket_path, 0o600)
+        threading.Thread(target=self._watch_idle, daemon=True).start()
+
+        print(f"Сервер рендеринга запущен (pid {os.getpid()}): {self.socket_path}", flush=True)
+        try:
+            running = True
+            while running:
+                try:
+                    conn = listener.accept()
+                except (AuthenticationError, EOFError, OSError) as e:
+                    print(f"Отклонено подключение: {e}", flush=True)
+                    continue
+                with conn:
+                    self._busy = True
+                    try:
+                        running = self._handle(conn)
+                    finally:
+                        self._busy = False
+                        self._last_activity = time.monotonic()
+        finally:
+            listener.close()
+
+    def _watch_idle(self):
+        """Останавливает сервер после idle_timeout секунд без заданий."""
+        while True:
+            time.sleep(min(self.idle_timeout, 5))
+            if not self._busy and time.monotonic() - self._last_activity > self.idle_timeout:
+                print("Нет заданий, завершение по простою", flush=True)
+                # accept() не прерывается из другого потока, поэтому отправляем себе shutdown
+                with Client(self.socket_path, family='AF_UNIX', authkey=self.authkey) as conn:
+                    conn.send({'command': 'shutdown'})
+                    conn.recv()
+                return
+
+    def _handle(self, conn):
+        """Выполняет один запрос; возвращает False, если нужно завершиться."""
+        try:
+            request = conn.recv()
+        except EOFError:
+            return True
+
+        command = request.get('command')
+        if command == 'ping':
+            conn.send({'ok': True, 'pid': os.getpid(), 'code_stamp': self.code_stamp})
+            return True
+        if command == 'shutdown':
+            conn.send({'ok': True})
+            return False
+        if command != 'render':
+            conn.send({'ok': False, 'error': f"Неизвестная команда: {command}"})
+            return True
+
+        output = io.StringIO()
+        try:
+            with redirect_stdout(output):
+                figures = self.renderer.render(**request['job'])
+            response = {'ok': True, 'figures': figures, 'output': output.getvalue()}
+        except Exception:
+            plt.close('all')
+            response = {'ok': False, 'error': traceback.format_exc(), 'output': output.getvalue()}
+        conn.send(response)
+        return True
+
+
+def main():
+    """Точка входа процесса рендеринга."""
+    parser = argparse.ArgumentParser(description='Фоновый процесс рендеринга графиков')
+    parser.add_argument('--socket', required=True, help='Путь к Unix-сокету')
+    parser.add_argument('--idle-timeout', type=float, default=600, help='Секунд простоя до завершения')
+    args = parser.parse_args()
+
+    server = RenderServer(args.socket, idle_timeout=args.idle_timeout)
+    server.warm_up()
+    server.serve()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
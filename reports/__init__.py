@@ -0,0 +1,5 @@
+"""Модуль для формирования отчетов."""
+
+from .html_report import HtmlReportWriter
+
+__all__ = ['HtmlReportWriter']
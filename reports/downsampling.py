@@ -0,0 +1,81 @@
+"""Прореживание временных рядов для интерактивных отчетов."""
+
+import numpy as np
+
+
+def minmax_downsample(x, y, n_out):
+    """
+    Оставляет минимум и максимум в каждой из n_out/2 колонок.
+
+    Сохраняет пики (например, всплески стоимости), поэтому подходит
+    для значений по бакетам.
+
+    Args:
+        x: Отсортированные координаты X
+        y: Значения
+        n_out: Максимальное количество точек на выходе
+
+    Returns:
+        tuple: (x, y) прореженного ряда
+    """
+    x = np.asarray(x)
+    y = np.asarray(y, dtype=float)
+    n_columns = (n_out - 2) // 2
+    if len(x) <= n_out or n_columns < 1:
+        return x, y
+
+    edges = np.linspace(0, len(x), n_columns + 1).astype(np.int64)
+    starts = edges[:-1]
+    column = np.repeat(np.arange(n_columns), np.diff(edges))
+
+    # Индексы минимума и максимума в каждой колонке без цикла по колонкам
+    order = np.lexsort((y, column))
+    first = np.searchsorted(column[order], np.arange(n_columns), side='left')
+    last = np.searchsorted(column[order], np.arange(n_columns), side='right') - 1
+    idx_min = order[first]
+    idx_max = order[last]
+
+    idx = np.sort(np.unique(np.concatenate([idx_min, idx_max, starts[:1], [len(x) - 1]])))
+    return x[idx], y[idx]
+
+
+def lttb_downsample(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets: сохраняет визуальную форму линии.
+
+    Подходит для гладких рядов (кумулятивная стоимость).
+
+    Args:
+        x: Отсортированные координаты X
+        y: Значения
+        n_out: Количество точек на выходе (>= 3)
+
+    Returns:
+        tuple: (x, y) прореженного ряда
+    """
+    x = np.asarray(x)
+    y = np.asarray(y, dtype=float)
+    if len(x) <= n_out or n_out < 3:
+        return x, y
+
+    xf = x.astype(float)
+    edges = np.linspace(1, len(x) - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = len(x) - 1
+
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Средняя точка следующего бакета (для последнего - последняя точка ряда)
+        if i + 2 < len(edges):
+            next_x = xf[hi:edges[i + 2]].mean()
+            next_y = y[hi:edges[i + 2]].mean()
+        else:
+            next_x, next_y = xf[-1], y[-1]
+
+        prev = selected[i]
+        area = np.abs((xf[prev] - next_x) * (y[lo:hi] - y[prev])
+                      - (xf[prev] - xf[lo:hi]) * (next_y - y[prev]))
+        selected[i + 1] = lo + int(np.argmax(area))
+
+    return x[selected], y[selected]
@@ -0,0 +1,288 @@
+"""Автономный интерактивный HTML отчет (без CDN и сервера)."""
+
+import json
+import os
+from datetime import datetime
+from .downsampling import minmax_downsample, lttb_downsample
+
+
+MODEL_COLORS = [
+    '#FF6B6B', '#4ECDC4', '#45B7D1', '#FFA07A', '#98D8C8',
+    '#F1C40F', '#9B59B6', '#E67E22', '#3498DB', '#2ECC71'
+]
+
+
+class HtmlReportWriter:
+    """
+    Формирует один HTML файл с данными в JSON и встроенным JS рендерером.
+
+    Ряды строятся по тем же агрегатам, что и графики таймлайна
+    (TimelineCube), и заранее прореживаются до max_points точек,
+    поэтому размер файла не зависит от длины периода.
+    """
+
+    def __init__(self, output_dir='graphics', max_points=2000, step=600):
+        """
+        Инициализирует генератор отчета.
+
+        Args:
+            output_dir: Директория для сохранения отчета
+            max_points: Максимум точек на ряд после прореживания
+            step: Шаг детального ряда в секундах (по умолчанию 10 минут)
+        """
+        self.output_dir = output_dir
+        self.max_points = max_points
+        self.step = step
+
+    def write(self, results, total_cost, total_requests, filename='report.html', cube=None):
+        """
+        Записывает HTML отчет.
+
+        Args:
+            results: Результаты CSVAnalyzer.analyze()
+            total_cost: Общая стоимость
+            total_requests: Общее количество запросов
+            filename: Имя файла отчета
+            cube: TimelineCube периода, общий с графиками таймлайна
+                (None - отчет без графиков, с пометкой об этом)
+
+        Returns:
+            str: Путь к созданному файлу
+        """
+        print("  └─ Интерактивный HTML отчет...")
+        os.makedirs(self.output_dir, exist_ok=True)
+
+        if cube is None:
+            note = 'Timeline charts are unavailable: no timeline data was passed to the report.'
+        elif not len(cube):
+            note = 'No paid requests in this period.'
+        else:
+            note = None
+        payload = {
+            'generated': datetime.now().strftime('%Y-%m-%d %H:%M'),
+            'summary': {
+                'total_cost': round(total_cost, 2),
+                'total_requests': total_requests,
+                'models': self._model_rows(results['models']),
+            },
+            'charts': self._build_charts(cube) if note is None else [],
+            'note': note,
+        }
+
+        data = json.dumps(payload, separators=(',', ':')).replace('</', '<\\/')
+        filepath = os.path.join(self.output_dir, filename)
+        with open(filepath, 'w', encoding='utf-8') as f:
+            f.write(HTML_TEMPLATE.replace('__DATA__', data))
+        return filepath
+
+    @staticmethod
+    def _model_rows(models):
+        """Строки таблицы моделей, отсортированные по стоимости."""
+        rows = []
+        for model, stats in models.items():
+            requests = stats['included_requests'] + stats['on_demand_requests']
+            cost = stats['included_cost'] + stats['on_demand_cost']
+            if requests:
+                rows.append([model, requests, round(cost, 4), round(cost / requests, 4), stats['errors']])
+        return sorted(rows, key=lambda row: row[2], reverse=True)
+
+    def _build_charts(self, cube):
+        """Собирает прореженные ряды для графиков отчета."""
+        detail = cube.full_range(self.step)
+        daily = cube.full_range(86400)
+        step_name = f'{self.step // 60} min'
+
+        cost = detail['values']['cost'].sum(axis=1)
+        requests = detail['values']['requests'].sum(axis=1)
+        cumulative = detail['cumulative']['cost'].sum(axis=1)
+
+        charts = [
+            {
+                'id': 'cost', 'title': f'Cost per {step_name}', 'unit': '$',
+                'series': [self._series('Cost', '#e74c3c', 'bar', *minmax_downsample(detail['starts'], cost, self.max_points))],
+            },
+            {
+                'id': 'cumulative', 'title': 'Cumulative Cost', 'unit': '$',
+                'series': [self._series('Cumulative', '#2ecc71', 'line', *lttb_downsample(detail['starts'], cumulative, self.max_points))],
+            },
+            {
+                'id': 'requests', 'title': f'Requests per {step_name}', 'unit': '',
+                'series': [self._series('Requests', '#3498db', 'bar', *minmax_downsample(detail['starts'], requests, self.max_points))],
+            },
+        ]
+
+        # Дневная стоимость по топ-10 моделям
+        daily_cost = daily['values']['cost']
+        top = daily_cost.sum(axis=0).argsort()[::-1][:10]
+        charts.append({
+            'id': 'models', 'title': 'Daily Cost by Model', 'unit': '$',
+            'series': [
+                self._series(daily['models'][i], MODEL_COLORS[n % len(MODEL_COLORS)], 'line',
+                             *lttb_downsample(daily['starts'], daily_cost[:, i], self.max_points))
+                for n, i in enumerate(top) if daily_cost[:, i].sum() > 0
+            ],
+        })
+        return charts
+
+    @staticmethod
+    def _series(name, color, kind, x, y):
+        """Ряд для JSON: метки времени в секундах (UTC+7), значения с округлением."""
+        return {
+            'name': name,
+            'color': color,
+            'type': kind,
+            'x': [int(v) for v in x],
+            'y': [round(float(v), 4) for v in y],
+        }
+
+
+HTML_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>Cursor Usage Report</title>
+<style>
+body { background: #0a0a0a; color: #ddd; font: 14px -apple-system, Segoe UI, sans-serif; margin: 24px; }
+h1 { margin: 0 0 4px; } .muted { color: #888; }
+.cards { display: flex; gap: 16px; margin: 16px 0; }
+.card { background: #161616; border: 1px solid #333; border-radius: 6px; padding: 12px 18px; }
+.card b { display: block; font-size: 22px; color: #fff; }
+.chart { background: #111; border: 1px solid #333; border-radius: 6px; margin: 16px 0; padding: 8px; position: relative; }
+.chart h2 { font-size: 16px; margin: 4px 8px; }
+canvas { width: 100%; height: 320px; display: block; cursor: crosshair; }
+.legend span { margin: 0 10px; font-size: 12px; } .legend i { display: inline-block; width: 10px; height: 10px; margin-right: 4px; }
+.tip { position: absolute; pointer-events: none; background: #222; border: 1px solid #555; padding: 4px 8px; font-size: 12px; display: none; }
+table { border-collapse: collapse; margin-top: 8px; } td, th { padding: 4px 12px; border-bottom: 1px solid #333; text-align: right; }
+td:first-child, th:first-child { text-align: left; }
+</style>
+</head>
+<body>
+<h1>Cursor Usage Report</h1>
+<div class="muted" id="generated"></div>
+<div class="cards" id="cards"></div>
+<div id="charts"></div>
+<h2>Models</h2>
+<table id="models"><tr><th>Model</th><th>Requests</th><th>Cost ($)</th><th>$/request</th><th>Rate limited</th></tr></table>
+<p class="muted">Drag on a chart to zoom, double-click to reset. Times are UTC+7.</p>
+<script type="application/json" id="data">__DATA__</script>
+<script>
+(function () {
+  var data = JSON.parse(document.getElementById('data').textContent);
+  document.getElementById('generated').textContent = 'Generated ' + data.generated;
+  var s = data.summary;
+  document.getElementById('cards').innerHTML =
+    '<div class="card">Total cost<b>$' + s.total_cost.toFixed(2) + '</b></div>' +
+    '<div class="card">Requests<b>' + s.total_requests.toLocaleString() + '</b></div>' +
+    '<div class="card">Models<b>' + s.models.length + '</b></div>';
+  if (data.note) {
+    var note = document.createElement('p');
+    note.className = 'muted';
+    note.textContent = data.note;
+    document.getElementById('charts').appendChild(note);
+  }
+  var table = document.getElementById('models');
+  s.models.forEach(function (r) {
+    var tr = table.insertRow();
+    [r[0], r[1].toLocaleString(), r[2].toFixed(2), r[3].toFixed(4), r[4]].forEach(function (v) { tr.insertCell().textContent = v; });
+  });
+
+  function fmtTime(t, span) {
+    var d = new Date(t * 1000), p = function (n) { return (n < 10 ? '0' : '') + n; };
+    var day = d.getUTCFullYear() + '-' + p(d.getUTCMonth() + 1) + '-' + p(d.getUTCDate());
+    return span > 3 * 86400 ? day : day.slice(5) + ' ' + p(d.getUTCHours()) + ':' + p(d.getUTCMinutes());
+  }
+  function niceStep(range, n) {
+    var raw = range / n, mag = Math.pow(10, Math.floor(Math.log10(raw || 1))), r = raw / mag;
+    return (r > 5 ? 10 : r > 2 ? 5 : r > 1 ? 2 : 1) * mag;
+  }
+
+  data.charts.forEach(function (chart) {
+    var box = document.createElement('div');
+    box.className = 'chart';
+    box.innerHTML = '<h2>' + chart.title + '</h2><div class="legend"></div><canvas></canvas><div class="tip"></div>';
+    document.getElementById('charts').appendChild(box);
+    var canvas = box.querySelector('canvas'), tip = box.querySelector('.tip'), ctx = canvas.getContext('2d');
+    box.querySelector('.legend').innerHTML = chart.series.map(function (ser) {
+      return '<span><i style="background:' + ser.color + '"></i>' + ser.name + '</span>';
+    }).join('');
+
+    var xmin = Infinity, xmax = -Infinity;
+    chart.series.forEach(function (ser) { xmin = Math.min(xmin, ser.x[0]); xmax = Math.max(xmax, ser.x[ser.x.length - 1]); });
+    var view = [xmin, xmax], drag = null, pad = { l: 60, r: 12, t: 10, b: 28 };
+
+    function scales(w, h) {
+      var ymax = 0;
+      chart.series.forEach(function (ser) {
+        for (var i = 0; i < ser.x.length; i++) if (ser.x[i] >= view[0] && ser.x[i] <= view[1]) ymax = Math.max(ymax, ser.y[i]);
+      });
+      ymax = ymax || 1;
+      return {
+        x: function (v) { return pad.l + (v - view[0]) / Math.max(1, view[1] - view[0]) * (w - pad.l - pad.r); },
+        inv: function (px) { return view[0] + (px - pad.l) / (w - pad.l - pad.r) * (view[1] - view[0]); },
+        y: function (v) { return h - pad.b - v / ymax * (h - pad.t - pad.b); },
+        ymax: ymax
+      };
+    }
+
+    function draw() {
+      var dpr = window.devicePixelRatio || 1, w = canvas.clientWidth, h = canvas.clientHeight;
+      canvas.width = w * dpr; canvas.height = h * dpr;
+      ctx.setTransform(dpr, 0, 0, dpr, 0, 0);
+      ctx.clearRect(0, 0, w, h);
+      var sc = scales(w, h);
+      ctx.strokeStyle = '#333'; ctx.fillStyle = '#999'; ctx.font = '11px sans-serif';
+      var ystep = niceStep(sc.ymax, 5);
+      for (var v = 0; v <= sc.ymax; v += ystep) {
+        ctx.beginPath(); ctx.moveTo(pad.l, sc.y(v)); ctx.lineTo(w - pad.r, sc.y(v)); ctx.stroke();
+        ctx.fillText(chart.unit + (ystep < 1 ? v.toFixed(2) : v.toLocaleString()), 4, sc.y(v) + 4);
+      }
+      for (var i = 0; i <= 6; i++) {
+        var t = view[0] + (view[1] - view[0]) * i / 6;
+        ctx.fillText(fmtTime(t, view[1] - view[0]), Math.min(sc.x(t) - 30, w - 90), h - 8);
+      }
+      ctx.save();
+      ctx.beginPath(); ctx.rect(pad.l, pad.t, w - pad.l - pad.r, h - pad.t - pad.b); ctx.clip();
+      chart.series.forEach(function (ser) {
+        ctx.strokeStyle = ser.color; ctx.fillStyle = ser.color; ctx.lineWidth = 1.5;
+        ctx.beginPath();
+        for (var i = 0; i < ser.x.length; i++) {
+          var px = sc.x(ser.x[i]), py = sc.y(ser.y[i]);
+          if (ser.type === 'bar') { ctx.moveTo(px, sc.y(0)); ctx.lineTo(px, py); }
+          else if (i === 0) ctx.moveTo(px, py); else ctx.lineTo(px, py);
+        }
+        ctx.stroke();
+      });
+      ctx.restore();
+      if (drag) { ctx.fillStyle = 'rgba(255,255,255,0.1)'; ctx.fillRect(Math.min(drag[0], drag[1]), pad.t, Math.abs(drag[1] - drag[0]), h - pad.t - pad.b); }
+    }
+
+    function pos(e) { return e.clientX - canvas.getBoundingClientRect().left; }
+    canvas.addEventListener('mousedown', function (e) { drag = [pos(e), pos(e)]; });
+    canvas.addEventListener('mousemove', function (e) {
+      var px = pos(e), sc = scales(canvas.clientWidth, canvas.clientHeight), t = sc.inv(px);
+      if (drag) { drag[1] = px; draw(); return; }
+      var lines = [fmtTime(t, 0)];
+      chart.series.forEach(function (ser) {
+        var lo = 0, hi = ser.x.length - 1;
+        while (lo < hi) { var mid = (lo + hi) >> 1; if (ser.x[mid] < t) lo = mid + 1; else hi = mid; }
+        lines.push(ser.name + ': ' + chart.unit + ser.y[lo]);
+      });
+      tip.innerHTML = lines.join('<br>'); tip.style.display = 'block';
+      tip.style.left = Math.min(px + 12, canvas.clientWidth - 160) + 'px'; tip.style.top = '40px';
+    });
+    canvas.addEventListener('mouseleave', function () { tip.style.display = 'none'; });
+    window.addEventListener('mouseup', function () {
+      if (!drag) return;
+      var sc = scales(canvas.clientWidth, canvas.clientHeight);
+      if (Math.abs(drag[1] - drag[0]) > 5) view = [sc.inv(Math.min(drag[0], drag[1])), sc.inv(Math.max(drag[0], drag[1]))];
+      drag = null; draw();
+    });
+    canvas.addEventListener('dblclick', function () { view = [xmin, xmax]; draw(); });
+    window.addEventListener('resize', draw);
+    draw();
+  });
+})();
+</script>
+</body>
+</html>
+"""
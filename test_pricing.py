@@ -236,7 +236,8 @@ if __name__ == '__main__':
     import sys
     from utils import find_csv_file
     
-    csv_file = find_csv_file()
+    # Путь к CSV можно передать аргументом (например, синтетический экспорт из benchmarks)
+    csv_file = sys.argv[1] if len(sys.argv) > 1 else find_csv_file()
     print(f"CSV файл: {csv_file}\n")
     
     # Тест расчета цен
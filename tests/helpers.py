@@ -0,0 +1,70 @@
+"""Общие данные для тестов: небольшие CSV в формате экспорта Cursor."""
+
+import csv
+import os
+import random
+from datetime import datetime, timedelta
+
+
+HEADER = ['Date', 'Kind', 'Model', 'Max Mode', 'Input (w/ Cache Write)', 'Input (w/o Cache Write)',
+          'Cache Read', 'Output Tokens', 'Total Tokens', 'Cost']
+
+MODELS = ('claude-4.5-sonnet', 'gpt-5', 'auto')
+
+
+def make_rows(n, end=None, step_minutes=37, seed=0):
+    """
+    Строки экспорта: n запросов с шагом step_minutes до момента end (UTC).
+
+    Returns:
+        list: Словари с полями HEADER, от новых к старым (как в экспорте)
+    """
+    rng = random.Random(seed)
+    end = end or datetime.utcnow().replace(microsecond=0)
+    rows = []
+    for i in range(n):
+        input_no_cache = rng.randint(1000, 90000)
+        cache_write = rng.choice((0, rng.randint(0, 20000)))
+        output = rng.randint(100, 8000)
+        cache_read = rng.randint(0, 200000)
+        rows.append({
+            'Date': (end - timedelta(minutes=step_minutes * i)).strftime('%Y-%m-%dT%H:%M:%S.000Z'),
+            'Kind': rng.choices(('Included', 'On-Demand', 'Rate Limited'), (70, 25, 5))[0],
+            'Model': rng.choice(MODELS),
+            'Max Mode': 'No',
+            'Input (w/ Cache Write)': input_no_cache + cache_write,
+            'Input (w/o Cache Write)': input_no_cache,
+            'Cache Read': cache_read,
+            'Output Tokens': output,
+            'Total Tokens': input_no_cache + cache_write + cache_read + output,
+            'Cost': round(rng.uniform(0.001, 0.9), 4),
+        })
+    return rows
+
+
+def write_usage_csv(directory, rows, name='team-usage-events-test.csv'):
+    """Записывает строки в directory/csv_data/name и возвращает путь к файлу."""
+    os.makedirs(os.path.join(directory, 'csv_data'), exist_ok=True)
+    path = os.path.join(directory, 'csv_data', name)
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=HEADER)
+        writer.writeheader()
+        writer.writerows(rows)
+    return path
+
+
+def billed_cost(rows):
+    """Стоимость запросов Included и On-Demand."""
+    return sum(row['Cost'] for row in rows if row['Kind'] in ('Included', 'On-Demand'))
+
+
+def assert_results_close(testcase, first, second, path=()):
+    """Сравнивает вложенные результаты анализа; суммы float - с точностью до порядка сложения."""
+    if isinstance(first, dict):
+        testcase.assertEqual(first.keys(), second.keys(), path)
+        for key in first:
+            assert_results_close(testcase, first[key], second[key], path + (key,))
+    elif isinstance(first, float):
+        testcase.assertAlmostEqual(first, second, msg=path)
+    else:
+        testcase.assertEqual(first, second, path)
@@ -0,0 +1,57 @@
+"""Тесты анализа всех периодов за один проход."""
+
+import contextlib
+import io
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from analyzers import CSVAnalyzer
+from analyzers.event_table import EventTable
+from tests.helpers import make_rows, write_usage_csv, assert_results_close
+
+
+PERIODS = ('day', 'week', 'month', 'all')
+
+# Поля результатов, сравниваемые с отдельным анализом периода
+COMPARED = ('models', 'total_cost', 'total_requests', 'daily_usage', 'hourly_usage', 'daily_cost',
+            'hourly_cost_full', 'ten_min_requests', 'all_timestamps', 'cost_percentiles')
+
+
+class AnalyzeWindowsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        # Секунды событий смещены на полминуты от текущего момента, чтобы границы
+        # периодов (now - N дней) не совпадали с событиями между двумя вызовами now()
+        end = datetime.utcnow().replace(microsecond=0) + timedelta(seconds=30)
+        self.csv_file = write_usage_csv(self.tmp.name, make_rows(2500, end=end, step_minutes=23, seed=4))
+        self.events = EventTable.from_csv(self.csv_file, show_progress=False)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def analyze(self, period):
+        analyzer = CSVAnalyzer(self.csv_file, period=period, events=self.events, show_progress=False)
+        return analyzer.analyze()
+
+    def test_windows_match_single_period_runs(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            windows = CSVAnalyzer(self.csv_file, events=self.events, show_progress=False).analyze_windows(PERIODS)
+            single = {period: self.analyze(period) for period in PERIODS}
+
+        self.assertEqual(list(windows), list(PERIODS))
+        for period in PERIODS:
+            for key in COMPARED:
+                assert_results_close(self, windows[period][key], single[period][key], (period, key))
+            self.assertEqual(windows[period]['cost_box_stats'].keys(), single[period]['cost_box_stats'].keys())
+
+    def test_windows_are_nested(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            windows = CSVAnalyzer(self.csv_file, events=self.events, show_progress=False).analyze_windows(PERIODS)
+        requests = [windows[period]['total_requests'] for period in PERIODS]
+        self.assertEqual(requests, sorted(requests))
+        self.assertLess(requests[0], requests[-1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+"""Тесты статистик box plot compute_box_stats."""
+
+import unittest
+import numpy as np
+from analyzers.box_stats import compute_box_stats, partition_quantiles, sorted_quantiles
+
+
+class BoxStatsTest(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        self.costs = np.concatenate([rng.lognormal(-3, 0.6, 5000), [5.0, 7.5, 11.0]])
+
+    def test_quartiles_match_numpy_percentile(self):
+        stats = compute_box_stats(self.costs, 'gpt-5')
+        q1, med, q3 = np.percentile(self.costs, [25, 50, 75])
+        self.assertAlmostEqual(stats['q1'], q1)
+        self.assertAlmostEqual(stats['med'], med)
+        self.assertAlmostEqual(stats['q3'], q3)
+        self.assertAlmostEqual(stats['mean'], self.costs.mean())
+        self.assertEqual(stats['n'], len(self.costs))
+
+    def test_whiskers_are_extreme_values_within_bounds(self):
+        stats = compute_box_stats(self.costs, 'gpt-5')
+        iqr = stats['q3'] - stats['q1']
+        inside = self.costs[(self.costs >= stats['q1'] - 1.5 * iqr) & (self.costs <= stats['q3'] + 1.5 * iqr)]
+        self.assertEqual(stats['whislo'], inside.min())
+        self.assertEqual(stats['whishi'], inside.max())
+        self.assertIn(11.0, stats['fliers'])
+
+    def test_fliers_are_capped_and_keep_extremes(self):
+        stats = compute_box_stats(self.costs, 'gpt-5', max_fliers=10)
+        self.assertLessEqual(len(stats['fliers']), 10)
+        self.assertEqual(stats['fliers'].max(), 11.0)
+
+    def test_empty_costs(self):
+        self.assertIsNone(compute_box_stats([], 'gpt-5'))
+
+    def test_presorted_path_matches_partition_path(self):
+        for max_fliers in (200, 10):
+            exact = compute_box_stats(self.costs, 'gpt-5', max_fliers=max_fliers)
+            presorted = compute_box_stats(np.sort(self.costs), 'gpt-5', max_fliers=max_fliers, presorted=True)
+            for key in ('q1', 'med', 'q3', 'mean', 'whislo', 'whishi', 'cilo', 'cihi', 'n'):
+                self.assertAlmostEqual(presorted[key], exact[key])
+            np.testing.assert_array_equal(np.sort(presorted['fliers']), np.sort(exact['fliers']))
+
+    def test_partition_and_sorted_quantiles_match_numpy(self):
+        quantiles = (0.0, 0.01, 0.5, 0.9, 0.99, 1.0)
+        expected = np.percentile(self.costs, [q * 100 for q in quantiles])
+        np.testing.assert_allclose(partition_quantiles(self.costs, quantiles), expected)
+        np.testing.assert_allclose(sorted_quantiles(np.sort(self.costs), quantiles), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+"""Тесты прогноза расходов на платежный цикл."""
+
+import unittest
+from datetime import datetime, timedelta
+from analyzers.burn_rate import BurnRateProjector
+
+
+def business_hours(first_day, last_moment, cost=2.0):
+    """Почасовой агрегат: расходы только в будни с 9:00 до 19:00, 3/4 - gpt-5, 1/4 - auto."""
+    hourly = {}
+    moment = first_day
+    while moment <= last_moment:
+        if moment.weekday() < 5 and 9 <= moment.hour < 19:
+            hourly[moment.strftime('%Y-%m-%d %H:00')] = {'gpt-5': cost * 0.75, 'auto': cost * 0.25}
+        moment += timedelta(hours=1)
+    return hourly
+
+
+class BurnRateProjectorTest(unittest.TestCase):
+
+    def setUp(self):
+        # С понедельника 5 мая по пятницу 6 июня 18:00; цикл - с 1 июня по 1 июля
+        self.hourly = business_hours(datetime(2025, 5, 5), datetime(2025, 6, 6, 18))
+
+    def projector(self, **kwargs):
+        options = dict(team_budget=None, model_budgets={}, cycle_start_day=1, trend_days=14, warn_ratio=0.9)
+        options.update(kwargs)
+        return BurnRateProjector(**options)
+
+    def test_cycle_bounds(self):
+        projector = self.projector(cycle_start_day=15)
+        self.assertEqual(projector.cycle_bounds(datetime(2025, 6, 20, 8)),
+                         (datetime(2025, 6, 15), datetime(2025, 7, 15)))
+        self.assertEqual(projector.cycle_bounds(datetime(2025, 1, 3)),
+                         (datetime(2024, 12, 15), datetime(2025, 1, 15)))
+        with self.assertRaises(ValueError):
+            self.projector(cycle_start_day=31)
+
+    def test_seasonal_projection_counts_remaining_business_hours(self):
+        projection = self.projector().project(self.hourly)
+        self.assertEqual((projection['cycle_start'], projection['cycle_end']), ('2025-06-01 00:00', '2025-07-01 00:00'))
+        self.assertEqual(projection['as_of'], '2025-06-06 19:00')
+        team = projection['team']
+        # Потрачено: 5 дней × 10 часов × $2; осталось 16 рабочих дней × 10 часов
+        self.assertAlmostEqual(team['spent'], 100.0)
+        self.assertAlmostEqual(team['projected'], 100.0 + 160 * 2.0)
+        self.assertAlmostEqual(projection['models']['gpt-5']['projected'], 0.75 * team['projected'])
+        self.assertAlmostEqual(projection['daily_rate'], 100.0 / 7)
+
+    def test_budget_statuses(self):
+        projection = self.projector(team_budget=300.0, model_budgets={'gpt-5': 50.0, 'auto': 1000.0}).project(self.hourly)
+        team = projection['team']
+        self.assertEqual(team['status'], 'over')
+        # Еще $200 - 100 рабочих часов: две недели, последний час - 20 июня 18:00-19:00
+        self.assertEqual(team['exhausted_at'], '2025-06-20 19:00')
+        self.assertEqual(projection['models']['gpt-5']['status'], 'exceeded')
+        self.assertEqual(projection['models']['auto']['status'], 'ok')
+
+        warning = self.projector(team_budget=450.0).project(self.hourly)['team']
+        self.assertEqual(warning['status'], 'warning')
+        self.assertAlmostEqual(warning['ratio'], 420.0 / 450.0)
+
+    def test_incomplete_rollup_is_skipped(self):
+        self.assertIsNone(self.projector().project(self.hourly, since=datetime(2025, 6, 4)))
+        self.assertIsNone(self.projector().project({}))
+
+
+if __name__ == '__main__':
+    unittest.main()
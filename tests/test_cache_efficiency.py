@@ -0,0 +1,117 @@
+"""Тесты эффективности кэша промптов CacheEfficiency."""
+
+import random
+import unittest
+from datetime import datetime, timedelta
+from analyzers.cache_efficiency import CacheEfficiency
+from analyzers.cost_calculator import CostCalculator
+from analyzers.event_table import UsageEvent
+from analyzers.sessions import SessionTable
+from analyzers.usage_query import EventColumns
+from config import CACHE_EFFICIENCY
+
+
+START = datetime(2025, 6, 2, 9)
+PAID = ('Included', 'On-Demand')
+
+
+def make_events(n=600, seed=5):
+    """Запросы двух моделей за три дня, часть - Rate Limited."""
+    rng = random.Random(seed)
+    events, moment = [], START
+    for _ in range(n):
+        moment += timedelta(minutes=rng.randint(1, 12))
+        cache_write = rng.randint(0, 5000)
+        events.append(UsageEvent(moment, rng.choice(('gpt-5', 'claude-4.5-sonnet')),
+                                 rng.choices(('Included', 'On-Demand', 'Rate Limited'), (60, 30, 10))[0],
+                                 cache_write + rng.randint(100, 20000), rng.randint(10, 3000),
+                                 rng.randint(0, 60000), cache_write, 0.0))
+    return events
+
+
+def reference(events):
+    """Показатели простым циклом по запросам: (prompt, cache_read, cached_cost, uncached_cost)."""
+    prompt = cache_read = cached = uncached = 0.0
+    for e in events:
+        if e.kind not in PAID:
+            continue
+        prompt += e.input_tokens + e.cache_read
+        cache_read += e.cache_read
+        cached += CostCalculator.calculate_cost(e.model, e.input_tokens - e.cache_write, e.output_tokens,
+                                                e.cache_read, e.cache_write)
+        uncached += CostCalculator.calculate_cost(e.model, e.input_tokens + e.cache_read, e.output_tokens, 0, 0)
+    return prompt, cache_read, cached, uncached
+
+
+class CacheEfficiencyTest(unittest.TestCase):
+
+    def setUp(self):
+        self.events = make_events()
+        self.columns = EventColumns.from_events(self.events)
+        self.cache = CacheEfficiency(self.columns)
+
+    def assert_matches(self, stats, events):
+        prompt, cache_read, cached, uncached = reference(events)
+        self.assertEqual(stats['requests'], sum(e.kind in PAID for e in events))
+        self.assertEqual(stats['prompt_tokens'], prompt)
+        self.assertAlmostEqual(stats['hit_ratio'], cache_read / prompt)
+        self.assertAlmostEqual(stats['cached_cost'], cached)
+        self.assertAlmostEqual(stats['uncached_cost'], uncached)
+        self.assertAlmostEqual(stats['cost_avoided'], uncached - cached)
+
+    def test_totals_match_per_request_pricing(self):
+        self.assert_matches(self.cache.totals(), self.events)
+
+    def test_by_model(self):
+        stats = self.cache.by_model()
+        self.assertEqual(sorted(stats), ['claude-4.5-sonnet', 'gpt-5'])
+        for model, row in stats.items():
+            self.assert_matches(row, [e for e in self.events if e.model == model])
+
+    def test_by_day(self):
+        result = self.cache.by_day()
+        days = sorted({e.date.date() for e in self.events})
+        self.assertEqual(result['days'], [day.isoformat() for day in days])
+        for i, day in enumerate(days):
+            _, _, cached, uncached = reference([e for e in self.events if e.date.date() == day])
+            self.assertAlmostEqual(result['cost_avoided'][i], uncached - cached)
+
+    def test_period_slice(self):
+        since, until = self.events[100].date, self.events[400].date
+        cache = CacheEfficiency(self.columns, since=since, until=until)
+        self.assert_matches(cache.totals(), [e for e in self.events if since <= e.date < until])
+
+    def test_poor_reuse_reasons(self):
+        base = {'prompt_tokens': 10 ** 6, 'hit_ratio': 0.9, 'write_amplification': 0.1, 'cost_avoided': 1.0}
+        self.assertEqual(CacheEfficiency.poor_reuse(base), [])
+        self.assertEqual(CacheEfficiency.poor_reuse(dict(base, hit_ratio=0.1)), ['low_hit_ratio'])
+        self.assertEqual(CacheEfficiency.poor_reuse(dict(base, write_amplification=None)), ['write_amplification'])
+        self.assertEqual(CacheEfficiency.poor_reuse(dict(base, cost_avoided=-0.5)), ['negative_savings'])
+        small = dict(base, prompt_tokens=CACHE_EFFICIENCY['min_prompt_tokens'] - 1, hit_ratio=0.0)
+        self.assertEqual(CacheEfficiency.poor_reuse(small), [])
+
+    def test_poor_sessions_match_per_session_stats(self):
+        # Первая сессия пишет в кэш и ничего из него не читает, вторая читает
+        first = [UsageEvent(START + timedelta(minutes=i), 'claude-4.5-sonnet', 'Included',
+                            60000, 500, 0, 50000, 0.0) for i in range(5)]
+        second = [UsageEvent(START + timedelta(hours=3, minutes=i), 'claude-4.5-sonnet', 'On-Demand',
+                             2000, 500, 80000, 0, 0.0) for i in range(5)]
+        columns = EventColumns.from_events(first + second)
+        sessions = SessionTable.from_columns(columns, gap_minutes=30)
+        self.assertEqual(len(sessions), 2)
+        count, worst = CacheEfficiency(columns).poor_sessions(sessions)
+        self.assertEqual(count, 1)
+        self.assertEqual(worst[0]['requests'], 5)
+        self.assertIn('low_hit_ratio', worst[0]['reasons'])
+        self.assertIn('write_amplification', worst[0]['reasons'])
+        self.assertEqual(worst[0]['start'], sessions.format_time(sessions.start[0]))
+
+    def test_empty_period(self):
+        cache = CacheEfficiency(self.columns, until=START)
+        self.assertEqual(cache.totals()['requests'], 0)
+        self.assertEqual(cache.by_model(), {})
+        self.assertEqual(cache.by_day()['days'], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+"""Тесты масок рабочего календаря WorkCalendar."""
+
+import unittest
+from datetime import datetime, timedelta
+import numpy as np
+from analyzers.timeline import WorkCalendar
+
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def to_seconds(moments):
+    """Переводит даты в целочисленные метки (секунды от эпохи)."""
+    return np.array([int((moment - EPOCH).total_seconds()) for moment in moments], dtype=np.int64)
+
+
+class WorkCalendarTest(unittest.TestCase):
+
+    def setUp(self):
+        self.calendar = WorkCalendar(
+            working_hours=[9 <= hour < 18 for hour in range(24)],
+            weekend_days=[False] * 5 + [True, True],
+            holidays=['2025-06-12'],
+        )
+        start = datetime(2025, 6, 2)
+        self.moments = [start + timedelta(minutes=45 * i) for i in range(14 * 24 * 60 // 45)]
+        self.seconds = to_seconds(self.moments)
+
+    def test_night_mask_matches_hours(self):
+        expected = [not 9 <= moment.hour < 18 for moment in self.moments]
+        self.assertEqual(self.calendar.is_night(self.seconds).tolist(), expected)
+
+    def test_day_off_mask_matches_weekdays_and_holidays(self):
+        expected = [moment.weekday() >= 5 or moment.date() == datetime(2025, 6, 12).date()
+                    for moment in self.moments]
+        self.assertEqual(self.calendar.is_day_off(self.seconds).tolist(), expected)
+
+    def test_defaults_come_from_config(self):
+        from config.calendar_config import WORKING_HOURS, WEEKEND_DAYS
+        calendar = WorkCalendar()
+        self.assertEqual(calendar.working_hour_mask.tolist(), WORKING_HOURS)
+        self.assertEqual(calendar.weekend_mask.tolist(), WEEKEND_DAYS)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+"""Тесты экспорта событий в Parquet/Arrow и обратного чтения."""
+
+import os
+import tempfile
+import unittest
+from datetime import datetime
+from analyzers import UsageQuery
+from analyzers.event_table import EventTable
+from tests.helpers import make_rows, write_usage_csv
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+if pyarrow is not None:
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+    from analyzers.columnar_io import export_usage, read_event_table, write_events
+
+
+END = datetime(2025, 6, 10, 12, 17, 23)
+
+
+@unittest.skipIf(pyarrow is None, 'нужен pyarrow')
+class ColumnarExportTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.csv_file = write_usage_csv(self.tmp.name, make_rows(1200, end=END, step_minutes=17, seed=8))
+        self.table = EventTable.from_csv(self.csv_file, show_progress=False)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.tmp.name, name)
+
+    def test_roundtrip_preserves_events(self):
+        for name in ('events.parquet', 'events.arrow'):
+            write_events(self.table, self.path(name))
+            self.assertEqual(read_event_table(self.path(name)).events, self.table.events, name)
+
+    def test_parquet_row_group_per_day(self):
+        write_events(self.table, self.path('events.parquet'))
+        days = {event.date.date() for event in self.table}
+        self.assertEqual(pq.ParquetFile(self.path('events.parquet')).num_row_groups, len(days))
+
+    def test_rollups_match_event_totals(self):
+        paths = export_usage(self.table, self.path('usage.parquet'))
+        self.assertEqual([os.path.basename(path) for path in paths],
+                         ['usage.parquet', 'usage.hourly.parquet', 'usage.daily.parquet'])
+        totals = UsageQuery(self.table).agg(requests='count', cost='sum', cache_read='sum')
+        for path in paths[1:]:
+            rollup = pq.read_table(path)
+            self.assertEqual(pc.sum(rollup.column('requests')).as_py(), totals['requests'])
+            self.assertAlmostEqual(pc.sum(rollup.column('cost')).as_py(), totals['cost'])
+            self.assertEqual(pc.sum(rollup.column('cache_read')).as_py(), totals['cache_read'])
+
+    def test_query_reads_export_path(self):
+        write_events(self.table, self.path('events.arrow'))
+        exported = UsageQuery(self.path('events.arrow')).group_by('model').agg(cost='sum')
+        original = UsageQuery(self.table).group_by('model').agg(cost='sum')
+        self.assertEqual([row['model'] for row in exported], [row['model'] for row in original])
+        for left, right in zip(exported, original):
+            self.assertAlmostEqual(left['cost'], right['cost'])
+
+    def test_rejects_rollup_and_unknown_format(self):
+        paths = export_usage(self.table, self.path('usage.parquet'))
+        with self.assertRaises(ValueError):
+            read_event_table(paths[1])
+        with self.assertRaises(ValueError):
+            write_events(self.table, self.path('events.json'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+"""Тесты снимка данных дашборда и HTTP эндпоинтов."""
+
+import contextlib
+import http.client
+import io
+import json
+import socket
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from analyzers import CSVAnalyzer
+from analyzers.event_table import EventTable
+from dashboard.server import DashboardServer
+from dashboard.snapshot import DashboardSnapshot, DashboardError
+from tests.helpers import make_rows, write_usage_csv
+
+
+END = datetime(2025, 6, 10, 12, 17, 23)
+PAID = ('Included', 'On-Demand')
+
+
+def make_snapshot(rows):
+    """Снимок по результатам анализа всех событий CSV."""
+    with tempfile.TemporaryDirectory() as tmp:
+        table = EventTable.from_csv(write_usage_csv(tmp, rows), show_progress=False)
+    analyzer = CSVAnalyzer(None, events=table, show_progress=False)
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = analyzer.analyze()
+    return table, DashboardSnapshot(results, table.columns(), {}, 'all')
+
+
+def free_port():
+    """Свободный TCP порт на localhost."""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class DashboardSnapshotTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.rows = make_rows(1000, end=END, step_minutes=13, seed=13)
+        cls.table, cls.snapshot = make_snapshot(cls.rows)
+
+    def test_timeline_matches_events(self):
+        since = datetime(2025, 6, 9, 10)
+        until = since + timedelta(hours=6)
+        timeline = self.snapshot.timeline('cost', '1h', since=since, until=until)
+        self.assertEqual(len(timeline['starts']), 6)
+        self.assertEqual(timeline['starts'][0], '2025-06-09T10:00:00')
+        for i in range(6):
+            start = since + timedelta(hours=i)
+            expected = sum(event.cost for event in self.table.between(start, start + timedelta(hours=1))
+                           if event.kind in PAID)
+            self.assertAlmostEqual(timeline['total'][i], expected)
+
+    def test_unaligned_timeline_is_trimmed(self):
+        since = datetime(2025, 6, 9, 10, 25)
+        until = datetime(2025, 6, 9, 15, 40)
+        timeline = self.snapshot.timeline('requests', '1h', since=since, until=until)
+        self.assertEqual((timeline['since'], timeline['until']), ('2025-06-09T10:25:00', '2025-06-09T15:40:00'))
+        self.assertEqual(timeline['starts'][0], '2025-06-09T10:00:00')
+        expected = sum(event.kind in PAID for event in self.table.between(since, until))
+        self.assertEqual(sum(timeline['total']), expected)
+
+    def test_timeline_is_limited_to_period(self):
+        since, until = datetime(2025, 6, 8, 9, 30), datetime(2025, 6, 9, 18)
+        analyzer = CSVAnalyzer(None, events=self.table, since=since, until=until, show_progress=False)
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = analyzer.analyze()
+        snapshot = DashboardSnapshot(results, self.table.columns(), {}, 'custom', since=since, until=until)
+        self.assertGreater(results['total_requests'], 0)
+        for requested in (None, datetime(2025, 1, 1)):
+            timeline = snapshot.timeline('requests', '1d', since=requested)
+            self.assertEqual((timeline['since'], timeline['until']), (since.isoformat(), until.isoformat()))
+            self.assertEqual(sum(timeline['total']), results['total_requests'])
+        summary = snapshot.summary()
+        self.assertGreaterEqual(summary['first_event'], since.isoformat())
+        self.assertLess(summary['last_event'], until.isoformat())
+        self.assertNotEqual(snapshot.version, self.snapshot.version)
+
+    def test_timeline_for_one_model(self):
+        timeline = self.snapshot.timeline('requests', '1d', model='gpt-5')
+        expected = sum(event.model == 'gpt-5' and event.kind in PAID for event in self.table)
+        self.assertEqual(sum(timeline['total']), expected)
+        self.assertEqual(list(timeline['models']), ['gpt-5'])
+
+    def test_timeline_errors(self):
+        with self.assertRaises(DashboardError) as error:
+            self.snapshot.timeline('tokens')
+        self.assertEqual(error.exception.status, 400)
+        with self.assertRaises(DashboardError) as error:
+            self.snapshot.timeline(model='no-such-model')
+        self.assertEqual(error.exception.status, 404)
+        with self.assertRaises(DashboardError) as error:
+            self.snapshot.timeline(res='1min', max_points=100)
+        self.assertEqual(error.exception.status, 400)
+
+    def test_version_depends_on_content(self):
+        _, same = make_snapshot(self.rows)
+        _, other = make_snapshot(self.rows[1:])
+        self.assertEqual(same.version, self.snapshot.version)
+        self.assertNotEqual(other.version, self.snapshot.version)
+
+    def test_summary(self):
+        summary = self.snapshot.summary()
+        self.assertEqual(summary['total_requests'], sum(row['Kind'] in PAID for row in self.rows))
+        self.assertEqual(summary['last_event'], '2025-06-10T19:17:23')
+
+
+class DashboardServerTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = DashboardServer(host='127.0.0.1', port=free_port(), render_workers=1)
+        cls.server.start()
+
+    def request(self, path, headers=None):
+        conn = http.client.HTTPConnection(self.server.host, self.server.port, timeout=30)
+        try:
+            conn.request('GET', path, headers=headers or {})
+            response = conn.getresponse()
+            return response.status, dict(response.getheaders()), response.read()
+        finally:
+            conn.close()
+
+    def test_endpoints(self):
+        self.server.snapshot = None
+        self.assertEqual(self.request('/api/summary')[0], 503)
+
+        _, self.server.snapshot = make_snapshot(make_rows(300, end=END, seed=14))
+        status, headers, body = self.request('/api/summary')
+        self.assertEqual(status, 200)
+        self.assertEqual(json.loads(body)['version'], self.server.snapshot.version)
+        self.assertEqual(self.request('/api/summary', {'If-None-Match': headers['ETag']})[0], 304)
+
+        status, _, body = self.request('/api/timeline?metric=requests&res=1d')
+        self.assertEqual(status, 200)
+        self.assertEqual(sum(json.loads(body)['total']), self.server.snapshot.results['total_requests'])
+
+        self.assertEqual(self.request('/api/timeline?since=yesterday')[0], 400)
+        self.assertEqual(self.request('/charts/unknown.png')[0], 404)
+        self.assertEqual(self.request('/nothing')[0], 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+"""Тесты календарной сетки DayHourGrid."""
+
+import unittest
+from collections import defaultdict
+from datetime import date, timedelta
+import numpy as np
+from analyzers.day_hour_grid import DayHourGrid
+
+
+class DayHourGridTest(unittest.TestCase):
+
+    def test_matches_manual_counts_for_unordered_days(self):
+        rng = np.random.default_rng(5)
+        start = date(2025, 1, 1)
+        grid = DayHourGrid(capacity=4)
+        expected = defaultdict(float)
+        counts = defaultdict(int)
+        # Дни в произвольном порядке: сетка должна расширяться в обе стороны
+        for _ in range(2000):
+            day = start + timedelta(days=int(rng.integers(0, 300)))
+            hour = int(rng.integers(0, 24))
+            cost = float(rng.random())
+            grid.add(day.toordinal(), hour, cost)
+            expected[day, hour] += cost
+            counts[day, hour] += 1
+
+        dates = grid.dates()
+        first = min(day for day, _ in expected)
+        last = max(day for day, _ in expected)
+        self.assertEqual(grid.n_days, (last - first).days + 1)
+        self.assertEqual(dates[0], np.datetime64(first))
+        self.assertEqual(dates[-1], np.datetime64(last))
+        for (day, hour), cost in expected.items():
+            row = (day - first).days
+            self.assertAlmostEqual(grid.cost[row, hour], cost)
+            self.assertEqual(grid.requests[row, hour], counts[day, hour])
+        self.assertEqual(grid.requests.sum(), 2000)
+
+    def test_empty_grid(self):
+        grid = DayHourGrid()
+        self.assertEqual(grid.n_days, 0)
+        self.assertEqual(len(grid.dates()), 0)
+        self.assertEqual(grid.cost.shape, (0, 24))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+"""Тесты прореживания рядов для HTML отчета."""
+
+import unittest
+import numpy as np
+from reports.downsampling import minmax_downsample, lttb_downsample
+
+
+class MinMaxDownsampleTest(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        self.x = np.arange(10000, dtype=np.int64) * 600
+        self.y = rng.random(10000)
+        self.y[4321] = 50.0
+        self.y[777] = -5.0
+
+    def test_keeps_spikes_and_endpoints(self):
+        x, y = minmax_downsample(self.x, self.y, 200)
+        self.assertLessEqual(len(x), 200)
+        self.assertIn(50.0, y)
+        self.assertIn(-5.0, y)
+        self.assertEqual(x[0], self.x[0])
+        self.assertEqual(x[-1], self.x[-1])
+        self.assertTrue(np.all(np.diff(x) > 0))
+
+    def test_points_come_from_source(self):
+        x, y = minmax_downsample(self.x, self.y, 200)
+        np.testing.assert_array_equal(self.y[x // 600], y)
+
+    def test_short_series_unchanged(self):
+        x, y = minmax_downsample(self.x[:50], self.y[:50], 200)
+        np.testing.assert_array_equal(x, self.x[:50])
+        np.testing.assert_array_equal(y, self.y[:50])
+
+
+class LttbDownsampleTest(unittest.TestCase):
+
+    def test_exact_size_and_endpoints(self):
+        x = np.arange(5000)
+        y = np.cumsum(np.random.default_rng(1).random(5000))
+        xs, ys = lttb_downsample(x, y, 300)
+        self.assertEqual(len(xs), 300)
+        self.assertEqual((xs[0], xs[-1]), (0, 4999))
+        self.assertTrue(np.all(np.diff(xs) > 0))
+        np.testing.assert_array_equal(y[xs], ys)
+
+    def test_keeps_corner_of_step(self):
+        x = np.arange(1000)
+        y = np.where(x < 600, 0.0, 10.0)
+        xs, ys = lttb_downsample(x, y, 20)
+        # Точка излома сохраняется, поэтому линия не "размазывает" скачок
+        self.assertTrue({599, 600} & set(xs.tolist()))
+
+    def test_short_series_unchanged(self):
+        xs, ys = lttb_downsample([1, 2], [3, 4], 10)
+        self.assertEqual(xs.tolist(), [1, 2])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+"""Тесты таблицы событий EventTable и анализа произвольного периода."""
+
+import argparse
+import contextlib
+import io
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from analyzers import CSVAnalyzer
+from analyzers.cost_calculator import CostCalculator
+from analyzers.event_table import EventTable
+from main import parse_periods, parse_datetime
+from tests.helpers import make_rows, write_usage_csv, billed_cost
+
+
+END = datetime(2025, 6, 10, 12)
+
+
+class EventTableTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.rows = make_rows(300, end=END, step_minutes=41, seed=3)
+        self.csv_file = write_usage_csv(self.tmp.name, self.rows)
+        self.table = EventTable.from_csv(self.csv_file, show_progress=False)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_parse_row_shifts_to_utc7_and_splits_cache_write(self):
+        row = dict(self.rows[0])
+        event = EventTable.parse_row(row)
+        self.assertEqual(event.date, END + timedelta(hours=7))
+        self.assertEqual(event.cache_write, row['Input (w/ Cache Write)'] - row['Input (w/o Cache Write)'])
+        self.assertEqual(event.cost, row['Cost'])
+
+    def test_parse_row_computes_missing_cost(self):
+        row = dict(self.rows[0], Cost='0', Model='gpt-5')
+        event = EventTable.parse_row(row)
+        expected = CostCalculator.calculate_cost('gpt-5', row['Input (w/o Cache Write)'], row['Output Tokens'],
+                                                 row['Cache Read'], event.cache_write)
+        self.assertAlmostEqual(event.cost, expected)
+
+    def test_parse_row_skips_broken_rows(self):
+        self.assertIsNone(EventTable.parse_row(dict(self.rows[0], Date='yesterday')))
+        self.assertIsNone(EventTable.parse_row({'Date': self.rows[0]['Date']}))
+
+    def test_events_are_sorted_and_sliced(self):
+        dates = [event.date for event in self.table]
+        self.assertEqual(len(self.table), len(self.rows))
+        self.assertEqual(dates, sorted(dates))
+        since, until = dates[40], dates[90]
+        self.assertEqual(self.table.between(since, until), [e for e in self.table if since <= e.date < until])
+
+    def test_custom_range_matches_filtered_table(self):
+        since, until = datetime(2025, 6, 8), datetime(2025, 6, 9, 12)
+        ranged = CSVAnalyzer(self.csv_file, events=self.table, since=since, until=until, show_progress=False)
+        filtered = CSVAnalyzer(self.csv_file, events=EventTable(self.table.between(since, until)), show_progress=False)
+        with contextlib.redirect_stdout(io.StringIO()):
+            ranged_models = ranged.analyze()['models']
+            filtered_models = filtered.analyze()['models']
+        self.assertEqual(ranged_models, filtered_models)
+        self.assertAlmostEqual(ranged.get_total_cost(), filtered.get_total_cost())
+
+    def test_all_period_totals(self):
+        analyzer = CSVAnalyzer(self.csv_file, events=self.table, show_progress=False)
+        with contextlib.redirect_stdout(io.StringIO()):
+            analyzer.analyze()
+        self.assertAlmostEqual(analyzer.get_total_cost(), billed_cost(self.rows))
+
+
+class CommandLineTest(unittest.TestCase):
+
+    def test_parse_periods(self):
+        self.assertEqual(parse_periods('week, day,week'), ['week', 'day'])
+        with self.assertRaises(argparse.ArgumentTypeError):
+            parse_periods('year')
+        with self.assertRaises(argparse.ArgumentTypeError):
+            parse_periods(',')
+
+    def test_parse_datetime(self):
+        self.assertEqual(parse_datetime('2025-06-01'), datetime(2025, 6, 1))
+        self.assertEqual(parse_datetime('2025-06-01 13:30'), datetime(2025, 6, 1, 13, 30))
+        with self.assertRaises(argparse.ArgumentTypeError):
+            parse_datetime('01.06.2025')
+
+
+if __name__ == '__main__':
+    unittest.main()
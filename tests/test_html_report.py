@@ -0,0 +1,54 @@
+"""Тесты автономного HTML отчета HtmlReportWriter."""
+
+import json
+import os
+import re
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from analyzers.timeline import TimelineCube
+from reports import HtmlReportWriter
+
+
+NOW = datetime(2025, 6, 4, 12, 5)
+
+RESULTS = {'models': {'gpt-5': {'included_requests': 3, 'on_demand_requests': 0, 'included_cost': 0.3,
+                                'on_demand_cost': 0.0, 'errors': 0}}}
+
+
+def report_data(path):
+    """JSON с данными отчета из HTML файла."""
+    with open(path, encoding='utf-8') as f:
+        html = f.read()
+    return json.loads(re.search(r'id="data">(.*?)</script>', html, re.S).group(1))
+
+
+class HtmlReportWriterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.writer = HtmlReportWriter(output_dir=self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_charts_come_from_given_cube(self):
+        items = [(NOW - timedelta(minutes=10 * i), 'gpt-5', 0.1) for i in range(3)][::-1]
+        path = self.writer.write(RESULTS, 0.3, 3, cube=TimelineCube(items, now=NOW))
+        data = report_data(path)
+        self.assertIsNone(data['note'])
+        self.assertEqual([chart['id'] for chart in data['charts']], ['cost', 'cumulative', 'requests', 'models'])
+        self.assertAlmostEqual(sum(data['charts'][0]['series'][0]['y']), 0.3)
+        self.assertEqual(os.path.basename(path), 'report.html')
+
+    def test_note_without_timeline_data(self):
+        data = report_data(self.writer.write(RESULTS, 0.3, 3))
+        self.assertEqual(data['charts'], [])
+        self.assertIn('unavailable', data['note'])
+        data = report_data(self.writer.write(RESULTS, 0.0, 0, cube=TimelineCube([], now=NOW)))
+        self.assertEqual(data['charts'], [])
+        self.assertIn('No paid requests', data['note'])
+
+
+if __name__ == '__main__':
+    unittest.main()
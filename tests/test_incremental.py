@@ -0,0 +1,131 @@
+"""Тесты инкрементального чтения экспорта и обновления статистики (--watch)."""
+
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+import numpy as np
+from analyzers import CSVAnalyzer
+from analyzers.event_table import EventTable
+from tests.helpers import make_rows, write_usage_csv, assert_results_close
+
+
+END = datetime(2025, 6, 10, 12, 17, 23)
+
+COMPARED = ('models', 'total_cost', 'total_requests', 'daily_usage', 'daily_cost', 'hourly_cost_full',
+            'ten_min_requests', 'all_timestamps', 'cost_percentiles')
+
+
+class IngestCsvTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.old_rows = make_rows(800, end=END, step_minutes=11, seed=9)
+        self.new_rows = make_rows(150, end=END + timedelta(days=1), step_minutes=9, seed=10)
+        self.csv_file = write_usage_csv(self.tmp.name, self.old_rows)
+        self.table = EventTable.from_csv(self.csv_file, show_progress=False)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_reingesting_same_export_adds_nothing(self):
+        self.assertEqual(self.table.ingest_csv(self.csv_file), [])
+        self.assertEqual(len(self.table), len(self.old_rows))
+
+    def test_only_newer_rows_are_added(self):
+        write_usage_csv(self.tmp.name, self.new_rows + self.old_rows)
+        added = self.table.ingest_csv(self.csv_file)
+        self.assertEqual(len(added), len(self.new_rows))
+        self.assertEqual(self.table.events, EventTable.from_csv(self.csv_file, show_progress=False).events)
+        self.assertEqual(self.table.dates, sorted(self.table.dates))
+
+    def test_rows_in_the_last_second_are_not_doubled(self):
+        # Новая строка с той же секундой, что и последнее событие
+        latest = dict(self.old_rows[0], Cost=0.123, Model='gpt-5', Kind='Included')
+        write_usage_csv(self.tmp.name, [latest] + self.old_rows)
+        added = self.table.ingest_csv(self.csv_file)
+        self.assertEqual(len(added), 1)
+        self.assertEqual(added[0].cost, 0.123)
+        self.assertEqual(self.table.ingest_csv(self.csv_file), [])
+
+    def test_older_export_is_merged(self):
+        newer = write_usage_csv(self.tmp.name, self.new_rows, name='newer.csv')
+        table = EventTable.from_csv(newer, show_progress=False)
+        added = table.ingest_csv(self.csv_file)
+        self.assertEqual(len(added), len(self.old_rows))
+        merged = write_usage_csv(self.tmp.name, self.new_rows + self.old_rows, name='all.csv')
+        self.assertEqual(table.events, EventTable.from_csv(merged, show_progress=False).events)
+        self.assertEqual(table.dates, [event.date for event in table.events])
+
+    def test_gap_in_history_is_filled(self):
+        table = EventTable(self.table.events[:300] + self.table.events[500:])
+        added = table.ingest_csv(self.csv_file)
+        self.assertEqual(added, self.table.events[300:500])
+        self.assertEqual(table.events, self.table.events)
+        self.assertEqual(table.ingest_csv(self.csv_file), [])
+
+    def test_columns_follow_new_events(self):
+        self.assertEqual(len(self.table.columns()), len(self.old_rows))
+        write_usage_csv(self.tmp.name, self.new_rows + self.old_rows)
+        self.table.ingest_csv(self.csv_file)
+        self.assertEqual(len(self.table.columns()), len(self.old_rows) + len(self.new_rows))
+
+
+class UpdateTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.rows = make_rows(1500, end=END, step_minutes=11, seed=11)
+        self.csv_file = write_usage_csv(self.tmp.name, self.rows)
+        self.table = EventTable.from_csv(self.csv_file, show_progress=False)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def analyzer(self, events, **kwargs):
+        return CSVAnalyzer(self.csv_file, events=events, show_progress=False, **kwargs)
+
+    def test_update_matches_full_rebuild(self):
+        split = 1100
+        incremental = self.analyzer(EventTable(self.table.events[:split]))
+        with contextlib.redirect_stdout(io.StringIO()):
+            incremental.analyze()
+            updated = incremental.update(self.table.events[split:])
+            rebuilt = self.analyzer(self.table).analyze()
+        for key in COMPARED:
+            assert_results_close(self, updated[key], rebuilt[key], (key,))
+
+    def test_update_respects_custom_range(self):
+        since, until = self.table.dates[200], self.table.dates[1300]
+        incremental = self.analyzer(EventTable(self.table.events[:900]), since=since, until=until)
+        with contextlib.redirect_stdout(io.StringIO()):
+            incremental.analyze()
+            updated = incremental.update(self.table.events[900:])
+        expected = [event for event in self.table.between(since, until) if event.kind in ('Included', 'On-Demand')]
+        self.assertEqual(updated['total_requests'], len(expected))
+        self.assertAlmostEqual(updated['total_cost'], sum(event.cost for event in expected))
+
+
+class WeekdayHourTest(unittest.TestCase):
+
+    def test_matrices_match_manual_counts(self):
+        rows = make_rows(900, end=END, step_minutes=29, seed=12)
+        with tempfile.TemporaryDirectory() as tmp:
+            table = EventTable.from_csv(write_usage_csv(tmp, rows), show_progress=False)
+        since, until = table.dates[100], table.dates[700]
+        matrices = table.columns().weekday_hour(since=since, until=until)
+
+        requests = np.zeros((7, 24), dtype=int)
+        cost = np.zeros((7, 24))
+        for event in table.between(since, until):
+            if event.kind in ('Included', 'On-Demand'):
+                requests[event.date.weekday(), event.date.hour] += 1
+                cost[event.date.weekday(), event.date.hour] += event.cost
+        self.assertEqual(matrices['requests'], requests.tolist())
+        np.testing.assert_allclose(matrices['cost'], cost)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+"""Тесты записи графиков в один PDF документ."""
+
+import os
+import tempfile
+import unittest
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+from visualizers.base_visualizer import BaseVisualizer
+from visualizers import SummaryPageVisualizer
+
+
+class SinglePdfTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.pdf_path = os.path.join(self.tmp.name, 'report.pdf')
+        BaseVisualizer.reset_counter()
+
+    def tearDown(self):
+        BaseVisualizer.close_pdf()
+        BaseVisualizer.reset_counter()
+        self.tmp.cleanup()
+
+    def test_pages_go_into_one_document(self):
+        BaseVisualizer.open_pdf(self.pdf_path)
+        summary = SummaryPageVisualizer(self.tmp.name)
+        # 130 строк -> 3 страницы сводки
+        summary.create_summary_pages([f"line {i}" for i in range(130)])
+        plt.figure()
+        plt.plot([0, 1], [1, 0])
+        path = summary.save_figure('chart.png')
+
+        self.assertEqual(path, self.pdf_path)
+        self.assertEqual(plt.get_fignums(), [])
+        self.assertEqual(BaseVisualizer.close_pdf(), 4)
+        self.assertEqual(sorted(os.listdir(self.tmp.name)), ['report.pdf'])
+        with open(self.pdf_path, 'rb') as f:
+            self.assertTrue(f.read(5).startswith(b'%PDF'))
+
+    def test_close_without_open(self):
+        self.assertEqual(BaseVisualizer.close_pdf(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+"""Тесты профилировщика этапов StageProfiler."""
+
+import json
+import os
+import tempfile
+import time
+import unittest
+from utils.profiler import StageProfiler
+
+
+class StageProfilerTest(unittest.TestCase):
+
+    def test_disabled_profiler_records_nothing(self):
+        profiler = StageProfiler()
+        self.assertIs(profiler.stage('a'), profiler.stage('b'))
+        with profiler.stage('a'):
+            pass
+        self.assertEqual(profiler.stages, {})
+
+    def test_stages_are_nested_and_summed(self):
+        profiler = StageProfiler()
+        profiler.start()
+        with profiler.stage('render'):
+            for _ in range(3):
+                with profiler.stage('write file'):
+                    time.sleep(0.002)
+        profiler.stop()
+
+        render, write = profiler.stages['render'], profiler.stages['write file']
+        self.assertEqual((render['calls'], render['depth']), (1, 0))
+        self.assertEqual((write['calls'], write['depth']), (3, 1))
+        self.assertGreaterEqual(write['wall'], 0.006)
+        self.assertGreaterEqual(render['wall'], write['wall'])
+        # Таблица отсортирована по времени: внешний этап первый
+        self.assertTrue(profiler.format_table()[2].startswith('render'))
+
+    def test_memory_peaks_and_json_report(self):
+        profiler = StageProfiler()
+        profiler.start(trace_memory=True)
+        with profiler.stage('allocate'):
+            block = bytearray(8 * 2 ** 20)
+            del block
+        profiler.stop()
+        self.assertGreaterEqual(profiler.stages['allocate']['memory_peak_mb'], 7.5)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'stages.json')
+            profiler.write_json(path)
+            with open(path, encoding='utf-8') as f:
+                report = json.load(f)
+        self.assertTrue(report['trace_memory'])
+        self.assertIn('allocate', report['stages'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+"""Тесты квантильного скетча KLLSketch."""
+
+import tempfile
+import unittest
+import numpy as np
+from analyzers import CSVAnalyzer, EventTable
+from analyzers.quantile_sketch import KLLSketch
+from analyzers.box_stats import compute_box_stats, compute_sketch_box_stats
+from tests.helpers import make_rows, write_usage_csv
+
+
+QUANTILES = (0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99)
+
+
+def rank_of(sorted_values, value):
+    """Нормированный ранг значения в отсортированном массиве."""
+    return np.searchsorted(sorted_values, value, side='right') / len(sorted_values)
+
+
+class KLLSketchTest(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(11)
+        self.values = rng.lognormal(-3, 1.0, 100000)
+        self.sorted_values = np.sort(self.values)
+
+    def assert_rank_error(self, sketch):
+        for q, value in zip(QUANTILES, sketch.quantiles(QUANTILES)):
+            self.assertLessEqual(abs(rank_of(self.sorted_values, value) - q), sketch.rank_error(), q)
+
+    def test_quantiles_within_rank_error(self):
+        sketch = KLLSketch(k=200, seed=1)
+        for value in self.values:
+            sketch.update(value)
+        self.assert_rank_error(sketch)
+
+    def test_memory_is_bounded(self):
+        sketch = KLLSketch(k=200, seed=1)
+        for value in self.values:
+            sketch.update(value)
+        self.assertLess(len(sketch.items()), 1000)
+        self.assertEqual(len(sketch), len(self.values))
+
+    def test_exact_aggregates(self):
+        sketch = KLLSketch(k=100, seed=2)
+        for value in self.values[:5000]:
+            sketch.update(value)
+        self.assertAlmostEqual(sketch.total, self.values[:5000].sum())
+        self.assertEqual(sketch.min, self.values[:5000].min())
+        self.assertEqual(sketch.max, self.values[:5000].max())
+
+    def test_merged_sketch_keeps_rank_error(self):
+        parts = []
+        for i, chunk in enumerate(np.array_split(self.values, 4)):
+            sketch = KLLSketch(k=200, seed=i)
+            for value in chunk:
+                sketch.update(value)
+            parts.append(sketch)
+        merged = parts[0]
+        for sketch in parts[1:]:
+            merged.merge(sketch)
+        self.assertEqual(merged.n, len(self.values))
+        self.assertAlmostEqual(merged.total, self.values.sum())
+        self.assert_rank_error(merged)
+
+    def test_empty_sketch(self):
+        self.assertEqual(KLLSketch().quantiles((0.5,)), [None])
+        self.assertIsNone(compute_sketch_box_stats(KLLSketch(), 'gpt-5'))
+
+    def test_sketch_box_stats_close_to_exact(self):
+        sketch = KLLSketch(k=200, seed=3)
+        for value in self.values:
+            sketch.update(value)
+        approx = compute_sketch_box_stats(sketch, 'gpt-5')
+        exact = compute_box_stats(self.values, 'gpt-5')
+        self.assertAlmostEqual(approx['mean'], exact['mean'])
+        for key in ('q1', 'med', 'q3'):
+            self.assertLessEqual(abs(rank_of(self.sorted_values, approx[key])
+                                     - rank_of(self.sorted_values, exact[key])), sketch.rank_error())
+
+    def test_merge_rejects_different_k(self):
+        with self.assertRaises(ValueError):
+            KLLSketch(k=100).merge(KLLSketch(k=200))
+
+
+class CostSketchModeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_sketch_mode_keeps_totals_and_timelines(self):
+        table = EventTable.from_csv(write_usage_csv(self.tmp.name, make_rows(3000, seed=8)), show_progress=False)
+        exact = CSVAnalyzer(None, events=table, show_progress=False).analyze()
+        approx = CSVAnalyzer(None, events=table, cost_sketches=True, show_progress=False).analyze()
+        self.assertAlmostEqual(approx['total_cost'], exact['total_cost'])
+        self.assertEqual(approx['all_timestamps'], exact['all_timestamps'])
+        for model, percentiles in approx['cost_percentiles'].items():
+            self.assertGreater(percentiles['rank_error'], 0)
+            costs = np.sort([e.cost for e in table if e.model == model and e.kind in ('Included', 'On-Demand')])
+            self.assertLessEqual(abs(rank_of(costs, percentiles['p90']) - 0.9), percentiles['rank_error'])
+
+
+if __name__ == '__main__':
+    unittest.main()
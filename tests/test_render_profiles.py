@@ -0,0 +1,53 @@
+"""Тесты профилей сохранения графиков."""
+
+import os
+import tempfile
+import unittest
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+from PIL import Image
+from config import DEFAULT_RENDER_PROFILE
+from visualizers.base_visualizer import BaseVisualizer
+
+
+class RenderProfileTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.visualizer = BaseVisualizer(self.tmp.name)
+        BaseVisualizer.reset_counter()
+
+    def tearDown(self):
+        BaseVisualizer.set_render_profile(DEFAULT_RENDER_PROFILE)
+        BaseVisualizer.reset_counter()
+        self.tmp.cleanup()
+
+    def draw(self, filename):
+        plt.figure(figsize=(4, 2))
+        plt.plot([0, 1], [0, 1])
+        return self.visualizer.save_figure(filename, use_tight_layout=False)
+
+    def test_draft_profile_uses_its_dpi(self):
+        BaseVisualizer.set_render_profile('draft')
+        path = self.draw('chart.png')
+        self.assertEqual(os.path.basename(path), '01_chart.png')
+        with Image.open(path) as image:
+            self.assertEqual(image.size, (4 * 72, 2 * 72))
+
+    def test_format_override_changes_extension(self):
+        BaseVisualizer.set_render_profile('screen', fmt='svg')
+        path = self.draw('chart.png')
+        self.assertTrue(path.endswith('01_chart.svg'))
+        with open(path, encoding='utf-8') as f:
+            self.assertIn('<svg', f.read())
+
+    def test_unknown_profile_and_format(self):
+        with self.assertRaises(ValueError):
+            BaseVisualizer.set_render_profile('poster')
+        with self.assertRaises(ValueError):
+            BaseVisualizer.set_render_profile('draft', fmt='gif')
+
+
+if __name__ == '__main__':
+    unittest.main()
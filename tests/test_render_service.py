@@ -0,0 +1,101 @@
+"""Тесты протокола процесса рендеринга и исполнителя заданий."""
+
+import os
+import socket
+import tempfile
+import unittest
+from render_service.client import RenderClient
+from render_service.common import load_authkey
+from render_service.server import RenderServer
+from visualizers.base_visualizer import BaseVisualizer
+from visualizers.chart_registry import ChartRenderer
+
+
+class FakeConnection:
+    """Соединение, возвращающее один запрос и запоминающее ответ."""
+
+    def __init__(self, request):
+        self.request = request
+        self.response = None
+
+    def recv(self):
+        return self.request
+
+    def send(self, response):
+        self.response = response
+
+
+class RenderServerProtocolTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        socket_path = os.path.join(self.tmp.name, 'render.sock')
+        load_authkey(socket_path, create=True)
+        self.server = RenderServer(socket_path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def handle(self, request):
+        conn = FakeConnection(request)
+        running = self.server._handle(conn)
+        return running, conn.response
+
+    def test_ping_reports_code_stamp(self):
+        running, response = self.handle({'command': 'ping'})
+        self.assertTrue(running)
+        self.assertEqual(response['code_stamp'], self.server.code_stamp)
+
+    def test_shutdown_stops_loop(self):
+        running, response = self.handle({'command': 'shutdown'})
+        self.assertFalse(running)
+        self.assertTrue(response['ok'])
+
+    def test_unknown_command(self):
+        running, response = self.handle({'command': 'dance'})
+        self.assertTrue(running)
+        self.assertFalse(response['ok'])
+
+    def test_render_errors_are_returned(self):
+        _, response = self.handle({'command': 'render', 'job': {'jobs': [('no_such_chart', {})]}})
+        self.assertFalse(response['ok'])
+        self.assertIn('no_such_chart', response['error'])
+
+    def test_render_job(self):
+        job = {'jobs': [('summary', {'lines': ['total: $1.00']})], 'output_dir': self.tmp.name,
+               'render_profile': 'draft'}
+        try:
+            _, response = self.handle({'command': 'render', 'job': job})
+        finally:
+            BaseVisualizer.set_render_profile('print')
+        self.assertTrue(response['ok'], response.get('error'))
+        self.assertEqual(response['figures'], 1)
+        self.assertIn('01_summary_1.png', os.listdir(self.tmp.name))
+
+
+@unittest.skipUnless(hasattr(socket, 'AF_UNIX'), 'нужны Unix-сокеты')
+class RenderClientTest(unittest.TestCase):
+
+    def test_client_starts_and_stops_daemon(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            client = RenderClient(socket_path=os.path.join(tmp, 'render.sock'), idle_timeout=30,
+                                  start_timeout=60)
+            self.assertIsNone(client.ping())
+            try:
+                client.ensure_running()
+                self.assertIsNotNone(client.ping())
+            finally:
+                client.shutdown()
+                client._wait_for_exit()
+            self.assertIsNone(client.ping())
+
+
+class ChartRendererTest(unittest.TestCase):
+
+    def test_unknown_charts_are_rejected_before_rendering(self):
+        with self.assertRaises(ValueError):
+            ChartRenderer().render([('summary', {'lines': []}), ('bogus', {})])
+
+
+if __name__ == '__main__':
+    unittest.main()
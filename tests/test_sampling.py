@@ -0,0 +1,87 @@
+"""Тесты приближенных оценок BlockSample (режим --sample)."""
+
+import shutil
+import tempfile
+import unittest
+from datetime import datetime
+import numpy as np
+from analyzers import BlockSample, EventTable
+from tests.helpers import make_rows, write_usage_csv
+
+
+END = datetime(2025, 6, 20, 12)
+
+
+class BlockSampleTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.mkdtemp()
+        cls.csv_file = write_usage_csv(cls.directory, make_rows(3000, end=END, step_minutes=11, seed=4))
+        cls.table = EventTable.from_csv(cls.csv_file, show_progress=False)
+        cls.columns = cls.table.columns()
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.directory)
+
+    def paid(self, events):
+        return [event for event in events if event.kind in ('Included', 'On-Demand')]
+
+    def test_every_row_belongs_to_exactly_one_block(self):
+        sample = BlockSample.from_csv(self.csv_file, rows=10 ** 9, block_bytes=512, seed=1)
+        self.assertTrue(sample.exact)
+        self.assertEqual(sample.sampled_blocks, sample.n_blocks)
+        self.assertEqual(len(sample), len(self.table))
+        self.assertEqual(sorted(sample.columns.ts.tolist()), self.columns.ts.tolist())
+
+    def test_full_coverage_matches_exact_totals(self):
+        estimate = BlockSample.from_csv(self.csv_file, rows=10 ** 9, block_bytes=1024, seed=2).estimate()
+        paid = self.paid(self.table)
+        self.assertTrue(estimate['exact'])
+        self.assertEqual(estimate['total_requests'], {'value': len(paid), 'margin': 0.0})
+        self.assertAlmostEqual(estimate['total_cost']['value'], sum(event.cost for event in paid))
+        self.assertEqual(estimate['total_cost']['margin'], 0.0)
+        self.assertEqual(estimate['errors']['value'], sum(event.kind == 'Rate Limited' for event in self.table))
+        for model, stats in estimate['models'].items():
+            rows = [event for event in paid if event.model == model]
+            self.assertEqual(stats['requests']['value'], len(rows))
+            self.assertAlmostEqual(stats['cost_per_request']['value'], sum(e.cost for e in rows) / len(rows))
+        exact = self.columns.weekday_hour()
+        self.assertEqual(estimate['weekday_hour']['requests'], exact['requests'])
+        np.testing.assert_allclose(estimate['weekday_hour']['cost'], exact['cost'], atol=1e-9)
+
+    def test_period_estimate_at_full_coverage(self):
+        since, until = self.table.events[500].date, self.table.events[2500].date
+        estimate = BlockSample.from_csv(self.csv_file, rows=10 ** 9, seed=3).estimate(since=since, until=until)
+        paid = self.paid(self.table.between(since, until))
+        self.assertEqual(estimate['total_requests']['value'], len(paid))
+        self.assertAlmostEqual(estimate['total_cost']['value'], sum(event.cost for event in paid))
+
+    def test_partial_sample_reads_part_of_file(self):
+        sample = BlockSample.from_csv(self.csv_file, rows=300, block_bytes=1024, seed=4)
+        self.assertFalse(sample.exact)
+        self.assertGreaterEqual(len(sample), 300)
+        self.assertLess(sample.bytes_read, sample.file_size)
+        estimate = sample.estimate()
+        self.assertGreater(estimate['total_cost']['margin'], 0)
+        again = BlockSample.from_csv(self.csv_file, rows=300, block_bytes=1024, seed=4).estimate()
+        self.assertEqual(estimate['total_cost'], again['total_cost'])
+
+    def test_intervals_cover_exact_totals(self):
+        exact = sum(event.cost for event in self.paid(self.table))
+        covered = 0
+        for seed in range(100):
+            total = BlockSample.from_csv(self.csv_file, rows=600, block_bytes=1024, seed=seed).estimate()['total_cost']
+            covered += abs(total['value'] - exact) <= total['margin']
+        # 95% интервалы: с запасом на разброс по 100 выборкам
+        self.assertGreaterEqual(covered, 85)
+
+    def test_single_block_has_no_margin(self):
+        sample = BlockSample.from_csv(self.csv_file, rows=1, block_bytes=1024, seed=5)
+        self.assertEqual(sample.sampled_blocks, 1)
+        self.assertIsNone(sample.estimate()['total_cost']['margin'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+"""Тесты восстановления сессий SessionTable."""
+
+import random
+import unittest
+from datetime import datetime, timedelta
+from analyzers.event_table import UsageEvent
+from analyzers.sessions import SessionTable
+from analyzers.usage_query import EventColumns
+
+
+START = datetime(2025, 6, 2, 9)
+PAID = ('Included', 'On-Demand')
+
+
+def make_events(n=3000, seed=2):
+    """Запросы с паузами от секунд до нескольких часов."""
+    rng = random.Random(seed)
+    events, moment = [], START
+    for _ in range(n):
+        moment += timedelta(seconds=rng.choice((rng.randint(5, 600), rng.randint(5, 600), rng.randint(1800, 14400))))
+        kind = rng.choices(('Included', 'On-Demand', 'Rate Limited'), (70, 25, 5))[0]
+        events.append(UsageEvent(moment, rng.choice(('gpt-5', 'auto', 'claude-4.5-sonnet')), kind,
+                                 0, 0, 0, 0, round(rng.uniform(0.01, 0.5), 4)))
+    return events
+
+
+def reference_sessions(events, gap_minutes):
+    """Сессии простым циклом: (начало, конец, запросы, стоимость)."""
+    sessions = []
+    for event in events:
+        cost = event.cost if event.kind in PAID else 0.0
+        if sessions and event.date - sessions[-1][1] <= timedelta(minutes=gap_minutes):
+            first, _, requests, total = sessions[-1]
+            sessions[-1] = (first, event.date, requests + 1, total + cost)
+        else:
+            sessions.append((event.date, event.date, 1, cost))
+    return sessions
+
+
+def seconds(moment):
+    return int((moment - datetime(1970, 1, 1)).total_seconds())
+
+
+class SessionTableTest(unittest.TestCase):
+
+    def setUp(self):
+        self.events = make_events()
+        self.columns = EventColumns.from_events(self.events)
+
+    def assert_matches_reference(self, table, events, gap_minutes):
+        expected = reference_sessions(events, gap_minutes)
+        self.assertEqual(len(table), len(expected))
+        self.assertEqual(table.start.tolist(), [seconds(first) for first, _, _, _ in expected])
+        self.assertEqual(table.end.tolist(), [seconds(last) for _, last, _, _ in expected])
+        self.assertEqual(table.requests.tolist(), [requests for _, _, requests, _ in expected])
+        for cost, (_, _, _, total) in zip(table.cost.tolist(), expected):
+            self.assertAlmostEqual(cost, total)
+
+    def test_sessions_match_reference(self):
+        for gap in (15, 30, 120):
+            self.assert_matches_reference(SessionTable.from_columns(self.columns, gap_minutes=gap), self.events, gap)
+
+    def test_period_slice(self):
+        since, until = self.events[500].date, self.events[2000].date
+        table = SessionTable.from_columns(self.columns, gap_minutes=30, since=since, until=until)
+        self.assert_matches_reference(table, [e for e in self.events if since <= e.date < until], 30)
+
+    def test_groups_are_sessionized_separately(self):
+        groups = [i % 2 for i in range(len(self.events))]
+        table = SessionTable.from_columns(self.columns, gap_minutes=30, groups=groups)
+        expected = sum(len(reference_sessions(self.events[owner::2], 30)) for owner in (0, 1))
+        self.assertEqual(len(table), expected)
+        self.assertEqual(table.requests.sum(), len(self.events))
+
+    def test_dominant_model_is_most_expensive(self):
+        events = [
+            UsageEvent(START, 'auto', 'Included', 0, 0, 0, 0, 0.1),
+            UsageEvent(START + timedelta(minutes=1), 'auto', 'Included', 0, 0, 0, 0, 0.1),
+            UsageEvent(START + timedelta(minutes=2), 'gpt-5', 'On-Demand', 0, 0, 0, 0, 0.5),
+        ]
+        table = SessionTable.from_columns(EventColumns.from_events(events), gap_minutes=30)
+        self.assertEqual(table.models[table.model_codes[0]], 'gpt-5')
+
+    def test_summary(self):
+        table = SessionTable.from_columns(self.columns, gap_minutes=30)
+        summary = table.summary(top=5)
+        self.assertEqual(summary['count'], len(table))
+        costs = [session['cost'] for session in summary['top']]
+        self.assertEqual(costs, sorted(table.cost.tolist(), reverse=True)[:5])
+        self.assertAlmostEqual(summary['duration_minutes']['max'], table.duration_minutes.max())
+
+    def test_empty(self):
+        table = SessionTable.from_columns(self.columns, since=START - timedelta(days=2), until=START - timedelta(days=1))
+        self.assertEqual(len(table), 0)
+        self.assertIsNone(table.summary())
+
+
+if __name__ == '__main__':
+    unittest.main()
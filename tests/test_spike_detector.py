@@ -0,0 +1,177 @@
+"""Тесты детектора всплесков расходов."""
+
+import json
+import os
+import random
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+import numpy as np
+from analyzers.event_table import UsageEvent
+from analyzers.spike_detector import SpikeDetector, SpikeNotifier, decay_scan, MAD_SCALE
+from analyzers.usage_query import EventColumns
+
+
+START = datetime(2025, 6, 2)
+SPIKE_AT = datetime(2025, 6, 3, 15, 20)
+
+
+def make_events(spike=True):
+    """Два дня запросов двух моделей каждые 5 минут и один дорогой бакет у gpt-5."""
+    rng = random.Random(1)
+    events = []
+    for i in range(2 * 24 * 12):
+        moment = START + timedelta(minutes=5 * i)
+        events.append(UsageEvent(moment, 'gpt-5', 'Included', 0, 0, 0, 0, rng.uniform(0.05, 0.15)))
+        events.append(UsageEvent(moment + timedelta(seconds=30), 'auto', 'On-Demand', 0, 0, 0, 0,
+                                 rng.uniform(0.01, 0.03)))
+        events.append(UsageEvent(moment + timedelta(seconds=40), 'auto', 'Rate Limited', 0, 0, 0, 0, 9.0))
+    if spike:
+        events.append(UsageEvent(SPIKE_AT + timedelta(minutes=3), 'gpt-5', 'On-Demand', 0, 0, 0, 0, 6.0))
+    return sorted(events, key=lambda event: event.date)
+
+
+def make_sparse_events(spike=True):
+    """Дорогая модель, которой пользуются изредка (~$1.3 за активный бакет), и один бакет на $12."""
+    rng = random.Random(2)
+    events = []
+    for i in range(120):
+        moment = START + timedelta(hours=5 * i + rng.randint(0, 3), minutes=rng.randint(0, 59))
+        events.append(UsageEvent(moment, 'claude-4-opus', 'Included', 0, 0, 0, 0, rng.uniform(1.0, 1.6)))
+    if spike:
+        events.append(UsageEvent(START + timedelta(days=23, minutes=7), 'claude-4-opus', 'On-Demand',
+                                 0, 0, 0, 0, 12.0))
+    return sorted(events, key=lambda event: event.date)
+
+
+def detector():
+    return SpikeDetector(bucket_minutes=10, window=144, alpha=0.05, threshold=6.0, min_cost=1.0,
+                         min_scale=0.05, warmup=36)
+
+
+def reference_spikes(events, spikes_detector):
+    """Те же правила по шагам: каждый пустой бакет - отдельный ноль в EWMA."""
+    step, alpha = spikes_detector.step, spikes_detector.alpha
+    by_model = {}
+    for event in events:
+        if event.kind in ('Included', 'On-Demand'):
+            bucket = int((event.date - datetime(1970, 1, 1)).total_seconds()) // step
+            costs = by_model.setdefault(event.model, {})
+            costs[bucket] = costs.get(bucket, 0.0) + event.cost
+    spikes = []
+    for model, costs in by_model.items():
+        mean = var = 0.0
+        active = []
+        for bucket in range(min(costs), max(costs) + 1):
+            value = costs.get(bucket, 0.0)
+            if bucket in costs and value >= spikes_detector.min_cost and len(active) >= spikes_detector.warmup:
+                window = np.array(active[-spikes_detector.window:])
+                median = np.median(window)
+                scale = max(MAD_SCALE * np.median(np.abs(window - median)), np.sqrt(var), spikes_detector.min_scale)
+                if (value - median) / scale >= spikes_detector.threshold:
+                    spikes.append((bucket * step, model, round(median, 4)))
+            if not active:
+                mean = value
+            else:
+                diff = value - mean
+                mean += alpha * diff
+                var = (1 - alpha) * (var + diff * alpha * diff)
+            if bucket in costs:
+                active.append(value)
+    return sorted(spikes)
+
+
+class SpikeDetectorTest(unittest.TestCase):
+
+    def test_flags_expensive_bucket(self):
+        spikes_detector = detector()
+        spikes = spikes_detector.feed(EventColumns.from_events(make_events())) + spikes_detector.flush()
+        self.assertEqual(len(spikes), 1)
+        spike = spikes[0]
+        self.assertEqual((spike['model'], spike['bucket']), ('gpt-5', '2025-06-03T15:20'))
+        self.assertGreaterEqual(spike['score'], 6.0)
+        self.assertGreater(spike['cost'], 6.0)
+
+    def test_steady_spend_and_rate_limited_rows_are_quiet(self):
+        spikes_detector = detector()
+        columns = EventColumns.from_events(make_events(spike=False))
+        self.assertEqual(spikes_detector.feed(columns) + spikes_detector.flush(), [])
+
+    def test_chunked_feed_matches_single_pass(self):
+        events = make_events()
+        whole = detector()
+        expected = whole.feed(EventColumns.from_events(events)) + whole.flush()
+
+        chunked = detector()
+        spikes = []
+        for part in np.array_split(np.arange(len(events)), 7):
+            spikes += chunked.feed(EventColumns.from_events([events[i] for i in part]))
+        spikes += chunked.flush()
+        self.assertEqual(spikes, expected)
+
+    def test_until_excludes_later_events(self):
+        spikes_detector = detector()
+        columns = EventColumns.from_events(make_events())
+        self.assertEqual(spikes_detector.feed(columns, until=SPIKE_AT) + spikes_detector.flush(), [])
+
+
+    def test_is_behind_closed_buckets(self):
+        spikes_detector = detector()
+        self.assertFalse(spikes_detector.is_behind(START))
+        spikes_detector.feed(EventColumns.from_events(make_events()), until=SPIKE_AT)
+        self.assertTrue(spikes_detector.is_behind(SPIKE_AT - timedelta(minutes=20)))
+        # Последний бакет (15:10) еще открыт
+        self.assertFalse(spikes_detector.is_behind(SPIKE_AT - timedelta(minutes=5)))
+
+    def test_sparse_model_is_compared_with_its_active_buckets(self):
+        spikes_detector = detector()
+        quiet = spikes_detector.feed(EventColumns.from_events(make_sparse_events(spike=False)))
+        self.assertEqual(quiet + spikes_detector.flush(), [])
+
+        spikes_detector = detector()
+        spikes = spikes_detector.feed(EventColumns.from_events(make_sparse_events())) + spikes_detector.flush()
+        self.assertEqual([spike['cost'] for spike in spikes], [12.0])
+        self.assertGreater(spikes[0]['median'], 1.0)
+
+    def test_matches_step_by_step_reference(self):
+        for events in (make_events(), make_sparse_events()):
+            spikes_detector = SpikeDetector(bucket_minutes=10, window=50, alpha=0.05, threshold=4.0,
+                                            min_cost=0.2, min_scale=0.05, warmup=10)
+            spikes = spikes_detector.feed(EventColumns.from_events(events)) + spikes_detector.flush()
+            expected = reference_spikes(events, spikes_detector)
+            self.assertGreater(len(expected), 0)
+            self.assertEqual([(spike['ts'], spike['model'], spike['median']) for spike in spikes], expected)
+
+
+class DecayScanTest(unittest.TestCase):
+
+    def test_matches_loop_across_long_gaps(self):
+        rng = np.random.default_rng(3)
+        steps = rng.integers(1, 40, 500)
+        steps[[100, 300]] = [50_000, 10 ** 9]  # пропуски длиннее блока и до полного затухания
+        values = rng.exponential(1.0, 500)
+        expected, y = [], 2.5
+        for step, value in zip(steps.tolist(), values.tolist()):
+            y = 0.95 ** step * y + value
+            expected.append(y)
+        np.testing.assert_allclose(decay_scan(steps, values, 2.5, 0.95), expected, rtol=1e-9)
+
+
+class SpikeNotifierTest(unittest.TestCase):
+
+    def test_appends_json_lines(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'spikes.jsonl')
+            notifier = SpikeNotifier(jsonl_path=path)
+            notifier.emit([])
+            self.assertFalse(os.path.exists(path))
+            notifier.emit([{'model': 'gpt-5', 'cost': 6.1}])
+            notifier.emit([{'model': 'auto', 'cost': 2.0}])
+            with open(path, encoding='utf-8') as f:
+                records = [json.loads(line) for line in f]
+        self.assertEqual([record['model'] for record in records], ['gpt-5', 'auto'])
+        self.assertIn('detected_at', records[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+"""Тесты режима --stats-only: только статистика, без библиотек графиков."""
+
+import contextlib
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import mock
+from tests.helpers import make_rows, write_usage_csv, billed_cost
+
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Модули, которые не должны загружаться без графиков
+PLOTTING_MODULES = ('matplotlib', 'seaborn', 'tqdm', 'visualizers', 'reports', 'render_service')
+
+# Модули других режимов (--store, --sample, --watch, графики таймлайнов, дашборд)
+MODE_MODULES = ('sqlite3', 'hashlib', 'statistics', 'analyzers.sampling', 'analyzers.timeline',
+                'analyzers.timeline_pyramid', 'dashboard')
+
+# Сколько может занимать импорт main сверх numpy (numpy нужен самому анализу)
+IMPORT_BUDGET = 0.05
+
+
+def run_python(args, cwd, bytecode=False):
+    """Запускает интерпретатор с корнем проекта в sys.path (bytecode - с кэшем .pyc, как у пользователя)."""
+    env = dict(os.environ, PYTHONPATH=PROJECT_ROOT, PYTHONIOENCODING='utf-8')
+    if bytecode:
+        env.pop('PYTHONDONTWRITEBYTECODE', None)
+    return subprocess.run([sys.executable] + args, cwd=cwd, env=env, capture_output=True,
+                          text=True, encoding='utf-8', timeout=120)
+
+
+class StatsOnlyTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.rows = make_rows(50)
+        write_usage_csv(self.tmp.name, self.rows)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_importing_main_skips_plotting_modules(self):
+        code = ("import sys, main; "
+                f"print(','.join(m for m in {PLOTTING_MODULES!r} if m in sys.modules))")
+        result = run_python(['-c', code], self.tmp.name)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.strip(), '')
+
+    def test_importing_main_defers_other_modes(self):
+        code = ("import sys, main; "
+                f"print(','.join(m for m in {MODE_MODULES!r} if m in sys.modules))")
+        result = run_python(['-c', code], self.tmp.name)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.strip(), '')
+
+    def test_analyzers_exports_resolve_lazily(self):
+        code = ("import sys, analyzers; loaded = 'analyzers.sampling' in sys.modules; "
+                "from analyzers import BlockSample; "
+                "print(loaded, BlockSample.__module__, all(hasattr(analyzers, name) for name in analyzers._LAZY))")
+        result = run_python(['-c', code], self.tmp.name)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.strip(), 'False analyzers.sampling True')
+
+    def test_import_time_beyond_numpy(self):
+        code = ("import time, numpy; start = time.perf_counter(); import main; "
+                "print(time.perf_counter() - start)")
+        # Первый запуск пишет кэш .pyc, из нескольких замеров берется лучший
+        timings = []
+        for _ in range(4):
+            result = run_python(['-c', code], self.tmp.name, bytecode=True)
+            self.assertEqual(result.returncode, 0, result.stderr)
+            timings.append(float(result.stdout))
+        self.assertLess(min(timings[1:]), IMPORT_BUDGET)
+
+    def test_stats_only_prints_totals_without_charts(self):
+        result = run_python([os.path.join(PROJECT_ROOT, 'main.py'), '--stats-only'], self.tmp.name)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertIn(f"Общая стоимость: ${billed_cost(self.rows):.2f}", result.stdout)
+        self.assertFalse(os.path.exists(os.path.join(self.tmp.name, 'graphics')))
+
+    def test_failed_run_exits_non_zero(self):
+        # Сбой прогноза расходов внутри run(), после успешной загрузки CSV
+        code = ("import sys, main; sys.argv = ['main.py', '--stats-only']; "
+                "main.BurnRateProjector.project = lambda *args, **kwargs: 1 / 0; main.main()")
+        result = run_python(['-c', code], self.tmp.name)
+        self.assertEqual(result.returncode, 1)
+        self.assertIn('ZeroDivisionError', result.stderr)
+        self.assertNotIn('Непредвиденная ошибка', result.stdout)
+
+
+class InteractiveRunTest(unittest.TestCase):
+
+    def test_interactive_run_reports_error_without_exit(self):
+        import main
+        analyzer = main.CursorUsageAnalyzer.__new__(main.CursorUsageAnalyzer)
+        output, errors = io.StringIO(), io.StringIO()
+        with mock.patch.object(main.CursorUsageAnalyzer, 'analyze', side_effect=RuntimeError('сбой')), \
+                contextlib.redirect_stdout(output), contextlib.redirect_stderr(errors):
+            analyzer.run(interactive=True)
+        self.assertIn('Непредвиденная ошибка: сбой', output.getvalue())
+        self.assertIn('RuntimeError', errors.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+"""Тесты генератора синтетического экспорта и векторного расчета стоимости."""
+
+import argparse
+import filecmp
+import os
+import tempfile
+import unittest
+from datetime import datetime, timezone
+import numpy as np
+from config import MODEL_PRICING
+from analyzers import CostCalculator
+from analyzers.event_table import EventTable
+from benchmarks.suite import compare_with_baseline
+from benchmarks.synthetic_export import SyntheticExportGenerator, parse_rows
+
+
+END = datetime(2025, 6, 30, 18, tzinfo=timezone.utc)
+
+
+class SyntheticExportTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def generate(self, name, seed=7, rows=3000):
+        generator = SyntheticExportGenerator(seed=seed, days=30, end=END)
+        return generator.write(os.path.join(self.tmp.name, name), rows, chunk_size=1000)
+
+    def test_same_seed_gives_same_file(self):
+        first = self.generate('a.csv')
+        self.assertTrue(filecmp.cmp(first, self.generate('b.csv'), shallow=False))
+        self.assertFalse(filecmp.cmp(first, self.generate('c.csv', seed=8), shallow=False))
+
+    def test_rows_parse_and_costs_follow_pricing(self):
+        table = EventTable.from_csv(self.generate('a.csv'), show_progress=False)
+        self.assertEqual(len(table), 3000)
+        self.assertLessEqual(table.events[-1].date, datetime(2025, 7, 1, 1))
+        for event in table.events[::37]:
+            if event.kind == 'Rate Limited':
+                continue
+            input_no_cache = event.input_tokens - event.cache_write
+            expected = CostCalculator.calculate_cost(event.model, input_no_cache, event.output_tokens,
+                                                     event.cache_read, event.cache_write)
+            self.assertAlmostEqual(event.cost, expected, places=5)
+
+    def test_parse_rows(self):
+        self.assertEqual(parse_rows('1M'), 1_000_000)
+        self.assertEqual(parse_rows('2500'), 2500)
+        for value in ('0', 'lots'):
+            with self.assertRaises(argparse.ArgumentTypeError):
+                parse_rows(value)
+
+
+class VectorizedCostTest(unittest.TestCase):
+
+    def test_calculate_costs_matches_scalar_rules(self):
+        rng = np.random.default_rng(2)
+        n = 200
+        tokens = [rng.integers(0, 300_000, n) for _ in range(4)]
+        for model in list(MODEL_PRICING) + ['unknown-model']:
+            costs = CostCalculator.calculate_costs(model, *tokens)
+            for i in range(0, n, 9):
+                expected = CostCalculator.calculate_cost(model, *(int(values[i]) for values in tokens))
+                self.assertAlmostEqual(costs[i], expected, msg=model)
+
+
+class BaselineComparisonTest(unittest.TestCase):
+
+    def test_regressions_above_threshold(self):
+        baseline = {'results': {'ingest': {'best': 1.0}, 'analyze': {'best': 2.0}}}
+        results = {'ingest': {'best': 1.1}, 'analyze': {'best': 2.6}, 'charts': {'best': 0.5}}
+        lines, regressions = compare_with_baseline(results, baseline, threshold=0.2)
+        self.assertEqual(regressions, ['analyze'])
+        self.assertEqual(len(lines), 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+"""Тесты куба агрегатов TimelineCube."""
+
+import pickle
+import unittest
+from datetime import datetime, timedelta
+import numpy as np
+from analyzers.event_table import UsageEvent
+from analyzers.timeline import TimelineCube
+from analyzers.usage_query import EventColumns
+
+
+NOW = datetime(2025, 6, 4, 12, 5)
+
+WINDOWS = {
+    'day': {'step': 3600, 'buckets': 24},
+    'all': {'step': None, 'buckets': 4},
+}
+
+
+def make_timestamps():
+    """События двух моделей: каждые 25 минут последние двое суток."""
+    items = []
+    for i in range(2 * 24 * 60 // 25):
+        moment = NOW - timedelta(minutes=25 * i)
+        items.append((moment, 'gpt-5' if i % 3 else 'claude-4.5-sonnet', 0.01 * (i % 7 + 1)))
+    return sorted(items)
+
+
+class TimelineCubeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.items = make_timestamps()
+        self.cube = TimelineCube(self.items, now=NOW, windows=WINDOWS)
+
+    def test_fixed_step_window_matches_manual_sums(self):
+        window = self.cube.window('day')
+        self.assertEqual(len(window['starts']), 24)
+        last_start = datetime(2025, 6, 4, 12)
+        self.assertEqual(int(window['starts'][-1]), int((last_start - datetime(1970, 1, 1)).total_seconds()))
+
+        first = last_start - timedelta(hours=23)
+        for j, model in enumerate(window['models']):
+            for bucket in (0, 11, 23):
+                start = first + timedelta(hours=bucket)
+                selected = [cost for moment, name, cost in self.items
+                            if name == model and start <= moment < start + timedelta(hours=1)]
+                self.assertAlmostEqual(window['values']['cost'][bucket, j], sum(selected))
+                self.assertEqual(window['values']['requests'][bucket, j], len(selected))
+
+    def test_events_outside_window_are_ignored(self):
+        window = self.cube.window('day')
+        first = datetime(2025, 6, 3, 13)
+        inside = [item for item in self.items if first <= item[0] < datetime(2025, 6, 4, 13)]
+        self.assertEqual(window['values']['requests'].sum(), len(inside))
+
+    def test_cumulative_is_running_sum(self):
+        window = self.cube.window('day')
+        for metric in TimelineCube.METRICS:
+            np.testing.assert_allclose(window['cumulative'][metric], np.cumsum(window['values'][metric], axis=0))
+
+    def test_whole_period_window_splits_requests_evenly(self):
+        window = self.cube.window('all')
+        requests = window['values']['requests'].sum(axis=1)
+        self.assertEqual(requests.sum(), len(self.items))
+        self.assertLessEqual(requests.max() - requests[:-1].min(), 1)
+        self.assertAlmostEqual(window['values']['cost'].sum(), sum(item[2] for item in self.items))
+
+    def test_windows_are_cached(self):
+        self.assertIs(self.cube.window('day'), self.cube.window('day'))
+
+    def test_from_columns_matches_timestamp_list(self):
+        events = [UsageEvent(moment, model, 'Included', 0, 0, 0, 0, cost) for moment, model, cost in self.items]
+        # Запросы Rate Limited и события вне периода в куб не попадают
+        events += [UsageEvent(NOW - timedelta(hours=3, seconds=i), 'auto', 'Rate Limited', 0, 0, 0, 0, 0.0)
+                   for i in range(5)]
+        columns = EventColumns.from_events(sorted(events))
+        since = datetime(2025, 6, 3, 9, 30)
+        cube = TimelineCube.from_columns(columns, since=since, now=NOW, windows=WINDOWS)
+        expected = TimelineCube([item for item in self.items if item[0] >= since], now=NOW, windows=WINDOWS)
+        self.assertEqual(cube.model_names, expected.model_names)
+        for name in WINDOWS:
+            for metric in TimelineCube.METRICS:
+                np.testing.assert_allclose(cube.window(name)['values'][metric],
+                                           expected.window(name)['values'][metric])
+
+    def test_pickle_drops_built_windows(self):
+        self.cube.window('day')
+        copy = pickle.loads(pickle.dumps(self.cube))
+        self.assertEqual(copy._cache, {})
+        np.testing.assert_allclose(copy.window('day')['values']['cost'], self.cube.window('day')['values']['cost'])
+
+
+if __name__ == '__main__':
+    unittest.main()
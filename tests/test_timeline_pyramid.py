@@ -0,0 +1,105 @@
+"""Тесты многоуровневой пирамиды TimelinePyramid."""
+
+import unittest
+import numpy as np
+from analyzers.timeline_pyramid import TimelinePyramid
+
+
+DAY = 86400
+
+
+class TimelinePyramidTest(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(9)
+        start = 20240 * DAY  # 2025-06-01
+        self.ts = np.sort(start + rng.integers(0, 60 * DAY, 20000)).astype(np.int64)
+        self.codes = rng.integers(0, 3, len(self.ts))
+        self.costs = rng.random(len(self.ts))
+        self.pyramid = TimelinePyramid(self.ts, self.codes, self.costs, ['a', 'b', 'c'])
+
+    def exact(self, since, until):
+        """Точные суммы стоимости и запросов по моделям за [since, until)."""
+        mask = (self.ts >= since) & (self.ts < until)
+        cost = np.bincount(self.codes[mask], weights=self.costs[mask], minlength=3)
+        requests = np.bincount(self.codes[mask], minlength=3)
+        return cost, requests
+
+    def test_whole_range_totals(self):
+        result = self.pyramid.query(points=50)
+        self.assertAlmostEqual(result['cost'].sum(), self.costs.sum())
+        self.assertEqual(result['requests'].sum(), len(self.ts))
+        self.assertEqual(result['cost'].shape, (50, 3))
+
+    def test_aligned_query_matches_exact_sums(self):
+        since = int(self.ts[0]) // DAY * DAY + 3 * DAY
+        until = since + 20 * DAY
+        result = self.pyramid.query(since, until, points=20)
+        self.assertEqual(result['level'], '1d')
+        cost, requests = self.exact(since, until)
+        np.testing.assert_allclose(result['cost'].sum(axis=0), cost)
+        np.testing.assert_array_equal(result['requests'].sum(axis=0), requests)
+        for i, start in enumerate(result['starts'][:3]):
+            cost, requests = self.exact(start, start + DAY)
+            np.testing.assert_allclose(result['cost'][i], cost)
+
+    def test_picks_finer_level_for_short_ranges(self):
+        since = int(self.ts[100]) // 3600 * 3600
+        result = self.pyramid.query(since, since + 6 * 3600, points=36)
+        self.assertEqual(result['level'], '10min')
+        cost, _ = self.exact(since, since + 6 * 3600)
+        np.testing.assert_allclose(result['cost'].sum(axis=0), cost)
+
+    def test_bucket_values_match_exact(self):
+        first_start = int(self.ts[0]) // 3600 * 3600
+        values = self.pyramid.bucket_values(3600, first_start, 48)
+        for i in (0, 17, 47):
+            cost, requests = self.exact(first_start + i * 3600, first_start + (i + 1) * 3600)
+            np.testing.assert_allclose(values['cost'][i], cost)
+            np.testing.assert_array_equal(values['requests'][i], requests)
+
+    def test_weeks_start_on_monday(self):
+        result = self.pyramid.query(points=3)
+        self.assertEqual(result['level'], '1w')
+        # 1970-01-05 - понедельник
+        self.assertTrue(np.all((result['starts'] - 4 * DAY) % (7 * DAY) == 0))
+
+    def test_empty_pyramid(self):
+        empty = TimelinePyramid([], [], [], [])
+        self.assertIsNone(empty.query())
+
+    def test_empty_range_has_no_points(self):
+        since = int(self.ts[100])
+        for until in (since, since - 3600):
+            result = self.pyramid.query(since, until)
+            self.assertEqual(result['cost'].shape, (0, 3))
+            self.assertEqual(len(result['starts']), 0)
+
+    def test_explicit_level_gives_one_point_per_bucket(self):
+        since = int(self.ts[0]) // 3600 * 3600
+        result = self.pyramid.query(since, since + 12 * 3600, points=100, res='1h')
+        self.assertEqual(result['level'], '1h')
+        self.assertEqual(result['starts'].tolist(), [since + i * 3600 for i in range(12)])
+        cost, _ = self.exact(since + 5 * 3600, since + 6 * 3600)
+        np.testing.assert_allclose(result['cost'][5], cost)
+        with self.assertRaises(ValueError):
+            self.pyramid.query(since, since + 12 * 3600, points=5, res='1h')
+        with self.assertRaises(ValueError):
+            self.pyramid.query(res='2h')
+
+    def test_unaligned_query_trims_edge_buckets(self):
+        since = int(self.ts[0]) // DAY * DAY + 3 * DAY + 5437
+        until = since + 9 * DAY + 12345
+        for points, res in ((10, None), (300, None), (20, '1d')):
+            result = self.pyramid.query(since, until, points=points, res=res)
+            self.assertEqual((result['since'], result['until']), (since, until))
+            cost, requests = self.exact(since, until)
+            np.testing.assert_allclose(result['cost'].sum(axis=0), cost)
+            np.testing.assert_array_equal(result['requests'].sum(axis=0), requests)
+            # Первая точка - от since до конца ее группы бакетов
+            cost, _ = self.exact(since, int(result['starts'][1]))
+            np.testing.assert_allclose(result['cost'][0], cost, atol=1e-9)
+
+
+if __name__ == '__main__':
+    unittest.main()
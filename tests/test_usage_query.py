@@ -0,0 +1,114 @@
+"""Тесты запросов UsageQuery: фильтры, группировки и агрегаты."""
+
+import math
+import unittest
+from datetime import datetime, timedelta
+import numpy as np
+from analyzers import EventTable, UsageQuery
+from analyzers.event_table import UsageEvent
+
+
+START = datetime(2025, 6, 2, 10)  # понедельник
+
+
+def make_events():
+    """12 событий двух моделей: каждые 20 минут, с 10:00 до 13:40."""
+    events = []
+    for i in range(12):
+        model = 'gpt-5' if i % 3 else 'claude-4.5-sonnet'
+        kind = 'Rate Limited' if i == 11 else ('On-Demand' if i % 2 else 'Included')
+        events.append(UsageEvent(START + timedelta(minutes=20 * i), model, kind,
+                                 100 * (i + 1), 10 * i, 1000 * (i % 4), 0, round(0.05 * (i + 1), 2)))
+    return events
+
+
+class UsageQueryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.events = make_events()
+        self.query = UsageQuery(EventTable(self.events))
+
+    def costs(self, predicate=lambda event: True):
+        return np.array([event.cost for event in self.events if predicate(event)])
+
+    def test_totals_without_grouping(self):
+        result = self.query.agg(cost='sum', requests='count', input_tokens='sum')
+        self.assertAlmostEqual(result['cost'], self.costs().sum())
+        self.assertEqual(result['requests'], 12)
+        self.assertEqual(result['input_tokens'], sum(event.input_tokens for event in self.events))
+        self.assertIsInstance(result['input_tokens'], int)
+
+    def test_where_filters(self):
+        since, until = START + timedelta(hours=1), START + timedelta(hours=3)
+        result = self.query.where(model='gpt-5', since=since, until=until).agg(requests='count', cost='sum')
+        expected = self.costs(lambda e: e.model == 'gpt-5' and since <= e.date < until)
+        self.assertEqual(result['requests'], len(expected))
+        self.assertAlmostEqual(result['cost'], expected.sum())
+
+    def test_where_refines_previous_filters(self):
+        query = self.query.where(kind=['Included', 'On-Demand']).where(kind='Included')
+        self.assertEqual(query.agg(requests='count')['requests'],
+                         sum(event.kind == 'Included' for event in self.events))
+
+    def test_group_by_model(self):
+        rows = self.query.group_by('model').agg(requests='count', cost='sum')
+        self.assertEqual([row['model'] for row in rows], ['claude-4.5-sonnet', 'gpt-5'])
+        for row in rows:
+            expected = self.costs(lambda e: e.model == row['model'])
+            self.assertEqual(row['requests'], len(expected))
+            self.assertAlmostEqual(row['cost'], expected.sum())
+
+    def test_group_by_time_bucket(self):
+        rows = self.query.group_by('1h').agg(requests='count')
+        self.assertEqual([row['1h'] for row in rows], [START + timedelta(hours=h) for h in range(4)])
+        self.assertEqual([row['requests'] for row in rows], [3, 3, 3, 3])
+
+    def test_group_by_hour_and_weekday(self):
+        rows = self.query.group_by('weekday', 'hour').agg(requests='count')
+        self.assertEqual([(row['weekday'], row['hour']) for row in rows], [(0, 10), (0, 11), (0, 12), (0, 13)])
+
+    def test_min_max_float_column(self):
+        result = self.query.agg(low=('cost', 'min'), high=('cost', 'max'))
+        self.assertAlmostEqual(result['low'], self.costs().min())
+        self.assertAlmostEqual(result['high'], self.costs().max())
+
+    def test_min_max_integer_column_stays_integer(self):
+        rows = self.query.group_by('model').agg(low=('input_tokens', 'min'), high=('input_tokens', 'max'))
+        for row in rows:
+            tokens = [event.input_tokens for event in self.events if event.model == row['model']]
+            self.assertEqual((row['low'], row['high']), (min(tokens), max(tokens)))
+            self.assertIsInstance(row['low'], int)
+
+    def test_mean_median_and_percentiles(self):
+        result = self.query.agg(mean=('cost', 'mean'), median=('cost', 'median'), p95=('cost', 'p95'))
+        self.assertAlmostEqual(result['mean'], self.costs().mean())
+        self.assertAlmostEqual(result['median'], np.median(self.costs()))
+        self.assertAlmostEqual(result['p95'], np.percentile(self.costs(), 95))
+
+    def test_percentiles_per_group(self):
+        rows = self.query.group_by('model').agg(p90=('cost', 'p90'))
+        for row in rows:
+            self.assertAlmostEqual(row['p90'], np.percentile(self.costs(lambda e: e.model == row['model']), 90))
+
+    def test_empty_selection(self):
+        query = self.query.where(since=START + timedelta(days=1))
+        result = query.agg(requests='count', cost='sum', low=('cost', 'min'), high=('input_tokens', 'max'),
+                           median=('cost', 'median'))
+        self.assertEqual(result['requests'], 0)
+        self.assertEqual(result['cost'], 0)
+        self.assertTrue(math.isnan(result['low']))
+        self.assertTrue(math.isnan(result['high']))
+        self.assertTrue(math.isnan(result['median']))
+        self.assertEqual(query.group_by('model').agg(low=('cost', 'min'), p95=('cost', 'p95')), [])
+
+    def test_unknown_aggregation_and_key(self):
+        with self.assertRaises(ValueError):
+            self.query.agg(cost='variance')
+        with self.assertRaises(ValueError):
+            self.query.agg(x=('price', 'sum'))
+        with self.assertRaises(ValueError):
+            self.query.group_by('month')
+
+
+if __name__ == '__main__':
+    unittest.main()
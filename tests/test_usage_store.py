@@ -0,0 +1,109 @@
+"""Тесты SQLite хранилища событий UsageStore."""
+
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from analyzers.event_table import EventTable
+from analyzers.usage_store import UsageStore
+from tests.helpers import make_rows, write_usage_csv
+
+
+END = datetime(2025, 6, 10, 12, 17, 23)
+
+
+class UsageStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.rows = make_rows(1500, end=END, step_minutes=13, seed=5)
+        self.csv_file = write_usage_csv(self.tmp.name, self.rows)
+        self.table = EventTable.from_csv(self.csv_file, show_progress=False)
+        self.store = UsageStore(os.path.join(self.tmp.name, 'usage.sqlite3'), batch_size=100)
+        self.store.import_csv(self.csv_file, show_progress=False)
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp.cleanup()
+
+    def expected(self, since, until, model=None, kind=None):
+        """Суммы по событиям таблицы за [since, until)."""
+        selected = [event for event in self.table.between(since, until)
+                    if (model is None or event.model == model) and (kind is None or event.kind == kind)]
+        return {
+            'requests': len(selected),
+            'cost': sum(event.cost for event in selected),
+            'input_tokens': sum(event.input_tokens for event in selected),
+            'cache_read': sum(event.cache_read for event in selected),
+        }
+
+    def assert_totals(self, since, until, model=None, kind=None):
+        totals = self.store.totals(since, until, model=model, kind=kind)
+        expected = self.expected(since, until, model, kind)
+        self.assertEqual(totals['requests'], expected['requests'])
+        self.assertAlmostEqual(totals['cost'], expected['cost'])
+        self.assertEqual(totals['input_tokens'], expected['input_tokens'])
+        self.assertEqual(totals['cache_read'], expected['cache_read'])
+
+    def test_load_events_matches_csv(self):
+        self.assertEqual(self.store.load_events().events, self.table.events)
+        since, until = self.table.dates[100], self.table.dates[700]
+        self.assertEqual(self.store.load_events(since, until).events, self.table.between(since, until))
+
+    def test_time_range(self):
+        self.assertEqual(self.store.time_range(), (self.table.dates[0], self.table.dates[-1]))
+
+    def test_totals_over_unaligned_ranges(self):
+        first = self.table.dates[0]
+        # Внутри часа, через границы часов, через несколько дней
+        for start, length in ((timedelta(minutes=7), timedelta(minutes=31)),
+                              (timedelta(hours=3, minutes=11), timedelta(hours=5, minutes=2)),
+                              (timedelta(hours=9, minutes=40), timedelta(days=6, hours=7, minutes=3))):
+            self.assert_totals(first + start, first + start + length)
+
+    def test_totals_with_filters_and_defaults(self):
+        since, until = self.table.dates[0] + timedelta(hours=5), self.table.dates[-1]
+        self.assert_totals(since, until, model='gpt-5')
+        self.assert_totals(since, until, kind='On-Demand')
+        totals = self.store.totals()
+        self.assertEqual(totals['requests'], len(self.table))
+        self.assertAlmostEqual(totals['cost'], sum(event.cost for event in self.table))
+
+    def test_unchanged_file_is_not_reimported(self):
+        self.assertEqual(self.store.import_csv(self.csv_file, show_progress=False), 0)
+        self.assertEqual(self.store.totals()['requests'], len(self.table))
+
+    def test_changed_file_replaces_its_events(self):
+        rows = make_rows(200, end=END + timedelta(days=3), step_minutes=13, seed=6) + self.rows
+        write_usage_csv(self.tmp.name, rows)
+        stat = os.stat(self.csv_file)
+        os.utime(self.csv_file, (stat.st_atime, stat.st_mtime + 10))
+        self.store.import_csv(self.csv_file, show_progress=False)
+        self.table = EventTable.from_csv(self.csv_file, show_progress=False)
+        self.assertEqual(self.store.totals()['requests'], len(rows))
+        self.assert_totals(self.table.dates[0], END + timedelta(days=4))
+
+    def test_empty_store(self):
+        with UsageStore(os.path.join(self.tmp.name, 'empty.sqlite3')) as store:
+            self.assertEqual(store.time_range(), (None, None))
+            self.assertEqual(store.totals()['requests'], 0)
+
+    def test_overlapping_exports_are_stored_once(self):
+        # Следующий экспорт - 300 новых строк поверх прежнего снимка
+        newer = make_rows(300, end=END + timedelta(days=5), step_minutes=13, seed=7) + self.rows
+        newer_file = write_usage_csv(self.tmp.name, newer, name='team-usage-events-newer.csv')
+        self.assertEqual(self.store.import_csv(newer_file, show_progress=False), 300)
+        self.table = EventTable.from_csv(newer_file, show_progress=False)
+        self.assertEqual(self.store.totals()['requests'], len(newer))
+        self.assert_totals(self.table.dates[0], END + timedelta(days=6))
+
+    def test_identical_rows_of_one_file_are_kept(self):
+        rows = self.rows[:10] + self.rows[:10]
+        path = write_usage_csv(self.tmp.name, rows, name='team-usage-events-twice.csv')
+        with UsageStore(os.path.join(self.tmp.name, 'twice.sqlite3')) as store:
+            self.assertEqual(store.import_csv(path, show_progress=False), 20)
+            self.assertEqual(store.totals()['requests'], 20)
+
+
+if __name__ == '__main__':
+    unittest.main()
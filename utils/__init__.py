@@ -1,6 +1,9 @@
 """Утилиты для работы с файлами и данными."""
 
 from .file_utils import find_csv_file, setup_output_encoding, clear_directory
+from .profiler import StageProfiler, PROFILER, profile_stage
+from .export_watcher import ExportWatcher
 
-__all__ = ['find_csv_file', 'setup_output_encoding', 'clear_directory']
+__all__ = ['find_csv_file', 'setup_output_encoding', 'clear_directory',
+           'StageProfiler', 'PROFILER', 'profile_stage', 'ExportWatcher']
 
@@ -0,0 +1,92 @@
+"""Наблюдение за папкой экспортов: опрос и подавление дребезга."""
+
+import os
+import time
+import fnmatch
+
+
+class ExportWatcher:
+    """
+    Сообщает о новых и измененных файлах экспорта в папке.
+
+    Папка опрашивается раз в poll_interval секунд (os.scandir, без
+    зависимостей и одинаково на всех ОС). Изменения отдаются только после
+    того, как файлы не менялись debounce секунд: недокопированный экспорт
+    не читается, а несколько файлов подряд дают одно обновление.
+    Хранятся только размеры и времена изменения текущих файлов папки.
+    """
+
+    def __init__(self, directory, pattern='*.csv', poll_interval=2.0, debounce=5.0):
+        """
+        Инициализирует наблюдателя.
+
+        Args:
+            directory: Папка с экспортами
+            pattern: Маска имен файлов
+            poll_interval: Интервал опроса, секунд
+            debounce: Сколько секунд файлы должны не меняться перед выдачей
+        """
+        self.directory = directory
+        self.pattern = pattern
+        self.poll_interval = poll_interval
+        self.debounce = debounce
+        self._known = {}
+
+    def scan(self):
+        """
+        Текущие файлы экспорта.
+
+        Returns:
+            dict: {путь: (размер, время изменения в нс)}
+        """
+        files = {}
+        try:
+            entries = list(os.scandir(self.directory))
+        except FileNotFoundError:
+            return files
+        for entry in entries:
+            if not fnmatch.fnmatch(entry.name, self.pattern):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            if entry.is_file():
+                files[entry.path] = (stat.st_size, stat.st_mtime_ns)
+        return files
+
+    def existing(self):
+        """
+        Запоминает текущие файлы как уже обработанные.
+
+        Returns:
+            list: Пути к файлам от старых к новым (по времени изменения)
+        """
+        self._known = self.scan()
+        return self._sorted(self._known)
+
+    def wait_for_changes(self):
+        """
+        Ждет новых или измененных файлов и возвращает их, когда они перестанут меняться.
+
+        Returns:
+            list: Пути к файлам от старых к новым (по времени изменения)
+        """
+        pending, changed_at = {}, None
+        while True:
+            current = self.scan()
+            # Удаленные файлы забываются, чтобы состояние не росло
+            self._known = {path: state for path, state in self._known.items() if path in current}
+            changed = {path: state for path, state in current.items() if self._known.get(path) != state}
+
+            if changed != pending:
+                pending, changed_at = changed, time.monotonic()
+            elif pending and time.monotonic() - changed_at >= self.debounce:
+                self._known.update(pending)
+                return self._sorted(pending)
+            time.sleep(self.poll_interval)
+
+    @staticmethod
+    def _sorted(files):
+        """Пути, отсортированные по времени изменения."""
+        return sorted(files, key=lambda path: (files[path][1], path))
@@ -0,0 +1,152 @@
+"""Профилирование этапов: время, CPU и память."""
+
+import sys
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+_DISABLED = nullcontext()
+
+
+class StageProfiler:
+    """
+    Замеры по этапам (поиск файла, разбор CSV, агрегаты, графики, запись).
+
+    Выключенный профилировщик возвращает общий пустой контекст, поэтому
+    разметка этапов в коде почти ничего не стоит. Одноименные этапы
+    (например, запись каждого файла) суммируются.
+    """
+
+    def __init__(self):
+        """Инициализирует выключенный профилировщик."""
+        self.enabled = False
+        self.trace_memory = False
+        self.stages = {}
+        self._stack = []
+        self._cprofile = None
+
+    def start(self, trace_memory=False, cprofile=False):
+        """
+        Включает профилирование.
+
+        Args:
+            trace_memory: Пиковая память Python по этапам через tracemalloc (замедляет работу)
+            cprofile: Параллельно собирать cProfile для write_prof()
+        """
+        self.enabled = True
+        self.trace_memory = trace_memory
+        self.stages = {}
+        if trace_memory:
+            tracemalloc.start()
+        if cprofile:
+            import cProfile
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+
+    def stop(self):
+        """Выключает профилирование (собранные данные сохраняются)."""
+        if self._cprofile is not None:
+            self._cprofile.disable()
+        if self.trace_memory:
+            tracemalloc.stop()
+        self.enabled = False
+
+    def stage(self, name):
+        """Контекст замера этапа name (при выключенном профилировщике - пустой)."""
+        if not self.enabled:
+            return _DISABLED
+        return self._measure(name)
+
+    @contextmanager
+    def _measure(self, name):
+        """Замеряет этап и добавляет результат к одноименным."""
+        frame = {'memory_peak': 0, 'memory_start': 0}
+        if self.trace_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if self._stack:
+                self._stack[-1]['memory_peak'] = max(self._stack[-1]['memory_peak'], peak)
+            tracemalloc.reset_peak()
+            frame['memory_start'] = current
+        self._stack.append(frame)
+
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall_start
+            cpu = time.process_time() - cpu_start
+            self._stack.pop()
+
+            memory = 0
+            if self.trace_memory:
+                _, peak = tracemalloc.get_traced_memory()
+                peak = max(peak, frame['memory_peak'])
+                memory = peak - frame['memory_start']
+                if self._stack:
+                    self._stack[-1]['memory_peak'] = max(self._stack[-1]['memory_peak'], peak)
+                tracemalloc.reset_peak()
+
+            stats = self.stages.setdefault(name, {
+                'calls': 0, 'wall': 0.0, 'cpu': 0.0, 'memory_peak_mb': 0.0, 'rss_peak_mb': 0.0,
+                'depth': len(self._stack),
+            })
+            stats['calls'] += 1
+            stats['wall'] += wall
+            stats['cpu'] += cpu
+            stats['memory_peak_mb'] = max(stats['memory_peak_mb'], memory / 2 ** 20)
+            stats['rss_peak_mb'] = max(stats['rss_peak_mb'], self._rss_peak_mb())
+
+    @staticmethod
+    def _rss_peak_mb():
+        """Пиковый RSS процесса в МБ (0, если недоступно)."""
+        if resource is None:
+            return 0.0
+        # Linux - килобайты, macOS - байты
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 2 ** 10
+
+    def format_table(self, limit=40):
+        """
+        Формирует таблицу этапов, отсортированную по времени.
+
+        Returns:
+            list: Строки таблицы
+        """
+        ranked = sorted(self.stages.items(), key=lambda item: item[1]['wall'], reverse=True)
+        lines = [
+            f"{'Этап':<44} {'Вызовы':>7} {'Время, с':>9} {'CPU, с':>8} {'Python, МБ':>11} {'RSS, МБ':>8}",
+            "-" * 92,
+        ]
+        for name, stats in ranked[:limit]:
+            label = "  " * stats['depth'] + name
+            memory = f"{stats['memory_peak_mb']:.1f}" if self.trace_memory else "-"
+            lines.append(f"{label[:44]:<44} {stats['calls']:>7} {stats['wall']:>9.3f} {stats['cpu']:>8.3f} "
+                         f"{memory:>11} {stats['rss_peak_mb']:>8.0f}")
+        return lines
+
+    def write_json(self, filepath):
+        """Сохраняет замеры этапов в JSON."""
+        with open(filepath, 'w', encoding='utf-8') as f:
+            json.dump({'trace_memory': self.trace_memory, 'stages': self.stages}, f,
+                      ensure_ascii=False, indent=2)
+
+    def write_prof(self, filepath):
+        """Сохраняет данные cProfile (для snakeviz, pstats)."""
+        if self._cprofile is not None:
+            self._cprofile.dump_stats(filepath)
+
+
+PROFILER = StageProfiler()
+
+
+def profile_stage(name):
+    """Контекст замера этапа в общем профилировщике."""
+    return PROFILER.stage(name)
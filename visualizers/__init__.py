@@ -3,6 +3,10 @@
 from .model_charts import ModelChartsVisualizer
 from .activity_charts import ActivityChartsVisualizer
 from .heatmap_charts import HeatmapChartsVisualizer
+from .summary_charts import SummaryPageVisualizer
+from .session_charts import SessionChartsVisualizer
+from .chart_registry import ChartRenderer, CHARTS
 
-__all__ = ['ModelChartsVisualizer', 'ActivityChartsVisualizer', 'HeatmapChartsVisualizer']
+__all__ = ['ModelChartsVisualizer', 'ActivityChartsVisualizer', 'HeatmapChartsVisualizer', 'SummaryPageVisualizer',
+           'SessionChartsVisualizer', 'ChartRenderer', 'CHARTS']
 
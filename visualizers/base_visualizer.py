@@ -2,18 +2,67 @@
 
 import os
 import matplotlib.pyplot as plt
+from matplotlib.backends.backend_pdf import PdfPages
+from utils import profile_stage
+from config import RENDER_PROFILES, RENDER_FORMATS, DEFAULT_RENDER_PROFILE
 
 
 class BaseVisualizer:
     """Базовый класс для всех визуализаторов."""
     
     _figure_counter = 0
+    _render_profile = RENDER_PROFILES[DEFAULT_RENDER_PROFILE]
+    _pdf_pages = None
+    _pdf_path = None
+    _matplotlib_ready = False
     
     @classmethod
     def reset_counter(cls):
         """Сбрасывает счетчик фигур."""
         cls._figure_counter = 0
     
+    @classmethod
+    def set_render_profile(cls, name, fmt=None):
+        """
+        Выбирает профиль сохранения для всех визуализаторов.
+        
+        Args:
+            name: Название профиля из RENDER_PROFILES ('draft', 'screen', 'print')
+            fmt: Формат файлов вместо указанного в профиле
+        """
+        if name not in RENDER_PROFILES:
+            raise ValueError(f"Неизвестный профиль '{name}'. Доступны: {', '.join(RENDER_PROFILES)}")
+        profile = dict(RENDER_PROFILES[name])
+        if fmt is not None:
+            profile['format'] = fmt
+        if profile['format'] not in RENDER_FORMATS:
+            raise ValueError(f"Неподдерживаемый формат '{profile['format']}'. Доступны: {', '.join(RENDER_FORMATS)}")
+        cls._render_profile = profile
+    
+    @classmethod
+    def open_pdf(cls, filepath):
+        """
+        Включает режим одного PDF: все следующие фигуры пишутся страницами в filepath.
+        
+        Args:
+            filepath: Путь к PDF документу
+        """
+        cls.close_pdf()
+        os.makedirs(os.path.dirname(filepath) or '.', exist_ok=True)
+        cls._pdf_pages = PdfPages(filepath)
+        cls._pdf_path = filepath
+    
+    @classmethod
+    def close_pdf(cls):
+        """Завершает PDF документ (если открыт) и возвращает количество страниц."""
+        if cls._pdf_pages is None:
+            return 0
+        pages = cls._pdf_pages.get_pagecount()
+        cls._pdf_pages.close()
+        cls._pdf_pages = None
+        cls._pdf_path = None
+        return pages
+    
     def __init__(self, output_dir='graphics'):
         """
         Инициализирует визуализатор.
@@ -24,27 +73,65 @@ class BaseVisualizer:
         self.output_dir = output_dir
         os.makedirs(output_dir, exist_ok=True)
         
-        # Настройка matplotlib
+        BaseVisualizer._setup_matplotlib()
+    
+    @classmethod
+    def _setup_matplotlib(cls):
+        """Настраивает matplotlib (один раз на процесс)."""
+        if cls._matplotlib_ready:
+            return
         plt.ioff()
         plt.switch_backend('Agg')
         plt.style.use('dark_background')
+        cls._matplotlib_ready = True
     
-    def save_figure(self, filename, dpi=300, use_tight_layout=True):
+    def save_figure(self, filename, dpi=None, use_tight_layout=True):
         """
         Сохраняет текущую фигуру с автоматической нумерацией.
         
+        Формат, сжатие и обрезка полей берутся из текущего профиля
+        (см. set_render_profile), расширение файла заменяется на формат профиля.
+        Если открыт PDF (open_pdf), фигура добавляется в него страницей.
+        
         Args:
             filename: Имя файла без номера (например, 'models_overview.png')
-            dpi: Разрешение изображения
+            dpi: Разрешение изображения, по умолчанию - из профиля
             use_tight_layout: Использовать ли tight_layout
+            
+        Returns:
+            str: Путь к сохраненному файлу
         """
+        profile = BaseVisualizer._render_profile
+        fmt = profile['format']
+        bbox_inches = 'tight' if profile['tight_bbox'] else None
+        
         BaseVisualizer._figure_counter += 1
-        numbered_filename = f"{BaseVisualizer._figure_counter:02d}_{filename}"
-        filepath = os.path.join(self.output_dir, numbered_filename)
+        
         if use_tight_layout:
             plt.tight_layout()
-        plt.savefig(filepath, dpi=dpi, bbox_inches='tight')
+        
+        pdf = BaseVisualizer._pdf_pages
+        if pdf is not None:
+            # Фигура закрывается сразу после записи: в памяти одна страница
+            with profile_stage('Запись файлов'):
+                pdf.savefig(dpi=dpi or profile['dpi'], bbox_inches=bbox_inches)
+            plt.close()
+            return BaseVisualizer._pdf_path
+        
+        numbered_filename = f"{BaseVisualizer._figure_counter:02d}_{os.path.splitext(filename)[0]}.{fmt}"
+        filepath = os.path.join(self.output_dir, numbered_filename)
+        
+        save_kwargs = {}
+        if fmt == 'png':
+            save_kwargs['pil_kwargs'] = {'compress_level': profile['png_compression']}
+        elif fmt == 'webp':
+            save_kwargs['pil_kwargs'] = {'quality': profile['webp_quality']}
+        
+        with profile_stage('Запись файлов'):
+            plt.savefig(filepath, format=fmt, dpi=dpi or profile['dpi'],
+                        bbox_inches=bbox_inches, **save_kwargs)
         plt.close()
+        return filepath
     
     def create_subplot_grid(self, rows, cols, figsize):
         """
@@ -0,0 +1,133 @@
+"""Реестр графиков и исполнитель заданий на рендеринг."""
+
+from utils import profile_stage
+from .base_visualizer import BaseVisualizer
+from .model_charts import ModelChartsVisualizer
+from .activity_charts import ActivityChartsVisualizer
+from .heatmap_charts import HeatmapChartsVisualizer
+from .summary_charts import SummaryPageVisualizer
+from .session_charts import SessionChartsVisualizer
+
+
+# Идентификатор графика -> (группа, класс визуализатора, метод)
+CHARTS = {
+    'summary': ('summary', SummaryPageVisualizer, 'create_summary_pages'),
+    'models_overview': ('models', ModelChartsVisualizer, 'create_models_overview'),
+    'included_vs_ondemand': ('models', ModelChartsVisualizer, 'create_included_vs_ondemand'),
+    'tokens_detailed': ('models', ModelChartsVisualizer, 'create_tokens_detailed'),
+    'cost_per_request': ('models', ModelChartsVisualizer, 'create_cost_per_request'),
+    'cost_distribution_boxplot': ('models', ModelChartsVisualizer, 'create_cost_distribution_boxplot'),
+    'token_composition': ('models', ModelChartsVisualizer, 'create_token_composition'),
+    'cache_efficiency': ('models', ModelChartsVisualizer, 'create_cache_efficiency'),
+    'daily_activity': ('activity', ActivityChartsVisualizer, 'create_daily_activity'),
+    'daily_activity_separate': ('activity', ActivityChartsVisualizer, 'create_daily_activity_separate'),
+    'timelines': ('timeline', ActivityChartsVisualizer, 'create_timeline_charts'),
+    'requests_heatmap': ('heatmaps', HeatmapChartsVisualizer, 'create_combined_requests_heatmap'),
+    'cost_heatmap': ('heatmaps', HeatmapChartsVisualizer, 'create_combined_cost_heatmap'),
+    'cost_per_request_heatmap': ('heatmaps', HeatmapChartsVisualizer, 'create_cost_per_request_heatmap'),
+    'calendar_heatmap': ('heatmaps', HeatmapChartsVisualizer, 'create_calendar_heatmap'),
+    'calendar_day_grid': ('heatmaps', HeatmapChartsVisualizer, 'create_calendar_day_grid'),
+    'session_distributions': ('sessions', SessionChartsVisualizer, 'create_session_distributions'),
+}
+
+CHART_GROUPS = {
+    'summary': '📄 Сводка...',
+    'models': '📈 Графики моделей...',
+    'activity': '📉 Графики активности...',
+    'timeline': '💰 Графики стоимости и запросов...',
+    'heatmaps': '🔥 Хитмапы...',
+    'sessions': '⏱ Графики сессий...',
+}
+
+
+class ChartRenderer:
+    """
+    Выполняет задания на рендеринг: список (идентификатор графика, аргументы).
+
+    Экземпляры визуализаторов создаются один раз на директорию и CSV файл,
+    поэтому долгоживущий процесс (render_service, режим --watch)
+    переиспользует их между заданиями. Номера файлов каждого графика
+    запоминаются, чтобы можно было перестроить часть графиков, не сдвигая
+    нумерацию остальных.
+    """
+
+    def __init__(self):
+        """Инициализирует исполнитель."""
+        self._visualizers = {}
+        self.figure_numbers = {}  # chart_id -> (номер перед первой фигурой, количество фигур)
+        self.numbering_changed = False
+
+    def render(self, jobs, output_dir='graphics', csv_file=None, render_profile=None,
+               render_format=None, pdf_path=None, keep_numbers=False):
+        """
+        Строит графики по списку заданий.
+
+        Args:
+            jobs: Список (chart_id, kwargs) в порядке построения
+            output_dir: Директория для сохранения графиков
+            csv_file: Путь к CSV (нужен хитмапам, которые читают файл сами)
+            render_profile: Название профиля сохранения, None - текущий
+            render_format: Формат файлов вместо указанного в профиле
+            pdf_path: Путь к PDF, если все фигуры пишутся в один документ
+            keep_numbers: Нумеровать файлы графиков как при прошлом рендеринге
+                (перестраивается часть графиков); если у графика изменилось
+                количество фигур, выставляется numbering_changed
+
+        Returns:
+            int: Количество сохраненных фигур (страниц)
+        """
+        unknown = [chart_id for chart_id, _ in jobs if chart_id not in CHARTS]
+        if unknown:
+            raise ValueError(f"Неизвестные графики: {', '.join(unknown)}")
+
+        BaseVisualizer.reset_counter()
+        if render_profile is not None:
+            BaseVisualizer.set_render_profile(render_profile, render_format)
+        if pdf_path is not None:
+            BaseVisualizer.open_pdf(pdf_path)
+
+        self.numbering_changed = False
+        figures = 0
+        try:
+            group = None
+            for chart_id, kwargs in jobs:
+                chart_group, visualizer_class, method = CHARTS[chart_id]
+                if chart_group != group:
+                    group = chart_group
+                    print(f"\n{CHART_GROUPS[group]}")
+
+                previous = self.figure_numbers.get(chart_id)
+                if keep_numbers:
+                    if previous is None:
+                        self.numbering_changed = True
+                    else:
+                        BaseVisualizer._figure_counter = previous[0]
+                first = BaseVisualizer._figure_counter
+
+                with profile_stage(f"График: {chart_id}"):
+                    visualizer = self._get_visualizer(visualizer_class, output_dir, csv_file)
+                    getattr(visualizer, method)(**kwargs)
+
+                count = BaseVisualizer._figure_counter - first
+                if keep_numbers and previous is not None and previous[1] != count:
+                    self.numbering_changed = True
+                self.figure_numbers[chart_id] = (first, count)
+                figures += count
+        finally:
+            if pdf_path is not None:
+                BaseVisualizer.close_pdf()
+
+        return figures
+
+    def _get_visualizer(self, visualizer_class, output_dir, csv_file):
+        """Возвращает (создает при первом обращении) экземпляр визуализатора."""
+        if visualizer_class is HeatmapChartsVisualizer:
+            key = (visualizer_class, output_dir, csv_file)
+            args = (csv_file, output_dir)
+        else:
+            key = (visualizer_class, output_dir)
+            args = (output_dir,)
+
+        if key not in self._visualizers:
+            self._visualizers[key] = visualizer_class(*args)
+        return self._visualizers[key]
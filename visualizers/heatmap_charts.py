@@ -4,7 +4,6 @@ import csv
 import numpy as np
 import seaborn as sns
 import matplotlib.pyplot as plt
-from collections import defaultdict
 from datetime import datetime, timedelta
 from tqdm import tqdm
 from .base_visualizer import BaseVisualizer
@@ -18,11 +17,12 @@ class HeatmapChartsVisualizer(BaseVisualizer):
         Инициализирует визуализатор хитмапов.
         
         Args:
-            csv_file: Путь к CSV файлу для чтения данных
+            csv_file: Путь к CSV файлу (если хитмапам не переданы готовые матрицы)
             output_dir: Директория для сохранения графиков
         """
         super().__init__(output_dir)
         self.csv_file = csv_file
+        self._weekday_hour = None
     
     @staticmethod
     def _format_value(value, decimals=1):
@@ -31,11 +31,28 @@ class HeatmapChartsVisualizer(BaseVisualizer):
             return "0"
         return f"{value:.{decimals}f}"
     
-    def create_combined_requests_heatmap(self):
-        """Создает объединенный хитмап: матрица в центре, суммы по краям."""
-        weekday_hourly = defaultdict(lambda: defaultdict(int))
+    @staticmethod
+    def _title(title, weekday_hour):
+        """Заголовок хитмапа; у оценок по выборке (--sample) - с подписью о точности."""
+        caption = weekday_hour.get('caption')
+        return f"{title}\n{caption}" if caption else title
+    
+    def _read_weekday_hour(self):
+        """
+        Читает CSV в матрицы день недели × час (Included и On-Demand).
+        
+        Файл читается один раз на визуализатор, результат общий для всех хитмапов.
+        
+        Returns:
+            dict: 'requests', 'cost', 'paid_requests' - массивы 7 × 24
+        """
+        if self._weekday_hour is not None:
+            return self._weekday_hour
+        
+        requests = np.zeros((7, 24), dtype=int)
+        cost = np.zeros((7, 24))
+        paid_requests = np.zeros((7, 24), dtype=int)
         
-        print("  └─ Объединенный хитмап активности...")
         with open(self.csv_file, 'r', encoding='utf-8') as f:
             lines = sum(1 for _ in f) - 1
         
@@ -48,16 +65,31 @@ class HeatmapChartsVisualizer(BaseVisualizer):
                         date_utc7 = date_obj + timedelta(hours=7)
                         weekday = date_utc7.weekday()
                         hour = date_utc7.hour
-                        weekday_hourly[weekday][hour] += 1
-                    except:
-                        pass
+                        cost_str = row['Cost']
+                        row_cost = float(cost_str) if (cost_str and cost_str != 'NaN') else 0.0
+                    except (KeyError, ValueError):
+                        continue
+                    requests[weekday, hour] += 1
+                    cost[weekday, hour] += row_cost
+                    if row_cost > 0:
+                        paid_requests[weekday, hour] += 1
+        
+        self._weekday_hour = {'requests': requests, 'cost': cost, 'paid_requests': paid_requests}
+        return self._weekday_hour
+    
+    def create_combined_requests_heatmap(self, weekday_hour=None):
+        """
+        Создает объединенный хитмап: матрица в центре, суммы по краям.
         
-        weekday_names = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-        heatmap_data = []
+        Args:
+            weekday_hour: Матрицы день недели × час (EventColumns.weekday_hour),
+                          None - прочитать CSV
+        """
+        print("  └─ Объединенный хитмап активности...")
+        weekday_hour = weekday_hour or self._read_weekday_hour()
         
-        for weekday in range(7):
-            row = [weekday_hourly[weekday].get(hour, 0) for hour in range(24)]
-            heatmap_data.append(row)
+        weekday_names = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+        heatmap_data = weekday_hour['requests']
         
         heatmap_array = np.array(heatmap_data)
         hourly_totals = heatmap_array.sum(axis=0)
@@ -74,7 +106,7 @@ class HeatmapChartsVisualizer(BaseVisualizer):
         hourly_matrix = hourly_totals.reshape(1, -1)
         sns.heatmap(hourly_matrix, annot=True, fmt='.0f', cmap='YlOrRd',
                     xticklabels=[], yticklabels=[], ax=ax_top, cbar=False)
-        ax_top.set_title('Activity by Hour and Day', 
+        ax_top.set_title(self._title('Activity by Hour and Day', weekday_hour),
                         fontsize=16, fontweight='bold', pad=20)
         
         weekday_matrix = weekday_totals.reshape(-1, 1)
@@ -86,38 +118,22 @@ class HeatmapChartsVisualizer(BaseVisualizer):
                     ax=ax_main, cbar=False)
         ax_main.set_xlabel('Hour of Day', fontsize=12)
         
-        plt.subplots_adjust(left=0.08, right=0.98, top=0.95, bottom=0.05)
+        plt.subplots_adjust(left=0.08, right=0.98, top=0.91 if weekday_hour.get('caption') else 0.95, bottom=0.05)
         self.save_figure('requests_heatmap.png', use_tight_layout=False)
     
-    def create_combined_cost_heatmap(self):
-        """Создает объединенный хитмап стоимости: матрица в центре, суммы по краям."""
-        weekday_hourly_cost = defaultdict(lambda: defaultdict(float))
+    def create_combined_cost_heatmap(self, weekday_hour=None):
+        """
+        Создает объединенный хитмап стоимости: матрица в центре, суммы по краям.
         
+        Args:
+            weekday_hour: Матрицы день недели × час (EventColumns.weekday_hour),
+                          None - прочитать CSV
+        """
         print("  └─ Объединенный хитмап стоимости...")
-        with open(self.csv_file, 'r', encoding='utf-8') as f:
-            lines = sum(1 for _ in f) - 1
-        
-        with open(self.csv_file, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in tqdm(reader, total=lines, desc="     Обработка", unit="строк", leave=False):
-                if row['Kind'] in ['Included', 'On-Demand']:
-                    try:
-                        date_obj = datetime.fromisoformat(row['Date'].replace('Z', '+00:00'))
-                        date_utc7 = date_obj + timedelta(hours=7)
-                        weekday = date_utc7.weekday()
-                        hour = date_utc7.hour
-                        cost_str = row['Cost']
-                        cost = float(cost_str) if (cost_str and cost_str != 'NaN') else 0.0
-                        weekday_hourly_cost[weekday][hour] += cost
-                    except:
-                        pass
+        weekday_hour = weekday_hour or self._read_weekday_hour()
         
         weekday_names = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-        heatmap_data = []
-        
-        for weekday in range(7):
-            row = [weekday_hourly_cost[weekday].get(hour, 0.0) for hour in range(24)]
-            heatmap_data.append(row)
+        heatmap_data = weekday_hour['cost']
         
         heatmap_array = np.array(heatmap_data, dtype=float)
         hourly_totals = heatmap_array.sum(axis=0)
@@ -135,7 +151,7 @@ class HeatmapChartsVisualizer(BaseVisualizer):
         hourly_labels = np.array([[self._format_value(c) for c in hourly_totals]])
         sns.heatmap(hourly_matrix, annot=hourly_labels, fmt='', cmap='YlOrRd',
                     xticklabels=[], yticklabels=[], ax=ax_top, cbar=False)
-        ax_top.set_title('Cost by Hour and Day', 
+        ax_top.set_title(self._title('Cost by Hour and Day', weekday_hour),
                         fontsize=16, fontweight='bold', pad=20)
         
         weekday_matrix = weekday_totals.reshape(-1, 1)
@@ -149,62 +165,30 @@ class HeatmapChartsVisualizer(BaseVisualizer):
                     ax=ax_main, cbar=False)
         ax_main.set_xlabel('Hour of Day', fontsize=12)
         
-        plt.subplots_adjust(left=0.08, right=0.98, top=0.95, bottom=0.05)
+        plt.subplots_adjust(left=0.08, right=0.98, top=0.91 if weekday_hour.get('caption') else 0.95, bottom=0.05)
         self.save_figure('cost_heatmap.png', use_tight_layout=False)
     
-    def create_cost_per_request_heatmap(self):
-        """Создает хитмап средней стоимости на запрос: стоимость / количество платных запросов."""
-        weekday_hourly_cost = defaultdict(lambda: defaultdict(float))
-        weekday_hourly_count = defaultdict(lambda: defaultdict(int))
+    def create_cost_per_request_heatmap(self, weekday_hour=None):
+        """
+        Создает хитмап средней стоимости на запрос: стоимость / количество платных запросов.
         
+        Args:
+            weekday_hour: Матрицы день недели × час (EventColumns.weekday_hour),
+                          None - прочитать CSV
+        """
         print("  └─ Хитмап средней стоимости запроса...")
-        with open(self.csv_file, 'r', encoding='utf-8') as f:
-            lines = sum(1 for _ in f) - 1
+        weekday_hour = weekday_hour or self._read_weekday_hour()
+        cost = np.array(weekday_hour['cost'], dtype=float)
+        count = np.array(weekday_hour['paid_requests'], dtype=float)
         
-        with open(self.csv_file, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in tqdm(reader, total=lines, desc="     Обработка", unit="строк", leave=False):
-                if row['Kind'] in ['Included', 'On-Demand']:
-                    try:
-                        cost_str = row['Cost']
-                        cost = float(cost_str) if (cost_str and cost_str != 'NaN') else 0.0
-                        
-                        if cost > 0:
-                            date_obj = datetime.fromisoformat(row['Date'].replace('Z', '+00:00'))
-                            date_utc7 = date_obj + timedelta(hours=7)
-                            weekday = date_utc7.weekday()
-                            hour = date_utc7.hour
-                            
-                            weekday_hourly_cost[weekday][hour] += cost
-                            weekday_hourly_count[weekday][hour] += 1
-                    except:
-                        pass
+        def average(total_cost, total_count):
+            return np.divide(total_cost, total_count, out=np.zeros_like(total_cost), where=total_count > 0)
         
         weekday_names = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-        heatmap_data = []
-        
-        for weekday in range(7):
-            row = []
-            for hour in range(24):
-                total_cost = weekday_hourly_cost[weekday].get(hour, 0.0)
-                total_count = weekday_hourly_count[weekday].get(hour, 0)
-                avg_cost = (total_cost / total_count) if total_count > 0 else 0.0
-                row.append(avg_cost)
-            heatmap_data.append(row)
-        
-        heatmap_array = np.array(heatmap_data, dtype=float)
-        
-        hourly_avg = []
-        for hour in range(24):
-            hour_cost = sum(weekday_hourly_cost[wd].get(hour, 0.0) for wd in range(7))
-            hour_count = sum(weekday_hourly_count[wd].get(hour, 0) for wd in range(7))
-            hourly_avg.append((hour_cost / hour_count) if hour_count > 0 else 0.0)
-        
-        weekday_avg = []
-        for weekday in range(7):
-            day_cost = sum(weekday_hourly_cost[weekday].get(h, 0.0) for h in range(24))
-            day_count = sum(weekday_hourly_count[weekday].get(h, 0) for h in range(24))
-            weekday_avg.append((day_cost / day_count) if day_count > 0 else 0.0)
+        heatmap_array = average(cost, count)
+        heatmap_data = heatmap_array.tolist()
+        hourly_avg = average(cost.sum(axis=0), count.sum(axis=0)).tolist()
+        weekday_avg = average(cost.sum(axis=1), count.sum(axis=1)).tolist()
         
         fig = plt.figure(figsize=(16, 10))
         gs = fig.add_gridspec(2, 2, height_ratios=[1, 4], width_ratios=[1, 8], 
@@ -218,7 +202,7 @@ class HeatmapChartsVisualizer(BaseVisualizer):
         hourly_labels = np.array([[f'{v:.3f}' if v > 0 else '0' for v in hourly_avg]])
         sns.heatmap(hourly_matrix, annot=hourly_labels, fmt='', cmap='YlOrRd',
                     xticklabels=[], yticklabels=[], ax=ax_top, cbar=False)
-        ax_top.set_title('Average Cost Per Request ($) by Hour and Day', 
+        ax_top.set_title(self._title('Average Cost Per Request ($) by Hour and Day', weekday_hour),
                         fontsize=16, fontweight='bold', pad=20)
         
         weekday_matrix = np.array(weekday_avg).reshape(-1, 1)
@@ -232,5 +216,94 @@ class HeatmapChartsVisualizer(BaseVisualizer):
                     ax=ax_main, cbar=False)
         ax_main.set_xlabel('Hour of Day', fontsize=12)
         
-        plt.subplots_adjust(left=0.08, right=0.98, top=0.95, bottom=0.05)
+        plt.subplots_adjust(left=0.08, right=0.98, top=0.91 if weekday_hour.get('caption') else 0.95, bottom=0.05)
         self.save_figure('cost_per_request_heatmap.png', use_tight_layout=False)
+    
+    def create_calendar_heatmap(self, day_hour_grid):
+        """
+        Создает календарный хитмап день × час за весь период (стоимость и запросы).
+        
+        Рисуется через imshow без подписей в ячейках, поэтому год данных
+        (~8 760 ячеек) строится так же быстро, как неделя.
+        
+        Args:
+            day_hour_grid: DayHourGrid, заполненная при анализе CSV
+        """
+        print("  └─ Календарный хитмап (день × час)...")
+        if day_hour_grid.n_days == 0:
+            print("     [!] Нет данных для календарного хитмапа")
+            return
+        
+        dates = day_hour_grid.dates()
+        n_days = len(dates)
+        extent = (-0.5, n_days - 0.5, -0.5, 23.5)
+        
+        fig, (ax_cost, ax_requests) = plt.subplots(2, 1, figsize=(18, 10), sharex=True)
+        
+        panels = [
+            (ax_cost, day_hour_grid.cost, 'Cost by Day and Hour', 'Cost ($)'),
+            (ax_requests, day_hour_grid.requests, 'Requests by Day and Hour', 'Requests'),
+        ]
+        for ax, data, title, label in panels:
+            image = ax.imshow(data.T, aspect='auto', origin='lower', cmap='YlOrRd',
+                              interpolation='nearest', extent=extent)
+            fig.colorbar(image, ax=ax, label=label, pad=0.01)
+            ax.set_title(title, fontsize=16, fontweight='bold')
+            ax.set_ylabel('Hour of Day', fontsize=12)
+            ax.set_yticks([0, 6, 12, 18, 23])
+        
+        step = max(1, n_days // 12)
+        ticks = np.arange(0, n_days, step)
+        ax_requests.set_xticks(ticks)
+        ax_requests.set_xticklabels([str(dates[i]) for i in ticks], rotation=45, ha='right', fontsize=9)
+        ax_requests.set_xlabel('Date (UTC+7)', fontsize=12)
+        
+        plt.tight_layout()
+        self.save_figure('calendar_heatmap.png', use_tight_layout=False)
+    
+    def create_calendar_day_grid(self, day_hour_grid):
+        """
+        Создает календарь в стиле GitHub: недели по горизонтали, дни недели по вертикали.
+        
+        Args:
+            day_hour_grid: DayHourGrid, заполненная при анализе CSV
+        """
+        print("  └─ Календарь дневной стоимости...")
+        if day_hour_grid.n_days == 0:
+            print("     [!] Нет данных для календаря")
+            return
+        
+        dates = day_hour_grid.dates()
+        daily_cost = day_hour_grid.cost.sum(axis=1)
+        
+        # Смещение первого дня до понедельника (1970-01-01 - четверг)
+        days = dates.astype(np.int64)
+        first_weekday = int((days[0] + 3) % 7)
+        cells = first_weekday + len(days)
+        n_weeks = -(-cells // 7)
+        
+        grid = np.full(n_weeks * 7, np.nan)
+        grid[first_weekday:cells] = daily_cost
+        grid = np.ma.masked_invalid(grid.reshape(n_weeks, 7).T)
+        
+        cmap = plt.get_cmap('YlOrRd').copy()
+        cmap.set_bad('#1a1a1a')
+        
+        fig, ax = plt.subplots(figsize=(max(8, n_weeks * 0.35 + 3), 4))
+        image = ax.imshow(grid, aspect='equal', cmap=cmap, interpolation='nearest')
+        fig.colorbar(image, ax=ax, label='Cost ($)', pad=0.01, shrink=0.8)
+        
+        weekday_names = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+        ax.set_yticks(range(7))
+        ax.set_yticklabels(weekday_names, fontsize=9)
+        
+        # Подписи месяцев над первой неделей месяца
+        week_starts = dates[::7] if first_weekday == 0 else np.concatenate(
+            [dates[:1], dates[7 - first_weekday::7]])
+        months = week_starts.astype('datetime64[M]')
+        month_ticks = np.flatnonzero(np.r_[True, months[1:] != months[:-1]])
+        ax.set_xticks(month_ticks)
+        ax.set_xticklabels([str(months[i]) for i in month_ticks], fontsize=9)
+        ax.set_title('Daily Cost Calendar', fontsize=16, fontweight='bold')
+        
+        self.save_figure('calendar_day_grid.png')
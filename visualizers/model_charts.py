@@ -283,40 +283,38 @@ class ModelChartsVisualizer(BaseVisualizer):
         
         self.save_figure('cost_per_request.png')
     
-    def create_cost_distribution_boxplot(self, request_costs_by_model):
-        """Создает box plot распределения стоимости запросов по моделям."""
-        print("  └─ Box plot распределения стоимости...")
+    def create_cost_distribution_boxplot(self, cost_box_stats):
+        """
+        Создает box plot распределения стоимости запросов по моделям.
         
-        # Фильтруем только модели с платными запросами
-        filtered_data = {model: costs for model, costs in request_costs_by_model.items() 
-                        if costs and any(c > 0 for c in costs)}
+        Args:
+            cost_box_stats: Предрассчитанные статистики {модель: stats} (см. compute_box_stats)
+        """
+        print("  └─ Box plot распределения стоимости...")
         
-        if not filtered_data:
+        if not cost_box_stats:
             print("     [!] Нет данных для box plot")
             return
         
         # Сортируем модели по медианной стоимости
-        median_costs = {model: np.median(costs) for model, costs in filtered_data.items()}
-        sorted_models = sorted(median_costs.keys(), key=lambda x: median_costs[x], reverse=True)
-        
-        # Подготавливаем данные для box plot
-        data_to_plot = [filtered_data[model] for model in sorted_models]
+        sorted_models = sorted(cost_box_stats.keys(), key=lambda x: cost_box_stats[x]['med'], reverse=True)
+        stats_to_plot = [cost_box_stats[model] for model in sorted_models]
         
         # Создаем график
         fig, ax = plt.subplots(figsize=(16, 10))
         
         # Создаем box plot с настройками
-        bp = ax.boxplot(data_to_plot, labels=sorted_models, patch_artist=True,
-                       notch=True,  # Вырезы показывают доверительный интервал медианы
-                       showmeans=True,  # Показываем среднее значение
-                       meanprops=dict(marker='D', markerfacecolor='red', markersize=8, 
-                                     markeredgecolor='darkred', linewidth=1.5),
-                       medianprops=dict(color='darkblue', linewidth=2),
-                       boxprops=dict(facecolor='lightblue', edgecolor='darkblue', linewidth=1.5),
-                       whiskerprops=dict(color='darkblue', linewidth=1.5),
-                       capprops=dict(color='darkblue', linewidth=1.5),
-                       flierprops=dict(marker='o', markerfacecolor='orange', markersize=6,
-                                      markeredgecolor='darkorange', alpha=0.6))
+        bp = ax.bxp(stats_to_plot, patch_artist=True,
+                   shownotches=True,  # Вырезы показывают доверительный интервал медианы
+                   showmeans=True,  # Показываем среднее значение
+                   meanprops=dict(marker='D', markerfacecolor='red', markersize=8, 
+                                 markeredgecolor='darkred', linewidth=1.5),
+                   medianprops=dict(color='darkblue', linewidth=2),
+                   boxprops=dict(facecolor='lightblue', edgecolor='darkblue', linewidth=1.5),
+                   whiskerprops=dict(color='darkblue', linewidth=1.5),
+                   capprops=dict(color='darkblue', linewidth=1.5),
+                   flierprops=dict(marker='o', markerfacecolor='orange', markersize=6,
+                                  markeredgecolor='darkorange', alpha=0.6))
         
         ax.set_title('Cost Distribution Per Request by Model\n(Box Plot with Median, Quartiles & Outliers)', 
                     fontsize=16, fontweight='bold', pad=20)
@@ -341,11 +339,7 @@ class ModelChartsVisualizer(BaseVisualizer):
         
         # Добавляем статистику для каждой модели
         for i, model in enumerate(sorted_models, 1):
-            costs = filtered_data[model]
-            median = np.median(costs)
-            mean = np.mean(costs)
-            q1 = np.percentile(costs, 25)
-            q3 = np.percentile(costs, 75)
+            median = cost_box_stats[model]['med']
             
             # Выводим медиану над боксом
             ax.text(i, median, f'${median:.3f}', 
@@ -462,3 +456,92 @@ class ModelChartsVisualizer(BaseVisualizer):
         plt.tight_layout()
         self.save_figure('token_composition.png')
 
+    
+    def create_cache_efficiency(self, cache_efficiency):
+        """
+        Создает графики эффективности кэша промптов по моделям и дням.
+        
+        Args:
+            cache_efficiency: Показатели кэша (results['cache_efficiency'])
+        """
+        print("  └─ Эффективность кэша...")
+        
+        models = cache_efficiency['models'] if cache_efficiency else {}
+        if not models:
+            print("     [!] Нет данных для графика")
+            return
+        
+        thresholds = cache_efficiency['thresholds']
+        poor_models = cache_efficiency['poor_models']
+        model_names = sorted(models, key=lambda name: models[name]['uncached_cost'], reverse=True)
+        x = np.arange(len(model_names))
+        bar_colors = ['#e74c3c' if name in poor_models else '#2ecc71' for name in model_names]
+        
+        fig, ((ax1, ax2), (ax3, ax4)) = self.create_subplot_grid(2, 2, figsize=(18, 12))
+        fig.suptitle('Prompt Cache Efficiency (Red = Poor Reuse)', fontsize=18, fontweight='bold')
+        
+        # Hit ratio
+        hit_ratio = [models[name]['hit_ratio'] * 100 for name in model_names]
+        ax1.bar(x, hit_ratio, color=bar_colors, alpha=0.85, edgecolor='white', linewidth=0.5)
+        ax1.axhline(thresholds['min_hit_ratio'] * 100, color='yellow', linestyle='--', linewidth=2,
+                    label=f"Min: {thresholds['min_hit_ratio'] * 100:.0f}%")
+        for i, value in enumerate(hit_ratio):
+            ax1.text(i, value, f'{value:.1f}%', ha='center', va='bottom', fontsize=9, fontweight='bold')
+        ax1.set_title('Cache Hit Ratio (cache read / prompt tokens)', fontsize=14, fontweight='bold')
+        ax1.set_ylabel('Hit Ratio (%)', fontsize=12)
+        ax1.set_ylim(0, 105)
+        ax1.legend(fontsize=10)
+        
+        # Write amplification (без чтений - столбец на уровне порога с пометкой)
+        limit = thresholds['max_write_amplification']
+        amplification = [models[name]['write_amplification'] for name in model_names]
+        heights = [value if value is not None else limit * 2 for value in amplification]
+        ax2.bar(x, heights, color=bar_colors, alpha=0.85, edgecolor='white', linewidth=0.5)
+        ax2.axhline(limit, color='yellow', linestyle='--', linewidth=2, label=f"Max: {limit:.2f}")
+        for i, value in enumerate(amplification):
+            ax2.text(i, heights[i], f'{value:.2f}' if value is not None else 'no reads',
+                     ha='center', va='bottom', fontsize=9, fontweight='bold')
+        ax2.set_title('Write Amplification (cache write / cache read)', fontsize=14, fontweight='bold')
+        ax2.set_ylabel('Tokens Written per Token Read', fontsize=12)
+        ax2.legend(fontsize=10)
+        
+        # Стоимость с кэшем и без
+        width = 0.38
+        uncached = [models[name]['uncached_cost'] for name in model_names]
+        cached = [models[name]['cached_cost'] for name in model_names]
+        ax3.bar(x - width / 2, uncached, width, color='#95a5a6', label='Without Cache')
+        ax3.bar(x + width / 2, cached, width, color='#3498db', label='With Cache')
+        for i, name in enumerate(model_names):
+            ax3.text(i, max(uncached[i], cached[i]), f"-${models[name]['cost_avoided']:,.0f}\n"
+                     f"({models[name]['savings_ratio'] * 100:.0f}%)",
+                     ha='center', va='bottom', fontsize=8, fontweight='bold', color='#2ecc71')
+        ax3.set_ylim(0, max(uncached + cached) * 1.15 or 1)
+        ax3.set_title('Token Cost With vs Without Cache (MODEL_PRICING)', fontsize=14, fontweight='bold')
+        ax3.set_ylabel('Cost ($)', fontsize=12)
+        ax3.legend(fontsize=10)
+        
+        for ax in (ax1, ax2, ax3):
+            ax.set_xticks(x)
+            ax.set_xticklabels(model_names, rotation=30, ha='right', fontsize=9)
+            ax.grid(axis='y', alpha=0.3, linestyle='--')
+        
+        # По дням: сэкономленная стоимость и hit ratio
+        daily = cache_efficiency['daily']
+        days = np.arange(len(daily['days']))
+        ax4.bar(days, daily['cost_avoided'], color='#2ecc71', alpha=0.6, label='Cost Avoided ($)')
+        ax4.set_ylabel('Cost Avoided ($)', fontsize=12)
+        ax4_ratio = ax4.twinx()
+        ax4_ratio.plot(days, [value * 100 for value in daily['hit_ratio']], color='#F1C40F',
+                       linewidth=2, marker='o', markersize=3, label='Hit Ratio (%)')
+        ax4_ratio.set_ylabel('Hit Ratio (%)', fontsize=12)
+        ax4_ratio.set_ylim(0, 105)
+        ax4.set_title('Daily Cache Savings and Hit Ratio', fontsize=14, fontweight='bold')
+        tick_step = max(1, len(days) // 10)
+        ax4.set_xticks(days[::tick_step])
+        ax4.set_xticklabels(daily['days'][::tick_step], rotation=30, ha='right', fontsize=9)
+        ax4.grid(axis='y', alpha=0.3, linestyle='--')
+        handles, labels = ax4.get_legend_handles_labels()
+        ratio_handles, ratio_labels = ax4_ratio.get_legend_handles_labels()
+        ax4.legend(handles + ratio_handles, labels + ratio_labels, fontsize=10, loc='lower left')
+        
+        self.save_figure('cache_efficiency.png')
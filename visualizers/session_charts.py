@@ -0,0 +1,82 @@
+"""Визуализатор графиков сессий работы."""
+
+import numpy as np
+from .base_visualizer import BaseVisualizer
+
+
+class SessionChartsVisualizer(BaseVisualizer):
+    """Класс для создания графиков распределения сессий."""
+
+    MODEL_COLORS = [
+        '#FF6B6B', '#4ECDC4', '#45B7D1', '#FFA07A', '#98D8C8',
+        '#F1C40F', '#9B59B6', '#E67E22', '#3498DB', '#2ECC71'
+    ]
+
+    def create_session_distributions(self, sessions):
+        """
+        Создает распределения длительности, запросов и стоимости сессий.
+
+        Args:
+            sessions: Колонки сессий (SessionTable.chart_data)
+        """
+        print("  └─ Распределения сессий...")
+
+        if not sessions or not sessions['cost']:
+            print("     [!] Нет данных о сессиях")
+            return
+
+        duration = np.asarray(sessions['duration_minutes'])
+        requests = np.asarray(sessions['requests'])
+        cost = np.asarray(sessions['cost'])
+        model_codes = np.asarray(sessions['model_codes'])
+        models = sessions['models']
+
+        fig, ((ax1, ax2), (ax3, ax4)) = self.create_subplot_grid(2, 2, figsize=(18, 12))
+        fig.suptitle(f"Coding Sessions ({len(cost):,} sessions, gap > {sessions['gap_minutes']} min)",
+                     fontsize=18, fontweight='bold')
+
+        # Длительность: сессия из одного запроса длится 0 минут, на лог-шкале - как 1 минута
+        self._draw_histogram(ax1, np.maximum(duration, 1), '#45B7D1', 'Session Duration',
+                             'Duration (minutes, log scale)', '{:.0f} min')
+        self._draw_histogram(ax2, requests, '#4ECDC4', 'Requests per Session',
+                             'Requests (log scale)', '{:.0f}')
+        self._draw_histogram(ax3, np.maximum(cost, 0.01), '#FFA07A', 'Cost per Session',
+                             'Cost ($, log scale)', '${:.2f}')
+
+        # Стоимость от длительности, цвет - основная модель сессии
+        totals = np.bincount(model_codes, weights=cost, minlength=len(models))
+        top_codes = [code for code in np.argsort(-totals, kind='stable')[:len(self.MODEL_COLORS)] if totals[code] > 0]
+        for color, code in zip(self.MODEL_COLORS, top_codes):
+            mask = model_codes == code
+            ax4.scatter(np.maximum(duration[mask], 1), np.maximum(cost[mask], 0.01),
+                        s=np.clip(requests[mask], 10, 300), color=color, alpha=0.6,
+                        edgecolors='white', linewidths=0.3, label=models[code])
+        ax4.set_xscale('log')
+        ax4.set_yscale('log')
+        ax4.set_title('Cost vs Duration (size = requests, color = dominant model)', fontsize=14, fontweight='bold')
+        ax4.set_xlabel('Duration (minutes, log scale)', fontsize=12)
+        ax4.set_ylabel('Cost ($, log scale)', fontsize=12)
+        ax4.grid(True, alpha=0.3, linestyle='--', which='both')
+        if top_codes:
+            ax4.legend(fontsize=9, loc='upper left', markerscale=0.6)
+
+        self.save_figure('session_distributions.png')
+
+    @staticmethod
+    def _draw_histogram(ax, values, color, title, xlabel, value_format):
+        """Гистограмма с логарифмическими корзинами и линиями медианы и p90."""
+        low, high = values.min(), values.max()
+        bins = np.geomspace(low, high, 40) if high > low else 10
+        ax.hist(values, bins=bins, color=color, alpha=0.8, edgecolor='white', linewidth=0.3)
+        if high > low:
+            ax.set_xscale('log')
+
+        median, p90 = np.percentile(values, [50, 90])
+        ax.axvline(median, color='yellow', linestyle='--', linewidth=2,
+                   label=f"Median: {value_format.format(median)}")
+        ax.axvline(p90, color='red', linestyle=':', linewidth=2, label=f"P90: {value_format.format(p90)}")
+        ax.set_title(title, fontsize=14, fontweight='bold')
+        ax.set_xlabel(xlabel, fontsize=12)
+        ax.set_ylabel('Sessions', fontsize=12)
+        ax.grid(axis='y', alpha=0.3, linestyle='--')
+        ax.legend(fontsize=10)
@@ -0,0 +1,33 @@
+"""Визуализатор текстовой страницы со статистикой."""
+
+import matplotlib.pyplot as plt
+from .base_visualizer import BaseVisualizer
+
+
+class SummaryPageVisualizer(BaseVisualizer):
+    """Класс для вывода текстовой статистики страницами (обложка PDF отчета)."""
+
+    LINES_PER_PAGE = 60
+
+    def create_summary_pages(self, lines, title='Cursor Usage Summary'):
+        """
+        Создает страницы A4 с текстом статистики моноширинным шрифтом.
+
+        Args:
+            lines: Строки статистики (могут содержать переводы строк)
+            title: Заголовок первой страницы
+        """
+        print("  └─ Страница статистики...")
+        text_lines = "\n".join(lines).strip("\n").split("\n")
+        pages = [text_lines[i:i + self.LINES_PER_PAGE]
+                 for i in range(0, len(text_lines), self.LINES_PER_PAGE)] or [[]]
+
+        for page_number, page_lines in enumerate(pages, 1):
+            fig = plt.figure(figsize=(8.27, 11.69))
+            if page_number == 1:
+                fig.text(0.06, 0.96, title, fontsize=16, fontweight='bold', va='top')
+            fig.text(0.06, 0.92, "\n".join(page_lines), fontsize=8, family='monospace',
+                     va='top', linespacing=1.4)
+            if len(pages) > 1:
+                fig.text(0.94, 0.03, f"{page_number}/{len(pages)}", fontsize=8, ha='right')
+            self.save_figure(f'summary_{page_number}.png', use_tight_layout=False)